@@ -14,6 +14,7 @@
 - UnifiedStrategyEngine: 统一策略引擎
 - StrategyAdapter: 策略适配器（向后兼容）
 - BacktestAPIHandler: 回测API处理器
+- NavStore: 本地列式净值存储
 """
 
 # Core components
@@ -28,6 +29,7 @@ from .core.backtest_api import (
 )
 from .core.backtest_engine import FundBacktest
 from .core.akshare_data_fetcher import fetch_fund_history_from_akshare
+from .core.nav_store import NavStore, get_nav_store
 
 # Strategies
 from .strategies.trend_analyzer import TrendAnalyzer, TrendType, TrendResult
@@ -64,6 +66,7 @@ __all__ = [
     'UnifiedStrategyEngine', 'UnifiedStrategyResult',
     'BacktestAPIHandler', 'BacktestTaskManager', 'BacktestTask', 'BacktestStatus',
     'FundBacktest', 'fetch_fund_history_from_akshare',
+    'NavStore', 'get_nav_store',
     
     # Strategies
     'TrendAnalyzer', 'TrendType', 'TrendResult',
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+批量相关性计算
+Batch Correlation Kernels
+
+在对齐后的（日期 × 基金）收益率矩阵上一次性计算所有基金对的相关性，
+替代逐对调用 Series.corr / stats.pearsonr：
+- correlation_matrix: N×N 皮尔逊相关矩阵（一次矩阵乘法）
+- rolling_correlation: 滚动窗口相关系数，窗口和用累计和相减得到，耗时与窗口长度无关
+- period_correlation_matrix: 多日（周、月等）收益率的相关矩阵
+- spearman_matrix / correlation_p_values: 秩相关矩阵与相关系数显著性
+- top_correlated_pairs: 按相关系数绝对值选出前k个基金对
+
+输入收益率矩阵不应包含NaN（_align_fund_data已清理）。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import stats
+
+# 方差低于该相对阈值视为常数序列，相关系数为NaN
+_VARIANCE_RTOL = 1e-12
+
+
+def correlation_matrix(returns: np.ndarray) -> np.ndarray:
+    """
+    皮尔逊相关矩阵
+
+    参数:
+    returns: （日期 × 基金）收益率矩阵
+
+    返回:
+    np.ndarray: N×N 相关矩阵，常数序列所在的行列为NaN
+    """
+    returns = np.asarray(returns, dtype=float)
+    n_funds = returns.shape[1]
+    if returns.shape[0] < 2:
+        return np.full((n_funds, n_funds), np.nan)
+    centered = returns - returns.mean(axis=0)
+    cov = centered.T @ centered
+    variance = np.diag(cov).copy()
+    scale = np.maximum((centered ** 2).max(axis=0) * returns.shape[0], np.finfo(float).tiny)
+    valid = variance > _VARIANCE_RTOL * scale
+    std = np.sqrt(np.where(valid, variance, np.nan))
+    corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+    np.fill_diagonal(corr, np.where(valid, 1.0, np.nan))
+    return corr
+
+
+def rolling_correlation(returns: np.ndarray, window: int,
+                        pairs: Optional[Sequence[Tuple[int, int]]] = None) -> np.ndarray:
+    """
+    滚动窗口相关系数（与 Series.rolling(window).corr 一致，前 window-1 行为NaN）
+
+    各窗口的 Σx、Σx²、Σxy 由累计和相减得到，整个时间序列只遍历一次。
+    计算前先对每列去均值，减小累计和相减时的精度损失。
+
+    参数:
+    returns: （日期 × 基金）收益率矩阵
+    window: 窗口天数
+    pairs: 基金列下标对列表，None表示计算所有基金对
+
+    返回:
+    np.ndarray: pairs为None时为（日期 × N × N）张量，否则为（日期 × 基金对数）矩阵
+    """
+    returns = np.asarray(returns, dtype=float)
+    n_dates, n_funds = returns.shape
+    if pairs is None:
+        left, right = np.divmod(np.arange(n_funds * n_funds), n_funds)
+    else:
+        left = np.array([p[0] for p in pairs], dtype=int)
+        right = np.array([p[1] for p in pairs], dtype=int)
+
+    out = np.full((n_dates, len(left)), np.nan)
+    if n_dates >= window and len(left):
+        centered = returns - returns.mean(axis=0)
+
+        def window_sums(values):
+            cumulative = np.cumsum(np.concatenate([np.zeros((1, values.shape[1])), values]), axis=0)
+            return cumulative[window:] - cumulative[:-window]
+
+        sum_x = window_sums(centered)
+        sum_xx = window_sums(centered ** 2)
+        sum_xy = window_sums(centered[:, left] * centered[:, right])
+
+        variance = sum_xx - sum_x ** 2 / window
+        scale = np.maximum(window_sums(np.abs(centered)) ** 2, np.finfo(float).tiny)
+        variance = np.where(variance > _VARIANCE_RTOL * scale, variance, np.nan)
+        cov = sum_xy - sum_x[:, left] * sum_x[:, right] / window
+        with np.errstate(invalid='ignore'):
+            out[window - 1:] = np.clip(cov / np.sqrt(variance[:, left] * variance[:, right]), -1.0, 1.0)
+
+    if pairs is None:
+        return out.reshape(n_dates, n_funds, n_funds)
+    return out
+
+
+def period_returns(returns: np.ndarray, period: int) -> np.ndarray:
+    """
+    由日收益率（百分比）得到 period 日收益率（百分比）
+
+    与逐日累乘净值（初始100）后 pct_change(period) 的结果一致，只保留有效行。
+    """
+    returns = np.asarray(returns, dtype=float)
+    growth = np.concatenate([np.ones((1, returns.shape[1])), 1 + returns[:-1] / 100], axis=0)
+    nav = 100 * np.cumprod(growth, axis=0)
+    return (nav[period:] / nav[:-period] - 1) * 100
+
+
+def period_correlation_matrix(returns: np.ndarray, period: int) -> np.ndarray:
+    """period 日收益率的 N×N 相关矩阵"""
+    return correlation_matrix(period_returns(returns, period))
+
+
+def spearman_matrix(returns: np.ndarray) -> np.ndarray:
+    """斯皮尔曼秩相关矩阵：按列取秩后计算皮尔逊相关"""
+    return correlation_matrix(stats.rankdata(np.asarray(returns, dtype=float), axis=0))
+
+
+def correlation_p_values(corr: np.ndarray, n_obs: int) -> np.ndarray:
+    """
+    相关系数的双侧p值（t检验，与 stats.pearsonr / stats.spearmanr 一致）
+    """
+    corr = np.asarray(corr, dtype=float)
+    if n_obs <= 2:
+        return np.full(corr.shape, np.nan)
+    dof = n_obs - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_stat = corr * np.sqrt(dof / ((1 - corr) * (1 + corr)))
+    return 2 * stats.t.sf(np.abs(t_stat), dof)
+
+
+def top_correlated_pairs(corr: np.ndarray, k: Optional[int] = None,
+                         threshold: float = 0.0) -> List[Tuple[int, int, float]]:
+    """
+    按相关系数绝对值从高到低选出基金对
+
+    参数:
+    corr: N×N 相关矩阵
+    k: 返回的基金对数量上限，None表示不限
+    threshold: 相关系数绝对值下限
+
+    返回:
+    list: [(行下标, 列下标, 相关系数)]，绝对值相同时保持矩阵上三角的行优先顺序
+    """
+    corr = np.asarray(corr, dtype=float)
+    rows, cols = np.triu_indices(corr.shape[0], k=1)
+    values = corr[rows, cols]
+    keep = np.isfinite(values) & (np.abs(values) >= threshold)
+    rows, cols, values = rows[keep], cols[keep], values[keep]
+    order = np.argsort(-np.abs(values), kind='stable')[:k]
+    return [(int(rows[o]), int(cols[o]), float(values[o])) for o in order]
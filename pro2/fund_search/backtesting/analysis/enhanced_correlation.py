@@ -17,12 +17,8 @@ from datetime import datetime, timedelta
 from scipy import stats
 import matplotlib
 matplotlib.use('Agg')  # 设置matplotlib后端为非GUI模式
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from matplotlib import font_manager
-import base64
-from io import BytesIO
-import platform
+from matplotlib.figure import Figure
 
 # 导入性能监控工具
 from .correlation_performance_monitor import (
@@ -31,72 +27,155 @@ from .correlation_performance_monitor import (
     timed_correlation_analysis
 )
 
+from shared.chart_downsampling import encode_array, select_indices, take
+from shared.chart_fonts import setup_chinese_font
+from .correlation_batch import (
+    correlation_matrix,
+    correlation_p_values,
+    period_correlation_matrix,
+    rolling_correlation,
+    spearman_matrix,
+    top_correlated_pairs
+)
+
 logger = logging.getLogger(__name__)
 
-# 全局配置matplotlib中文字体
-def setup_chinese_font():
-    """配置matplotlib支持中文显示"""
-    system = platform.system()
-    
-    # 尝试查找可用的中文字体
-    chinese_fonts = []
-    if system == 'Windows':
-        chinese_fonts = ['Microsoft YaHei', 'SimHei', 'SimSun', 'NSimSun', 'FangSong', 'KaiTi', '微软雅黑', '黑体', '宋体']
-    elif system == 'Darwin':  # macOS
-        chinese_fonts = ['Arial Unicode MS', 'Heiti TC', 'Heiti SC', 'PingFang SC', 'STHeiti']
-    else:  # Linux
-        chinese_fonts = ['WenQuanYi Micro Hei', 'WenQuanYi Zen Hei', 'Noto Sans CJK SC', 'SimHei']
-    
-    # 获取系统中所有可用字体
-    available_fonts = set([f.name for f in font_manager.fontManager.ttflist])
-    
-    # 找到第一个可用的中文字体
-    selected_font = None
-    for font in chinese_fonts:
-        if font in available_fonts:
-            selected_font = font
-            logger.info(f"选择中文字体: {font}")
-            break
-    
-    # 如果找不到预定义的中文字体，尝试查找包含中文字符的任意字体
-    if not selected_font:
-        for font_prop in font_manager.fontManager.ttflist:
-            # 检查字体名称是否包含中文相关关键词
-            font_name = font_prop.name.lower()
-            if any(keyword in font_name for keyword in ['yahei', 'hei', 'song', 'fang', 'pingfang', 'wenquan', 'noto']):
-                selected_font = font_prop.name
-                logger.info(f"选择备选中文字体: {selected_font}")
-                break
-    
-    if selected_font:
-        # 设置主要中文字体
-        plt.rcParams['font.sans-serif'] = [selected_font, 'DejaVu Sans', 'Bitstream Vera Sans', 'Lucida Grande', 'Verdana', 'Geneva', 'Lucid', 'Arial', 'Helvetica', 'sans-serif']
-        logger.info(f"已设置中文字体: {selected_font}")
-        
-        # 强制设置所有文本元素的字体
-        plt.rcParams['font.family'] = 'sans-serif'
-        
-        # 针对Windows系统额外优化
-        if system == 'Windows':
-            # 确保使用系统默认的高质量中文字体
-            plt.rcParams['font.serif'] = ['Times New Roman', 'SimSun', selected_font]
-            plt.rcParams['font.monospace'] = ['Courier New', 'FangSong', selected_font]
-    else:
-        # 如果没有找到中文字体，使用默认字体并记录警告
-        logger.warning("未找到合适的中文字体，图表中文可能显示为方块")
-        # 设置fallback字体以尽量减少乱码
-        plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Bitstream Vera Sans', 'Lucida Grande', 'Verdana', 'Geneva', 'Lucid', 'Arial', 'Helvetica', 'sans-serif']
-        plt.rcParams['font.family'] = 'sans-serif'
-    
-    plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-    
-    # 抑制字体警告信息
-    import warnings
-    warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
+# 多日收益率相关性的周期（交易日）
+CORRELATION_PERIODS = {
+    'weekly': 5,      # 周收益(5日)
+    'biweekly': 10,   # 双周收益(10日)
+    'monthly': 20,    # 月收益(20日)
+    'quarterly': 60   # 季度收益(60日)
+}
+
+# 高相关性阈值
+HIGH_CORRELATION_THRESHOLD = 0.7
+
+# 四合一相关性图表的输出DPI
+CORRELATION_CHART_DPI = 120
 
 # 初始化字体配置
 setup_chinese_font()
 
+
+def _short_label(name: str, limit: int = 12) -> str:
+    return name[:limit] + '...' if len(name) > limit else name
+
+
+def draw_correlation_chart(payload: Dict) -> Figure:
+    """
+    绘制四合一相关性分析图表（图表渲染服务的渲染函数）
+
+    参数:
+    payload: EnhancedCorrelationAnalyzer._correlation_chart_payload 生成的图表数据
+
+    返回:
+    Figure: 散点图、净值走势、滚动相关性、收益率分布四个子图
+    """
+    fund1_name, fund2_name = payload['fund1_name'], payload['fund2_name']
+    pearson_corr = payload['pearson_corr']
+    window = payload['rolling_window']
+    dates = pd.to_datetime(pd.Series(payload['dates']))
+    returns1 = pd.Series(payload['returns1'], dtype=float)
+    returns2 = pd.Series(payload['returns2'], dtype=float)
+
+    # 定义配色方案
+    color1 = '#3498db'  # 蓝色
+    color2 = '#e74c3c'  # 红色
+    color_rolling = '#9b59b6'  # 紫色
+
+    fig = Figure(figsize=(16, 12))
+    axes = fig.subplots(2, 2)
+    fig.patch.set_facecolor('#fafafa')
+
+    # 设置主标题
+    fig.suptitle(f'基金相关性分析\n{fund1_name} vs {fund2_name}',
+                 fontsize=16, fontweight='bold', color='#2c3e50', y=0.98)
+
+    # 1. 散点图 - 日收益率相关性
+    ax1 = axes[0, 0]
+    ax1.set_facecolor('#ffffff')
+    ax1.scatter(returns2, returns1, alpha=0.6, s=30, c=color1, edgecolors='white', linewidth=0.5)
+
+    # 添加趋势线
+    z = np.polyfit(returns2, returns1, 1)
+    p = np.poly1d(z)
+    x_line = np.linspace(returns2.min(), returns2.max(), 100)
+    ax1.plot(x_line, p(x_line), color=color2, linestyle='--', linewidth=2.5,
+             label=f'趋势线: y={z[0]:.3f}x+{z[1]:.3f}')
+
+    ax1.set_xlabel(f'{_short_label(fund2_name, 10)} 日收益率 (%)', fontsize=11, color='#34495e')
+    ax1.set_ylabel(f'{_short_label(fund1_name, 10)} 日收益率 (%)', fontsize=11, color='#34495e')
+    ax1.set_title(f'日收益率散点图\nPearson r = {pearson_corr:.4f}',
+                  fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
+    ax1.legend(loc='upper left', fontsize=9, framealpha=0.9)
+    ax1.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
+    ax1.axhline(y=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
+    ax1.axvline(x=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
+    ax1.tick_params(axis='both', labelsize=9, colors='#34495e')
+
+    # 2. 净值走势对比（初始净值100，第k天只累计前k-1天的收益）
+    ax2 = axes[0, 1]
+    ax2.set_facecolor('#ffffff')
+    norm_nav1 = 100 * np.cumprod(np.concatenate([[1.0], 1 + returns1.to_numpy()[:-1] / 100]))
+    norm_nav2 = 100 * np.cumprod(np.concatenate([[1.0], 1 + returns2.to_numpy()[:-1] / 100]))
+    ax2.plot(dates, norm_nav1, label=_short_label(fund1_name), linewidth=2, color=color1, alpha=0.9)
+    ax2.plot(dates, norm_nav2, label=_short_label(fund2_name), linewidth=2, color=color2, alpha=0.9)
+    ax2.fill_between(dates, norm_nav1, alpha=0.1, color=color1)
+    ax2.fill_between(dates, norm_nav2, alpha=0.1, color=color2)
+    ax2.set_xlabel('日期', fontsize=11, color='#34495e')
+    ax2.set_ylabel('归一化净值 (起始=100)', fontsize=11, color='#34495e')
+    ax2.set_title('净值走势对比 (归一化)', fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
+    ax2.legend(loc='upper left', fontsize=9, framealpha=0.9)
+    ax2.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
+
+    # 3. 滚动相关性
+    ax3 = axes[1, 0]
+    ax3.set_facecolor('#ffffff')
+    rolling_corr = returns1.rolling(window=window).corr(returns2)
+    ax3.plot(dates, rolling_corr, linewidth=2, color=color_rolling, alpha=0.9)
+    ax3.fill_between(dates, rolling_corr, alpha=0.2, color=color_rolling)
+    ax3.axhline(y=pearson_corr, color=color2, linestyle='--', linewidth=2,
+                label=f'整体相关性: {pearson_corr:.4f}')
+    ax3.axhline(y=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
+    ax3.set_xlabel('日期', fontsize=11, color='#34495e')
+    ax3.set_ylabel(f'滚动相关系数 ({window}日)', fontsize=11, color='#34495e')
+    ax3.set_title(f'滚动相关性变化 ({window}日窗口)', fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
+    ax3.legend(loc='lower right', fontsize=9, framealpha=0.9)
+    ax3.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
+    ax3.set_ylim(-1.1, 1.1)
+
+    for ax in (ax2, ax3):
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha='right', fontsize=9)
+        ax.tick_params(axis='both', labelsize=9, colors='#34495e')
+
+    # 4. 收益率分布
+    ax4 = axes[1, 1]
+    ax4.set_facecolor('#ffffff')
+    # 动态计算bins范围
+    all_returns = pd.concat([returns1, returns2])
+    bins = np.linspace(max(-10, all_returns.min() - 1), min(10, all_returns.max() + 1), 40)
+    ax4.hist(returns1, bins=bins, alpha=0.7, label=_short_label(fund1_name),
+             color=color1, density=True, edgecolor='white', linewidth=0.5)
+    ax4.hist(returns2, bins=bins, alpha=0.7, label=_short_label(fund2_name),
+             color=color2, density=True, edgecolor='white', linewidth=0.5)
+    ax4.set_xlabel('日收益率 (%)', fontsize=11, color='#34495e')
+    ax4.set_ylabel('概率密度', fontsize=11, color='#34495e')
+    ax4.set_title('日收益率分布对比', fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
+    ax4.legend(loc='upper right', fontsize=9, framealpha=0.9)
+    ax4.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
+    ax4.axvline(x=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
+    ax4.tick_params(axis='both', labelsize=9, colors='#34495e')
+
+    # 调整子图间距
+    fig.tight_layout(rect=[0, 0.02, 1, 0.95])
+    fig.subplots_adjust(hspace=0.35, wspace=0.25)
+    return fig
+
+
 class EnhancedCorrelationAnalyzer:
     """
     增强版基金相关性分析器
@@ -108,13 +187,15 @@ class EnhancedCorrelationAnalyzer:
         # 字体配置已在模块级别全局设置
     
     def analyze_enhanced_correlation(self, fund_data_dict: Dict[str, pd.DataFrame], 
-                                   fund_names: Dict[str, str]) -> Dict:
+                                   fund_names: Dict[str, str], batch_top_k: Optional[int] = None) -> Dict:
         """
         执行增强版相关性分析（含时间统计）
         
         参数:
         fund_data_dict: 基金代码到历史数据DataFrame的映射
         fund_names: 基金代码到基金名称的映射
+        batch_top_k: 不为 None 时在同一份对齐数据和相关矩阵上附带批量分析结果
+                     （batch_analysis，见 analyze_correlation_batch），返回该数量的高相关性基金对
         
         返回:
         dict: 增强的相关性分析结果（包含性能数据）
@@ -160,6 +241,15 @@ class EnhancedCorrelationAnalyzer:
             with StageTimer("相关性解读生成", monitor):
                 interpretation = self._interpret_correlation_results(basic_correlation, enhanced_correlation)
             
+            # 8. 批量分析：复用对齐数据和基础相关矩阵
+            batch_analysis = None
+            if batch_top_k is not None:
+                with StageTimer("批量相关性计算", monitor):
+                    batch_analysis = self._batch_correlation(
+                        aligned_data, fund_names, batch_top_k,
+                        corr=np.asarray(basic_correlation['correlation_matrix'], dtype=float)
+                    )
+            
             # 记录总耗时
             total_time = monitor.end("total")
             
@@ -185,6 +275,9 @@ class EnhancedCorrelationAnalyzer:
                 }
             }
             
+            if batch_analysis is not None:
+                result['batch_analysis'] = batch_analysis
+            
             # 输出性能报告
             logger.info(f"[Performance] 增强相关性分析完成，基金数量: {len(fund_codes)}, 总耗时: {total_time:.2f} ms")
             monitor.log_report()
@@ -244,8 +337,7 @@ class EnhancedCorrelationAnalyzer:
         merged_df = merged_df.dropna()
         
         # 过滤异常值（收益率超过±100%）
-        for col in numeric_columns:
-            merged_df = merged_df[merged_df[col].abs() <= 100]
+        merged_df = merged_df[(merged_df[numeric_columns].abs() <= 100).all(axis=1)]
         
         # 检查是否有足够的数据点
         if len(merged_df) < 2:
@@ -270,12 +362,11 @@ class EnhancedCorrelationAnalyzer:
         返回:
         dict: 基础相关性结果
         """
-        fund_columns = [col for col in aligned_data.columns if col != 'date']
-        correlation_matrix = aligned_data[fund_columns].corr(method='pearson')
+        fund_columns, returns = self._returns_matrix(aligned_data)
         
         return {
             'fund_codes': fund_columns,
-            'correlation_matrix': correlation_matrix.values.tolist(),
+            'correlation_matrix': correlation_matrix(returns).tolist(),
             'method': 'pearson'
         }
     
@@ -289,31 +380,25 @@ class EnhancedCorrelationAnalyzer:
         返回:
         dict: 包含皮尔逊、斯皮尔曼、肯德尔相关系数的结果
         """
-        fund_columns = [col for col in aligned_data.columns if col != 'date']
+        fund_columns, returns = self._returns_matrix(aligned_data)
+        n_obs = len(returns)
         results = {}
         
-        # 计算每对基金的相关系数
+        # 皮尔逊、斯皮尔曼（秩相关）相关系数及p值按矩阵一次算出
+        pearson = correlation_matrix(returns)
+        pearson_p = correlation_p_values(pearson, n_obs)
+        spearman = spearman_matrix(returns)
+        spearman_p = correlation_p_values(spearman, n_obs)
+        
         for i in range(len(fund_columns)):
             for j in range(i + 1, len(fund_columns)):
-                fund1 = fund_columns[i]
-                fund2 = fund_columns[j]
-                
-                returns1 = aligned_data[fund1]
-                returns2 = aligned_data[fund2]
-                
-                # 皮尔逊相关系数
-                pearson_corr, pearson_p = stats.pearsonr(returns1, returns2)
-                
-                # 斯皮尔曼相关系数（秩相关）
-                spearman_corr, spearman_p = stats.spearmanr(returns1, returns2)
-                
-                # 肯德尔相关系数
-                kendall_corr, kendall_p = stats.kendalltau(returns1, returns2)
+                # 肯德尔相关系数没有矩阵形式，仍逐对计算
+                kendall_corr, kendall_p = stats.kendalltau(returns[:, i], returns[:, j])
                 
-                pair_key = f"{fund1}_{fund2}"
+                pair_key = f"{fund_columns[i]}_{fund_columns[j]}"
                 results[pair_key] = {
-                    'pearson': {'corr': float(pearson_corr), 'p_value': float(pearson_p)},
-                    'spearman': {'corr': float(spearman_corr), 'p_value': float(spearman_p)},
+                    'pearson': {'corr': float(pearson[i, j]), 'p_value': float(pearson_p[i, j])},
+                    'spearman': {'corr': float(spearman[i, j]), 'p_value': float(spearman_p[i, j])},
                     'kendall': {'corr': float(kendall_corr), 'p_value': float(kendall_p)}
                 }
         
@@ -334,24 +419,13 @@ class EnhancedCorrelationAnalyzer:
             return []
         
         # 只计算第一对基金的滚动相关性作为示例
-        fund1, fund2 = fund_columns[0], fund_columns[1]
-        returns1 = aligned_data[fund1]
-        returns2 = aligned_data[fund2]
+        _, returns = self._returns_matrix(aligned_data)
+        rolling_corr = rolling_correlation(returns, self.rolling_window, pairs=[(0, 1)])[:, 0]
         
-        # 计算滚动相关系数
-        rolling_corr = returns1.rolling(window=self.rolling_window).corr(returns2)
-        
-        # 构造结果
-        result = []
-        for idx, corr_value in rolling_corr.items():
-            if not pd.isna(corr_value):
-                date_str = aligned_data.loc[idx, 'date'].strftime('%Y-%m-%d')
-                result.append({
-                    'date': date_str,
-                    'correlation': float(corr_value)
-                })
-        
-        return result[-200:]  # 只返回最近200个数据点以减少传输量
+        # 构造结果，只返回最近200个数据点以减少传输量
+        valid = np.flatnonzero(~np.isnan(rolling_corr))[-200:]
+        dates = aligned_data['date'].dt.strftime('%Y-%m-%d').to_numpy()
+        return [{'date': dates[k], 'correlation': float(rolling_corr[k])} for k in valid]
     
     def _calculate_period_correlation(self, aligned_data: pd.DataFrame) -> Dict:
         """
@@ -367,20 +441,11 @@ class EnhancedCorrelationAnalyzer:
         if len(fund_columns) < 2:
             return {}
         
-        fund1, fund2 = fund_columns[0], fund_columns[1]
-        nav1 = self._returns_to_nav(aligned_data[fund1])
-        nav2 = self._returns_to_nav(aligned_data[fund2])
-        
-        periods = {
-            'weekly': 5,      # 周收益(5日)
-            'biweekly': 10,   # 双周收益(10日)  
-            'monthly': 20,    # 月收益(20日)
-            'quarterly': 60   # 季度收益(60日)
-        }
+        _, returns = self._returns_matrix(aligned_data)
         
         results = {}
-        for period_name, period_days in periods.items():
-            corr = self._calculate_period_corr(nav1, nav2, period_days)
+        for period_name, period_days in CORRELATION_PERIODS.items():
+            corr = period_correlation_matrix(returns[:, :2], period_days)[0, 1]
             results[period_name] = float(corr) if not pd.isna(corr) else 0.0
         
         return results
@@ -395,28 +460,9 @@ class EnhancedCorrelationAnalyzer:
         返回:
         pd.Series: 净值序列
         """
-        # 假设初始净值为100
-        nav = [100]
-        for ret in returns:
-            new_nav = nav[-1] * (1 + ret / 100)
-            nav.append(new_nav)
-        return pd.Series(nav[:-1], index=returns.index)
-    
-    def _calculate_period_corr(self, nav1: pd.Series, nav2: pd.Series, period: int) -> float:
-        """
-        计算指定周期的收益率相关性
-        
-        参数:
-        nav1: 基金1的净值序列
-        nav2: 基金2的净值序列
-        period: 周期天数
-        
-        返回:
-        float: 相关系数
-        """
-        ret1 = nav1.pct_change(period) * 100
-        ret2 = nav2.pct_change(period) * 100
-        return ret1.corr(ret2)
+        # 假设初始净值为100，第k天的净值只累计前k-1天的收益
+        growth = np.concatenate([[1.0], 1 + returns.to_numpy(dtype=float)[:-1] / 100])
+        return pd.Series(100 * np.cumprod(growth), index=returns.index)
     
     def _identify_high_correlation_pairs(self, fund_codes: List[str], fund_names: Dict[str, str],
                                        correlation_matrix: List[List[float]]) -> List[Dict]:
@@ -431,29 +477,98 @@ class EnhancedCorrelationAnalyzer:
         返回:
         list: 高相关性基金组合列表
         """
+        # 只返回前10个最高相关性组合
+        top_pairs = top_correlated_pairs(np.asarray(correlation_matrix, dtype=float), k=10,
+                                         threshold=HIGH_CORRELATION_THRESHOLD)
+        return [self._format_pair(fund_codes[i], fund_codes[j], correlation, fund_names)
+                for i, j, correlation in top_pairs]
+    
+    def _format_pair(self, fund1_code: str, fund2_code: str, correlation: float,
+                     fund_names: Dict[str, str]) -> Dict:
+        """基金对的展示信息"""
+        return {
+            'fund1_code': fund1_code,
+            'fund1_name': fund_names.get(fund1_code, fund1_code),
+            'fund2_code': fund2_code,
+            'fund2_name': fund_names.get(fund2_code, fund2_code),
+            'correlation': round(correlation, 4),
+            'strength': self._get_correlation_strength(correlation),
+            'direction': '正相关' if correlation > 0 else '负相关'
+        }
+    
+    def _returns_matrix(self, aligned_data: pd.DataFrame) -> Tuple[List[str], np.ndarray]:
+        """
+        取出对齐后的（日期 × 基金）收益率矩阵
+        
+        返回:
+        tuple: (基金代码列表, 收益率矩阵)
+        """
+        fund_columns = [col for col in aligned_data.columns if col != 'date']
+        return fund_columns, aligned_data[fund_columns].to_numpy(dtype=float)
+    
+    def analyze_correlation_batch(self, fund_data_dict: Dict[str, pd.DataFrame],
+                                  fund_names: Dict[str, str], top_k: int = 10,
+                                  threshold: float = HIGH_CORRELATION_THRESHOLD) -> Dict:
+        """
+        批量相关性分析：在对齐后的收益率矩阵上一次算出所有基金对的结果
+        
+        参数:
+        fund_data_dict: 基金代码到历史数据DataFrame的映射
+        fund_names: 基金代码到基金名称的映射
+        top_k: 返回的高相关性基金对数量
+        threshold: 高相关性阈值（相关系数绝对值）
+        
+        返回:
+        dict: N×N 相关矩阵、各周期相关矩阵、最近一个滚动窗口的相关矩阵、
+              高相关性基金对及其滚动相关序列
+        """
+        aligned_data = self._align_fund_data(fund_data_dict)
+        return self._batch_correlation(aligned_data, fund_names, top_k, threshold)
+    
+    def _batch_correlation(self, aligned_data: pd.DataFrame, fund_names: Dict[str, str], top_k: int,
+                           threshold: float = HIGH_CORRELATION_THRESHOLD,
+                           corr: Optional[np.ndarray] = None) -> Dict:
+        """
+        在对齐后的数据上计算批量相关性结果（corr 为已算好的 N×N 相关矩阵，None 时重新计算）
+        """
+        fund_columns, returns = self._returns_matrix(aligned_data)
+        if len(fund_columns) < 2:
+            raise ValueError("至少需要2只基金进行相关性分析")
+        
+        if corr is None:
+            corr = correlation_matrix(returns)
+        top_pairs = top_correlated_pairs(corr, k=top_k, threshold=threshold)
+        
+        # 只为高相关性基金对输出滚动序列，完整的（日期 × N × N）张量见 rolling_correlation
+        window = self.rolling_window
+        rolling = rolling_correlation(returns, window, pairs=[(i, j) for i, j, _ in top_pairs])
+        dates = aligned_data['date'].dt.strftime('%Y-%m-%d').to_numpy()
+        valid_rows = np.flatnonzero(~np.isnan(rolling).all(axis=1)) if len(top_pairs) else np.array([], dtype=int)
+        
         high_pairs = []
-        threshold = 0.7  # 高相关性阈值
-        
-        for i in range(len(fund_codes)):
-            for j in range(i + 1, len(fund_codes)):
-                correlation = correlation_matrix[i][j]
-                if abs(correlation) >= threshold:
-                    fund1_code = fund_codes[i]
-                    fund2_code = fund_codes[j]
-                    
-                    high_pairs.append({
-                        'fund1_code': fund1_code,
-                        'fund1_name': fund_names.get(fund1_code, fund1_code),
-                        'fund2_code': fund2_code,
-                        'fund2_name': fund_names.get(fund2_code, fund2_code),
-                        'correlation': round(correlation, 4),
-                        'strength': self._get_correlation_strength(correlation),
-                        'direction': '正相关' if correlation > 0 else '负相关'
-                    })
-        
-        # 按相关性强度排序
-        high_pairs.sort(key=lambda x: abs(x['correlation']), reverse=True)
-        return high_pairs[:10]  # 只返回前10个最高相关性组合
+        for k, (i, j, value) in enumerate(top_pairs):
+            pair = self._format_pair(fund_columns[i], fund_columns[j], value, fund_names)
+            pair['rolling_correlation'] = [None if np.isnan(v) else float(v) for v in rolling[valid_rows, k]]
+            high_pairs.append(pair)
+        
+        latest_window = correlation_matrix(returns[-window:]) if len(returns) >= window else None
+        
+        def to_list(matrix):
+            return np.where(np.isnan(matrix), None, np.round(matrix, 6)).tolist()
+        
+        return {
+            'fund_codes': fund_columns,
+            'correlation_matrix': to_list(corr),
+            'period_correlation': {
+                name: to_list(period_correlation_matrix(returns, days))
+                for name, days in CORRELATION_PERIODS.items()
+            },
+            'rolling_window': window,
+            'rolling_dates': dates[valid_rows].tolist(),
+            'latest_rolling_matrix': to_list(latest_window) if latest_window is not None else None,
+            'high_correlation_pairs': high_pairs,
+            'data_points': len(aligned_data)
+        }
     
     def _get_correlation_strength(self, corr: float) -> str:
         """
@@ -504,7 +619,9 @@ class EnhancedCorrelationAnalyzer:
 
     def generate_interactive_correlation_data(self, fund_data_dict: Dict[str, pd.DataFrame], 
                                             fund_names: Dict[str, str],
-                                            lazy_load: bool = True) -> Dict:
+                                            lazy_load: bool = True,
+                                            max_points: Optional[int] = None,
+                                            encoding: str = 'json') -> Dict:
         """
         生成用于交互式图表的详细相关性数据（优化版，支持懒加载和时间统计）
         
@@ -512,6 +629,8 @@ class EnhancedCorrelationAnalyzer:
         fund_data_dict: 基金代码到历史数据DataFrame的映射
         fund_names: 基金代码到基金名称的映射
         lazy_load: 是否启用懒加载模式，默认True
+        max_points: 折线图（净值对比、滚动相关性）的最大数据点数，None表示不降采样
+        encoding: 折线图数值数组的编码方式，'json' 或 'base64'
         
         返回:
         dict: 包含散点图、净值对比、滚动相关性、分布图等详细数据（含性能数据）
@@ -540,9 +659,13 @@ class EnhancedCorrelationAnalyzer:
             # 分析所有基金组合（如果有多只基金）
             if len(fund_columns) >= 2:
                 
+                # 所有组合的相关系数一次算出
+                with StageTimer("相关矩阵计算", monitor):
+                    corr = correlation_matrix(aligned_data[fund_columns].to_numpy(dtype=float))
+                
                 # 找到相关性最高的组合作为主组合显示
                 with StageTimer("主组合查找", monitor):
-                    primary_pair = self._find_primary_pair(aligned_data, fund_columns, fund_names)
+                    primary_pair = self._find_primary_pair(aligned_data, fund_columns, fund_names, corr)
                     fund1_col, fund2_col = primary_pair['fund1_col'], primary_pair['fund2_col']
                     fund1_name, fund2_name = primary_pair['fund1_name'], primary_pair['fund2_name']
                 
@@ -558,15 +681,17 @@ class EnhancedCorrelationAnalyzer:
                         'fund2_name': fund2_name,
                         'correlation_results': self._calculate_single_pair_correlation(returns1, returns2),
                         'scatter_data': self._generate_scatter_data(returns1, returns2),
-                        'nav_comparison_data': self._generate_nav_comparison_data(returns1, returns2, aligned_data['date'], fund1_name, fund2_name),
-                        'rolling_correlation_data': self._generate_rolling_correlation_data(returns1, returns2, aligned_data['date'], fund1_name, fund2_name),
+                        'nav_comparison_data': self._generate_nav_comparison_data(
+                            returns1, returns2, aligned_data['date'], fund1_name, fund2_name, max_points, encoding),
+                        'rolling_correlation_data': self._generate_rolling_correlation_data(
+                            returns1, returns2, aligned_data['date'], fund1_name, fund2_name, max_points, encoding),
                         'distribution_data': self._generate_distribution_data(returns1, returns2, fund1_name, fund2_name)
                     }
                 
                 # 生成所有基金的净值对比和分布数据（这些是必需的，且计算量不大）
                 with StageTimer("净值对比和分布数据生成", monitor):
                     all_funds_nav_data = self._generate_all_funds_nav_comparison(
-                        aligned_data, fund_columns, fund_names
+                        aligned_data, fund_columns, fund_names, max_points, encoding
                     )
                     all_funds_distribution = self._generate_all_funds_distribution(
                         aligned_data, fund_columns, fund_names
@@ -581,15 +706,15 @@ class EnhancedCorrelationAnalyzer:
                             f1_name = fund_names.get(f1_col, f1_col)
                             f2_name = fund_names.get(f2_col, f2_col)
                             
-                            # 只计算相关系数，不生成图表数据
-                            corr = aligned_data[f1_col].corr(aligned_data[f2_col])
+                            # 只取相关系数，不生成图表数据
+                            pair_corr = corr[i, j]
                             
                             all_combinations_summary.append({
                                 'fund1_code': f1_col,
                                 'fund2_code': f2_col,
                                 'fund1_name': f1_name,
                                 'fund2_name': f2_name,
-                                'correlation': float(corr) if not pd.isna(corr) else 0.0,
+                                'correlation': float(pair_corr) if not pd.isna(pair_corr) else 0.0,
                                 'has_detail': (f1_col == fund1_col and f2_col == fund2_col) or 
                                              (f1_col == fund2_col and f2_col == fund1_col)
                             })
@@ -637,7 +762,7 @@ class EnhancedCorrelationAnalyzer:
             return {}
     
     def _find_primary_pair(self, aligned_data: pd.DataFrame, fund_columns: List[str], 
-                           fund_names: Dict[str, str]) -> Dict:
+                           fund_names: Dict[str, str], corr: Optional[np.ndarray] = None) -> Dict:
         """
         找出相关性最高（或最具代表性）的基金对作为主显示
         
@@ -645,21 +770,21 @@ class EnhancedCorrelationAnalyzer:
         aligned_data: 对齐后的数据
         fund_columns: 基金代码列表
         fund_names: 基金名称映射
+        corr: 已计算的相关矩阵（可选），未提供时由aligned_data计算
         
         返回:
         dict: 主基金对信息
         """
-        # 默认使用第一对
+        if corr is None:
+            corr = correlation_matrix(aligned_data[fund_columns].to_numpy(dtype=float))
+        
+        # 默认使用第一对，否则取绝对相关性最高的对（关注高相关性组合）
         fund1_col, fund2_col = fund_columns[0], fund_columns[1]
         max_correlation = 0
-        
-        # 遍历找到绝对相关性最高的对（关注高相关性组合）
-        for i in range(len(fund_columns)):
-            for j in range(i + 1, len(fund_columns)):
-                corr = aligned_data[fund_columns[i]].corr(aligned_data[fund_columns[j]])
-                if not pd.isna(corr) and abs(corr) > abs(max_correlation):
-                    max_correlation = corr
-                    fund1_col, fund2_col = fund_columns[i], fund_columns[j]
+        top_pairs = top_correlated_pairs(corr, k=1)
+        if top_pairs and top_pairs[0][2] != 0:
+            i, j, max_correlation = top_pairs[0]
+            fund1_col, fund2_col = fund_columns[i], fund_columns[j]
         
         return {
             'fund1_col': fund1_col,
@@ -672,7 +797,9 @@ class EnhancedCorrelationAnalyzer:
     def generate_pair_detail_data(self, fund_data_dict: Dict[str, pd.DataFrame],
                                   fund_names: Dict[str, str],
                                   fund1_code: str, 
-                                  fund2_code: str) -> Dict:
+                                  fund2_code: str,
+                                  max_points: Optional[int] = None,
+                                  encoding: str = 'json') -> Dict:
         """
         按需生成单个基金对的详细分析数据（懒加载API使用）
         
@@ -681,6 +808,8 @@ class EnhancedCorrelationAnalyzer:
         fund_names: 基金名称映射
         fund1_code: 基金1代码
         fund2_code: 基金2代码
+        max_points: 折线图的最大数据点数，None表示不降采样
+        encoding: 折线图数值数组的编码方式，'json' 或 'base64'
         
         返回:
         dict: 该基金对的完整分析数据
@@ -707,8 +836,10 @@ class EnhancedCorrelationAnalyzer:
                 'fund2_name': fund2_name,
                 'correlation_results': self._calculate_single_pair_correlation(returns1, returns2),
                 'scatter_data': self._generate_scatter_data(returns1, returns2),
-                'nav_comparison_data': self._generate_nav_comparison_data(returns1, returns2, aligned_data['date'], fund1_name, fund2_name),
-                'rolling_correlation_data': self._generate_rolling_correlation_data(returns1, returns2, aligned_data['date'], fund1_name, fund2_name),
+                'nav_comparison_data': self._generate_nav_comparison_data(
+                    returns1, returns2, aligned_data['date'], fund1_name, fund2_name, max_points, encoding),
+                'rolling_correlation_data': self._generate_rolling_correlation_data(
+                    returns1, returns2, aligned_data['date'], fund1_name, fund2_name, max_points, encoding),
                 'distribution_data': self._generate_distribution_data(returns1, returns2, fund1_name, fund2_name)
             }
             
@@ -718,7 +849,9 @@ class EnhancedCorrelationAnalyzer:
 
     def _generate_all_funds_nav_comparison(self, aligned_data: pd.DataFrame, 
                                            fund_columns: List[str], 
-                                           fund_names: Dict[str, str]) -> Dict:
+                                           fund_names: Dict[str, str],
+                                           max_points: Optional[int] = None,
+                                           encoding: str = 'json') -> Dict:
         """
         生成所有基金的净值对比数据（支持多只基金同时显示）
         
@@ -726,29 +859,28 @@ class EnhancedCorrelationAnalyzer:
         aligned_data: 对齐后的基金数据
         fund_columns: 基金代码列表
         fund_names: 基金代码到基金名称的映射
+        max_points: 最大数据点数，所有基金按同一组日期降采样（min-max分桶）
+        encoding: 净值数组的编码方式
         
         返回:
         dict: 包含所有基金的净值数据
         """
         try:
-            # 格式化日期
-            formatted_dates = [date.strftime('%Y-%m-%d') for date in aligned_data['date']]
+            # 所有基金的净值一次算出（初始净值100，第k天只累计前k-1天的收益）
+            returns = aligned_data[fund_columns].to_numpy(dtype=float)
+            growth = np.vstack([np.ones((1, len(fund_columns))), 1 + returns[:-1] / 100])
+            navs = 100 * np.cumprod(growth, axis=0)
+            
+            indices = select_indices(navs.T, max_points, method='minmax')
+            formatted_dates = take(aligned_data['date'].dt.strftime('%Y-%m-%d').tolist(), indices)
+            navs = navs[indices]
             
-            # 为每只基金计算净值
             funds_data = []
-            for fund_col in fund_columns:
-                returns = aligned_data[fund_col]
-                
-                # 将收益率转换为净值
-                nav = self._returns_to_nav_for_plot(returns)
-                
-                # 归一化处理（起始值设为100）
-                normalized_nav = (nav / nav.iloc[0]) * 100
-                
+            for j, fund_col in enumerate(fund_columns):
                 funds_data.append({
                     'fund_code': fund_col,
                     'fund_name': fund_names.get(fund_col, fund_col),
-                    'values': normalized_nav.tolist()
+                    'values': encode_array(navs[:, j].tolist(), encoding)
                 })
             
             return {
@@ -875,52 +1007,50 @@ class EnhancedCorrelationAnalyzer:
             return {'slope': 0, 'intercept': 0, 'equation': 'y = 0'}
 
     def _generate_nav_comparison_data(self, returns1: pd.Series, returns2: pd.Series, 
-                                    dates: pd.Series, fund1_name: str, fund2_name: str) -> Dict:
+                                    dates: pd.Series, fund1_name: str, fund2_name: str,
+                                    max_points: Optional[int] = None, encoding: str = 'json') -> Dict:
         """生成净值对比数据"""
         # 将收益率转换为净值
         nav1 = self._returns_to_nav_for_plot(returns1)
         nav2 = self._returns_to_nav_for_plot(returns2)
         
         # 归一化处理（起始值设为100）
-        normalized_nav1 = (nav1 / nav1.iloc[0]) * 100
-        normalized_nav2 = (nav2 / nav2.iloc[0]) * 100
+        normalized_nav1 = ((nav1 / nav1.iloc[0]) * 100).to_numpy()
+        normalized_nav2 = ((nav2 / nav2.iloc[0]) * 100).to_numpy()
         
-        # 格式化日期
-        formatted_dates = [date.strftime('%Y-%m-%d') for date in dates]
+        # 两条净值曲线按同一组日期降采样
+        indices = select_indices([normalized_nav1, normalized_nav2], max_points)
+        formatted_dates = take(pd.to_datetime(dates).dt.strftime('%Y-%m-%d').tolist(), indices)
         
         return {
             'dates': formatted_dates,
-            'fund1_values': normalized_nav1.tolist(),
-            'fund2_values': normalized_nav2.tolist(),
+            'fund1_values': encode_array(normalized_nav1[indices].tolist(), encoding),
+            'fund2_values': encode_array(normalized_nav2[indices].tolist(), encoding),
             'fund1_name': fund1_name,
             'fund2_name': fund2_name
         }
 
     def _generate_rolling_correlation_data(self, returns1: pd.Series, returns2: pd.Series,
-                                         dates: pd.Series, fund1_name: str, fund2_name: str) -> Dict:
-        """生成滚动相关性数据"""
+                                         dates: pd.Series, fund1_name: str, fund2_name: str,
+                                         max_points: Optional[int] = None, encoding: str = 'json') -> Dict:
+        """生成滚动相关性数据（最多200个点）"""
         # 计算滚动相关系数
         rolling_corr = returns1.rolling(window=self.rolling_window).corr(returns2)
         
         # 获取整体相关系数
         overall_corr = returns1.corr(returns2)
         
-        # 清理NaN值并限制数据点
+        # 清理NaN值并限制数据点，LTTB采样保持趋势
         clean_data = rolling_corr.dropna()
-        if len(clean_data) > 200:
-            # 采样保持趋势
-            indices = np.linspace(0, len(clean_data)-1, 200).astype(int)
-            sampled_corr = clean_data.iloc[indices]
-            sampled_dates = dates.iloc[indices]
-        else:
-            sampled_corr = clean_data
-            sampled_dates = dates.loc[clean_data.index]
+        indices = select_indices([clean_data.to_numpy()], min(max_points or 200, 200))
+        sampled_corr = clean_data.iloc[indices]
+        sampled_dates = pd.to_datetime(dates.loc[sampled_corr.index])
         
         formatted_dates = [date.strftime('%Y-%m-%d') for date in sampled_dates]
         
         return {
             'dates': formatted_dates,
-            'correlations': sampled_corr.tolist(),
+            'correlations': encode_array(sampled_corr.tolist(), encoding),
             'overall_corr': float(overall_corr),
             'window': self.rolling_window,
             'fund1_name': fund1_name,
@@ -947,14 +1077,15 @@ class EnhancedCorrelationAnalyzer:
         }
 
     def generate_correlation_charts(self, fund_data_dict: Dict[str, pd.DataFrame], 
-                                  fund_names: Dict[str, str]) -> Dict[str, str]:
+                                  fund_names: Dict[str, str], wait: bool = True) -> Dict[str, str]:
         """
             生成相关性分析图表
             fund_data_dict: 基金代码到历史数据DataFrame的映射
             fund_names: 基金代码到基金名称的映射
+            wait: True 时等待渲染完成并返回base64图片；False 时提交到渲染服务后立即返回图片URL
                 
             返回:
-            dict: 包含各个图表的base64编码字符串
+            dict: 包含各个图表的base64编码字符串（或图片URL及渲染状态）
         """
         try:
             # 数据对齐
@@ -976,6 +1107,20 @@ class EnhancedCorrelationAnalyzer:
                 returns2 = aligned_data[fund2_col]
                 corr_results = self._calculate_single_pair_correlation(returns1, returns2)
                     
+                if not wait:
+                    from services.chart_render_service import get_chart_render_service
+                    payload = self._correlation_chart_payload(
+                        aligned_data, fund1_col, fund2_col, fund1_name, fund2_name, corr_results
+                    )
+                    ticket = get_chart_render_service().submit('correlation', payload, dpi=CORRELATION_CHART_DPI)
+                    return {
+                        'correlation_chart_url': ticket['url'],
+                        'chart_key': ticket['key'],
+                        'chart_status': ticket['status'],
+                        'fund1_name': fund1_name,
+                        'fund2_name': fund2_name
+                    }
+
                 # 生成图表
                 chart_base64 = self._create_correlation_chart(
                     aligned_data, fund1_col, fund2_col, fund1_name, fund2_name, corr_results
@@ -1010,12 +1155,27 @@ class EnhancedCorrelationAnalyzer:
             'kendall': {'corr': float(kendall_corr), 'p_value': float(kendall_p)}
         }
 
+    def _correlation_chart_payload(self, aligned_data: pd.DataFrame,
+                                   fund1_col: str, fund2_col: str,
+                                   fund1_name: str, fund2_name: str,
+                                   corr_results: Dict) -> Dict:
+        """四合一相关性图表的渲染数据（可JSON序列化，同时作为图表缓存键的一部分）"""
+        return {
+            'fund1_name': fund1_name,
+            'fund2_name': fund2_name,
+            'dates': aligned_data['date'].dt.strftime('%Y-%m-%d').tolist(),
+            'returns1': aligned_data[fund1_col].astype(float).tolist(),
+            'returns2': aligned_data[fund2_col].astype(float).tolist(),
+            'pearson_corr': float(corr_results['pearson']['corr']),
+            'rolling_window': self.rolling_window
+        }
+
     def _create_correlation_chart(self, aligned_data: pd.DataFrame, 
                                 fund1_col: str, fund2_col: str,
                                 fund1_name: str, fund2_name: str,
                                 corr_results: Dict) -> str:
             """
-            创建四合一相关性分析图表
+            创建四合一相关性分析图表（由图表渲染服务渲染并缓存）
                 
             参数:
             aligned_data: 对齐的数据
@@ -1027,137 +1187,11 @@ class EnhancedCorrelationAnalyzer:
             str: base64编码的PNG图片
             """
             try:
-                pearson_corr = corr_results['pearson']['corr']
-                returns1 = aligned_data[fund1_col]
-                returns2 = aligned_data[fund2_col]
-                
-                # 设置美观的图表样式
-                plt.style.use('seaborn-v0_8-whitegrid')
-                
-                # 定义配色方案
-                color1 = '#3498db'  # 蓝色
-                color2 = '#e74c3c'  # 红色
-                color_trend = '#2ecc71'  # 绿色
-                color_rolling = '#9b59b6'  # 紫色
-                    
-                # 创建图表，增大尺寸
-                fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-                fig.patch.set_facecolor('#fafafa')
-                
-                # 设置主标题
-                fig.suptitle(f'基金相关性分析\n{fund1_name} vs {fund2_name}', 
-                            fontsize=16, fontweight='bold', color='#2c3e50', y=0.98)
-                    
-                # 1. 散点图 - 日收益率相关性
-                ax1 = axes[0, 0]
-                ax1.set_facecolor('#ffffff')
-                scatter = ax1.scatter(returns2, returns1, alpha=0.6, s=30, c=color1, 
-                                     edgecolors='white', linewidth=0.5)
-                    
-                # 添加趋势线
-                z = np.polyfit(returns2, returns1, 1)
-                p = np.poly1d(z)
-                x_line = np.linspace(returns2.min(), returns2.max(), 100)
-                ax1.plot(x_line, p(x_line), color=color2, linestyle='--', linewidth=2.5, 
-                        label=f'趋势线: y={z[0]:.3f}x+{z[1]:.3f}')
-                    
-                ax1.set_xlabel(f'{fund2_name[:10]}... 日收益率 (%)' if len(fund2_name) > 10 else f'{fund2_name} 日收益率 (%)', 
-                              fontsize=11, color='#34495e')
-                ax1.set_ylabel(f'{fund1_name[:10]}... 日收益率 (%)' if len(fund1_name) > 10 else f'{fund1_name} 日收益率 (%)', 
-                              fontsize=11, color='#34495e')
-                ax1.set_title(f'日收益率散点图\nPearson r = {pearson_corr:.4f}', 
-                             fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
-                ax1.legend(loc='upper left', fontsize=9, framealpha=0.9)
-                ax1.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
-                ax1.axhline(y=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
-                ax1.axvline(x=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
-                ax1.tick_params(axis='both', labelsize=9, colors='#34495e')
-                    
-                # 2. 净值走势对比
-                ax2 = axes[0, 1]
-                ax2.set_facecolor('#ffffff')
-                # 将收益率转换为净值进行对比
-                nav1 = self._returns_to_nav_for_plot(returns1)
-                nav2 = self._returns_to_nav_for_plot(returns2)
-                    
-                # 归一化处理
-                norm_nav1 = nav1 / nav1.iloc[0] * 100
-                norm_nav2 = nav2 / nav2.iloc[0] * 100
-                    
-                dates = aligned_data['date']
-                ax2.plot(dates, norm_nav1, label=fund1_name[:12] + '...' if len(fund1_name) > 12 else fund1_name, 
-                        linewidth=2, color=color1, alpha=0.9)
-                ax2.plot(dates, norm_nav2, label=fund2_name[:12] + '...' if len(fund2_name) > 12 else fund2_name, 
-                        linewidth=2, color=color2, alpha=0.9)
-                ax2.fill_between(dates, norm_nav1, alpha=0.1, color=color1)
-                ax2.fill_between(dates, norm_nav2, alpha=0.1, color=color2)
-                ax2.set_xlabel('日期', fontsize=11, color='#34495e')
-                ax2.set_ylabel('归一化净值 (起始=100)', fontsize=11, color='#34495e')
-                ax2.set_title('净值走势对比 (归一化)', fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
-                ax2.legend(loc='upper left', fontsize=9, framealpha=0.9)
-                ax2.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
-                ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-                ax2.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-                plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha='right', fontsize=9)
-                ax2.tick_params(axis='both', labelsize=9, colors='#34495e')
-                    
-                # 3. 滚动相关性
-                ax3 = axes[1, 0]
-                ax3.set_facecolor('#ffffff')
-                rolling_corr = returns1.rolling(window=self.rolling_window).corr(returns2)
-                    
-                ax3.plot(dates, rolling_corr, linewidth=2, color=color_rolling, alpha=0.9)
-                ax3.fill_between(dates, rolling_corr, alpha=0.2, color=color_rolling)
-                ax3.axhline(y=pearson_corr, color=color2, linestyle='--', linewidth=2, 
-                           label=f'整体相关性: {pearson_corr:.4f}')
-                ax3.axhline(y=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
-                ax3.set_xlabel('日期', fontsize=11, color='#34495e')
-                ax3.set_ylabel(f'滚动相关系数 ({self.rolling_window}日)', fontsize=11, color='#34495e')
-                ax3.set_title(f'滚动相关性变化 ({self.rolling_window}日窗口)', 
-                             fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
-                ax3.legend(loc='lower right', fontsize=9, framealpha=0.9)
-                ax3.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
-                ax3.set_ylim(-1.1, 1.1)
-                ax3.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-                ax3.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-                plt.setp(ax3.xaxis.get_majorticklabels(), rotation=45, ha='right', fontsize=9)
-                ax3.tick_params(axis='both', labelsize=9, colors='#34495e')
-                    
-                # 4. 收益率分布
-                ax4 = axes[1, 1]
-                ax4.set_facecolor('#ffffff')
-                # 动态计算bins范围
-                all_returns = pd.concat([returns1, returns2])
-                bin_min = max(-10, all_returns.min() - 1)
-                bin_max = min(10, all_returns.max() + 1)
-                bins = np.linspace(bin_min, bin_max, 40)
-                
-                ax4.hist(returns1, bins=bins, alpha=0.7, label=fund1_name[:12] + '...' if len(fund1_name) > 12 else fund1_name, 
-                        color=color1, density=True, edgecolor='white', linewidth=0.5)
-                ax4.hist(returns2, bins=bins, alpha=0.7, label=fund2_name[:12] + '...' if len(fund2_name) > 12 else fund2_name, 
-                        color=color2, density=True, edgecolor='white', linewidth=0.5)
-                ax4.set_xlabel('日收益率 (%)', fontsize=11, color='#34495e')
-                ax4.set_ylabel('概率密度', fontsize=11, color='#34495e')
-                ax4.set_title('日收益率分布对比', fontsize=12, fontweight='bold', color='#2c3e50', pad=10)
-                ax4.legend(loc='upper right', fontsize=9, framealpha=0.9)
-                ax4.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
-                ax4.axvline(x=0, color='#7f8c8d', linestyle='-', linewidth=0.8, alpha=0.5)
-                ax4.tick_params(axis='both', labelsize=9, colors='#34495e')
-                    
-                # 调整子图间距
-                plt.tight_layout(rect=[0, 0.02, 1, 0.95])
-                plt.subplots_adjust(hspace=0.35, wspace=0.25)
-                    
-                # 转换为base64，使用更高DPI
-                buffer = BytesIO()
-                plt.savefig(buffer, format='png', dpi=120, bbox_inches='tight', 
-                           facecolor='#fafafa', edgecolor='none')
-                buffer.seek(0)
-                image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-                buffer.close()
-                plt.close(fig)  # 释放内存
-                    
-                return image_base64
+                from services.chart_render_service import get_chart_render_service
+                payload = self._correlation_chart_payload(
+                    aligned_data, fund1_col, fund2_col, fund1_name, fund2_name, corr_results
+                )
+                return get_chart_render_service().render_base64('correlation', payload, dpi=CORRELATION_CHART_DPI)
                     
             except Exception as e:
                 logger.error(f"创建相关性图表失败: {str(e)}")
@@ -1175,9 +1209,5 @@ class EnhancedCorrelationAnalyzer:
             返回:
             pd.Series: 净值序列
         """
-        # 从收益率重建净值序列
-        nav = [100]  # 假设初始净值为100
-        for ret in returns:
-            new_nav = nav[-1] * (1 + ret / 100)
-            nav.append(new_nav)
-        return pd.Series(nav[:-1], index=returns.index)
\ No newline at end of file
+        # 从收益率重建净值序列（假设初始净值为100）
+        return self._returns_to_nav(returns)
\ No newline at end of file
@@ -18,6 +18,11 @@ from typing import List, Dict, Any, Optional, Tuple, Callable
 import numpy as np
 import pandas as pd
 
+try:
+    from shared.fund_metrics import CrossSectionMetrics, compute_cross_section_metrics
+except ImportError:
+    from fund_search.shared.fund_metrics import CrossSectionMetrics, compute_cross_section_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -399,6 +404,22 @@ class MetricEngine:
             metadata=metrics_input.metadata
         )
 
+    def compute_cross_section(
+        self,
+        navs: np.ndarray,
+        dates: Optional[Any] = None,
+        codes: Optional[List[str]] = None,
+        **options: Any
+    ) -> CrossSectionMetrics:
+        """
+        截面模式：以 (日期 × 基金) 净值矩阵为输入，一次向量化计算全部基金的指标
+
+        无风险利率和年化交易日数取自规则配置，其余选项见 shared.fund_metrics.compute_cross_section_metrics
+        """
+        options.setdefault('risk_free_rate', self.rule_set.get_param('global', 'risk_free_rate', 0.02))
+        options.setdefault('trading_days', self.rule_set.get_param('global', 'trading_days', 250))
+        return compute_cross_section_metrics(navs, dates=dates, codes=codes, **options)
+
     def _compute_bundle(self, metrics_input: MetricsInput, rule_set: MetricRuleSet) -> MetricBundle:
         metrics: Dict[str, MetricValue] = {}
         if not metrics_input.equity_curve or len(metrics_input.equity_curve) < 2:
@@ -14,14 +14,15 @@ import seaborn as sns
 from typing import Dict, List, Tuple, Optional, Any
 import warnings
 
+from shared.chart_fonts import setup_chinese_font
+
 # Set style for better looking plots
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 warnings.filterwarnings('ignore')
 
-# Configure matplotlib for Chinese font support (if needed)
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+# Configure matplotlib for Chinese font support (font lookup is cached per process)
+setup_chinese_font()
 
 
 class PerformanceVisualizer:
@@ -6,5 +6,8 @@ from .strategy_config import StrategyConfig, get_strategy_config
 from .position_manager import PositionManager, VolatilityLevel, PositionAdjustment
 from .stop_loss_manager import StopLossManager, StopLossLevel, StopLossResult
 from .akshare_data_fetcher import fetch_fund_history_from_akshare
+from .nav_store import NavStore, get_nav_store
+from .result_cache import BacktestResultCache, get_result_cache
+from .backtest_checkpoint import BacktestCheckpoint, BacktestCheckpointStore, get_checkpoint_store
 from .data_validator import DataValidator
 from .monitoring import RealTimeMonitor
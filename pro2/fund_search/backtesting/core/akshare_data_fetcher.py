@@ -145,6 +145,48 @@ def fetch_fund_history_from_akshare(fund_code: str, days: int = 90) -> pd.DataFr
         return pd.DataFrame()
 
 
+def fetch_fund_nav_series(fund_code: str) -> pd.DataFrame:
+    """
+    从 AkShare 获取基金完整单位净值序列（供本地净值存储使用）
+
+    参数:
+        fund_code: 基金代码
+
+    返回:
+        DataFrame: date, nav, daily_return（小数形式）
+    """
+    df = ak.fund_open_fund_info_em(symbol=fund_code, indicator="单位净值走势")
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['date', 'nav', 'daily_return'])
+
+    return pd.DataFrame({
+        'date': pd.to_datetime(df['净值日期']),
+        'nav': pd.to_numeric(df['单位净值'], errors='coerce'),
+        # 日增长率从百分比字符串转换为小数
+        'daily_return': pd.to_numeric(df['日增长率'].astype(str).str.rstrip('%'), errors='coerce') / 100
+    })
+
+
+def fetch_index_close_series(symbol: str) -> pd.DataFrame:
+    """
+    从 AkShare 获取指数完整日收盘价序列（供本地净值存储使用）
+
+    参数:
+        symbol: 指数代码，如 "sh000300"
+
+    返回:
+        DataFrame: date, close
+    """
+    df = ak.stock_zh_index_daily(symbol=symbol)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['date', 'close'])
+
+    return pd.DataFrame({
+        'date': pd.to_datetime(df['date']),
+        'close': pd.to_numeric(df['close'], errors='coerce')
+    })
+
+
 def fetch_fund_history_with_fallback(fund_code: str, days: int, db_manager) -> pd.DataFrame:
     """
     获取基金历史数据，优先从数据库获取，如果数据不足则从 AkShare 获取
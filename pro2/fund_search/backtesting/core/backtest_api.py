@@ -19,7 +19,7 @@ import json
 import csv
 import io
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 import threading
@@ -31,6 +31,7 @@ from ..strategies.custom_strategy_backtest import (
     run_custom_backtest
 )
 from ..analysis.performance_metrics import PerformanceCalculator, PerformanceMetrics
+from .result_cache import data_fingerprint, get_result_cache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -384,17 +385,22 @@ class BacktestAPIHandler:
     处理回测相关的API请求
     """
     
-    def __init__(self, db_manager=None, fund_data_manager=None):
+    def __init__(self, db_manager=None, fund_data_manager=None, result_cache=None, use_result_cache: bool = True):
         """
         初始化处理器
         
         Args:
             db_manager: 数据库管理器
             fund_data_manager: 基金数据管理器
+            result_cache: 回测结果缓存，默认使用全局缓存（get_result_cache）
+            use_result_cache: 是否复用相同输入的回测结果
         """
         self.db_manager = db_manager
         self.fund_data_manager = fund_data_manager
         self.task_manager = get_task_manager()
+        self.result_cache = None
+        if use_result_cache:
+            self.result_cache = result_cache if result_cache is not None else get_result_cache()
     
     def run_backtest(
         self,
@@ -403,7 +409,8 @@ class BacktestAPIHandler:
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         initial_capital: float = 100000.0,
-        rebalance_freq: str = 'monthly'
+        rebalance_freq: str = 'monthly',
+        progress_callback: Optional[Callable[[float], None]] = None
     ) -> Tuple[bool, Dict[str, Any]]:
         """
         执行回测
@@ -415,6 +422,7 @@ class BacktestAPIHandler:
             end_date: 结束日期
             initial_capital: 初始资金
             rebalance_freq: 调仓频率
+            progress_callback: 进度回调，参数为进度百分比（回测服务的工作进程用于上报进度）
             
         Returns:
             (成功标志, 结果字典)
@@ -436,6 +444,8 @@ class BacktestAPIHandler:
             self.task_manager.update_task_status(
                 task_id, BacktestStatus.RUNNING, progress=10.0
             )
+            if progress_callback:
+                progress_callback(10.0)
             
             # 设置默认日期范围
             if not end_date:
@@ -449,6 +459,8 @@ class BacktestAPIHandler:
             self.task_manager.update_task_status(
                 task_id, BacktestStatus.RUNNING, progress=30.0
             )
+            if progress_callback:
+                progress_callback(30.0)
             
             funds_data = self._get_funds_data(start_date, end_date)
             if funds_data.empty:
@@ -462,15 +474,35 @@ class BacktestAPIHandler:
             self.task_manager.update_task_status(
                 task_id, BacktestStatus.RUNNING, progress=50.0
             )
+            if progress_callback:
+                progress_callback(50.0)
             
-            result = run_custom_backtest(
-                strategy_config=strategy_config,
-                funds_data=funds_data,
-                start_date=start_date,
-                end_date=end_date,
-                initial_capital=initial_capital,
+            # 相同策略配置、基金数据和参数的回测直接复用结果；基金数据更新后指纹变化，缓存自动失效
+            cache_key = make_cache_key(
+                config_dict,
+                funds_data['fund_code'].unique() if 'fund_code' in funds_data.columns else [],
+                None,
+                start_date,
+                end_date,
+                data_fingerprint(funds_data),
+                initial_capital=float(initial_capital),
                 rebalance_freq=rebalance_freq
             )
+            result = self.result_cache.get(cache_key) if self.result_cache is not None else None
+            cached = result is not None
+            if cached:
+                logger.info(f"回测结果命中缓存: strategy_id={strategy_id}, {start_date} ~ {end_date}")
+            else:
+                result = run_custom_backtest(
+                    strategy_config=strategy_config,
+                    funds_data=funds_data,
+                    start_date=start_date,
+                    end_date=end_date,
+                    initial_capital=initial_capital,
+                    rebalance_freq=rebalance_freq
+                )
+                if self.result_cache is not None:
+                    self.result_cache.set(cache_key, result)
             
             # 保存结果
             self.task_manager.set_task_result(task_id, result)
@@ -481,6 +513,7 @@ class BacktestAPIHandler:
             return True, {
                 'task_id': task_id,
                 'status': 'completed',
+                'cached': cached,
                 'result': result.to_dict()
             }
             
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+回测断点存储
+Backtest Checkpoint Store
+
+按（基金，策略）保存单基金定投回测的末状态和已计算的回测曲线，
+新交易日到来时只需从断点继续计算新增的几天，无需从开始日期重算：
+- state.json：末日期、末日净值/日增长率、策略与基准的现金和份额、末日总资产、策略状态
+- curve.csv：回测曲线，只追加新行
+
+state.json记录已提交的曲线字节数，曲线先追加、state后原子替换，
+写入中断时曲线多出的尾部会在读取和下次追加时截断（与NavStore一致）。
+
+目录结构：
+    <root>/<策略键>/<基金代码>/state.json
+    <root>/<策略键>/<基金代码>/curve.csv
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BacktestCheckpoint:
+    """单基金回测在最后一个回测日结束时的状态"""
+    last_date: str
+    last_nav: float
+    last_daily_return: float
+    cash: float
+    shares: float
+    benchmark_cash: float
+    benchmark_shares: float
+    value_strategy: float
+    value_benchmark: float
+    rows: int = 0
+    curve_bytes: int = 0
+    strategy_state: Optional[Dict[str, Any]] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BacktestCheckpoint':
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+class BacktestCheckpointStore:
+    """
+    回测断点存储
+
+    save整体重写（首次回测或数据变化后重建），append在断点之后追加新行。
+    同一（基金，策略）不应并发写入，不同基金之间互不影响。
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _series_dir(self, fund_code: str, strategy_key: str) -> str:
+        return os.path.join(self.root_dir, strategy_key, str(fund_code))
+
+    def load(self, fund_code: str, strategy_key: str) -> Optional[BacktestCheckpoint]:
+        """读取断点，不存在或损坏时返回None"""
+        path = os.path.join(self._series_dir(fund_code, strategy_key), 'state.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return BacktestCheckpoint.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"回测断点损坏，将重新回测 {path}: {e}")
+            return None
+
+    def read_curve(self, fund_code: str, strategy_key: str) -> Optional[pd.DataFrame]:
+        """读取已提交的完整回测曲线"""
+        checkpoint = self.load(fund_code, strategy_key)
+        if checkpoint is None:
+            return None
+        curve_path = os.path.join(self._series_dir(fund_code, strategy_key), 'curve.csv')
+        try:
+            curve = pd.read_csv(curve_path, nrows=checkpoint.rows, parse_dates=['date'],
+                                dtype={'strategy': object}, float_precision='round_trip', encoding='utf-8')
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            return None
+        return curve if len(curve) == checkpoint.rows else None
+
+    def save(self, fund_code: str, strategy_key: str, checkpoint: BacktestCheckpoint,
+             curve: pd.DataFrame) -> None:
+        """整体重写断点和回测曲线"""
+        series_dir = self._series_dir(fund_code, strategy_key)
+        os.makedirs(series_dir, exist_ok=True)
+        state_path = os.path.join(series_dir, 'state.json')
+        # 先删除旧断点：重写曲线过程中中断时不会留下与曲线不匹配的断点
+        try:
+            os.remove(state_path)
+        except FileNotFoundError:
+            pass
+
+        fd, tmp_path = tempfile.mkstemp(dir=series_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self._encode_rows(curve, header=True))
+        os.replace(tmp_path, os.path.join(series_dir, 'curve.csv'))
+
+        checkpoint.rows = len(curve)
+        checkpoint.curve_bytes = os.path.getsize(os.path.join(series_dir, 'curve.csv'))
+        self._write_state(series_dir, checkpoint)
+
+    def append(self, fund_code: str, strategy_key: str, checkpoint: BacktestCheckpoint,
+               new_rows: pd.DataFrame, previous: BacktestCheckpoint) -> None:
+        """
+        在断点之后追加新行
+
+        Args:
+            checkpoint: 追加后的新断点
+            new_rows: 新增的回测行
+            previous: 追加前读取的断点，用于截断未提交的尾部
+        """
+        series_dir = self._series_dir(fund_code, strategy_key)
+        with open(os.path.join(series_dir, 'curve.csv'), 'r+b') as f:
+            f.truncate(previous.curve_bytes)
+            f.seek(previous.curve_bytes)
+            f.write(self._encode_rows(new_rows, header=False))
+            f.flush()
+            checkpoint.curve_bytes = f.tell()
+        checkpoint.rows = previous.rows + len(new_rows)
+        self._write_state(series_dir, checkpoint)
+
+    def delete(self, fund_code: str, strategy_key: str) -> None:
+        series_dir = self._series_dir(fund_code, strategy_key)
+        for name in ('state.json', 'curve.csv'):
+            try:
+                os.remove(os.path.join(series_dir, name))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _encode_rows(df: pd.DataFrame, header: bool) -> bytes:
+        df = df.assign(date=pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d'))
+        return df.to_csv(index=False, header=header).encode('utf-8')
+
+    def _write_state(self, series_dir: str, checkpoint: BacktestCheckpoint) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=series_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(series_dir, 'state.json'))
+
+
+# 全局回测断点存储
+_checkpoint_store: Optional[BacktestCheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> BacktestCheckpointStore:
+    """
+    获取全局回测断点存储
+
+    目录可通过环境变量 BACKTEST_CHECKPOINT_DIR 指定，默认位于回测模块缓存目录下。
+    """
+    global _checkpoint_store
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'backtest_checkpoints')
+            _checkpoint_store = BacktestCheckpointStore(os.environ.get('BACKTEST_CHECKPOINT_DIR', default_dir))
+        return _checkpoint_store
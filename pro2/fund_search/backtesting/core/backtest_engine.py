@@ -6,7 +6,7 @@
 
 该模块实现了一个完整的基金回测框架，支持单基金和基金组合的定投策略回测。
 核心功能包括：
-1. 从akshare获取基金历史数据
+1. 获取基金历史数据（优先读取本地净值存储，缺失时从akshare增量更新）
 2. 实现基于search_01.py的投资策略（已升级为统一策略引擎）
 3. 单基金定投回测
 4. 基金组合定投回测
@@ -26,10 +26,16 @@
 # 导入必要的库
 import pandas as pd  # 用于数据处理和分析
 import numpy as np   # 用于数值计算
-import matplotlib.pyplot as plt  # 用于数据可视化
-import akshare as ak  # 用于获取金融数据
 import datetime       # 用于日期处理
+import hashlib
+import json
 from services.fund_realtime import FundRealTime  # 导入实时基金数据模块
+from .akshare_data_fetcher import fetch_fund_nav_series, fetch_index_close_series
+from .nav_store import FUND_NAMESPACE, INDEX_NAMESPACE, get_nav_store
+from .backtest_checkpoint import BacktestCheckpoint, get_checkpoint_store
+
+# 沪深300指数代码
+HS300_SYMBOL = "sh000300"
 
 # 导入统一策略引擎适配器
 try:
@@ -46,7 +52,8 @@ class FundBacktest:
     支持单基金和基金组合的回测，可自定义回测时间范围、基准定投金额等参数。
     """
     
-    def __init__(self, base_amount=100, start_date='2020-01-01', end_date=None, initial_cash=None, use_unified_strategy=True):
+    def __init__(self, base_amount=100, start_date='2020-01-01', end_date=None, initial_cash=None, use_unified_strategy=True,
+                 nav_store=None, use_nav_store=True):
         """
         初始化回测引擎
         
@@ -56,6 +63,8 @@ class FundBacktest:
         end_date: str, 回测结束日期，格式为'YYYY-MM-DD'，默认为当前日期
         initial_cash: float, 初始现金，默认为base_amount
         use_unified_strategy: bool, 是否使用统一策略引擎，默认为True
+        nav_store: NavStore, 本地净值存储，默认使用全局存储（get_nav_store）
+        use_nav_store: bool, 是否优先读取本地净值存储，False时每次直接请求akshare
         """
         self.base_amount = base_amount  # 基准定投金额
         self.start_date = start_date  # 回测开始日期
@@ -70,39 +79,47 @@ class FundBacktest:
         if self.use_unified_strategy:
             self._strategy_adapter = StrategyAdapter(base_amount=base_amount)
         
-    def get_fund_history(self, fund_code):
+        # 本地净值存储：优先读取本地数据，缺失或过期时才请求akshare
+        self.nav_store = None
+        if use_nav_store:
+            self.nav_store = nav_store if nav_store is not None else get_nav_store()
+        
+        # 沪深300历史数据缓存，键为(开始日期, 结束日期)，避免组合回测重复拉取
+        self._hs300_cache = {}
+        
+    def get_fund_history(self, fund_code, start_date=None):
         """
-        从akshare获取基金历史数据
+        获取基金历史数据
+        
+        优先读取本地净值存储（本地缺失或过期时增量更新），未启用存储时直接请求akshare
         
         参数：
         fund_code: str, 基金代码
+        start_date: str, 读取的开始日期，默认为回测开始日期
         
         返回：
         pandas.DataFrame, 基金历史数据，包含日期、单位净值、日增长率等字段
         如果获取失败或数据为空，返回None
         """
+        start_date = start_date or self.start_date
         try:
-            # 从akshare获取基金单位净值走势数据
-            fund_hist = ak.fund_open_fund_info_em(symbol=fund_code, indicator="单位净值走势")
+            if self.nav_store is not None:
+                nav_df = self.nav_store.get(FUND_NAMESPACE, fund_code, start_date, self.end_date)
+            else:
+                nav_df = fetch_fund_nav_series(fund_code)
+                # 过滤指定日期范围内的数据
+                nav_df = nav_df[(nav_df['date'] >= start_date) & (nav_df['date'] <= self.end_date)]
             
             # 检查数据是否为空
-            if fund_hist.empty:
+            if nav_df is None or nav_df.empty:
                 print(f"基金 {fund_code} 没有获取到历史数据")
                 return None
             
-            # 将日期字符串转换为datetime类型
-            fund_hist['净值日期'] = pd.to_datetime(fund_hist['净值日期'])
-            
-            # 过滤指定日期范围内的数据
-            fund_hist = fund_hist[(fund_hist['净值日期'] >= self.start_date) & (fund_hist['净值日期'] <= self.end_date)]
-            
-            # 转换数据类型，确保数值型字段正确
-            fund_hist['单位净值'] = pd.to_numeric(fund_hist['单位净值'], errors='coerce')
-            # 将日增长率从百分比字符串转换为小数
-            fund_hist['日增长率'] = pd.to_numeric(fund_hist['日增长率'].astype(str).str.rstrip('%'), errors='coerce') / 100
-            
-            # 重置索引，确保索引连续
-            fund_hist = fund_hist.reset_index(drop=True)
+            fund_hist = pd.DataFrame({
+                '净值日期': nav_df['date'].to_numpy(),
+                '单位净值': nav_df['nav'].to_numpy(),
+                '日增长率': nav_df['daily_return'].to_numpy()
+            })
             
             return fund_hist
         except Exception as e:
@@ -112,35 +129,38 @@ class FundBacktest:
     
     def get_hs300_history(self):
         """
-        从akshare获取沪深300指数历史数据
+        获取沪深300指数历史数据
+        
+        优先读取本地净值存储，未启用存储时直接请求akshare
         
         返回：
         pandas.DataFrame, 沪深300指数历史数据，包含日期、收盘价、日增长率等字段
         如果获取失败或数据为空，返回None
         """
+        cache_key = (self.start_date, self.end_date)
+        if cache_key in self._hs300_cache:
+            return self._hs300_cache[cache_key].copy()
+        
         try:
-            # 从akshare获取沪深300指数历史数据
             # 沪深300指数代码为 "000300"，使用股票指数数据接口
-            hs300_hist = ak.stock_zh_index_daily(symbol="sh000300")
+            if self.nav_store is not None:
+                hs300_hist = self.nav_store.get(INDEX_NAMESPACE, HS300_SYMBOL, self.start_date, self.end_date)
+            else:
+                hs300_hist = fetch_index_close_series(HS300_SYMBOL)
+                # 过滤指定日期范围内的数据
+                hs300_hist = hs300_hist[(hs300_hist['date'] >= self.start_date) & (hs300_hist['date'] <= self.end_date)]
             
             # 检查数据是否为空
-            if hs300_hist.empty:
+            if hs300_hist is None or hs300_hist.empty:
                 print("沪深300指数没有获取到历史数据")
                 return None
             
-            # 将日期字符串转换为datetime类型
-            hs300_hist['date'] = pd.to_datetime(hs300_hist['date'])
-            
-            # 过滤指定日期范围内的数据
-            hs300_hist = hs300_hist[(hs300_hist['date'] >= self.start_date) & (hs300_hist['date'] <= self.end_date)]
-            
             # 计算日增长率（基于收盘价）
-            hs300_hist['pct_change'] = hs300_hist['close'].pct_change().fillna(0)
-            
-            # 重置索引，确保索引连续
             hs300_hist = hs300_hist.reset_index(drop=True)
+            hs300_hist['pct_change'] = hs300_hist['close'].pct_change().fillna(0)
             
-            return hs300_hist
+            self._hs300_cache[cache_key] = hs300_hist
+            return hs300_hist.copy()
         except Exception as e:
             # 捕获并打印异常信息
             print(f"获取沪深300指数历史数据时出错: {e}")
@@ -355,91 +375,227 @@ class FundBacktest:
         """
         # 获取基金历史数据
         fund_hist = self.get_fund_history(fund_code)
-        
+
         # 检查数据是否足够进行回测（至少需要2天数据）
         if fund_hist is None or len(fund_hist) < 2:
             print(f"基金 {fund_code} 数据不足，无法进行回测")
             return None
-        
-        # 初始化回测变量
-        cash = self.initial_cash  # 初始现金
-        shares = 0  # 初始基金份额
-        total_asset = []  # 存储每日总资产数据
-        benchmark_asset = []  # 存储基准策略每日总资产数据
-        benchmark_cash = self.initial_cash  # 基准策略初始现金
-        benchmark_shares = 0  # 基准策略初始份额
-        
-        # 模拟每日交易，从第二天开始（需要前一天的数据）
-        for i in range(1, len(fund_hist)):
-            today = fund_hist.iloc[i]  # 今日数据
-            yesterday = fund_hist.iloc[i-1]  # 昨日数据
-            
-            today_nav = today['单位净值']  # 今日单位净值
-            today_return = today['日增长率']  # 今日收益率（小数）
-            prev_day_return = yesterday['日增长率']  # 昨日收益率（小数）
-            
-            # 获取投资策略建议
-            status_label, is_buy, redeem_amount, _, _, _, buy_multiplier = self.get_investment_strategy(today_return, prev_day_return)
-            
-            # 执行买入操作
-            if is_buy:
-                # 计算买入金额 = 基准金额 * 买入乘数
-                buy_amount = self.base_amount * buy_multiplier
-                # 第一天允许现金不足，其他天必须有足够现金
-                if cash >= buy_amount or i == 1:
-                    buy_shares = buy_amount / today_nav  # 计算可购买份额
-                    shares += buy_shares  # 更新总份额
-                    cash -= buy_amount  # 更新剩余现金
-            
-            # 执行赎回操作
-            if redeem_amount > 0 and shares > 0:
-                redeem_shares = redeem_amount / today_nav  # 计算赎回份额
-                shares = max(0, shares - redeem_shares)  # 更新剩余份额（不允许为负）
-                cash += redeem_amount  # 更新剩余现金
-            
-            # 计算当前总资产（现金 + 基金市值）
-            current_asset = cash + shares * today_nav
-            # 记录每日资产数据
-            total_asset.append({
-                'date': today['净值日期'],  # 日期
-                'total_value': current_asset,  # 总资产
-                'cash': cash,  # 剩余现金
-                'shares': shares,  # 持有份额
-                'nav': today_nav,  # 单位净值
-                'strategy': status_label  # 策略标签
-            })
-            
-            # 基准策略：固定金额定投（每天定投base_amount）
-            benchmark_buy_amount = self.base_amount
-            if benchmark_cash >= benchmark_buy_amount or i == 1:
-                benchmark_buy_shares = benchmark_buy_amount / today_nav
-                benchmark_shares += benchmark_buy_shares
-                benchmark_cash -= benchmark_buy_amount
-            # 计算基准策略当前总资产
-            benchmark_current_asset = benchmark_cash + benchmark_shares * today_nav
-            # 记录基准策略每日资产数据
-            benchmark_asset.append({
-                'date': today['净值日期'],
-                'total_value': benchmark_current_asset
-            })
-        
-        # 将资产数据转换为DataFrame格式
-        result_df = pd.DataFrame(total_asset)
-        benchmark_df = pd.DataFrame(benchmark_asset)
-        
-        # 合并策略和基准的结果，添加后缀区分
-        result_df = result_df.merge(benchmark_df, on='date', suffixes=('_strategy', '_benchmark'))
-        
-        # 计算每日收益率（百分比变化）
-        result_df['daily_return_strategy'] = result_df['total_value_strategy'].pct_change().fillna(0)
-        result_df['daily_return_benchmark'] = result_df['total_value_benchmark'].pct_change().fillna(0)
-        
+
+        return self.backtest_from_history(fund_hist)
+
+    def backtest_from_history(self, fund_hist):
+        """
+        基于已加载的历史数据执行单基金回测（数组化执行内核）
+
+        将净值、日增长率一次性取出为NumPy数组：策略信号按整列计算，
+        基准定投完全向量化，策略现金/份额只做一次数组遍历，最后一次性构建结果DataFrame。
+        输出列与逐日回测完全一致。
+
+        参数：
+        fund_hist: pandas.DataFrame, 包含'净值日期'、'单位净值'、'日增长率'列的历史数据
+
+        返回：
+        pandas.DataFrame, 回测结果数据；数据不足2天时返回None
+        """
+        if fund_hist is None or len(fund_hist) < 2:
+            return None
+        result_df, _ = self._run_backtest(fund_hist)
+        return result_df
+
+    def _run_backtest(self, fund_hist, checkpoint=None):
+        """
+        回测执行内核，可从断点继续
+
+        fund_hist的第一行只提供前一日收益率，从第二行开始回测。
+        从断点继续时fund_hist的第一行是断点的最后一个回测日，现金、份额和基准状态取自断点，
+        运算顺序与完整回测相同，因此追加的结果与从头回测逐位一致。
+
+        返回：
+        tuple: (回测结果DataFrame, 最后一个回测日的断点)
+        """
+        dates = fund_hist['净值日期'].to_numpy()[1:]
+        navs = fund_hist['单位净值'].to_numpy(dtype=float)[1:]
+        daily_returns = fund_hist['日增长率'].to_numpy(dtype=float)
+        today_returns = daily_returns[1:]
+        prev_returns = daily_returns[:-1]
+
+        if checkpoint is None:
+            cash0, shares0 = self.initial_cash, 0.0
+            benchmark_cash0, benchmark_shares0 = self.initial_cash, 0.0
+        else:
+            cash0, shares0 = checkpoint.cash, checkpoint.shares
+            benchmark_cash0, benchmark_shares0 = checkpoint.benchmark_cash, checkpoint.benchmark_shares
+
+        # 1. 策略信号（整列计算）
+        labels, is_buy, redeem_amounts, buy_multipliers = self._strategy_signal_arrays(today_returns, prev_returns)
+        buy_amounts = np.where(is_buy, self.base_amount * buy_multipliers, 0.0)
+
+        # 2. 策略现金/份额（受现金约束，路径相关，单次数组遍历）
+        cash, shares = simulate_cash_gated_trades(navs, buy_amounts, redeem_amounts, cash0,
+                                                  initial_shares=shares0, first_day=checkpoint is None)
+        total_value_strategy = cash + shares * navs
+
+        # 3. 基准：固定金额定投（完全向量化）
+        benchmark_cash, benchmark_shares = fixed_amount_benchmark_state(
+            navs, self.base_amount, benchmark_cash0, initial_shares=benchmark_shares0, started=checkpoint is not None)
+        total_value_benchmark = benchmark_cash + benchmark_shares * navs
+
+        result_df = pd.DataFrame({
+            'date': dates,
+            'total_value_strategy': total_value_strategy,
+            'cash': cash,
+            'shares': shares,
+            'nav': navs,
+            'strategy': labels,
+            'total_value_benchmark': total_value_benchmark
+        })
+
+        # 计算每日收益率（百分比变化），从断点继续时以断点日总资产为第一天的前值
+        for column, value_column in (('daily_return_strategy', 'total_value_strategy'),
+                                     ('daily_return_benchmark', 'total_value_benchmark')):
+            values = result_df[value_column]
+            if checkpoint is not None:
+                prev_value = getattr(checkpoint, value_column.replace('total_', ''))
+                values = pd.concat([pd.Series([prev_value]), values], ignore_index=True)
+            result_df[column] = values.pct_change().fillna(0).to_numpy()[-len(result_df):]
+
+        new_checkpoint = BacktestCheckpoint(
+            last_date=pd.Timestamp(dates[-1]).strftime('%Y-%m-%d'),
+            last_nav=float(navs[-1]),
+            last_daily_return=float(daily_returns[-1]),
+            cash=float(cash[-1]),
+            shares=float(shares[-1]),
+            benchmark_cash=float(benchmark_cash[-1]),
+            benchmark_shares=float(benchmark_shares[-1]),
+            value_strategy=float(total_value_strategy[-1]),
+            value_benchmark=float(total_value_benchmark[-1]),
+            strategy_state=self._get_strategy_state(),
+            params=self._checkpoint_params(),
+        )
+        return result_df, new_checkpoint
+
+    def _checkpoint_params(self):
+        """影响回测结果的参数，参数不同的回测使用不同的断点"""
+        return {
+            'strategy': 'unified' if self._strategy_adapter is not None else 'legacy',
+            'base_amount': self.base_amount,
+            'initial_cash': self.initial_cash,
+            'start_date': str(self.start_date),
+        }
+
+    def checkpoint_key(self):
+        """
+        断点存储中的策略键（策略类型 + 参数哈希）
+        """
+        params = self._checkpoint_params()
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        return f"{params['strategy']}-{digest}"
+
+    def _supports_checkpoint(self):
+        """
+        原始策略无状态，可以直接从断点继续；统一策略引擎带有止损、趋势窗口等状态，
+        只有适配器提供get_state/set_state时才能保存和恢复
+        """
+        adapter = self._strategy_adapter
+        return adapter is None or (hasattr(adapter, 'get_state') and hasattr(adapter, 'set_state'))
+
+    def _get_strategy_state(self):
+        if self._strategy_adapter is not None and hasattr(self._strategy_adapter, 'get_state'):
+            return self._strategy_adapter.get_state()
+        return None
+
+    def extend_backtest(self, fund_code, checkpoint_store=None):
+        """
+        增量回测：从已保存的断点继续，只计算断点之后的新交易日
+
+        没有断点、断点之前的净值被修正或策略状态无法恢复时，从开始日期完整回测并重建断点。
+        回测曲线和断点保存在断点存储中，完整曲线可通过checkpoint_store.read_curve读取。
+
+        参数：
+        fund_code: str, 基金代码
+        checkpoint_store: BacktestCheckpointStore, 断点存储，默认使用全局存储
+
+        返回：
+        pandas.DataFrame, 本次新计算的回测行（完整回测时为整条曲线，没有新数据时为空表）；
+        数据不足时返回None
+        """
+        store = checkpoint_store if checkpoint_store is not None else get_checkpoint_store()
+        key = self.checkpoint_key()
+        checkpoint = store.load(fund_code, key) if self._supports_checkpoint() else None
+
+        if checkpoint is not None:
+            fund_hist = self.get_fund_history(fund_code, start_date=checkpoint.last_date)
+            if fund_hist is not None and self._checkpoint_matches(fund_hist, checkpoint):
+                if len(fund_hist) < 2:
+                    return self._empty_result()
+                if self._strategy_adapter is not None:
+                    self._strategy_adapter.set_state(checkpoint.strategy_state)
+                result_df, new_checkpoint = self._run_backtest(fund_hist, checkpoint)
+                store.append(fund_code, key, new_checkpoint, result_df, checkpoint)
+                return result_df
+            print(f"基金 {fund_code} 的回测断点与净值数据不一致，重新完整回测")
+
+        fund_hist = self.get_fund_history(fund_code)
+        if fund_hist is None or len(fund_hist) < 2:
+            print(f"基金 {fund_code} 数据不足，无法进行回测")
+            return None
+
+        self.reset_strategy()
+        result_df, new_checkpoint = self._run_backtest(fund_hist)
+        if self._supports_checkpoint():
+            store.save(fund_code, key, new_checkpoint, result_df)
         return result_df
+
+    @staticmethod
+    def _checkpoint_matches(fund_hist, checkpoint):
+        """断点日的净值和日增长率与当前数据一致，才能从断点继续"""
+        first = fund_hist.iloc[0]
+        if pd.Timestamp(first['净值日期']).strftime('%Y-%m-%d') != checkpoint.last_date:
+            return False
+        return np.array_equal(
+            np.array([first['单位净值'], first['日增长率']], dtype=float),
+            np.array([checkpoint.last_nav, checkpoint.last_daily_return], dtype=float),
+            equal_nan=True,
+        )
+
+    @staticmethod
+    def _empty_result():
+        return pd.DataFrame(columns=['date', 'total_value_strategy', 'cash', 'shares', 'nav', 'strategy',
+                                     'total_value_benchmark', 'daily_return_strategy', 'daily_return_benchmark'])
+
+    def _strategy_signal_arrays(self, today_returns, prev_returns):
+        """
+        批量计算策略信号
+
+        原始策略逻辑无状态，直接使用向量化规则；统一策略引擎带有状态
+        （止损、趋势窗口），只能按日顺序调用，但结果同样汇总为数组。
+
+        返回：
+        tuple: (状态标签数组, 是否买入数组, 赎回金额数组, 买入乘数数组)
+        """
+        if not (self.use_unified_strategy and self._strategy_adapter is not None):
+            return legacy_strategy_arrays(today_returns, prev_returns)
+
+        n = len(today_returns)
+        labels = np.empty(n, dtype=object)
+        is_buy = np.zeros(n, dtype=bool)
+        redeem_amounts = np.zeros(n, dtype=float)
+        buy_multipliers = np.zeros(n, dtype=float)
+        for i, (today_return, prev_day_return) in enumerate(zip(today_returns.tolist(), prev_returns.tolist())):
+            status_label, buy, redeem_amount, _, _, _, buy_multiplier = self.get_investment_strategy(today_return, prev_day_return)
+            labels[i] = status_label
+            is_buy[i] = buy
+            redeem_amounts[i] = redeem_amount
+            buy_multipliers[i] = buy_multiplier
+        return labels, is_buy, redeem_amounts, buy_multipliers
     
     def backtest_portfolio(self, fund_codes, weights=None):
         """
         回测基金组合的定投策略
         
+        所有基金的历史数据先对齐为一个（日期 × 基金）矩阵，策略对所有基金列同时执行，
+        沪深300基准用累积乘积一次算出。
+        
         参数：
         fund_codes: list, 基金代码列表
         weights: list, 基金权重列表，默认为等权重
@@ -459,99 +615,64 @@ class FundBacktest:
         
         # 确保权重和为1（归一化）
         weights = np.array(weights) / np.sum(weights)
+        weight_by_code = dict(zip(fund_codes, weights))
         
-        # 回测每只基金，保存有效的回测结果
-        fund_results = {}
+        # 获取每只基金的历史数据，保留数据足够的基金
+        fund_histories = {}
         for fund_code in fund_codes:
-            result = self.backtest_single_fund(fund_code)
-            if result is not None:
-                fund_results[fund_code] = result
+            fund_hist = self.get_fund_history(fund_code)
+            if fund_hist is None or len(fund_hist) < 2:
+                print(f"基金 {fund_code} 数据不足，无法进行回测")
+                continue
+            fund_histories[fund_code] = fund_hist
         
         # 检查是否有有效的回测结果
-        if not fund_results:
+        if not fund_histories:
             print("没有基金数据可以进行组合回测")
             return None
         
-        # 合并所有基金的策略结果
-        dates = None  # 基准日期序列
-        portfolio_asset = []  # 组合策略总资产
+        # 所有基金在统一日期轴上同时回测
+        strategy_values, benchmark_values = self.backtest_fund_matrix(fund_histories)
+        codes = list(strategy_values.columns)
+        fund_weights = np.array([weight_by_code[code] for code in codes])
+        first_fund_dates = strategy_values.index[strategy_values[codes[0]].notna() | benchmark_values[codes[0]].notna()]
         
         # 首先获取沪深300指数历史数据作为基准（优先使用）
         hs300_hist = self.get_hs300_history()
         
-        # 获取所有基金的日期范围
-        all_fund_dates = set()
-        for fund_code, result_df in fund_results.items():
-            all_fund_dates.update(result_df['date'].tolist())
-        
         if hs300_hist is not None:
             # 使用沪深300指数和基金数据的交集日期作为基准日期序列
             print("使用沪深300指数日期作为基准日期序列")
-            hs300_dates = set(hs300_hist['date'].tolist())
-            # 计算日期交集
-            common_dates = sorted(list(all_fund_dates.intersection(hs300_dates)))
+            common_dates = strategy_values.index.intersection(pd.DatetimeIndex(hs300_hist['date'])).sort_values()
             
-            if common_dates:
-                dates = pd.to_datetime(common_dates)
+            if len(common_dates) > 0:
+                dates = common_dates
             else:
                 # 如果没有交集，回退使用第一只基金的日期
                 print("沪深300指数与基金数据无日期交集，回退使用第一只基金日期作为基准")
-                for i, (fund_code, result_df) in enumerate(fund_results.items()):
-                    if i == 0:
-                        dates = result_df['date']
-                        break
+                dates = first_fund_dates
         else:
             # 沪深300数据获取失败，回退使用第一只基金的日期作为基准
             print("获取沪深300指数日期失败，回退使用第一只基金日期作为基准")
-            for i, (fund_code, result_df) in enumerate(fund_results.items()):
-                if i == 0:
-                    # 第一只基金作为基准日期序列
-                    dates = result_df['date']
-                    break
-        
-        # 基于基准日期序列计算组合资产
-        for i, (fund_code, result_df) in enumerate(fund_results.items()):
-            # 对齐基金的日期序列到基准日期
-            aligned_df = result_df.set_index('date').reindex(dates).reset_index()
-            
-            if i == 0:
-                # 初始化组合资产（基金资产 * 权重）
-                portfolio_asset = aligned_df['total_value_strategy'].fillna(0).values * weights[i]
-            else:
-                # 累加组合资产（考虑权重）
-                portfolio_asset += aligned_df['total_value_strategy'].fillna(0).values * weights[i]
+            dates = first_fund_dates
+        
+        # 组合资产 = 对齐后的各基金资产矩阵 × 权重向量
+        portfolio_asset = strategy_values.reindex(dates).fillna(0).to_numpy() @ fund_weights
         
         if hs300_hist is None:
             # 如果获取沪深300数据失败，使用原有的基金基准方法
             print("获取沪深300指数数据失败，使用基金基准方法")
-            # 重新初始化基准资产
-            benchmark_asset = []
-            for i, (fund_code, result_df) in enumerate(fund_results.items()):
-                if i == 0:
-                    benchmark_asset = result_df['total_value_benchmark'].values * weights[i]
-                else:
-                    aligned_df = result_df.set_index('date').reindex(dates).reset_index()
-                    benchmark_asset += aligned_df['total_value_benchmark'].fillna(0).values * weights[i]
+            benchmark_asset = benchmark_values.reindex(dates).fillna(0).to_numpy() @ fund_weights
         else:
-            # 使用沪深300指数作为基准
+            # 使用沪深300指数作为基准：基准资产 = 期初资产 × 沪深300累积净值
             print("使用沪深300指数作为回测基准")
-            # 对齐沪深300指数日期到基金组合日期
-            hs300_aligned = hs300_hist.set_index('date').reindex(dates).reset_index()
-            
-            # 初始化基准资产（与策略初始资产相同）
-            initial_asset = portfolio_asset[0]
-            # 计算基于沪深300指数的基准资产
-            hs300_returns = hs300_aligned['pct_change'].fillna(0)
-            benchmark_asset = [initial_asset]
-            
-            # 基于沪深300指数计算基准资产变化
-            for i in range(1, len(hs300_returns)):
-                # 基准资产 = 前一日资产 * (1 + 沪深300日收益率)
-                benchmark_asset.append(benchmark_asset[i-1] * (1 + hs300_returns.iloc[i]))
+            hs300_returns = hs300_hist.drop_duplicates('date').set_index('date')['pct_change'].reindex(dates).fillna(0).to_numpy(dtype=float, copy=True)
+            hs300_returns[0] = 0
+            benchmark_asset = portfolio_asset[0] * np.cumprod(1 + hs300_returns)
         
         # 创建组合回测结果DataFrame
         portfolio_result = pd.DataFrame({
-            'date': dates,
+            'date': np.asarray(dates),
             'total_value_strategy': portfolio_asset,
             'total_value_benchmark': benchmark_asset
         })
@@ -561,6 +682,63 @@ class FundBacktest:
         portfolio_result['daily_return_benchmark'] = portfolio_result['total_value_benchmark'].pct_change().fillna(0)
         
         return portfolio_result
+
+    def backtest_fund_matrix(self, fund_histories):
+        """
+        在统一日期轴上同时回测多只基金
+        
+        各基金历史数据按日期合并为（日期 × 基金）矩阵，每只基金仍以自身的上一个交易日
+        计算前一日收益率、以自身第二个交易日作为首个回测日，因此每一列与
+        backtest_from_history的单基金结果一致。
+        
+        参数：
+        fund_histories: dict, {基金代码: get_fund_history格式的DataFrame}
+        
+        返回：
+        tuple: (策略总资产宽表, 基准总资产宽表)，索引为日期、列为基金代码，
+               基金在该日无回测数据时为NaN
+        """
+        frames = {
+            code: hist.drop_duplicates('净值日期', keep='last').set_index('净值日期')
+            for code, hist in fund_histories.items()
+        }
+        nav_df = pd.DataFrame({code: frame['单位净值'] for code, frame in frames.items()}).sort_index()
+        dates = nav_df.index
+        present = np.column_stack([dates.isin(frame.index) for frame in frames.values()])
+        navs = nav_df.to_numpy(dtype=float)
+        returns = pd.DataFrame({code: frame['日增长率'] for code, frame in frames.items()}).reindex(dates).to_numpy(dtype=float)
+        
+        # 每只基金上一个有数据的行号，作为前一日收益率来源
+        n_dates, n_funds = navs.shape
+        row_idx = np.where(present, np.arange(n_dates)[:, None], -1)
+        last_idx = np.maximum.accumulate(row_idx, axis=0)
+        prev_idx = np.vstack([np.full((1, n_funds), -1), last_idx[:-1]])
+        active = present & (prev_idx >= 0)
+        prev_returns = np.where(active, np.take_along_axis(returns, np.maximum(prev_idx, 0), axis=0), np.nan)
+        
+        # 策略信号
+        if self.use_unified_strategy and self._strategy_adapter is not None:
+            is_buy = np.zeros(navs.shape, dtype=bool)
+            redeem_amounts = np.zeros(navs.shape, dtype=float)
+            buy_multipliers = np.zeros(navs.shape, dtype=float)
+            for j in range(n_funds):
+                rows = active[:, j]
+                _, is_buy[rows, j], redeem_amounts[rows, j], buy_multipliers[rows, j] = \
+                    self._strategy_signal_arrays(returns[rows, j], prev_returns[rows, j])
+        else:
+            _, is_buy, redeem_amounts, buy_multipliers = legacy_strategy_arrays(returns, prev_returns)
+        buy_amounts = np.where(active & is_buy, self.base_amount * buy_multipliers, 0.0)
+        redeem_amounts = np.where(active, redeem_amounts, 0.0)
+        
+        cash, shares = simulate_cash_gated_trades_matrix(navs, buy_amounts, redeem_amounts, self.initial_cash, active)
+        total_value_strategy = np.where(active, cash + shares * navs, np.nan)
+        total_value_benchmark = np.where(
+            active, fixed_amount_benchmark_values(navs, self.base_amount, self.initial_cash, active), np.nan)
+        
+        keep = active.any(axis=1)
+        strategy_values = pd.DataFrame(total_value_strategy[keep], index=dates[keep], columns=nav_df.columns)
+        benchmark_values = pd.DataFrame(total_value_benchmark[keep], index=dates[keep], columns=nav_df.columns)
+        return strategy_values, benchmark_values
     
     def calculate_performance_metrics(self, result_df):
         """
@@ -748,110 +926,30 @@ class FundBacktest:
         
         print(f'{"="*80}\n')
         
-        # 绘制可视化图表
+        # 绘制可视化图表（由图表渲染服务在后台进程中渲染，相同结果直接复用缓存图片）
         try:
-            # 设置中文显示，解决中文乱码问题
-            # 设置matplotlib中文字体支持（Windows优先使用微软雅黑）
-            plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS', 'DejaVu Sans']
-            plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
-            
-            # 创建三个子图，垂直排列
-            fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 15))
-            # 设置图表标题
-            fig.suptitle(f'基金定投策略回测结果' + (f' - {fund_code}' if fund_code else ' - 组合'), fontsize=16)
-            
-            # 第一个子图：总资产价值趋势对比
-            ax1.plot(result_df['date'], result_df['total_value_strategy'], label='策略总资产', color='blue')
-            ax1.plot(result_df['date'], result_df['total_value_benchmark'], label='基准总资产', color='red')
-            ax1.set_xlabel('日期')
-            ax1.set_ylabel('总资产价值 (元)')
-            ax1.set_title('总资产价值趋势对比')
-            ax1.legend()  # 显示图例
-            ax1.grid(True)  # 显示网格线
-            
-            # 第二个子图：每日收益率对比
-            ax2.plot(result_df['date'], result_df['daily_return_strategy'] * 100, label='策略日收益率', color='blue', alpha=0.6)
-            ax2.plot(result_df['date'], result_df['daily_return_benchmark'] * 100, label='基准日收益率', color='red', alpha=0.6)
-            ax2.set_xlabel('日期')
-            ax2.set_ylabel('日收益率 (%)')
-            ax2.set_title('每日收益率对比')
-            ax2.legend()
-            ax2.grid(True)
-            
-            # 第三个子图：绩效指标对比（柱状图）
-            if metrics:
-                # 准备指标数据
-                metrics_names = ['总收益率', '年化收益率', '最大回撤', '夏普比率', '胜率', '年化波动率', 'Alpha', 'Beta', '索提诺比率', '卡玛比率']
-                # 策略指标值
-                strategy_values = [
-                    metrics['总收益率_strategy'], metrics['年化收益率_strategy'], metrics['最大回撤_strategy'],
-                    metrics['夏普比率_strategy'], metrics['胜率_strategy'], metrics['年化波动率_strategy'],
-                    metrics['Alpha_strategy'], metrics['Beta_strategy'], metrics['索提诺比率_strategy'], metrics['卡玛比率_strategy']
-                ]
-                # 基准指标值（Alpha基准为0，Beta基准为1）
-                benchmark_values = [
-                    metrics['总收益率_benchmark'], metrics['年化收益率_benchmark'], metrics['最大回撤_benchmark'],
-                    metrics['夏普比率_benchmark'], metrics['胜率_benchmark'], metrics['年化波动率_benchmark'],
-                    0, 1, metrics['索提诺比率_benchmark'], metrics['卡玛比率_benchmark']
-                ]
-                
-                # 设置柱状图参数
-                bar_width = 0.35
-                index = np.arange(len(metrics_names))
-                
-                # 绘制策略和基准的柱状图
-                bars1 = ax3.bar(index - bar_width/2, strategy_values, bar_width, label='策略', color='blue')
-                bars2 = ax3.bar(index + bar_width/2, benchmark_values, bar_width, label='基准', color='red')
-                
-                # 设置图表属性
-                ax3.set_xlabel('绩效指标')
-                ax3.set_ylabel('指标值')
-                ax3.set_title('绩效指标对比')
-                ax3.set_xticks(index)  # 设置X轴刻度位置
-                ax3.set_xticklabels(metrics_names, rotation=45, ha='right')  # 设置X轴标签，旋转45度
-                ax3.legend()
-                ax3.grid(True, axis='y')  # 只显示Y轴网格线
-                
-                # 为柱状图添加数值标签
-                def add_labels(bars):
-                    """为柱状图添加数值标签"""
-                    for bar in bars:
-                        height = bar.get_height()
-                        # 根据指标类型选择合适的格式（百分比或小数）
-                        if '%' in ax3.get_ylabel() or metrics_names[bars.index(bar)] in ['总收益率', '年化收益率', '最大回撤', '胜率']:
-                            label = f'{height:.2%}'  # 百分比格式
-                        else:
-                            label = f'{height:.2f}'  # 小数格式
-                        # 添加标签
-                        ax3.annotate(label,
-                                   xy=(bar.get_x() + bar.get_width()/2, height),
-                                   xytext=(0, 3),  # 3点垂直偏移
-                                   textcoords="offset points",
-                                   ha='center', va='bottom')
-                
-                # 为两个柱状图添加标签
-                add_labels(bars1)
-                add_labels(bars2)
-            
-            # 调整图表布局，避免标签重叠
-            plt.tight_layout()
-            plt.subplots_adjust(top=0.9, hspace=0.3)  # 调整顶部和子图间距
+            from services.chart_render_service import get_chart_render_service
+            payload = {
+                'title': f'基金定投策略回测结果' + (f' - {fund_code}' if fund_code else ' - 组合'),
+                'dates': pd.to_datetime(result_df['date']).dt.strftime('%Y-%m-%d').tolist(),
+                'total_value_strategy': result_df['total_value_strategy'].astype(float).tolist(),
+                'total_value_benchmark': result_df['total_value_benchmark'].astype(float).tolist(),
+                'daily_return_strategy': result_df['daily_return_strategy'].astype(float).tolist(),
+                'daily_return_benchmark': result_df['daily_return_benchmark'].astype(float).tolist(),
+                'metrics': {k: float(v) for k, v in metrics.items()} if metrics else {}
+            }
+            image = get_chart_render_service().render('backtest', payload, dpi=300)
             
             # 保存图表到文件
             chart_filename = f"backtest_chart_{fund_code if fund_code else 'portfolio'}.png"
-            plt.savefig(chart_filename, dpi=300, bbox_inches='tight')
+            with open(chart_filename, 'wb') as f:
+                f.write(image)
             print(f"图表已保存到文件: {chart_filename}")
             
-            # 尝试显示图表（在有图形界面的环境中）
-            try:
-                plt.show()
-            except:
-                print("图表已保存但无法显示（可能是因为没有图形界面）")
-            
         except Exception as e:
             # 捕获并打印绘图异常
             print(f"绘制图表时出错: {e}")
-            print("可能是因为没有可用的图形界面或者中文字体缺失")
+            print("可能是因为图表渲染服务不可用或者中文字体缺失")
             print("将只显示绩效指标数据")
     
     def visualize_portfolio(self, result_df):
@@ -866,6 +964,285 @@ class FundBacktest:
         self.visualize_backtest(result_df)
 
 
+def draw_backtest_chart(payload):
+    """
+    绘制回测结果图表（图表渲染服务的渲染函数）
+    
+    三个子图垂直排列：总资产价值趋势对比、每日收益率对比、绩效指标对比
+    
+    参数：
+    payload: dict, 包含title、dates、总资产和日收益率序列以及metrics（calculate_performance_metrics的结果）
+    
+    返回：
+    matplotlib.figure.Figure
+    """
+    from matplotlib.figure import Figure
+    
+    dates = pd.to_datetime(pd.Series(payload['dates']))
+    metrics = payload.get('metrics') or {}
+    
+    # 创建三个子图，垂直排列
+    fig = Figure(figsize=(12, 15))
+    ax1, ax2, ax3 = fig.subplots(3, 1)
+    fig.suptitle(payload['title'], fontsize=16)
+    
+    # 第一个子图：总资产价值趋势对比
+    ax1.plot(dates, payload['total_value_strategy'], label='策略总资产', color='blue')
+    ax1.plot(dates, payload['total_value_benchmark'], label='基准总资产', color='red')
+    ax1.set_xlabel('日期')
+    ax1.set_ylabel('总资产价值 (元)')
+    ax1.set_title('总资产价值趋势对比')
+    ax1.legend()  # 显示图例
+    ax1.grid(True)  # 显示网格线
+    
+    # 第二个子图：每日收益率对比
+    ax2.plot(dates, np.asarray(payload['daily_return_strategy']) * 100, label='策略日收益率', color='blue', alpha=0.6)
+    ax2.plot(dates, np.asarray(payload['daily_return_benchmark']) * 100, label='基准日收益率', color='red', alpha=0.6)
+    ax2.set_xlabel('日期')
+    ax2.set_ylabel('日收益率 (%)')
+    ax2.set_title('每日收益率对比')
+    ax2.legend()
+    ax2.grid(True)
+    
+    # 第三个子图：绩效指标对比（柱状图）
+    if metrics:
+        metrics_names = ['总收益率', '年化收益率', '最大回撤', '夏普比率', '胜率', '年化波动率', 'Alpha', 'Beta', '索提诺比率', '卡玛比率']
+        percent_metrics = {'总收益率', '年化收益率', '最大回撤', '胜率'}
+        # 策略指标值
+        strategy_values = [
+            metrics['总收益率_strategy'], metrics['年化收益率_strategy'], metrics['最大回撤_strategy'],
+            metrics['夏普比率_strategy'], metrics['胜率_strategy'], metrics['年化波动率_strategy'],
+            metrics['Alpha_strategy'], metrics['Beta_strategy'], metrics['索提诺比率_strategy'], metrics['卡玛比率_strategy']
+        ]
+        # 基准指标值（Alpha基准为0，Beta基准为1）
+        benchmark_values = [
+            metrics['总收益率_benchmark'], metrics['年化收益率_benchmark'], metrics['最大回撤_benchmark'],
+            metrics['夏普比率_benchmark'], metrics['胜率_benchmark'], metrics['年化波动率_benchmark'],
+            0, 1, metrics['索提诺比率_benchmark'], metrics['卡玛比率_benchmark']
+        ]
+        
+        bar_width = 0.35
+        index = np.arange(len(metrics_names))
+        bars1 = ax3.bar(index - bar_width/2, strategy_values, bar_width, label='策略', color='blue')
+        bars2 = ax3.bar(index + bar_width/2, benchmark_values, bar_width, label='基准', color='red')
+        
+        ax3.set_xlabel('绩效指标')
+        ax3.set_ylabel('指标值')
+        ax3.set_title('绩效指标对比')
+        ax3.set_xticks(index)  # 设置X轴刻度位置
+        ax3.set_xticklabels(metrics_names, rotation=45, ha='right')  # 设置X轴标签，旋转45度
+        ax3.legend()
+        ax3.grid(True, axis='y')  # 只显示Y轴网格线
+        
+        # 为柱状图添加数值标签（百分比类指标用百分比格式）
+        for bars in (bars1, bars2):
+            for name, bar in zip(metrics_names, bars):
+                height = bar.get_height()
+                label = f'{height:.2%}' if name in percent_metrics else f'{height:.2f}'
+                ax3.annotate(label,
+                             xy=(bar.get_x() + bar.get_width()/2, height),
+                             xytext=(0, 3),  # 3点垂直偏移
+                             textcoords="offset points",
+                             ha='center', va='bottom')
+    
+    # 调整图表布局，避免标签重叠
+    fig.tight_layout()
+    fig.subplots_adjust(top=0.9, hspace=0.3)  # 调整顶部和子图间距
+    return fig
+
+
+# 原始策略规则表：(状态标签, 是否买入, 赎回金额, 买入乘数)，顺序与_get_legacy_strategy的分支一致
+LEGACY_STRATEGY_TABLE = [
+    ("反转涨", True, 0, 1.5),
+    ("反转跌", False, 30, 1.0),
+    ("持续涨增强", True, 0, 1.2),
+    ("持续涨减弱", True, 0, 1.0),
+    ("持续跌减弱", True, 0, 1.5),
+    ("持续跌增强", True, 0, 2.0),
+    ("转势持平", True, 0, 1.0),
+    ("转势休整", True, 0, 1.2),
+    ("突破上涨", True, 0, 1.5),
+    ("突破下跌", True, 0, 1.5),
+    ("震荡持平", True, 0, 1.0),
+]
+
+
+def legacy_strategy_arrays(today_returns: np.ndarray, prev_returns: np.ndarray) -> tuple:
+    """
+    原始策略逻辑的向量化版本
+
+    与FundBacktest._get_legacy_strategy逐条等价，分支按原顺序匹配（np.select取第一个命中的条件），
+    NaN收益率不满足任何比较条件，落入默认的"震荡持平"。
+
+    参数:
+        today_returns: 当日收益率数组（小数形式）
+        prev_returns: 前一日收益率数组（小数形式）
+
+    返回:
+        (状态标签数组, 是否买入数组, 赎回金额数组, 买入乘数数组)
+    """
+    today_returns = np.asarray(today_returns, dtype=float)
+    prev_returns = np.asarray(prev_returns, dtype=float)
+    return_diff = today_returns - prev_returns
+
+    t_pos, t_zero, t_neg = today_returns > 0, today_returns == 0, today_returns < 0
+    p_pos, p_zero, p_neg = prev_returns > 0, prev_returns == 0, prev_returns < 0
+    both_pos = t_pos & p_pos
+    both_neg = t_neg & p_neg
+
+    conditions = [
+        t_pos & (prev_returns <= 0),   # 反转涨
+        (today_returns <= 0) & p_pos,  # 反转跌
+        both_pos & (return_diff > 0),
+        both_pos,
+        both_neg & (return_diff > 0),
+        both_neg,
+        t_zero & p_pos,
+        t_zero & p_neg,
+        t_pos & p_zero,
+        t_neg & p_zero,
+    ]
+    case_ids = np.select(conditions, np.arange(len(conditions)), default=len(conditions))
+
+    labels = np.array([row[0] for row in LEGACY_STRATEGY_TABLE], dtype=object)[case_ids]
+    is_buy = np.array([row[1] for row in LEGACY_STRATEGY_TABLE], dtype=bool)[case_ids]
+    redeem_amounts = np.array([row[2] for row in LEGACY_STRATEGY_TABLE], dtype=float)[case_ids]
+    buy_multipliers = np.array([row[3] for row in LEGACY_STRATEGY_TABLE], dtype=float)[case_ids]
+    return labels, is_buy, redeem_amounts, buy_multipliers
+
+
+def simulate_cash_gated_trades(navs: np.ndarray, buy_amounts: np.ndarray, redeem_amounts: np.ndarray,
+                               initial_cash: float, initial_shares: float = 0.0, first_day: bool = True) -> tuple:
+    """
+    按现金约束执行买入/赎回，返回每日现金与份额
+
+    买入是否执行取决于当时的现金余额（第一天允许现金不足），赎回受持有份额限制，
+    状态是路径相关的，因此在预先取出的数组上做一次顺序遍历，运算顺序与逐日回测一致。
+
+    参数:
+        navs: 每日单位净值数组
+        buy_amounts: 每日计划买入金额数组（不买入为0）
+        redeem_amounts: 每日计划赎回金额数组（不赎回为0）
+        initial_cash: 初始现金
+        initial_shares: 初始份额（从断点继续时使用）
+        first_day: navs的第一天是否为回测首日（首日允许现金不足）
+
+    返回:
+        (现金数组, 份额数组)
+    """
+    n = len(navs)
+    cash_out = np.empty(n, dtype=float)
+    shares_out = np.empty(n, dtype=float)
+
+    cash = initial_cash
+    shares = initial_shares
+    for i, (nav, buy_amount, redeem_amount) in enumerate(zip(navs.tolist(), buy_amounts.tolist(),
+                                                             redeem_amounts.tolist())):
+        if buy_amount > 0 and (cash >= buy_amount or (i == 0 and first_day)):
+            shares += buy_amount / nav
+            cash -= buy_amount
+        if redeem_amount > 0 and shares > 0:
+            shares = max(0, shares - redeem_amount / nav)
+            cash += redeem_amount
+        cash_out[i] = cash
+        shares_out[i] = shares
+
+    return cash_out, shares_out
+
+
+def simulate_cash_gated_trades_matrix(navs: np.ndarray, buy_amounts: np.ndarray, redeem_amounts: np.ndarray,
+                                      initial_cash: float, active: np.ndarray) -> tuple:
+    """
+    simulate_cash_gated_trades的多基金版本
+
+    按日期顺序遍历一次，每一步对所有基金列同时做数组运算，耗时随日期数增长而不随基金数量增长。
+    每只基金在自身第一个回测日允许现金不足，未处于回测区间（active为False）的日期状态保持不变。
+
+    参数:
+        navs: （日期 × 基金）单位净值矩阵
+        buy_amounts: （日期 × 基金）计划买入金额矩阵
+        redeem_amounts: （日期 × 基金）计划赎回金额矩阵
+        initial_cash: 每只基金的初始现金
+        active: （日期 × 基金）布尔矩阵，标记基金在该日是否参与回测
+
+    返回:
+        (现金矩阵, 份额矩阵)
+    """
+    first_day = active & (np.cumsum(active, axis=0) == 1)
+    safe_navs = np.where(active, navs, 1.0)
+    cash_out = np.empty(navs.shape, dtype=float)
+    shares_out = np.empty(navs.shape, dtype=float)
+
+    cash = np.full(navs.shape[1], initial_cash, dtype=float)
+    shares = np.zeros(navs.shape[1], dtype=float)
+    for t in range(navs.shape[0]):
+        nav, buy_amount, redeem_amount = safe_navs[t], buy_amounts[t], redeem_amounts[t]
+
+        do_buy = (buy_amount > 0) & ((cash >= buy_amount) | first_day[t])
+        shares = np.where(do_buy, shares + buy_amount / nav, shares)
+        cash = np.where(do_buy, cash - buy_amount, cash)
+
+        do_redeem = (redeem_amount > 0) & (shares > 0)
+        remaining = shares - redeem_amount / nav
+        shares = np.where(do_redeem, np.where(remaining > 0, remaining, 0.0), shares)
+        cash = np.where(do_redeem, cash + redeem_amount, cash)
+
+        cash_out[t] = cash
+        shares_out[t] = shares
+
+    return cash_out, shares_out
+
+
+def fixed_amount_benchmark_state(navs: np.ndarray, base_amount: float, initial_cash: float,
+                                 active: np.ndarray = None, initial_shares: float = 0.0,
+                                 started: bool = False) -> tuple:
+    """
+    固定金额定投基准的每日现金与份额（向量化）
+
+    基准现金只减不增，所以买入日一定是一段前缀：第一天强制买入，之后只要现金足够就继续买入。
+    现金余额用np.subtract.accumulate按顺序扣减，份额用np.cumsum按顺序累加，与逐日计算的浮点结果一致。
+    支持（日期 × 基金）矩阵输入，此时每一列独立计算。
+
+    参数:
+        navs: 每日单位净值数组或矩阵
+        base_amount: 每日定投金额
+        initial_cash: 初始现金
+        active: 与navs同形状的布尔数组，标记参与回测的日期，默认全部参与
+        initial_shares: 初始份额（从断点继续时使用）
+        started: 回测是否已经开始（从断点继续时第一天不再强制买入）
+
+    返回:
+        (每日现金, 每日份额)，与navs同形状
+    """
+    if active is None:
+        active = np.ones(navs.shape, dtype=bool)
+    n = navs.shape[0]
+    # cash_after[k]: 买入k次之后的现金余额
+    cash_after = np.subtract.accumulate(np.concatenate(([initial_cash], np.full(n, base_amount, dtype=float))))
+    day_number = np.cumsum(active, axis=0)
+    forced = (day_number == 1) & (not started)
+    buy_mask = active & (forced | (cash_after[np.maximum(day_number - 1, 0)] >= base_amount))
+    buy_count = np.cumsum(buy_mask, axis=0)
+
+    increments = np.where(buy_mask, base_amount / np.where(active, navs, 1.0), 0.0)
+    first_row = np.full((1,) + navs.shape[1:], initial_shares, dtype=float)
+    shares = np.cumsum(np.concatenate([first_row, increments]), axis=0)[1:]
+    cash = cash_after[buy_count]
+    return cash, shares
+
+
+def fixed_amount_benchmark_values(navs: np.ndarray, base_amount: float, initial_cash: float,
+                                  active: np.ndarray = None) -> np.ndarray:
+    """
+    固定金额定投基准的每日总资产（向量化），见fixed_amount_benchmark_state
+
+    返回:
+        每日总资产数组（与navs同形状）
+    """
+    cash, shares = fixed_amount_benchmark_state(navs, base_amount, initial_cash, active)
+    return cash + shares * navs
+
+
 # 模块级函数，供测试使用
 def calculate_cumulative_returns(returns: np.ndarray) -> np.ndarray:
     """
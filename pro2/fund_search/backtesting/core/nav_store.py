@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+本地列式净值存储
+Local Columnar NAV Store
+
+回测引擎优先从本地磁盘读取净值序列，只在本地数据缺失或过期时调用数据源：
+- 每个序列一个目录，每列一个定长二进制文件（日期为int64天数，数值为float64）
+- 读取时使用np.memmap内存映射，按日期二分定位后只拷贝需要的区间
+- 增量追加：只写入比本地最后日期更新的交易日
+- 数据源可插拔：按命名空间（fund / index）注册获取函数，未注册时只读
+
+目录结构：
+    <root>/<namespace>/<code>/meta.json
+    <root>/<namespace>/<code>/date.bin
+    <root>/<namespace>/<code>/<column>.bin
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 命名空间
+FUND_NAMESPACE = 'fund'
+INDEX_NAMESPACE = 'index'
+
+# 本地数据的有效期（秒）：超过该时间且请求区间超出本地最后日期时才会重新获取
+DEFAULT_MAX_AGE_SECONDS = 6 * 60 * 60
+
+_DATE_DTYPE = np.dtype('<i8')
+_VALUE_DTYPE = np.dtype('<f8')
+
+
+class NavStore:
+    """
+    本地列式净值存储
+
+    meta.json记录已提交的行数，列文件先追加、meta后原子替换，
+    因此写入中断时多出的尾部数据会被忽略，并在下次追加前截断。
+    """
+
+    def __init__(self, root_dir: str, fetchers: Optional[Dict[str, Callable[[str], pd.DataFrame]]] = None,
+                 max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS):
+        """
+        初始化净值存储
+
+        Args:
+            root_dir: 存储根目录
+            fetchers: {命名空间: 获取函数}，获取函数接收代码，返回包含date列和数值列的DataFrame
+            max_age_seconds: 本地数据有效期（秒）
+        """
+        self.root_dir = root_dir
+        self.fetchers = dict(fetchers or {})
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+
+    def register_fetcher(self, namespace: str, fetcher: Callable[[str], pd.DataFrame]):
+        """注册命名空间的数据获取函数"""
+        self.fetchers[namespace] = fetcher
+
+    # ==================== 元数据 ====================
+
+    def _series_dir(self, namespace: str, code: str) -> str:
+        return os.path.join(self.root_dir, namespace, code)
+
+    def _read_meta(self, namespace: str, code: str) -> Optional[dict]:
+        meta_path = os.path.join(self._series_dir(namespace, code), 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取净值存储元数据失败 {namespace}/{code}: {e}")
+            return None
+
+    def _write_meta(self, namespace: str, code: str, meta: dict):
+        series_dir = self._series_dir(namespace, code)
+        tmp_path = os.path.join(series_dir, 'meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(series_dir, 'meta.json'))
+
+    def last_date(self, namespace: str, code: str) -> Optional[pd.Timestamp]:
+        """本地最后一个交易日，无数据时返回None"""
+        meta = self._read_meta(namespace, code)
+        if not meta or not meta.get('rows'):
+            return None
+        return pd.Timestamp(meta['last_date'])
+
+    def get_version(self, namespace: str, code: str) -> int:
+        """序列版本号，每次写入新数据时递增，无数据时为0"""
+        meta = self._read_meta(namespace, code)
+        return int(meta.get('version', 0)) if meta else 0
+
+    def is_fresh(self, namespace: str, code: str) -> bool:
+        """本地数据是否仍在有效期内"""
+        meta = self._read_meta(namespace, code)
+        if not meta or not meta.get('checked_at'):
+            return False
+        age = (datetime.now() - datetime.fromisoformat(meta['checked_at'])).total_seconds()
+        return age < self.max_age_seconds
+
+    # ==================== 读写 ====================
+
+    def read(self, namespace: str, code: str, start_date=None, end_date=None) -> Optional[pd.DataFrame]:
+        """
+        读取本地序列（内存映射，只拷贝请求的日期区间）
+
+        Args:
+            namespace: 命名空间
+            code: 基金或指数代码
+            start_date: 开始日期（含），默认不限
+            end_date: 结束日期（含），默认不限
+
+        Returns:
+            DataFrame: date列 + 数值列，本地无数据时返回None
+        """
+        meta = self._read_meta(namespace, code)
+        if not meta or not meta.get('rows'):
+            return None
+
+        rows = meta['rows']
+        series_dir = self._series_dir(namespace, code)
+        dates = np.memmap(os.path.join(series_dir, 'date.bin'), dtype=_DATE_DTYPE, mode='r', shape=(rows,))
+
+        lo = 0 if start_date is None else int(np.searchsorted(dates, _to_day_number(start_date), side='left'))
+        hi = rows if end_date is None else int(np.searchsorted(dates, _to_day_number(end_date), side='right'))
+
+        data = {'date': pd.to_datetime(np.array(dates[lo:hi]).astype('datetime64[D]'))}
+        for column in meta['columns']:
+            values = np.memmap(os.path.join(series_dir, f'{column}.bin'), dtype=_VALUE_DTYPE, mode='r', shape=(rows,))
+            data[column] = np.array(values[lo:hi])
+        return pd.DataFrame(data)
+
+    def append(self, namespace: str, code: str, df: pd.DataFrame) -> int:
+        """
+        增量追加数据，只写入比本地最后日期更新的行
+
+        首次写入时由df的数值列确定存储列；之后缺失的列以NaN补齐，多出的列忽略。
+
+        Args:
+            namespace: 命名空间
+            code: 基金或指数代码
+            df: 包含date列的DataFrame
+
+        Returns:
+            int: 实际追加的行数
+        """
+        with self._lock:
+            meta = self._read_meta(namespace, code)
+            series_dir = self._series_dir(namespace, code)
+            os.makedirs(series_dir, exist_ok=True)
+
+            if meta is None:
+                columns = [c for c in df.columns if c != 'date']
+                meta = {'columns': columns, 'rows': 0, 'last_date': None, 'version': 0}
+            columns: List[str] = meta['columns']
+            rows = meta['rows']
+
+            new_rows = df.dropna(subset=['date']).copy()
+            new_rows['date'] = pd.to_datetime(new_rows['date']).dt.normalize()
+            new_rows = new_rows.sort_values('date').drop_duplicates('date', keep='last')
+            if meta['last_date'] is not None:
+                new_rows = new_rows[new_rows['date'] > pd.Timestamp(meta['last_date'])]
+
+            meta['checked_at'] = datetime.now().isoformat()
+            if new_rows.empty:
+                self._write_meta(namespace, code, meta)
+                return 0
+
+            # 截断上次中断写入遗留的尾部数据后追加
+            day_numbers = new_rows['date'].to_numpy().astype('datetime64[D]').astype(_DATE_DTYPE)
+            self._append_column(os.path.join(series_dir, 'date.bin'), rows, _DATE_DTYPE, day_numbers)
+            for column in columns:
+                if column in new_rows.columns:
+                    values = pd.to_numeric(new_rows[column], errors='coerce').to_numpy(dtype=_VALUE_DTYPE)
+                else:
+                    values = np.full(len(new_rows), np.nan, dtype=_VALUE_DTYPE)
+                self._append_column(os.path.join(series_dir, f'{column}.bin'), rows, _VALUE_DTYPE, values)
+
+            meta['rows'] = rows + len(new_rows)
+            meta['last_date'] = new_rows['date'].iloc[-1].strftime('%Y-%m-%d')
+            meta['version'] = int(meta.get('version', 0)) + 1
+            self._write_meta(namespace, code, meta)
+
+            logger.info(f"[净值存储] {namespace}/{code} 追加 {len(new_rows)} 条，共 {meta['rows']} 条")
+            return len(new_rows)
+
+    @staticmethod
+    def _append_column(path: str, committed_rows: int, dtype: np.dtype, values: np.ndarray):
+        with open(path, 'ab') as f:
+            f.truncate(committed_rows * dtype.itemsize)
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    # ==================== 读穿透 ====================
+
+    def refresh(self, namespace: str, code: str) -> int:
+        """
+        调用数据源获取数据并增量追加
+
+        Returns:
+            int: 追加的行数；未注册数据源或获取失败时返回0
+        """
+        fetcher = self.fetchers.get(namespace)
+        if fetcher is None:
+            return 0
+        try:
+            df = fetcher(code)
+        except Exception as e:
+            logger.warning(f"[净值存储] 获取 {namespace}/{code} 失败: {e}")
+            return 0
+        if df is None or df.empty:
+            return 0
+        return self.append(namespace, code, df)
+
+    def get(self, namespace: str, code: str, start_date=None, end_date=None) -> Optional[pd.DataFrame]:
+        """
+        读取序列，本地缺失或过期时先从数据源增量更新
+
+        本地最后日期已覆盖end_date时直接读取，不访问数据源；
+        数据源失败时退回本地已有数据。
+        """
+        last_date = self.last_date(namespace, code)
+        covered = last_date is not None and end_date is not None and last_date >= pd.Timestamp(end_date)
+        if not covered and not (last_date is not None and self.is_fresh(namespace, code)):
+            self.refresh(namespace, code)
+        return self.read(namespace, code, start_date, end_date)
+
+
+def _to_day_number(value) -> int:
+    """日期转换为自1970-01-01以来的天数"""
+    return int(np.datetime64(pd.Timestamp(value).normalize().date(), 'D').astype(_DATE_DTYPE))
+
+
+# 全局净值存储
+_nav_store: Optional[NavStore] = None
+_nav_store_lock = threading.Lock()
+
+
+def get_nav_store() -> NavStore:
+    """
+    获取全局净值存储（使用AkShare作为数据源）
+
+    存储目录可通过环境变量NAV_STORE_DIR指定，默认位于回测模块缓存目录下。
+    """
+    global _nav_store
+    with _nav_store_lock:
+        if _nav_store is None:
+            from .akshare_data_fetcher import CACHE_DIR, fetch_fund_nav_series, fetch_index_close_series
+            root_dir = os.environ.get('NAV_STORE_DIR', os.path.join(CACHE_DIR, 'nav_store'))
+            _nav_store = NavStore(root_dir, fetchers={
+                FUND_NAMESPACE: fetch_fund_nav_series,
+                INDEX_NAMESPACE: fetch_index_close_series,
+            })
+        return _nav_store
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+回测结果缓存
+Backtest Result Cache
+
+以回测输入的内容哈希作为键缓存回测结果，相同配置的重复回测直接返回：
+- 键由策略配置、基金代码、权重、日期区间、数据版本和其他回测参数组成
+- 数据版本取输入数据的内容指纹（见 data_fingerprint），数据更新后键随之变化，旧结果自然失效
+- 两级存储：进程内 LRU + 磁盘（pickle），磁盘缓存在进程重启和多个进程之间共享
+
+目录结构：
+    <root>/<键前两位>/<键>.pkl
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 进程内缓存条目数 / 磁盘缓存条目数上限
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_DISK_ENTRIES = 2000
+
+
+def data_fingerprint(df: Optional[pd.DataFrame]) -> str:
+    """
+    DataFrame 的内容指纹（列名 + 按行哈希），任意单元格变化都会改变指纹
+    """
+    if df is None or df.empty:
+        return 'empty'
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns], ensure_ascii=False).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def make_cache_key(strategy_config: Any, fund_codes: Sequence[str], weights: Optional[Sequence[float]],
+                   start_date: Optional[str], end_date: Optional[str], data_version: Any, **params) -> str:
+    """
+    回测结果的缓存键
+
+    Args:
+        strategy_config: 策略配置（可 JSON 序列化的字典或有 to_dict 方法的对象）
+        fund_codes: 参与回测的基金代码（顺序无关）
+        weights: 与 fund_codes 对应的权重，None 表示由策略决定
+        start_date / end_date: 回测区间
+        data_version: 输入数据版本（内容指纹或存储版本号）
+        **params: 其他影响结果的参数（初始资金、调仓频率等）
+    """
+    if hasattr(strategy_config, 'to_dict'):
+        strategy_config = strategy_config.to_dict()
+    if weights is not None:
+        holdings = sorted(zip(map(str, fund_codes), (round(float(w), 10) for w in weights)))
+    else:
+        holdings = sorted(map(str, fund_codes))
+    payload = {
+        'strategy': strategy_config,
+        'holdings': holdings,
+        'start_date': str(start_date) if start_date else None,
+        'end_date': str(end_date) if end_date else None,
+        'data_version': data_version,
+        'params': params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class BacktestResultCache:
+    """
+    回测结果的两级缓存
+
+    读取先查进程内 LRU，未命中再读磁盘并回填；写入同时写两级。
+    磁盘写入先写临时文件再原子替换，读到损坏的文件按未命中处理并删除。
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_entries: int = DEFAULT_DISK_ENTRIES):
+        """
+        初始化结果缓存
+
+        Args:
+            root_dir: 磁盘缓存目录，None 表示只使用进程内缓存
+            max_memory_entries: 进程内缓存条目数
+            max_disk_entries: 磁盘缓存条目数，超出时删除最久未写入的文件
+        """
+        self.root_dir = root_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], f'{key}.pkl')
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return self._memory[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._remember(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._remember(key, value)
+            self._stats['writes'] += 1
+        self._write_disk(key, value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if not self.root_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"回测结果缓存文件损坏，已删除 {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if not self.root_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入回测结果缓存失败: {e}")
+            return
+
+        with self._lock:
+            self._writes_since_prune += 1
+            should_prune = self._writes_since_prune >= max(1, self.max_disk_entries // 10)
+            if should_prune:
+                self._writes_since_prune = 0
+        if should_prune:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """磁盘条目超出上限时按修改时间删除最旧的文件"""
+        entries = []
+        for shard in os.listdir(self.root_dir):
+            shard_dir = os.path.join(self.root_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.endswith('.pkl'):
+                    path = os.path.join(shard_dir, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+        excess = len(entries) - self.max_disk_entries
+        if excess <= 0:
+            return
+        for _, path in sorted(entries)[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.root_dir and os.path.isdir(self.root_dir):
+            for shard in os.listdir(self.root_dir):
+                shard_dir = os.path.join(self.root_dir, shard)
+                if os.path.isdir(shard_dir):
+                    for name in os.listdir(shard_dir):
+                        try:
+                            os.remove(os.path.join(shard_dir, name))
+                        except OSError:
+                            pass
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'memory_entries': len(self._memory)}
+
+
+# 全局回测结果缓存
+_result_cache: Optional[BacktestResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> BacktestResultCache:
+    """
+    获取全局回测结果缓存
+
+    磁盘目录可通过环境变量 BACKTEST_RESULT_CACHE_DIR 指定，默认位于回测模块缓存目录下。
+    """
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'backtest_results')
+            root_dir = os.environ.get('BACKTEST_RESULT_CACHE_DIR', default_dir)
+            _result_cache = BacktestResultCache(root_dir)
+        return _result_cache
@@ -10,11 +10,19 @@ Custom Strategy Backtest Engine
 - 实现排序选股逻辑
 - 实现交易规则执行
 - 实现风险控制（止损止盈）
+
+回测前将长表格式的基金数据一次性整理为按交易日索引的价格面板（FundDataPanel），
+只遍历有数据的交易日；调仓日的筛选、排序在当日因子表上按列向量化计算。
 """
 
+import hashlib
+import json
 import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
@@ -108,9 +116,206 @@ class BacktestResult:
         }
 
 
+def _coerce_compare_value(value: Any) -> Any:
+    """比较值类型转换：'true'/'false' 转为布尔值，其余字符串尽量转为浮点数"""
+    if isinstance(value, str):
+        if value.lower() in ['true', 'false']:
+            return value.lower() == 'true'
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return value
+
+
+class CompiledCondition:
+    """
+    预处理后的筛选条件
+    
+    比较值的类型转换在编译时完成一次，之后可按行（match）或按列（mask）评估。
+    """
+    
+    NUMERIC_OPERATORS = ('>', '<', '>=', '<=')
+    
+    __slots__ = ('condition', 'field', 'operator', 'value', 'threshold', 'error')
+    
+    def __init__(self, condition: FilterCondition):
+        self.condition = condition
+        self.field = condition.field
+        self.operator = condition.operator
+        self.value = _coerce_compare_value(condition.value)
+        self.threshold = None
+        self.error = None
+        if self.operator in self.NUMERIC_OPERATORS:
+            try:
+                self.threshold = float(self.value)
+            except (ValueError, TypeError) as e:
+                self.error = e
+        elif self.operator not in ('==', '!='):
+            self.error = f"未知操作符: {self.operator}"
+    
+    def match(self, field_value: Any) -> bool:
+        """评估单个字段值"""
+        if field_value is None:
+            return False
+        if self.error is not None:
+            self._warn()
+            return False
+        
+        try:
+            op = self.operator
+            if op == '>':
+                return float(field_value) > self.threshold
+            elif op == '<':
+                return float(field_value) < self.threshold
+            elif op == '>=':
+                return float(field_value) >= self.threshold
+            elif op == '<=':
+                return float(field_value) <= self.threshold
+            elif op == '==':
+                if isinstance(self.value, bool):
+                    return bool(field_value) == self.value
+                return field_value == self.value
+            else:
+                if isinstance(self.value, bool):
+                    return bool(field_value) != self.value
+                return field_value != self.value
+        except (ValueError, TypeError) as e:
+            logger.warning(f"条件评估失败: {self.condition}, 错误: {e}")
+            return False
+    
+    def mask(self, frame: pd.DataFrame, numeric: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        按列评估，结果与逐行调用 match 相同
+        
+        Args:
+            frame: 基金因子表，每行一只基金
+            numeric: 字段 -> 数值数组的缓存，同一字段的多个条件共用一次类型转换
+        """
+        if self.field not in frame.columns:
+            return np.zeros(len(frame), dtype=bool)
+        if self.error is not None:
+            self._warn()
+            return np.zeros(len(frame), dtype=bool)
+        
+        column = frame[self.field]
+        op = self.operator
+        
+        if op in self.NUMERIC_OPERATORS:
+            values = numeric.get(self.field) if numeric is not None else None
+            if values is None:
+                values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+                if numeric is not None:
+                    numeric[self.field] = values
+            with np.errstate(invalid='ignore'):
+                if op == '>':
+                    result = values > self.threshold
+                elif op == '<':
+                    result = values < self.threshold
+                elif op == '>=':
+                    result = values >= self.threshold
+                else:
+                    result = values <= self.threshold
+        else:
+            if isinstance(self.value, bool):
+                result = column.astype(bool).to_numpy() == self.value
+            else:
+                try:
+                    result = (column == self.value).to_numpy(dtype=bool)
+                except (TypeError, ValueError):
+                    result = np.fromiter((v == self.value for v in column.values), dtype=bool, count=len(column))
+            if op == '!=':
+                result = ~result
+        
+        # 字段值为 None 视为不满足（数值列中的缺失值是 NaN，按比较规则处理）
+        if column.dtype == object:
+            result &= np.fromiter((v is not None for v in column.values), dtype=bool, count=len(column))
+        return result
+    
+    def _warn(self):
+        if isinstance(self.error, str):
+            logger.warning(self.error)
+        else:
+            logger.warning(f"条件评估失败: {self.condition}, 错误: {self.error}")
+
+
+class CompiledFilter:
+    """
+    编译后的筛选条件组合
+    
+    mask 在基金因子表上一次得到布尔掩码：同一字段只做一次数值转换，
+    各条件的掩码按 AND/OR 合并。
+    """
+    
+    def __init__(self, conditions: List[FilterCondition], logic: str = 'AND', key: str = ''):
+        self.conditions = [CompiledCondition(c) for c in conditions]
+        self.logic = logic
+        self.key = key
+    
+    def mask(self, frame: pd.DataFrame) -> np.ndarray:
+        """满足条件的行的布尔掩码"""
+        if not self.conditions:
+            return np.ones(len(frame), dtype=bool)
+        numeric: Dict[str, np.ndarray] = {}
+        masks = [c.mask(frame, numeric) for c in self.conditions]
+        return np.logical_and.reduce(masks) if self.logic == 'AND' else np.logical_or.reduce(masks)
+    
+    def apply(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """返回满足条件的行（保持原顺序）"""
+        if not self.conditions or frame.empty:
+            return frame
+        return frame[self.mask(frame)]
+    
+    def match(self, fund_data: Dict[str, Any]) -> bool:
+        """评估单只基金的数据字典"""
+        if not self.conditions:
+            return True
+        results = (c.match(fund_data.get(c.field)) for c in self.conditions)
+        return all(results) if self.logic == 'AND' else any(results)
+
+
 class FilterEngine:
     """筛选条件引擎"""
     
+    # 编译结果按条件定义的哈希缓存
+    MAX_COMPILED_FILTERS = 256
+    _compiled: 'OrderedDict[str, CompiledFilter]' = OrderedDict()
+    _compiled_lock = threading.Lock()
+    
+    @staticmethod
+    def filter_key(conditions: List[FilterCondition], logic: str = 'AND') -> str:
+        """筛选条件定义的哈希"""
+        encoded = json.dumps({
+            'conditions': [c.to_dict() for c in conditions],
+            'logic': logic
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def compile(cls, conditions: List[FilterCondition], logic: str = 'AND') -> CompiledFilter:
+        """
+        编译筛选条件，相同定义的条件组合复用同一个编译结果
+        
+        Args:
+            conditions: 筛选条件列表
+            logic: 组合逻辑 ('AND' | 'OR')
+            
+        Returns:
+            编译后的筛选器
+        """
+        key = cls.filter_key(conditions, logic)
+        with cls._compiled_lock:
+            compiled = cls._compiled.get(key)
+            if compiled is not None:
+                cls._compiled.move_to_end(key)
+                return compiled
+        compiled = CompiledFilter(conditions, logic, key)
+        with cls._compiled_lock:
+            cls._compiled[key] = compiled
+            while len(cls._compiled) > cls.MAX_COMPILED_FILTERS:
+                cls._compiled.popitem(last=False)
+        return compiled
+    
     @staticmethod
     def evaluate_condition(fund_data: Dict[str, Any], condition: FilterCondition) -> bool:
         """
@@ -123,50 +328,7 @@ class FilterEngine:
         Returns:
             是否满足条件
         """
-        field_value = fund_data.get(condition.field)
-        
-        if field_value is None:
-            return False
-        
-        try:
-            # 获取比较值
-            compare_value = condition.value
-            
-            # 类型转换
-            if isinstance(compare_value, str):
-                if compare_value.lower() in ['true', 'false']:
-                    compare_value = compare_value.lower() == 'true'
-                else:
-                    try:
-                        compare_value = float(compare_value)
-                    except ValueError:
-                        pass
-            
-            # 执行比较
-            op = condition.operator
-            if op == '>':
-                return float(field_value) > float(compare_value)
-            elif op == '<':
-                return float(field_value) < float(compare_value)
-            elif op == '>=':
-                return float(field_value) >= float(compare_value)
-            elif op == '<=':
-                return float(field_value) <= float(compare_value)
-            elif op == '==':
-                if isinstance(compare_value, bool):
-                    return bool(field_value) == compare_value
-                return field_value == compare_value
-            elif op == '!=':
-                if isinstance(compare_value, bool):
-                    return bool(field_value) != compare_value
-                return field_value != compare_value
-            else:
-                logger.warning(f"未知操作符: {op}")
-                return False
-                
-        except (ValueError, TypeError) as e:
-            logger.warning(f"条件评估失败: {condition}, 错误: {e}")
-            return False
+        return CompiledCondition(condition).match(fund_data.get(condition.field))
     
     @staticmethod
     def filter_funds(
@@ -188,21 +350,43 @@ class FilterEngine:
         if not conditions:
             return funds_data
         
-        filtered = []
-        for fund in funds_data:
-            results = [
-                FilterEngine.evaluate_condition(fund, cond) 
-                for cond in conditions
-            ]
+        compiled = FilterEngine.compile(conditions, logic)
+        return [fund for fund in funds_data if compiled.match(fund)]
+    
+    @staticmethod
+    def condition_mask(frame: pd.DataFrame, condition: FilterCondition) -> np.ndarray:
+        """
+        对基金因子表按列评估单个筛选条件，结果与逐行调用 evaluate_condition 相同
+        
+        Args:
+            frame: 基金因子表，每行一只基金
+            condition: 筛选条件
             
-            if logic == 'AND':
-                if all(results):
-                    filtered.append(fund)
-            else:  # OR
-                if any(results):
-                    filtered.append(fund)
+        Returns:
+            布尔数组，长度与 frame 行数相同
+        """
+        return CompiledCondition(condition).mask(frame)
+    
+    @staticmethod
+    def filter_frame(
+        frame: pd.DataFrame,
+        conditions: List[FilterCondition],
+        logic: str = 'AND'
+    ) -> pd.DataFrame:
+        """
+        filter_funds 的向量化版本：在基金因子表上按列筛选
         
-        return filtered
+        Args:
+            frame: 基金因子表，每行一只基金
+            conditions: 筛选条件列表
+            logic: 组合逻辑 ('AND' | 'OR')
+            
+        Returns:
+            满足条件的行（保持原顺序）
+        """
+        if not conditions or frame.empty:
+            return frame
+        return FilterEngine.compile(conditions, logic).apply(frame)
 
 
 class SortingEngine:
@@ -249,6 +433,41 @@ class SortingEngine:
         
         # 选择前N只
         return sorted_funds[:select_count]
+    
+    @staticmethod
+    def sort_and_select_frame(
+        frame: pd.DataFrame,
+        sort_field: str,
+        sort_order: str = 'DESC',
+        select_count: int = 10
+    ) -> pd.DataFrame:
+        """
+        sort_and_select 的向量化版本：按列排序并取前N行
+        
+        排序字段为空或无法转换为数值的行不参与排序；相同取值保持原顺序。
+        
+        Args:
+            frame: 基金因子表
+            sort_field: 排序字段
+            sort_order: 排序方向 ('ASC' | 'DESC')
+            select_count: 选股数量
+            
+        Returns:
+            选中的行
+        """
+        if frame.empty or sort_field not in frame.columns:
+            return frame.iloc[0:0]
+        
+        values = pd.to_numeric(frame[sort_field], errors='coerce').to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) == 0:
+            return frame.iloc[0:0]
+        
+        keys = values[valid]
+        if sort_order.upper() == 'DESC':
+            keys = -keys
+        order = valid[np.argsort(keys, kind='stable')]
+        return frame.iloc[order[:select_count]]
 
 
 
@@ -429,6 +648,109 @@ class RiskController:
 
 
 
+class PriceRow(Mapping):
+    """
+    某个交易日的基金价格：价格面板一行的只读映射 {fund_code: price}
+    
+    没有有效报价（缺失或为0）的基金不在映射中。
+    """
+    
+    __slots__ = ('_columns', '_values')
+    
+    def __init__(self, columns: Dict[str, int], values: np.ndarray):
+        self._columns = columns
+        self._values = values
+    
+    def __getitem__(self, fund_code: str) -> float:
+        value = self._values[self._columns[fund_code]]
+        if np.isnan(value):
+            raise KeyError(fund_code)
+        return float(value)
+    
+    def __iter__(self) -> Iterator[str]:
+        for fund_code, i in self._columns.items():
+            if not np.isnan(self._values[i]):
+                yield fund_code
+    
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self._values)))
+
+
+class FundDataPanel:
+    """
+    按交易日索引的基金数据面板
+    
+    - prices: 交易日 × 基金 的价格矩阵，没有有效报价为 NaN（同一天同一基金多行时取最后一条有效报价）
+    - factors: 按日期排序的原始长表，每个交易日的行是连续区间，调仓日直接切片取当日因子表
+    """
+    
+    def __init__(self, funds_data: pd.DataFrame, start_date: str, end_date: str):
+        """
+        Args:
+            funds_data: 基金数据长表，日期列为 date 或 analysis_date，价格列为 nav 或 current_nav
+            start_date: 开始日期
+            end_date: 结束日期
+        """
+        date_col = 'date' if 'date' in funds_data.columns else (
+            'analysis_date' if 'analysis_date' in funds_data.columns else None)
+        if date_col is None or funds_data.empty:
+            self._init_empty(funds_data)
+            return
+        
+        day = pd.to_datetime(funds_data[date_col], errors='coerce').dt.normalize()
+        in_range = day.between(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+        order = np.argsort(day[in_range].to_numpy(), kind='stable')
+        factors = funds_data[in_range.to_numpy()].iloc[order].reset_index(drop=True)
+        day_values = day[in_range].to_numpy()[order]
+        
+        self.dates = pd.DatetimeIndex(pd.unique(day_values))
+        self.factors = factors
+        # 每个交易日在 factors 中的行区间 [start, stop)
+        self._bounds = np.searchsorted(day_values, self.dates.to_numpy(), side='left')
+        self._bounds = np.append(self._bounds, len(factors))
+        self._build_prices(factors, day_values)
+    
+    def _init_empty(self, funds_data: pd.DataFrame):
+        self.dates = pd.DatetimeIndex([])
+        self.factors = funds_data.iloc[0:0]
+        self._bounds = np.zeros(1, dtype=int)
+        self.codes: Dict[str, int] = {}
+        self.prices = np.empty((0, 0))
+    
+    def _build_prices(self, factors: pd.DataFrame, day_values: np.ndarray):
+        price_col = 'nav' if 'nav' in factors.columns else 'current_nav'
+        if price_col not in factors.columns or 'fund_code' not in factors.columns:
+            self.codes = {}
+            self.prices = np.full((len(self.dates), 0), np.nan)
+            return
+        
+        price = pd.to_numeric(factors[price_col], errors='coerce').to_numpy(dtype=float)
+        code = factors['fund_code']
+        valid = code.notna().to_numpy() & (code != '').to_numpy() & ~np.isnan(price) & (price != 0)
+        
+        quotes = pd.DataFrame({
+            'day': np.searchsorted(self.dates.to_numpy(), day_values[valid]),
+            'code': code[valid].to_numpy(),
+            'price': price[valid]
+        }).drop_duplicates(['day', 'code'], keep='last')
+        
+        code_index, unique_codes = pd.factorize(quotes['code'])
+        self.codes = {c: i for i, c in enumerate(unique_codes)}
+        self.prices = np.full((len(self.dates), len(unique_codes)), np.nan)
+        self.prices[quotes['day'].to_numpy(), code_index] = quotes['price'].to_numpy()
+    
+    def __len__(self) -> int:
+        return len(self.dates)
+    
+    def prices_at(self, i: int) -> PriceRow:
+        """第 i 个交易日的价格映射"""
+        return PriceRow(self.codes, self.prices[i])
+    
+    def factors_at(self, i: int) -> pd.DataFrame:
+        """第 i 个交易日的因子表（原始行，保持原顺序）"""
+        return self.factors.iloc[self._bounds[i]:self._bounds[i + 1]]
+
+
 class CustomStrategyBacktest:
     """
     自定义策略回测引擎
@@ -465,6 +787,8 @@ class CustomStrategyBacktest:
             trailing_stop=strategy_config.trailing_stop
         )
         
+        self._compiled_filter: Optional[CompiledFilter] = None
+        
         # 回测状态
         self.cash = initial_capital
         self.holdings: Dict[str, Dict] = {}  # {fund_code: {shares, cost_price, ...}}
@@ -741,22 +1065,24 @@ class CustomStrategyBacktest:
         """
         self.reset()
         
-        # 获取交易日期列表
-        dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        # 筛选条件在回测开始时编译一次，各调仓日复用
+        self._compiled_filter = self.filter_engine.compile(
+            self.config.filter_conditions,
+            self.config.filter_logic
+        )
+        
+        # 整理为交易日价格面板，只遍历有数据的交易日
+        panel = FundDataPanel(funds_data, start_date, end_date)
+        date_strs = panel.dates.strftime('%Y-%m-%d')
         
         prev_portfolio_value = self.initial_capital
         last_rebalance_date = None
         
-        for date in dates:
-            date_str = date.strftime('%Y-%m-%d')
-            
-            # 获取当日基金数据
-            daily_data = self._get_daily_data(funds_data, date_str)
-            if daily_data.empty:
-                continue
+        for i, date in enumerate(panel.dates):
+            date_str = date_strs[i]
             
             # 获取当日价格
-            prices = self._get_prices(daily_data)
+            prices = panel.prices_at(i)
             
             # 计算当前组合价值
             current_value = self.get_portfolio_value(prices)
@@ -786,7 +1112,7 @@ class CustomStrategyBacktest:
                 # 检查是否需要调仓
                 if self._should_rebalance(date, last_rebalance_date, rebalance_freq):
                     # 执行选股和调仓
-                    self._execute_strategy(daily_data, prices, date_str)
+                    self._execute_strategy(panel.factors_at(i), prices, date_str)
                     last_rebalance_date = date
             
             # 更新净值曲线
@@ -800,28 +1126,6 @@ class CustomStrategyBacktest:
         # 计算绩效指标
         return self._calculate_performance()
     
-    def _get_daily_data(self, funds_data: pd.DataFrame, date_str: str) -> pd.DataFrame:
-        """获取指定日期的基金数据"""
-        if 'date' in funds_data.columns:
-            return funds_data[funds_data['date'] == date_str]
-        elif 'analysis_date' in funds_data.columns:
-            return funds_data[funds_data['analysis_date'] == date_str]
-        return pd.DataFrame()
-    
-    def _get_prices(self, daily_data: pd.DataFrame) -> Dict[str, float]:
-        """获取基金价格字典"""
-        prices = {}
-        price_col = 'nav' if 'nav' in daily_data.columns else 'current_nav'
-        code_col = 'fund_code'
-        
-        for _, row in daily_data.iterrows():
-            code = row.get(code_col)
-            price = row.get(price_col)
-            if code and price and pd.notna(price):
-                prices[code] = float(price)
-        
-        return prices
-    
     def _should_rebalance(
         self, 
         current_date, 
@@ -847,31 +1151,31 @@ class CustomStrategyBacktest:
         prices: Dict[str, float],
         date_str: str
     ):
-        """执行策略选股和调仓"""
-        # 转换为字典列表
-        funds_list = daily_data.to_dict('records')
-        
+        """执行策略选股和调仓（在当日因子表上按列筛选、排序）"""
         # 应用筛选条件
-        filtered_funds = self.filter_engine.filter_funds(
-            funds_list,
+        compiled_filter = self._compiled_filter or self.filter_engine.compile(
             self.config.filter_conditions,
             self.config.filter_logic
         )
+        filtered_funds = compiled_filter.apply(daily_data)
         
-        if not filtered_funds:
+        if filtered_funds.empty:
             return
         
         # 排序选股
-        selected_funds = self.sorting_engine.sort_and_select(
+        selected = self.sorting_engine.sort_and_select_frame(
             filtered_funds,
             self.config.sort_field,
             self.config.sort_order,
             self.config.select_count
         )
         
-        if not selected_funds:
+        if selected.empty:
             return
         
+        # 只有入选的少数基金转换为字典
+        selected_funds = selected.to_dict('records')
+        
         # 计算权重
         weights = self.weight_calculator.calculate_weights(
             len(selected_funds),
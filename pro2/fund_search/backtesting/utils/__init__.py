@@ -1 +1,2 @@
 from .strategy_parameter_tuner import StrategyParameterTuner
+from .parameter_search import ParameterSearchExecutor, GaussianProcessOptimizer
@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+参数搜索执行器
+Parameter Search Executor
+
+为 StrategyParameterTuner 提供参数评估的执行层：
+1. 进程池并行评估：历史数据在工作进程初始化时传递一次，任务只携带参数字典
+2. 评分记忆化：按 ParameterSet.get_hash() + 数据指纹 + 窗口长度缓存，重复组合不再回测
+3. 逐次减半（successive halving）：先在较短的近期窗口上评估全部组合，
+   每轮只保留前 1/eta 进入更长窗口，最后一轮使用完整数据
+4. 贝叶斯优化：高斯过程代理模型 + 期望提升（EI）采集函数
+
+Example:
+    >>> with ParameterSearchExecutor(df, 'sharpe', tuner._evaluate_params, n_jobs=4) as executor:
+    ...     ranked = executor.successive_halving(candidates, eta=3)
+    ...     best_params, best_score = ranked[0]
+"""
+
+import hashlib
+import logging
+import math
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
+from scipy.stats import norm, qmc
+
+try:
+    from .strategy_parameter_tuner import ParameterSet
+except ImportError:
+    try:
+        from fund_search.backtesting.utils.strategy_parameter_tuner import ParameterSet
+    except ImportError:
+        from strategy_parameter_tuner import ParameterSet
+
+logger = logging.getLogger(__name__)
+
+# 评估函数签名：(params, historical_data, target_metric) -> score（越高越好）
+EvaluateFn = Callable[[Dict[str, Any], pd.DataFrame, str], float]
+
+# 逐次减半的最短评估窗口（交易日），过短的窗口评分噪声太大
+MIN_HALVING_WINDOW = 60
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """将 numpy 标量转换为原生类型，保证参数可 JSON 序列化、哈希稳定"""
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, np.integer):
+            value = int(value)
+        elif isinstance(value, np.floating):
+            value = float(value)
+        normalized[name] = value
+    return normalized
+
+
+def _as_score(value: Any) -> float:
+    """评估结果统一为 float，NaN/无法解析时视为 -inf"""
+    try:
+        arr = np.asarray(value, dtype=float).ravel()
+    except (TypeError, ValueError):
+        return -np.inf
+    if arr.size == 0 or np.isnan(arr[0]):
+        return -np.inf
+    return float(arr[0])
+
+
+def _data_fingerprint(data: pd.DataFrame) -> str:
+    """历史数据指纹，避免不同基金/区间之间的评分缓存串用"""
+    hashed = pd.util.hash_pandas_object(data, index=True).values
+    return hashlib.md5(hashed.tobytes()).hexdigest()[:12]
+
+
+def _tail(data: pd.DataFrame, window: int) -> pd.DataFrame:
+    return data if window >= len(data) else data.iloc[-window:]
+
+
+def _score(evaluate: EvaluateFn, params: Dict[str, Any], data: pd.DataFrame,
+           target_metric: str) -> float:
+    try:
+        return _as_score(evaluate(params, data, target_metric))
+    except Exception as e:
+        logger.warning(f"参数评估失败 {params}: {e}")
+        return -np.inf
+
+
+# 工作进程状态：由 initializer 在进程启动时设置一次
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(evaluate: EvaluateFn, historical_data: pd.DataFrame, target_metric: str) -> None:
+    _worker_state['evaluate'] = evaluate
+    _worker_state['data'] = historical_data
+    _worker_state['target_metric'] = target_metric
+
+
+def _evaluate_in_worker(params: Dict[str, Any], window: int) -> float:
+    return _score(
+        _worker_state['evaluate'], params,
+        _tail(_worker_state['data'], window), _worker_state['target_metric']
+    )
+
+
+class ParameterSearchExecutor:
+    """
+    参数评估执行器
+
+    Attributes:
+        n_jobs: 并行进程数（1 表示在当前进程串行评估）
+        score_cache: 评分缓存，可在多次搜索之间共享
+        history: 实际执行的评估记录（不含缓存命中）
+        evaluations: 实际执行的评估次数
+        cache_hits: 缓存命中次数
+    """
+
+    def __init__(
+        self,
+        historical_data: pd.DataFrame,
+        target_metric: str,
+        evaluate: EvaluateFn,
+        n_jobs: int = 1,
+        score_cache: Optional[Dict[str, float]] = None
+    ):
+        self.historical_data = historical_data
+        self.target_metric = target_metric
+        self.evaluate = evaluate
+        self.n_jobs = self._resolve_n_jobs(n_jobs)
+        self.score_cache = score_cache if score_cache is not None else {}
+        self.history: List[Dict[str, Any]] = []
+        self.evaluations = 0
+        self.cache_hits = 0
+        self._fingerprint = _data_fingerprint(historical_data)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def _resolve_n_jobs(n_jobs: Optional[int]) -> int:
+        cpu_count = os.cpu_count() or 1
+        if n_jobs is None or n_jobs == 0:
+            return 1
+        if n_jobs < 0:
+            return max(1, cpu_count + 1 + n_jobs)
+        return n_jobs
+
+    def __enter__(self) -> 'ParameterSearchExecutor':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _cache_key(self, params: Dict[str, Any], window: int) -> str:
+        param_hash = ParameterSet(name='search', parameters=params).get_hash()
+        return f"{self._fingerprint}:{self.target_metric}:{window}:{param_hash}"
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.n_jobs,
+                initializer=_init_worker,
+                initargs=(self.evaluate, self.historical_data, self.target_metric)
+            )
+        return self._pool
+
+    def _run(self, params_list: List[Dict[str, Any]], window: int) -> List[float]:
+        if self.n_jobs > 1 and len(params_list) > 1:
+            try:
+                pool = self._get_pool()
+                chunksize = max(1, len(params_list) // (self.n_jobs * 4))
+                return list(pool.map(_evaluate_in_worker, params_list, repeat(window), chunksize=chunksize))
+            except (pickle.PicklingError, AttributeError, TypeError, BrokenProcessPool) as e:
+                # 评估函数无法序列化到子进程时退回串行
+                logger.warning(f"进程池评估不可用，改为串行评估: {e}")
+                self.close()
+                self.n_jobs = 1
+
+        data = _tail(self.historical_data, window)
+        return [_score(self.evaluate, params, data, self.target_metric) for params in params_list]
+
+    def evaluate_many(self, params_list: List[Dict[str, Any]], window: Optional[int] = None) -> List[float]:
+        """
+        批量评估参数组合
+
+        Args:
+            params_list: 参数字典列表
+            window: 只使用最近 window 行数据评估，默认使用全部数据
+
+        Returns:
+            与 params_list 一一对应的评分
+        """
+        window = len(self.historical_data) if window is None else min(int(window), len(self.historical_data))
+        params_list = [normalize_params(params) for params in params_list]
+
+        scores: List[Optional[float]] = [None] * len(params_list)
+        pending: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+        for i, params in enumerate(params_list):
+            key = self._cache_key(params, window)
+            if key in self.score_cache:
+                scores[i] = self.score_cache[key]
+                self.cache_hits += 1
+            elif key in pending:
+                pending[key][1].append(i)
+                self.cache_hits += 1
+            else:
+                pending[key] = (params, [i])
+
+        if pending:
+            items = list(pending.items())
+            computed = self._run([params for _, (params, _) in items], window)
+            for (key, (params, indices)), score in zip(items, computed):
+                self.score_cache[key] = score
+                for i in indices:
+                    scores[i] = score
+                self.history.append({
+                    'iteration': len(self.history),
+                    'params': params.copy(),
+                    'score': score,
+                    'window': window
+                })
+            self.evaluations += len(items)
+
+        return scores
+
+    def successive_halving(
+        self,
+        candidates: List[Dict[str, Any]],
+        eta: int = 3,
+        min_window: int = MIN_HALVING_WINDOW
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        逐次减半搜索
+
+        窗口从 len(data) / eta^k 开始逐轮放大 eta 倍，每轮保留评分前 1/eta 的组合，
+        最后一轮在完整数据上评估；轮数受候选数量和 min_window 限制
+
+        Returns:
+            最后一轮（完整数据）的 (params, score) 列表，按评分降序
+        """
+        if eta < 2:
+            raise ValueError("eta 必须不小于 2")
+        candidates = [normalize_params(params) for params in candidates]
+        if not candidates:
+            return []
+
+        n_rows = len(self.historical_data)
+        max_rungs = int(math.log(len(candidates), eta)) + 1 if len(candidates) > 1 else 1
+        windows = [n_rows]
+        while len(windows) < max_rungs and windows[-1] // eta >= min_window:
+            windows.append(windows[-1] // eta)
+        windows.reverse()
+
+        survivors = candidates
+        for rung, window in enumerate(windows):
+            scores = self.evaluate_many(survivors, window)
+            ranked = sorted(zip(survivors, scores), key=lambda item: item[1], reverse=True)
+            if rung == len(windows) - 1:
+                return ranked
+
+            keep = max(1, math.ceil(len(ranked) / eta))
+            survivors = [params for params, score in ranked[:keep] if np.isfinite(score)] or [ranked[0][0]]
+            logger.debug(f"逐次减半第 {rung + 1} 轮: 窗口 {window} 行, {len(ranked)} → {len(survivors)} 个组合")
+
+        return []
+
+    def bayesian_optimize(
+        self,
+        param_bounds: Dict[str, Tuple[float, float]],
+        n_iterations: int,
+        n_initial: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        seed: int = 42
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        高斯过程贝叶斯优化
+
+        先用拉丁超立方采样 n_initial 个点，之后每轮按期望提升选出 batch_size 个点并行评估
+
+        Returns:
+            按评估顺序排列的 (params, score) 列表
+        """
+        optimizer = GaussianProcessOptimizer(param_bounds, seed=seed)
+        batch_size = batch_size or self.n_jobs
+        if n_initial is None:
+            n_initial = max(5, 2 * len(param_bounds))
+        n_initial = min(n_initial, n_iterations)
+
+        results: List[Tuple[Dict[str, Any], float]] = []
+        proposals = optimizer.initial_design(n_initial)
+        while proposals:
+            scores = self.evaluate_many(proposals)
+            optimizer.observe(proposals, scores)
+            results.extend(zip(proposals, scores))
+
+            remaining = n_iterations - len(results)
+            proposals = optimizer.suggest(min(batch_size, remaining)) if remaining > 0 else []
+
+        return results
+
+
+class GaussianProcessOptimizer:
+    """
+    高斯过程代理模型
+
+    参数归一化到单位超立方体，RBF 核的长度尺度按对数边际似然在候选值中选择，
+    采集函数为期望提升（EI）；批量建议使用 kriging believer（以预测均值作为伪观测）保证多样性
+    """
+
+    LENGTH_SCALES = (0.05, 0.1, 0.2, 0.5, 1.0)
+
+    def __init__(
+        self,
+        param_bounds: Dict[str, Tuple[float, float]],
+        seed: int = 42,
+        noise: float = 1e-6,
+        xi: float = 0.01,
+        n_candidates: int = 2000
+    ):
+        self.names = list(param_bounds.keys())
+        self.lows = np.array([float(param_bounds[name][0]) for name in self.names])
+        self.highs = np.array([float(param_bounds[name][1]) for name in self.names])
+        self.integer_mask = np.array([name.endswith('_period') for name in self.names])
+        self.noise = noise
+        self.xi = xi
+        self.n_candidates = n_candidates
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.X = np.empty((0, len(self.names)))
+        self.y = np.empty(0)
+
+    @property
+    def dim(self) -> int:
+        return len(self.names)
+
+    def _to_params(self, unit: np.ndarray) -> Dict[str, Any]:
+        values = self.lows + np.clip(unit, 0.0, 1.0) * (self.highs - self.lows)
+        params = {}
+        for name, value, is_int in zip(self.names, values, self.integer_mask):
+            params[name] = int(round(value)) if is_int else float(value)
+        return params
+
+    def _to_unit(self, params: Dict[str, Any]) -> np.ndarray:
+        values = np.array([float(params[name]) for name in self.names])
+        span = np.where(self.highs > self.lows, self.highs - self.lows, 1.0)
+        return (values - self.lows) / span
+
+    def initial_design(self, n: int) -> List[Dict[str, Any]]:
+        """拉丁超立方初始采样"""
+        if n <= 0:
+            return []
+        sampler = qmc.LatinHypercube(d=self.dim, seed=self.seed)
+        return [self._to_params(u) for u in sampler.random(n)]
+
+    def observe(self, params_list: List[Dict[str, Any]], scores: List[float]) -> None:
+        """记录评估结果"""
+        if not params_list:
+            return
+        X_new = np.array([self._to_unit(params) for params in params_list])
+        self.X = np.vstack([self.X, X_new])
+        self.y = np.concatenate([self.y, np.asarray(scores, dtype=float)])
+
+    @staticmethod
+    def _kernel(A: np.ndarray, B: np.ndarray, length_scale: float) -> np.ndarray:
+        sq_dist = np.sum(A ** 2, axis=1)[:, None] + np.sum(B ** 2, axis=1)[None, :] - 2 * A @ B.T
+        return np.exp(-0.5 * np.maximum(sq_dist, 0.0) / length_scale ** 2)
+
+    def _targets(self, y: np.ndarray) -> np.ndarray:
+        """-inf（评估失败）替换为略低于最差有效值的分数，再标准化"""
+        finite = np.isfinite(y)
+        if not finite.any():
+            return np.zeros_like(y)
+        y = y.copy()
+        low, high = y[finite].min(), y[finite].max()
+        y[~finite] = low - max(high - low, 1.0)
+        std = y.std()
+        return (y - y.mean()) / (std if std > 0 else 1.0)
+
+    def _fit(self, X: np.ndarray, y: np.ndarray):
+        """按对数边际似然选择长度尺度，返回 (length_scale, cholesky, alpha)"""
+        best = None
+        for length_scale in self.LENGTH_SCALES:
+            K = self._kernel(X, X, length_scale) + self.noise * np.eye(len(X))
+            try:
+                chol = cho_factor(K, lower=True)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = cho_solve(chol, y)
+            log_likelihood = -0.5 * y @ alpha - np.sum(np.log(np.diag(chol[0])))
+            if best is None or log_likelihood > best[0]:
+                best = (log_likelihood, length_scale, chol, alpha)
+        if best is None:
+            return None
+        return best[1:]
+
+    def _predict(self, model, X_train: np.ndarray, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        length_scale, chol, alpha = model
+        K_s = self._kernel(X, X_train, length_scale)
+        mu = K_s @ alpha
+        v = cho_solve(chol, K_s.T)
+        var = np.maximum(1.0 - np.sum(K_s * v.T, axis=1), 1e-12)
+        return mu, np.sqrt(var)
+
+    def _candidates(self, X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """全局随机点 + 当前最优点附近的局部扰动"""
+        n_local = self.n_candidates // 4
+        global_points = self.rng.random((self.n_candidates - n_local, self.dim))
+        best = X[np.argmax(y)]
+        local_points = np.clip(best + self.rng.normal(0, 0.05, (n_local, self.dim)), 0.0, 1.0)
+        return np.vstack([global_points, local_points])
+
+    def suggest(self, n: int = 1) -> List[Dict[str, Any]]:
+        """按期望提升建议 n 个新参数组合"""
+        if n <= 0:
+            return []
+        if len(self.y) < 2:
+            return [self._to_params(u) for u in self.rng.random((n, self.dim))]
+
+        X = self.X.copy()
+        y = self._targets(self.y)
+        suggestions = []
+        for _ in range(n):
+            model = self._fit(X, y)
+            candidates = self._candidates(X, y)
+            if model is None:
+                choice = candidates[0]
+            else:
+                mu, sigma = self._predict(model, X, candidates)
+                improvement = mu - y.max() - self.xi
+                z = improvement / sigma
+                ei = improvement * norm.cdf(z) + sigma * norm.pdf(z)
+                choice = candidates[int(np.argmax(ei))]
+                # kriging believer：以预测均值作为伪观测，使同批建议互不重复
+                believed = self._predict(model, X, choice[None, :])[0]
+                X = np.vstack([X, choice])
+                y = np.append(y, believed)
+            suggestions.append(self._to_params(choice))
+        return suggestions
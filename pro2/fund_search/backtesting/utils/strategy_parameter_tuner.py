@@ -559,14 +559,18 @@ class StrategyParameterTuner:
         }
     }
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, n_jobs: int = 1):
         """
         初始化参数调优器
         
         Args:
             config_path: 策略配置文件路径
+            n_jobs: 参数评估的并行进程数（1 为串行，-1 为全部CPU）
         """
         self.config_path = Path(config_path) if config_path else None
+        self.n_jobs = n_jobs
+        # 参数评分缓存（数据指纹 + 目标指标 + 窗口 + ParameterSet 哈希），跨多次优化共享
+        self._score_cache: Dict[str, float] = {}
         self.optimization_history: List[OptimizationResult] = []
         self.match_weights: Dict[str, float] = self._init_match_weights()
         self.ab_tests: Dict[str, ABTestConfig] = {}
@@ -609,7 +613,10 @@ class StrategyParameterTuner:
         optimization_method: OptimizationMethod = OptimizationMethod.GRID_SEARCH,
         param_bounds: Optional[Dict[str, Tuple[float, float]]] = None,
         constraints: Optional[Dict[str, Any]] = None,
-        max_iterations: int = 100
+        max_iterations: int = 100,
+        n_jobs: Optional[int] = None,
+        successive_halving: bool = False,
+        halving_eta: int = 3
     ) -> OptimizationResult:
         """
         优化策略参数
@@ -623,6 +630,9 @@ class StrategyParameterTuner:
             param_bounds: 参数边界字典，如 {'param_name': (min, max)}
             constraints: 约束条件字典
             max_iterations: 最大迭代次数
+            n_jobs: 并行进程数，默认使用初始化时的设置
+            successive_halving: 网格搜索时先在较短窗口上淘汰明显较差的组合
+            halving_eta: 逐次减半每轮保留 1/eta 的组合
             
         Returns:
             OptimizationResult: 优化结果
@@ -647,24 +657,32 @@ class StrategyParameterTuner:
             }
         
         # 根据优化方法选择优化器
-        if optimization_method == OptimizationMethod.GRID_SEARCH:
-            result = self._grid_search_optimize(
-                historical_data, target_metric, param_bounds, constraints
-            )
-        elif optimization_method == OptimizationMethod.BAYESIAN:
-            result = self._bayesian_optimize(
-                historical_data, target_metric, param_bounds, max_iterations
-            )
-        elif optimization_method == OptimizationMethod.DIFFERENTIAL_EVOLUTION:
-            result = self._differential_evolution_optimize(
-                historical_data, target_metric, param_bounds, max_iterations
-            )
-        elif optimization_method == OptimizationMethod.RANDOM_SEARCH:
-            result = self._random_search_optimize(
-                historical_data, target_metric, param_bounds, max_iterations
-            )
-        else:
-            raise ValueError(f"不支持的优化方法: {optimization_method}")
+        with self._create_search_executor(historical_data, target_metric, n_jobs) as executor:
+            if optimization_method == OptimizationMethod.GRID_SEARCH:
+                result = self._grid_search_optimize(
+                    historical_data, target_metric, param_bounds, constraints,
+                    executor=executor, successive_halving=successive_halving, halving_eta=halving_eta
+                )
+            elif optimization_method == OptimizationMethod.BAYESIAN:
+                result = self._bayesian_optimize(
+                    historical_data, target_metric, param_bounds, max_iterations, executor=executor
+                )
+            elif optimization_method == OptimizationMethod.DIFFERENTIAL_EVOLUTION:
+                result = self._differential_evolution_optimize(
+                    historical_data, target_metric, param_bounds, max_iterations, executor=executor
+                )
+            elif optimization_method == OptimizationMethod.RANDOM_SEARCH:
+                result = self._random_search_optimize(
+                    historical_data, target_metric, param_bounds, max_iterations, executor=executor
+                )
+            else:
+                raise ValueError(f"不支持的优化方法: {optimization_method}")
+
+            result.convergence_info.update({
+                'evaluations': executor.evaluations,
+                'cache_hits': executor.cache_hits,
+                'n_jobs': executor.n_jobs
+            })
         
         # 计算耗时
         computation_time = (datetime.now() - start_time).total_seconds()
@@ -698,16 +716,10 @@ class StrategyParameterTuner:
             评分（越高越好）
         """
         try:
-            # 使用回测引擎评估
-            backtest = FundBacktest(
-                base_amount=100,
-                start_date=historical_data.index[0] if hasattr(historical_data.index[0], 'strftime') else '2020-01-01',
-                use_unified_strategy=True
-            )
-            
             # 这里简化处理，实际应该修改策略参数后回测
             # 使用历史数据计算模拟绩效指标
-            returns = historical_data.pct_change().dropna()
+            prices = self._price_series(historical_data)
+            returns = prices.pct_change().dropna()
             if len(returns) < 20:
                 return -np.inf
             
@@ -717,7 +729,7 @@ class StrategyParameterTuner:
             sharpe = calculator.calculate_sharpe_ratio(returns.values)
             annual_return = returns.mean() * 252
             volatility = returns.std() * np.sqrt(252)
-            max_dd = calculator.calculate_max_drawdown(historical_data.values)
+            max_dd = calculator.calculate_max_drawdown(prices.tolist())
             
             # 根据目标指标返回评分
             if target_metric == 'sharpe':
@@ -740,19 +752,54 @@ class StrategyParameterTuner:
             logger.warning(f"参数评估失败: {e}")
             return -np.inf
     
+    @staticmethod
+    def _price_series(historical_data: pd.DataFrame) -> pd.Series:
+        """取一维净值序列（DataFrame 优先使用 close/nav 列，否则取第一列）"""
+        if isinstance(historical_data, pd.Series):
+            return historical_data
+        for column in ('close', 'nav', 'unit_nav'):
+            if column in historical_data.columns:
+                return historical_data[column]
+        return historical_data.iloc[:, 0]
+    
+    def _create_search_executor(
+        self,
+        historical_data: pd.DataFrame,
+        target_metric: str,
+        n_jobs: Optional[int] = None
+    ):
+        """创建参数搜索执行器（并行评估 + 评分缓存）"""
+        try:
+            from .parameter_search import ParameterSearchExecutor
+        except ImportError:
+            from parameter_search import ParameterSearchExecutor
+
+        return ParameterSearchExecutor(
+            historical_data,
+            target_metric,
+            self._evaluate_params,
+            n_jobs=self.n_jobs if n_jobs is None else n_jobs,
+            score_cache=self._score_cache
+        )
+
     def _grid_search_optimize(
         self,
         historical_data: pd.DataFrame,
         target_metric: str,
         param_bounds: Dict[str, Tuple[float, float]],
-        constraints: Optional[Dict[str, Any]]
+        constraints: Optional[Dict[str, Any]],
+        executor=None,
+        successive_halving: bool = False,
+        halving_eta: int = 3
     ) -> OptimizationResult:
-        """网格搜索优化"""
-        best_score = -np.inf
-        best_params = {}
-        history = []
-        iteration = 0
-        
+        """网格搜索优化（可选逐次减半剪枝）"""
+        if executor is None:
+            with self._create_search_executor(historical_data, target_metric) as executor:
+                return self._grid_search_optimize(
+                    historical_data, target_metric, param_bounds, constraints,
+                    executor, successive_halving, halving_eta
+                )
+
         # 为每个参数创建网格点
         param_names = list(param_bounds.keys())
         param_grids = []
@@ -769,36 +816,33 @@ class StrategyParameterTuner:
         
         # 生成所有组合
         from itertools import product
+        candidates = []
         for combo in product(*param_grids):
             params = dict(zip(param_names, combo))
             
             # 检查约束
             if constraints and not self._check_constraints(params, constraints):
                 continue
-            
-            score = self._evaluate_params(params, historical_data, target_metric)
-            
-            history.append({
-                'iteration': iteration,
-                'params': params.copy(),
-                'score': score
-            })
-            
-            if score > best_score:
-                best_score = score
-                best_params = params.copy()
-            
-            iteration += 1
+            candidates.append(params)
+        
+        if successive_halving:
+            ranked = executor.successive_halving(candidates, eta=halving_eta)
+        else:
+            scores = executor.evaluate_many(candidates)
+            ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+        
+        best_params, best_score = ranked[0] if ranked else ({}, -np.inf)
         
         # 计算性能指标
         perf_metrics = self._calculate_performance_metrics(best_params, historical_data)
         
         return OptimizationResult(
-            optimal_params=best_params,
+            optimal_params=dict(best_params),
             best_score=best_score,
             performance_metrics=perf_metrics,
-            optimization_history=history,
-            iterations=iteration
+            optimization_history=list(executor.history),
+            iterations=len(candidates),
+            convergence_info={'successive_halving': successive_halving, 'full_window_candidates': len(ranked)}
         )
     
     def _bayesian_optimize(
@@ -806,13 +850,31 @@ class StrategyParameterTuner:
         historical_data: pd.DataFrame,
         target_metric: str,
         param_bounds: Dict[str, Tuple[float, float]],
-        max_iterations: int
+        max_iterations: int,
+        executor=None
     ) -> OptimizationResult:
-        """贝叶斯优化（简化实现）"""
-        # 这里使用随机搜索作为简化实现
-        # 实际生产环境可以使用 scikit-optimize
-        return self._random_search_optimize(
-            historical_data, target_metric, param_bounds, max_iterations
+        """贝叶斯优化（高斯过程代理模型 + 期望提升）"""
+        if executor is None:
+            with self._create_search_executor(historical_data, target_metric) as executor:
+                return self._bayesian_optimize(
+                    historical_data, target_metric, param_bounds, max_iterations, executor
+                )
+        
+        evaluated = executor.bayesian_optimize(param_bounds, max_iterations)
+        best_params, best_score = max(evaluated, key=lambda item: item[1]) if evaluated else ({}, -np.inf)
+        history = [
+            {'iteration': i, 'params': params.copy(), 'score': score}
+            for i, (params, score) in enumerate(evaluated)
+        ]
+        
+        perf_metrics = self._calculate_performance_metrics(best_params, historical_data)
+        
+        return OptimizationResult(
+            optimal_params=dict(best_params),
+            best_score=best_score,
+            performance_metrics=perf_metrics,
+            optimization_history=history,
+            iterations=len(evaluated)
         )
     
     def _differential_evolution_optimize(
@@ -820,33 +882,36 @@ class StrategyParameterTuner:
         historical_data: pd.DataFrame,
         target_metric: str,
         param_bounds: Dict[str, Tuple[float, float]],
-        max_iterations: int
+        max_iterations: int,
+        executor=None
     ) -> OptimizationResult:
         """差分进化优化"""
+        if executor is None:
+            with self._create_search_executor(historical_data, target_metric) as executor:
+                return self._differential_evolution_optimize(
+                    historical_data, target_metric, param_bounds, max_iterations, executor
+                )
+        
         param_names = list(param_bounds.keys())
         bounds = [param_bounds[name] for name in param_names]
         
-        history = []
-        iteration_counter = [0]
-        
         def objective(x):
-            params = dict(zip(param_names, x))
-            score = self._evaluate_params(params, historical_data, target_metric)
-            history.append({
-                'iteration': iteration_counter[0],
-                'params': params.copy(),
-                'score': score
-            })
-            iteration_counter[0] += 1
+            score = executor.evaluate_many([dict(zip(param_names, x))])[0]
             # 差分进化是最小化，所以取负
             return -score
         
+        def population_map(func, population):
+            # 整个种群交给执行器批量评估（进程池 + 评分缓存）
+            scores = executor.evaluate_many([dict(zip(param_names, x)) for x in population])
+            return [-score for score in scores]
+        
         result = differential_evolution(
             objective,
             bounds,
-            maxiter=max_iterations // len(param_names),
+            maxiter=max(1, max_iterations // len(param_names)),
             seed=42,
-            workers=-1,
+            workers=population_map,
+            updating='deferred',
             polish=True
         )
         
@@ -857,8 +922,8 @@ class StrategyParameterTuner:
             optimal_params=best_params,
             best_score=-result.fun,
             performance_metrics=perf_metrics,
-            optimization_history=history,
-            iterations=iteration_counter[0],
+            optimization_history=list(executor.history),
+            iterations=int(result.nfev),
             convergence_info={
                 'success': result.success,
                 'message': result.message,
@@ -871,26 +936,33 @@ class StrategyParameterTuner:
         historical_data: pd.DataFrame,
         target_metric: str,
         param_bounds: Dict[str, Tuple[float, float]],
-        max_iterations: int
+        max_iterations: int,
+        executor=None
     ) -> OptimizationResult:
         """随机搜索优化"""
-        best_score = -np.inf
-        best_params = {}
-        history = []
-        
-        param_names = list(param_bounds.keys())
+        if executor is None:
+            with self._create_search_executor(historical_data, target_metric) as executor:
+                return self._random_search_optimize(
+                    historical_data, target_metric, param_bounds, max_iterations, executor
+                )
         
-        for i in range(max_iterations):
-            # 随机采样参数
+        # 先采样全部参数组合，再批量评估
+        samples = []
+        for _ in range(max_iterations):
             params = {}
             for name, (low, high) in param_bounds.items():
                 if name.endswith('_period'):
                     params[name] = np.random.randint(int(low), int(high) + 1)
                 else:
                     params[name] = np.random.uniform(low, high)
-            
-            score = self._evaluate_params(params, historical_data, target_metric)
-            
+            samples.append(params)
+        
+        scores = executor.evaluate_many(samples)
+        
+        best_score = -np.inf
+        best_params = {}
+        history = []
+        for i, (params, score) in enumerate(zip(samples, scores)):
             history.append({
                 'iteration': i,
                 'params': params.copy(),
@@ -932,7 +1004,8 @@ class StrategyParameterTuner:
         historical_data: pd.DataFrame
     ) -> Dict[str, float]:
         """计算性能指标"""
-        returns = historical_data.pct_change().dropna()
+        prices = self._price_series(historical_data)
+        returns = prices.pct_change().dropna()
         calculator = PerformanceCalculator()
         
         # 提取数值（处理pandas Series/DataFrame的情况）
@@ -943,7 +1016,7 @@ class StrategyParameterTuner:
         
         annual_return = get_scalar(returns.mean() * 252)
         volatility = get_scalar(returns.std() * np.sqrt(252))
-        max_dd = calculator.calculate_max_drawdown(historical_data.values)
+        max_dd = calculator.calculate_max_drawdown(prices.tolist())
         
         return {
             'sharpe_ratio': calculator.calculate_sharpe_ratio(returns.values),
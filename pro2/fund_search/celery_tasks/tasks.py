@@ -258,18 +258,10 @@ def update_nav_history_task(self, fund_codes: Optional[List[str]] = None,
             batch = fund_codes[i:i + batch_size]
             try:
                 results = fetcher.batch_get_fund_nav(batch, days=days)
-                for code, df in results.items():
-                    if df is not None and not df.empty:
-                        key = f"fund:nav:{code}"
-                        data = {
-                            'records': df.to_dict('records'),
-                            'columns': df.columns.tolist(),
-                            'last_date': str(df.iloc[-1].get('date', '')) if len(df) > 0 else None
-                        }
-                        preloader.cache.set(key, data, 24 * 3600)
-                        updated_count += 1
-                    else:
-                        failed_count += 1
+                valid = {code: df for code, df in results.items() if df is not None and not df.empty}
+                # 并入净值面板（增量合并最近 days 天），并发布列式数据供 Web 进程读取
+                updated_count += preloader.store_nav_history(valid, publish=True)
+                failed_count += len(results) - len(valid)
             except Exception as e:
                 logger.debug(f"批次更新历史净值失败 {batch[:3]}...: {e}")
                 failed_count += len(batch)
@@ -369,24 +361,14 @@ def recalc_performance_task(self) -> Dict[str, Any]:
         except Exception:
             codes = []
         
-        recalc_count = 0
-        failed_count = 0
-        
+        # 面板中没有的基金尝试从共享缓存加载
         for code in codes:
-            try:
-                # 获取历史数据
-                hist_key = f"fund:nav:{code}"
-                hist_data = preloader.cache.get(hist_key)
-                
-                if hist_data and 'records' in hist_data:
-                    # 重新计算绩效指标
-                    metrics = preloader._calculate_metrics(hist_data['records'])
-                    perf_key = f"fund:perf:{code}"
-                    preloader.cache.set(perf_key, metrics, 24 * 3600)
-                    recalc_count += 1
-            except Exception as e:
-                logger.debug(f"计算 {code} 绩效指标失败: {e}")
-                failed_count += 1
+            if code not in preloader.nav_panel:
+                preloader.get_fund_nav_history(code)
+        
+        # 整个面板一次向量化计算
+        recalc_count = preloader.recalculate_performance(codes)
+        failed_count = len(codes) - recalc_count
         
         logger.info(f"绩效指标重算完成: 成功 {recalc_count}, 失败 {failed_count}")
         return {
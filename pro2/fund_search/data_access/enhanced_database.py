@@ -13,6 +13,7 @@ from sqlalchemy import create_engine, text
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
+import time
 
 # 只获取logger，不配置basicConfig（由主程序配置）
 logger = logging.getLogger(__name__)
@@ -21,6 +22,131 @@ logger = logging.getLogger(__name__)
 class EnhancedDatabaseManager:
     """增强版数据库管理类"""
     
+    # 单行写入和批量写入共用的 upsert 语句
+    FUND_BASIC_INFO_UPSERT_SQL = """
+        INSERT INTO fund_basic_info (
+            fund_code, fund_name, fund_type, fund_company, fund_manager, 
+            establish_date, management_fee, custody_fee
+        ) VALUES (
+            :fund_code, :fund_name, :fund_type, :fund_company, :fund_manager,
+            :establish_date, :management_fee, :custody_fee
+        ) ON DUPLICATE KEY UPDATE
+            fund_name = VALUES(fund_name),
+            fund_type = VALUES(fund_type),
+            fund_company = VALUES(fund_company),
+            fund_manager = VALUES(fund_manager),
+            establish_date = VALUES(establish_date),
+            management_fee = VALUES(management_fee),
+            custody_fee = VALUES(custody_fee),
+            updated_at = CURRENT_TIMESTAMP
+        """
+
+    FUND_PERFORMANCE_UPSERT_SQL = """
+        INSERT INTO fund_performance (
+            fund_code, analysis_date, current_nav, previous_nav, daily_return, nav_date,
+            annualized_return, sharpe_ratio, max_drawdown, volatility, calmar_ratio,
+            sortino_ratio, var_95, win_rate, profit_loss_ratio, composite_score,
+            total_return, data_days
+        ) VALUES (
+            :fund_code, :analysis_date, :current_nav, :previous_nav, :daily_return, :nav_date,
+            :annualized_return, :sharpe_ratio, :max_drawdown, :volatility, :calmar_ratio,
+            :sortino_ratio, :var_95, :win_rate, :profit_loss_ratio, :composite_score,
+            :total_return, :data_days
+        ) ON DUPLICATE KEY UPDATE
+            current_nav = VALUES(current_nav),
+            previous_nav = VALUES(previous_nav),
+            daily_return = VALUES(daily_return),
+            nav_date = VALUES(nav_date),
+            annualized_return = VALUES(annualized_return),
+            sharpe_ratio = VALUES(sharpe_ratio),
+            max_drawdown = VALUES(max_drawdown),
+            volatility = VALUES(volatility),
+            calmar_ratio = VALUES(calmar_ratio),
+            sortino_ratio = VALUES(sortino_ratio),
+            var_95 = VALUES(var_95),
+            win_rate = VALUES(win_rate),
+            profit_loss_ratio = VALUES(profit_loss_ratio),
+            composite_score = VALUES(composite_score),
+            total_return = VALUES(total_return),
+            data_days = VALUES(data_days),
+            updated_at = CURRENT_TIMESTAMP
+        """
+
+    FUND_ANALYSIS_RESULTS_UPSERT_SQL = """
+        INSERT INTO fund_analysis_results (
+            fund_code, fund_name, yesterday_nav, current_estimate, today_return, 
+            prev_day_return, status_label, is_buy, redeem_amount, comparison_value, 
+            operation_suggestion, execution_amount, analysis_date, buy_multiplier, 
+            annualized_return, sharpe_ratio, sharpe_ratio_ytd, sharpe_ratio_1y, sharpe_ratio_all,
+            max_drawdown, volatility, calmar_ratio, 
+            sortino_ratio, var_95, win_rate, profit_loss_ratio, 
+            total_return, composite_score
+        ) VALUES (
+            :fund_code, :fund_name, :yesterday_nav, :current_estimate, :today_return,
+            :prev_day_return, :status_label, :is_buy, :redeem_amount, :comparison_value,
+            :operation_suggestion, :execution_amount, :analysis_date, :buy_multiplier,
+            :annualized_return, :sharpe_ratio, :sharpe_ratio_ytd, :sharpe_ratio_1y, :sharpe_ratio_all,
+            :max_drawdown, :volatility, :calmar_ratio,
+            :sortino_ratio, :var_95, :win_rate, :profit_loss_ratio, 
+            :total_return, :composite_score
+        ) ON DUPLICATE KEY UPDATE
+            fund_name = VALUES(fund_name),
+            yesterday_nav = VALUES(yesterday_nav),
+            current_estimate = VALUES(current_estimate),
+            today_return = VALUES(today_return),
+            prev_day_return = VALUES(prev_day_return),
+            status_label = VALUES(status_label),
+            is_buy = VALUES(is_buy),
+            redeem_amount = VALUES(redeem_amount),
+            comparison_value = VALUES(comparison_value),
+            operation_suggestion = VALUES(operation_suggestion),
+            execution_amount = VALUES(execution_amount),
+            buy_multiplier = VALUES(buy_multiplier),
+            annualized_return = VALUES(annualized_return),
+            sharpe_ratio = VALUES(sharpe_ratio),
+            sharpe_ratio_ytd = VALUES(sharpe_ratio_ytd),
+            sharpe_ratio_1y = VALUES(sharpe_ratio_1y),
+            sharpe_ratio_all = VALUES(sharpe_ratio_all),
+            max_drawdown = VALUES(max_drawdown),
+            volatility = VALUES(volatility),
+            calmar_ratio = VALUES(calmar_ratio),
+            sortino_ratio = VALUES(sortino_ratio),
+            var_95 = VALUES(var_95),
+            win_rate = VALUES(win_rate),
+            profit_loss_ratio = VALUES(profit_loss_ratio),
+            total_return = VALUES(total_return),
+            composite_score = VALUES(composite_score)
+        """
+
+    ANALYSIS_SUMMARY_UPSERT_SQL = """
+        INSERT INTO analysis_summary (
+            analysis_date, total_funds, buy_signals, sell_signals, hold_signals,
+            avg_buy_multiplier, total_redeem_amount, best_performing_fund,
+            worst_performing_fund, highest_sharpe_fund, lowest_volatility_fund,
+            report_files
+        ) VALUES (
+            :analysis_date, :total_funds, :buy_signals, :sell_signals, :hold_signals,
+            :avg_buy_multiplier, :total_redeem_amount, :best_performing_fund,
+            :worst_performing_fund, :highest_sharpe_fund, :lowest_volatility_fund,
+            :report_files
+        ) ON DUPLICATE KEY UPDATE
+            total_funds = VALUES(total_funds),
+            buy_signals = VALUES(buy_signals),
+            sell_signals = VALUES(sell_signals),
+            hold_signals = VALUES(hold_signals),
+            avg_buy_multiplier = VALUES(avg_buy_multiplier),
+            total_redeem_amount = VALUES(total_redeem_amount),
+            best_performing_fund = VALUES(best_performing_fund),
+            worst_performing_fund = VALUES(worst_performing_fund),
+            highest_sharpe_fund = VALUES(highest_sharpe_fund),
+            lowest_volatility_fund = VALUES(lowest_volatility_fund),
+            report_files = VALUES(report_files),
+            updated_at = CURRENT_TIMESTAMP
+        """
+
+    # 批量写入时每条语句包含的行数
+    BATCH_CHUNK_SIZE = 500
+    
     def __init__(self, db_config: Dict):
         """
         初始化数据库管理器
@@ -29,6 +155,7 @@ class EnhancedDatabaseManager:
         db_config: 数据库配置字典
         """
         self.db_config = db_config
+        self.last_batch_summary: Dict = {}
         self.engine = self._create_engine()
         self._init_database()
     
@@ -588,6 +715,21 @@ class EnhancedDatabaseManager:
             logger.error(f"执行原始查询失败: {str(e)}")
             return None
     
+    @staticmethod
+    def _to_native_params(params: Dict) -> Dict:
+        """转换numpy类型为Python原生类型"""
+        converted_params = {}
+        for key, value in params.items():
+            if isinstance(value, np.floating):
+                converted_params[key] = float(value)
+            elif isinstance(value, np.integer):
+                converted_params[key] = int(value)
+            elif isinstance(value, np.bool_):
+                converted_params[key] = bool(value)
+            else:
+                converted_params[key] = value
+        return converted_params
+    
     def execute_sql(self, sql: str, params: Optional[Dict] = None) -> bool:
         """
         执行SQL语句
@@ -602,18 +744,7 @@ class EnhancedDatabaseManager:
         try:
             # 转换numpy类型为Python原生类型
             if params:
-                import numpy as np
-                converted_params = {}
-                for key, value in params.items():
-                    if isinstance(value, np.floating):
-                        converted_params[key] = float(value)
-                    elif isinstance(value, np.integer):
-                        converted_params[key] = int(value)
-                    elif isinstance(value, np.bool_):
-                        converted_params[key] = bool(value)
-                    else:
-                        converted_params[key] = value
-                params = converted_params
+                params = self._to_native_params(params)
             
             with self.engine.connect() as conn:
                 if params:
@@ -681,23 +812,7 @@ class EnhancedDatabaseManager:
         bool: 插入是否成功
         """
         try:
-            sql = """
-            INSERT INTO fund_basic_info (
-                fund_code, fund_name, fund_type, fund_company, fund_manager, 
-                establish_date, management_fee, custody_fee
-            ) VALUES (
-                :fund_code, :fund_name, :fund_type, :fund_company, :fund_manager,
-                :establish_date, :management_fee, :custody_fee
-            ) ON DUPLICATE KEY UPDATE
-                fund_name = VALUES(fund_name),
-                fund_type = VALUES(fund_type),
-                fund_company = VALUES(fund_company),
-                fund_manager = VALUES(fund_manager),
-                establish_date = VALUES(establish_date),
-                management_fee = VALUES(management_fee),
-                custody_fee = VALUES(custody_fee),
-                updated_at = CURRENT_TIMESTAMP
-            """
+            sql = self.FUND_BASIC_INFO_UPSERT_SQL
             
             self.execute_sql(sql, fund_info)
             
@@ -719,36 +834,7 @@ class EnhancedDatabaseManager:
         bool: 插入是否成功
         """
         try:
-            sql = """
-            INSERT INTO fund_performance (
-                fund_code, analysis_date, current_nav, previous_nav, daily_return, nav_date,
-                annualized_return, sharpe_ratio, max_drawdown, volatility, calmar_ratio,
-                sortino_ratio, var_95, win_rate, profit_loss_ratio, composite_score,
-                total_return, data_days
-            ) VALUES (
-                :fund_code, :analysis_date, :current_nav, :previous_nav, :daily_return, :nav_date,
-                :annualized_return, :sharpe_ratio, :max_drawdown, :volatility, :calmar_ratio,
-                :sortino_ratio, :var_95, :win_rate, :profit_loss_ratio, :composite_score,
-                :total_return, :data_days
-            ) ON DUPLICATE KEY UPDATE
-                current_nav = VALUES(current_nav),
-                previous_nav = VALUES(previous_nav),
-                daily_return = VALUES(daily_return),
-                nav_date = VALUES(nav_date),
-                annualized_return = VALUES(annualized_return),
-                sharpe_ratio = VALUES(sharpe_ratio),
-                max_drawdown = VALUES(max_drawdown),
-                volatility = VALUES(volatility),
-                calmar_ratio = VALUES(calmar_ratio),
-                sortino_ratio = VALUES(sortino_ratio),
-                var_95 = VALUES(var_95),
-                win_rate = VALUES(win_rate),
-                profit_loss_ratio = VALUES(profit_loss_ratio),
-                composite_score = VALUES(composite_score),
-                total_return = VALUES(total_return),
-                data_days = VALUES(data_days),
-                updated_at = CURRENT_TIMESTAMP
-            """
+            sql = self.FUND_PERFORMANCE_UPSERT_SQL
             
             self.execute_sql(sql, performance_data)
             
@@ -761,6 +847,27 @@ class EnhancedDatabaseManager:
     
 
     
+    @staticmethod
+    def _prepare_analysis_summary_row(summary_data: Dict) -> Dict:
+        """准备 analysis_summary 表的插入数据"""
+        import json
+        
+        # 确保所有必填字段都有默认值
+        return {
+            'analysis_date': summary_data.get('analysis_date', datetime.now().date()),
+            'total_funds': summary_data.get('total_funds', 0),
+            'buy_signals': summary_data.get('buy_signals', 0),
+            'sell_signals': summary_data.get('sell_signals', 0),
+            'hold_signals': summary_data.get('hold_signals', 0),
+            'avg_buy_multiplier': summary_data.get('avg_buy_multiplier', 0.0),
+            'total_redeem_amount': summary_data.get('total_redeem_amount', 0),
+            'best_performing_fund': summary_data.get('best_performing_fund', ''),
+            'worst_performing_fund': summary_data.get('worst_performing_fund', ''),
+            'highest_sharpe_fund': summary_data.get('highest_sharpe_fund', ''),
+            'lowest_volatility_fund': summary_data.get('lowest_volatility_fund', ''),
+            'report_files': json.dumps(summary_data.get('report_files', {}))
+        }
+    
     def insert_analysis_summary(self, summary_data: Dict) -> bool:
         """
         插入分析汇总数据
@@ -772,49 +879,9 @@ class EnhancedDatabaseManager:
         bool: 插入是否成功
         """
         try:
-            sql = """
-            INSERT INTO analysis_summary (
-                analysis_date, total_funds, buy_signals, sell_signals, hold_signals,
-                avg_buy_multiplier, total_redeem_amount, best_performing_fund,
-                worst_performing_fund, highest_sharpe_fund, lowest_volatility_fund,
-                report_files
-            ) VALUES (
-                :analysis_date, :total_funds, :buy_signals, :sell_signals, :hold_signals,
-                :avg_buy_multiplier, :total_redeem_amount, :best_performing_fund,
-                :worst_performing_fund, :highest_sharpe_fund, :lowest_volatility_fund,
-                :report_files
-            ) ON DUPLICATE KEY UPDATE
-                total_funds = VALUES(total_funds),
-                buy_signals = VALUES(buy_signals),
-                sell_signals = VALUES(sell_signals),
-                hold_signals = VALUES(hold_signals),
-                avg_buy_multiplier = VALUES(avg_buy_multiplier),
-                total_redeem_amount = VALUES(total_redeem_amount),
-                best_performing_fund = VALUES(best_performing_fund),
-                worst_performing_fund = VALUES(worst_performing_fund),
-                highest_sharpe_fund = VALUES(highest_sharpe_fund),
-                lowest_volatility_fund = VALUES(lowest_volatility_fund),
-                report_files = VALUES(report_files),
-                updated_at = CURRENT_TIMESTAMP
-            """
+            sql = self.ANALYSIS_SUMMARY_UPSERT_SQL
             
-            import json
-            
-            # 确保所有必填字段都有默认值
-            safe_summary_data = {
-                'analysis_date': summary_data.get('analysis_date', datetime.now().date()),
-                'total_funds': summary_data.get('total_funds', 0),
-                'buy_signals': summary_data.get('buy_signals', 0),
-                'sell_signals': summary_data.get('sell_signals', 0),
-                'hold_signals': summary_data.get('hold_signals', 0),
-                'avg_buy_multiplier': summary_data.get('avg_buy_multiplier', 0.0),
-                'total_redeem_amount': summary_data.get('total_redeem_amount', 0),
-                'best_performing_fund': summary_data.get('best_performing_fund', ''),
-                'worst_performing_fund': summary_data.get('worst_performing_fund', ''),
-                'highest_sharpe_fund': summary_data.get('highest_sharpe_fund', ''),
-                'lowest_volatility_fund': summary_data.get('lowest_volatility_fund', ''),
-                'report_files': json.dumps(summary_data.get('report_files', {}))
-            }
+            safe_summary_data = self._prepare_analysis_summary_row(summary_data)
             
             self.execute_sql(sql, safe_summary_data)
             
@@ -825,97 +892,170 @@ class EnhancedDatabaseManager:
             logger.error(f"插入分析汇总数据失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _fund_basic_info_row(fund_data: Dict) -> Dict:
+        """从分析结果中提取 fund_basic_info 行"""
+        return {
+            'fund_code': fund_data.get('fund_code', ''),
+            'fund_name': fund_data.get('fund_name', ''),
+            'fund_type': fund_data.get('fund_type', ''),
+            'fund_company': fund_data.get('fund_company', ''),
+            'fund_manager': fund_data.get('fund_manager', ''),
+            'establish_date': fund_data.get('establish_date', None),
+            'management_fee': fund_data.get('management_fee', 0.0),
+            'custody_fee': fund_data.get('custody_fee', 0.0)
+        }
+    
+    @staticmethod
+    def _fund_performance_row(fund_data: Dict) -> Dict:
+        """从分析结果中提取 fund_performance 行"""
+        return {
+            'fund_code': fund_data.get('fund_code', ''),
+            'analysis_date': fund_data.get('analysis_date', datetime.now().date()),
+            'current_nav': fund_data.get('current_nav', 0.0),
+            'previous_nav': fund_data.get('previous_nav', 0.0),
+            'daily_return': fund_data.get('daily_return', 0.0),
+            'nav_date': fund_data.get('nav_date', datetime.now().date()),
+            'annualized_return': fund_data.get('annualized_return', 0.0),
+            'sharpe_ratio': fund_data.get('sharpe_ratio', 0.0),
+            'max_drawdown': fund_data.get('max_drawdown', 0.0),
+            'volatility': fund_data.get('volatility', 0.0),
+            'calmar_ratio': fund_data.get('calmar_ratio', 0.0),
+            'sortino_ratio': fund_data.get('sortino_ratio', 0.0),
+            'var_95': fund_data.get('var_95', 0.0),
+            'win_rate': fund_data.get('win_rate', 0.0),
+            'profit_loss_ratio': fund_data.get('profit_loss_ratio', 0.0),
+            'composite_score': fund_data.get('composite_score', 0.0),
+            'total_return': fund_data.get('total_return', 0.0),
+            'data_days': fund_data.get('data_days', 0)
+        }
+    
+    @staticmethod
+    def _fund_analysis_results_row(fund_data: Dict) -> Dict:
+        """从分析结果中提取 fund_analysis_results 行"""
+        return EnhancedDatabaseManager._prepare_fund_analysis_row({
+            'fund_code': fund_data.get('fund_code', ''),
+            'fund_name': fund_data.get('fund_name', ''),
+            'analysis_date': fund_data.get('analysis_date', datetime.now().date()),
+            'today_return': fund_data.get('today_return', 0.0),
+            'prev_day_return': fund_data.get('prev_day_return', 0.0),
+            'status_label': fund_data.get('status_label', ''),
+            'operation_suggestion': fund_data.get('operation_suggestion', ''),
+            'execution_amount': fund_data.get('execution_amount', ''),
+            'annualized_return': fund_data.get('annualized_return', 0.0),
+            'sharpe_ratio': fund_data.get('sharpe_ratio', 0.0),
+            'sharpe_ratio_ytd': fund_data.get('sharpe_ratio_ytd', 0.0),
+            'sharpe_ratio_1y': fund_data.get('sharpe_ratio_1y', 0.0),
+            'sharpe_ratio_all': fund_data.get('sharpe_ratio_all', 0.0),
+            'max_drawdown': fund_data.get('max_drawdown', 0.0),
+            'volatility': fund_data.get('volatility', 0.0),
+            'calmar_ratio': fund_data.get('calmar_ratio', 0.0),
+            'sortino_ratio': fund_data.get('sortino_ratio', 0.0),
+            'var_95': fund_data.get('var_95', 0.0),
+            'win_rate': fund_data.get('win_rate', 0.0),
+            'profit_loss_ratio': fund_data.get('profit_loss_ratio', 0.0),
+            'composite_score': fund_data.get('composite_score', 0.0),
+            'total_return': fund_data.get('total_return', 0.0),
+            'yesterday_nav': fund_data.get('previous_nav', 0.0),
+            'current_estimate': fund_data.get('estimate_nav', 0.0),
+            'is_buy': 1 if fund_data.get('is_buy', False) else 0,
+            'redeem_amount': fund_data.get('redeem_amount', 0.0),
+            'comparison_value': fund_data.get('comparison_value', 0.0),
+            'buy_multiplier': fund_data.get('buy_multiplier', 0.0)
+        })
+    
+    def _execute_chunked(self, conn, sql: str, rows: List[Dict], chunk_size: int) -> Dict:
+        """
+        在给定连接上分批 executemany（驱动将每批合并为一条多行 INSERT）
+        
+        返回：
+        Dict: rows, batches, seconds
+        """
+        started = time.perf_counter()
+        statement = text(sql)
+        batches = 0
+        for start in range(0, len(rows), chunk_size):
+            conn.execute(statement, rows[start:start + chunk_size])
+            batches += 1
+        return {
+            'rows': len(rows),
+            'batches': batches,
+            'seconds': round(time.perf_counter() - started, 4)
+        }
+    
+    def batch_upsert_fund_data(self, fund_data_list: List[Dict], summary_data: Optional[Dict] = None,
+                               chunk_size: Optional[int] = None) -> Dict:
+        """
+        集合式批量写入分析结果
+        
+        每张表的所有行按 chunk_size 分批，以多行 upsert 写入；
+        全部表在同一个事务中提交，任一批失败则整体回滚并抛出异常。
+        单条记录字段转换失败时跳过该记录（与逐条写入时单条失败不影响其他记录一致）。
+        
+        参数：
+        fund_data_list: 基金数据列表
+        summary_data: 汇总数据，None 时不写入 analysis_summary
+        chunk_size: 每条语句包含的行数，默认 BATCH_CHUNK_SIZE
+        
+        返回：
+        Dict: {表名: {'rows', 'batches', 'seconds', 'skipped'}, 'total_seconds': 总耗时}
+        """
+        chunk_size = chunk_size or self.BATCH_CHUNK_SIZE
+        tables = [
+            ('fund_basic_info', self.FUND_BASIC_INFO_UPSERT_SQL, self._fund_basic_info_row),
+            ('fund_performance', self.FUND_PERFORMANCE_UPSERT_SQL, self._fund_performance_row),
+            ('fund_analysis_results', self.FUND_ANALYSIS_RESULTS_UPSERT_SQL, self._fund_analysis_results_row),
+        ]
+        
+        prepared = []
+        for table, sql, build_row in tables:
+            rows = []
+            skipped = 0
+            for fund_data in fund_data_list:
+                try:
+                    rows.append(self._to_native_params(build_row(fund_data)))
+                except (TypeError, ValueError) as e:
+                    skipped += 1
+                    logger.warning(f"跳过 {table} 记录 {fund_data.get('fund_code', '')}: {e}")
+            prepared.append((table, sql, rows, skipped))
+        if summary_data is not None:
+            prepared.append(('analysis_summary', self.ANALYSIS_SUMMARY_UPSERT_SQL,
+                             [self._to_native_params(self._prepare_analysis_summary_row(summary_data))], 0))
+        
+        summary = {}
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            for table, sql, rows, skipped in prepared:
+                summary[table] = self._execute_chunked(conn, sql, rows, chunk_size)
+                summary[table]['skipped'] = skipped
+            conn.commit()
+        summary['total_seconds'] = round(time.perf_counter() - started, 4)
+        
+        for table, _, _, _ in prepared:
+            stats = summary[table]
+            logger.info(f"批量写入 {table}: {stats['rows']}行, {stats['batches']}批, {stats['seconds']:.3f}s"
+                        + (f", 跳过{stats['skipped']}行" if stats['skipped'] else ""))
+        return summary
+    
     def batch_insert_data(self, fund_data_list: List[Dict], 
-                         summary_data: Dict) -> bool:
+                         summary_data: Dict, chunk_size: Optional[int] = None) -> bool:
         """
         批量插入所有数据
         
         参数：
         fund_data_list: 基金数据列表
         summary_data: 汇总数据
+        chunk_size: 每条语句包含的行数，默认 BATCH_CHUNK_SIZE
         
         返回：
-        bool: 批量插入是否成功
+        bool: 批量插入是否成功（各表行数和耗时见 last_batch_summary）
         """
         try:
             logger.info("开始批量插入数据...")
             
-            # 插入基金基本信息
-            for fund_data in fund_data_list:
-                basic_info = {
-                    'fund_code': fund_data.get('fund_code', ''),
-                    'fund_name': fund_data.get('fund_name', ''),
-                    'fund_type': fund_data.get('fund_type', ''),
-                    'fund_company': fund_data.get('fund_company', ''),
-                    'fund_manager': fund_data.get('fund_manager', ''),
-                    'establish_date': fund_data.get('establish_date', None),
-                    'management_fee': fund_data.get('management_fee', 0.0),
-                    'custody_fee': fund_data.get('custody_fee', 0.0)
-                }
-                self.insert_fund_basic_info(basic_info)
-            
-            # 插入基金绩效数据
-            for fund_data in fund_data_list:
-                performance_data = {
-                    'fund_code': fund_data.get('fund_code', ''),
-                    'analysis_date': fund_data.get('analysis_date', datetime.now().date()),
-                    'current_nav': fund_data.get('current_nav', 0.0),
-                    'previous_nav': fund_data.get('previous_nav', 0.0),
-                    'daily_return': fund_data.get('daily_return', 0.0),
-                    'nav_date': fund_data.get('nav_date', datetime.now().date()),
-                    'annualized_return': fund_data.get('annualized_return', 0.0),
-                    'sharpe_ratio': fund_data.get('sharpe_ratio', 0.0),
-                    'max_drawdown': fund_data.get('max_drawdown', 0.0),
-                    'volatility': fund_data.get('volatility', 0.0),
-                    'calmar_ratio': fund_data.get('calmar_ratio', 0.0),
-                    'sortino_ratio': fund_data.get('sortino_ratio', 0.0),
-                    'var_95': fund_data.get('var_95', 0.0),
-                    'win_rate': fund_data.get('win_rate', 0.0),
-                    'profit_loss_ratio': fund_data.get('profit_loss_ratio', 0.0),
-                    'composite_score': fund_data.get('composite_score', 0.0),
-                    'total_return': fund_data.get('total_return', 0.0),
-                    'data_days': fund_data.get('data_days', 0)
-                }
-                self.insert_fund_performance(performance_data)
+            self.last_batch_summary = self.batch_upsert_fund_data(fund_data_list, summary_data, chunk_size)
             
-            # 插入综合分析结果数据到fund_analysis_results表
-            for fund_data in fund_data_list:
-                fund_analysis_data = {
-                    'fund_code': fund_data.get('fund_code', ''),
-                    'fund_name': fund_data.get('fund_name', ''),
-                    'analysis_date': fund_data.get('analysis_date', datetime.now().date()),
-                    'today_return': fund_data.get('today_return', 0.0),
-                    'prev_day_return': fund_data.get('prev_day_return', 0.0),
-                    'status_label': fund_data.get('status_label', ''),
-                    'operation_suggestion': fund_data.get('operation_suggestion', ''),
-                    'execution_amount': fund_data.get('execution_amount', ''),
-                    'annualized_return': fund_data.get('annualized_return', 0.0),
-                    'sharpe_ratio': fund_data.get('sharpe_ratio', 0.0),
-                    'sharpe_ratio_ytd': fund_data.get('sharpe_ratio_ytd', 0.0),
-                    'sharpe_ratio_1y': fund_data.get('sharpe_ratio_1y', 0.0),
-                    'sharpe_ratio_all': fund_data.get('sharpe_ratio_all', 0.0),
-                    'max_drawdown': fund_data.get('max_drawdown', 0.0),
-                    'volatility': fund_data.get('volatility', 0.0),
-                    'calmar_ratio': fund_data.get('calmar_ratio', 0.0),
-                    'sortino_ratio': fund_data.get('sortino_ratio', 0.0),
-                    'var_95': fund_data.get('var_95', 0.0),
-                    'win_rate': fund_data.get('win_rate', 0.0),
-                    'profit_loss_ratio': fund_data.get('profit_loss_ratio', 0.0),
-                    'composite_score': fund_data.get('composite_score', 0.0),
-                    'total_return': fund_data.get('total_return', 0.0),
-                    'yesterday_nav': fund_data.get('previous_nav', 0.0),
-                    'current_estimate': fund_data.get('estimate_nav', 0.0),
-                    'is_buy': 1 if fund_data.get('is_buy', False) else 0,
-                    'redeem_amount': fund_data.get('redeem_amount', 0.0),
-                    'comparison_value': fund_data.get('comparison_value', 0.0),
-                    'buy_multiplier': fund_data.get('buy_multiplier', 0.0)
-                }
-                self.insert_fund_analysis_results(fund_analysis_data)
-            
-            # 插入分析汇总数据
-            self.insert_analysis_summary(summary_data)
-            
-            logger.info("批量插入数据完成")
+            logger.info(f"批量插入数据完成，耗时 {self.last_batch_summary['total_seconds']:.3f}s")
             return True
             
         except Exception as e:
@@ -1294,6 +1434,40 @@ class EnhancedDatabaseManager:
             logger.error(f"保存报告文件信息失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _prepare_fund_analysis_row(analysis_data: Dict) -> Dict:
+        """准备插入的数据，映射到 fund_analysis_results 表的列"""
+        return {
+            'fund_code': str(analysis_data.get('fund_code', '')),
+            'fund_name': str(analysis_data.get('fund_name', '')),
+            'yesterday_nav': float(analysis_data.get('yesterday_nav', 0.0)),
+            'current_estimate': float(analysis_data.get('current_estimate', 0.0)),
+            'today_return': float(analysis_data.get('today_return', 0.0)),
+            'prev_day_return': float(analysis_data.get('prev_day_return', 0.0)),
+            'status_label': str(analysis_data.get('status_label', '')),
+            'is_buy': int(analysis_data.get('is_buy', 0)),
+            'redeem_amount': float(analysis_data.get('redeem_amount', 0.0)),
+            'comparison_value': float(analysis_data.get('comparison_value', 0.0)),
+            'operation_suggestion': str(analysis_data.get('operation_suggestion', '')),
+            'execution_amount': str(analysis_data.get('execution_amount', '')),
+            'analysis_date': analysis_data.get('analysis_date', datetime.now().date()),
+            'buy_multiplier': float(analysis_data.get('buy_multiplier', 0.0)),
+            'annualized_return': float(analysis_data.get('annualized_return', 0.0)),
+            'sharpe_ratio': float(analysis_data.get('sharpe_ratio', 0.0)),
+            'sharpe_ratio_ytd': float(analysis_data.get('sharpe_ratio_ytd', 0.0)),
+            'sharpe_ratio_1y': float(analysis_data.get('sharpe_ratio_1y', 0.0)),
+            'sharpe_ratio_all': float(analysis_data.get('sharpe_ratio_all', 0.0)),
+            'max_drawdown': float(analysis_data.get('max_drawdown', 0.0)),
+            'volatility': float(analysis_data.get('volatility', 0.0)),
+            'calmar_ratio': float(analysis_data.get('calmar_ratio', 0.0)),
+            'sortino_ratio': float(analysis_data.get('sortino_ratio', 0.0)),
+            'var_95': float(analysis_data.get('var_95', 0.0)),
+            'win_rate': float(analysis_data.get('win_rate', 0.0)),
+            'profit_loss_ratio': float(analysis_data.get('profit_loss_ratio', 0.0)),
+            'total_return': float(analysis_data.get('total_return', 0.0)),
+            'composite_score': float(analysis_data.get('composite_score', 0.0))
+        }
+    
     def insert_fund_analysis_results(self, analysis_data: Dict) -> bool:
         """
         插入基金分析结果数据到fund_analysis_results表
@@ -1305,83 +1479,9 @@ class EnhancedDatabaseManager:
         bool: 插入是否成功
         """
         try:
-            sql = """
-            INSERT INTO fund_analysis_results (
-                fund_code, fund_name, yesterday_nav, current_estimate, today_return, 
-                prev_day_return, status_label, is_buy, redeem_amount, comparison_value, 
-                operation_suggestion, execution_amount, analysis_date, buy_multiplier, 
-                annualized_return, sharpe_ratio, sharpe_ratio_ytd, sharpe_ratio_1y, sharpe_ratio_all,
-                max_drawdown, volatility, calmar_ratio, 
-                sortino_ratio, var_95, win_rate, profit_loss_ratio, 
-                total_return, composite_score
-            ) VALUES (
-                :fund_code, :fund_name, :yesterday_nav, :current_estimate, :today_return,
-                :prev_day_return, :status_label, :is_buy, :redeem_amount, :comparison_value,
-                :operation_suggestion, :execution_amount, :analysis_date, :buy_multiplier,
-                :annualized_return, :sharpe_ratio, :sharpe_ratio_ytd, :sharpe_ratio_1y, :sharpe_ratio_all,
-                :max_drawdown, :volatility, :calmar_ratio,
-                :sortino_ratio, :var_95, :win_rate, :profit_loss_ratio, 
-                :total_return, :composite_score
-            ) ON DUPLICATE KEY UPDATE
-                fund_name = VALUES(fund_name),
-                yesterday_nav = VALUES(yesterday_nav),
-                current_estimate = VALUES(current_estimate),
-                today_return = VALUES(today_return),
-                prev_day_return = VALUES(prev_day_return),
-                status_label = VALUES(status_label),
-                is_buy = VALUES(is_buy),
-                redeem_amount = VALUES(redeem_amount),
-                comparison_value = VALUES(comparison_value),
-                operation_suggestion = VALUES(operation_suggestion),
-                execution_amount = VALUES(execution_amount),
-                buy_multiplier = VALUES(buy_multiplier),
-                annualized_return = VALUES(annualized_return),
-                sharpe_ratio = VALUES(sharpe_ratio),
-                sharpe_ratio_ytd = VALUES(sharpe_ratio_ytd),
-                sharpe_ratio_1y = VALUES(sharpe_ratio_1y),
-                sharpe_ratio_all = VALUES(sharpe_ratio_all),
-                max_drawdown = VALUES(max_drawdown),
-                volatility = VALUES(volatility),
-                calmar_ratio = VALUES(calmar_ratio),
-                sortino_ratio = VALUES(sortino_ratio),
-                var_95 = VALUES(var_95),
-                win_rate = VALUES(win_rate),
-                profit_loss_ratio = VALUES(profit_loss_ratio),
-                total_return = VALUES(total_return),
-                composite_score = VALUES(composite_score)
-            """
+            sql = self.FUND_ANALYSIS_RESULTS_UPSERT_SQL
             
-            # 准备插入的数据，映射到实际表的列
-            prepared_data = {
-                'fund_code': str(analysis_data.get('fund_code', '')),
-                'fund_name': str(analysis_data.get('fund_name', '')),
-                'yesterday_nav': float(analysis_data.get('yesterday_nav', 0.0)),
-                'current_estimate': float(analysis_data.get('current_estimate', 0.0)),
-                'today_return': float(analysis_data.get('today_return', 0.0)),
-                'prev_day_return': float(analysis_data.get('prev_day_return', 0.0)),
-                'status_label': str(analysis_data.get('status_label', '')),
-                'is_buy': int(analysis_data.get('is_buy', 0)),
-                'redeem_amount': float(analysis_data.get('redeem_amount', 0.0)),
-                'comparison_value': float(analysis_data.get('comparison_value', 0.0)),
-                'operation_suggestion': str(analysis_data.get('operation_suggestion', '')),
-                'execution_amount': str(analysis_data.get('execution_amount', '')),
-                'analysis_date': analysis_data.get('analysis_date', datetime.now().date()),
-                'buy_multiplier': float(analysis_data.get('buy_multiplier', 0.0)),
-                'annualized_return': float(analysis_data.get('annualized_return', 0.0)),
-                'sharpe_ratio': float(analysis_data.get('sharpe_ratio', 0.0)),
-                'sharpe_ratio_ytd': float(analysis_data.get('sharpe_ratio_ytd', 0.0)),
-                'sharpe_ratio_1y': float(analysis_data.get('sharpe_ratio_1y', 0.0)),
-                'sharpe_ratio_all': float(analysis_data.get('sharpe_ratio_all', 0.0)),
-                'max_drawdown': float(analysis_data.get('max_drawdown', 0.0)),
-                'volatility': float(analysis_data.get('volatility', 0.0)),
-                'calmar_ratio': float(analysis_data.get('calmar_ratio', 0.0)),
-                'sortino_ratio': float(analysis_data.get('sortino_ratio', 0.0)),
-                'var_95': float(analysis_data.get('var_95', 0.0)),
-                'win_rate': float(analysis_data.get('win_rate', 0.0)),
-                'profit_loss_ratio': float(analysis_data.get('profit_loss_ratio', 0.0)),
-                'total_return': float(analysis_data.get('total_return', 0.0)),
-                'composite_score': float(analysis_data.get('composite_score', 0.0))
-            }
+            prepared_data = self._prepare_fund_analysis_row(analysis_data)
             
             self.execute_sql(sql, prepared_data)
             
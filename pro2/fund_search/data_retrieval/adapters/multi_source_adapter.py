@@ -1023,37 +1023,52 @@ class MultiSourceDataAdapter(OptimizedFundData):
         try:
             # 获取历史数据
             hist_data = self.get_historical_data(fund_code, days)
-            
-            if hist_data.empty or len(hist_data) < 2:
-                return self._get_default_metrics()
-            
-            # 提取日收益率（需要转换列名）
-            daily_growth_col = '日增长率' if '日增长率' in hist_data.columns else 'daily_return'
-            if daily_growth_col in hist_data.columns:
-                daily_returns = hist_data[daily_growth_col].dropna()
-                # 处理百分比格式
-                daily_returns = pd.to_numeric(daily_returns, errors='coerce')
-                # 如果数值较大，是百分比格式，需要转换为小数
-                if abs(daily_returns).mean() >= 0.01:
-                    daily_returns = daily_returns / 100
-            else:
-                daily_returns = pd.Series([0.0])
-            
-            if len(daily_returns) < 2:
-                return self._get_default_metrics()
-            
-            # 计算各种绩效指标
-            return self._calculate_metrics(daily_returns, hist_data)
+            return self.calculate_performance_from_history(hist_data)
             
         except Exception as e:
             logger.error(f"计算基金 {fund_code} 绩效指标失败: {e}")
             return self._get_default_metrics()
     
-    def _calculate_metrics(self, daily_returns: pd.Series, hist_data: pd.DataFrame) -> Dict:
+    @staticmethod
+    def calculate_performance_from_history(hist_data: pd.DataFrame) -> Dict:
+        """
+        由已获取的历史数据计算绩效指标（不访问数据源，可在子进程中调用）
+        
+        Args:
+            hist_data: get_historical_data 返回的历史数据
+            
+        Returns:
+            dict: 绩效指标
+        """
+        if hist_data.empty or len(hist_data) < 2:
+            return MultiSourceDataAdapter._get_default_metrics()
+        
+        # 提取日收益率（需要转换列名）
+        daily_growth_col = '日增长率' if '日增长率' in hist_data.columns else 'daily_return'
+        if daily_growth_col in hist_data.columns:
+            daily_returns = hist_data[daily_growth_col].dropna()
+            # 处理百分比格式
+            daily_returns = pd.to_numeric(daily_returns, errors='coerce')
+            # 如果数值较大，是百分比格式，需要转换为小数
+            if abs(daily_returns).mean() >= 0.01:
+                daily_returns = daily_returns / 100
+        else:
+            daily_returns = pd.Series([0.0])
+        
+        if len(daily_returns) < 2:
+            return MultiSourceDataAdapter._get_default_metrics()
+        
+        # 计算各种绩效指标
+        return MultiSourceDataAdapter._calculate_metrics(daily_returns, hist_data)
+    
+    @staticmethod
+    def _calculate_metrics(daily_returns: pd.Series, hist_data: pd.DataFrame) -> Dict:
         """
         计算绩效指标（与 EnhancedFundData 保持一致）
         分别计算不同时期的夏普比率：成立以来、近一年、今年以来
         """
+        from shared.fund_metrics import align_returns, compute_cross_section_metrics
+        
         try:
             from shared.enhanced_config import PERFORMANCE_CONFIG, INVESTMENT_STRATEGY_CONFIG
         except ImportError:
@@ -1073,140 +1088,38 @@ class MultiSourceDataAdapter(OptimizedFundData):
                 'risk_free_rate': 0.02
             }
         
-        # 获取配置参数
-        risk_free_rate = INVESTMENT_STRATEGY_CONFIG['risk_free_rate']
-        trading_days = PERFORMANCE_CONFIG['trading_days_per_year']
-        var_confidence = PERFORMANCE_CONFIG['var_confidence']
-        
         # 获取净值列名
         nav_col = '单位净值' if '单位净值' in hist_data.columns else 'nav'
         date_col = '日期' if '日期' in hist_data.columns else 'date'
+        if nav_col not in hist_data.columns:
+            return MultiSourceDataAdapter._get_default_metrics()
         
         # 确保数据按日期升序排列（最早的在前）
+        dates = None
         if date_col in hist_data.columns:
             hist_data = hist_data.sort_values(date_col, ascending=True).reset_index(drop=True)
-        
-        # 计算总收益率（成立以来）
-        if nav_col in hist_data.columns:
-            start_nav = float(hist_data[nav_col].iloc[0])
-            end_nav = float(hist_data[nav_col].iloc[-1])
-            total_return = (end_nav - start_nav) / start_nav if start_nav != 0 else 0.0
-        else:
-            total_return = 0.0
-        
-        # 计算年化收益率（成立以来）
-        days = len(hist_data)
-        if days > 0:
-            annualized_return = (1 + total_return) ** (trading_days / days) - 1
-        else:
-            annualized_return = 0.0
-        
-        # 计算年化波动率（成立以来）
-        volatility = daily_returns.std() * np.sqrt(trading_days)
-        
-        # 计算夏普比率（成立以来）- 使用全部数据
-        sharpe_ratio_all = (annualized_return - risk_free_rate) / volatility if volatility != 0 else 0.0
-        
-        # 计算不同时期的夏普比率
-        sharpe_ratio_1y = sharpe_ratio_all  # 默认使用全部数据
-        sharpe_ratio_ytd = sharpe_ratio_all  # 默认使用全部数据
-        
-        # 获取日期列
-        if date_col in hist_data.columns:
-            hist_data_copy = hist_data.copy()
-            hist_data_copy[date_col] = pd.to_datetime(hist_data_copy[date_col])
-            now = pd.Timestamp.now()
-            
-            # 计算近一年夏普比率
-            one_year_ago = now - pd.DateOffset(years=1)
-            last_year_data = hist_data_copy[hist_data_copy[date_col] >= one_year_ago]
-            if len(last_year_data) >= 30:  # 至少30个交易日数据
-                last_year_returns = daily_returns[-len(last_year_data):]
-                if len(last_year_returns) > 0:
-                    vol_1y = last_year_returns.std() * np.sqrt(trading_days)
-                    # 计算近一年年化收益率
-                    start_nav_1y = float(last_year_data[nav_col].iloc[0]) if nav_col in last_year_data.columns else start_nav
-                    end_nav_1y = float(last_year_data[nav_col].iloc[-1]) if nav_col in last_year_data.columns else end_nav
-                    if start_nav_1y != 0:
-                        total_return_1y = (end_nav_1y - start_nav_1y) / start_nav_1y
-                        annualized_return_1y = (1 + total_return_1y) ** (trading_days / len(last_year_data)) - 1
-                        sharpe_ratio_1y = (annualized_return_1y - risk_free_rate) / vol_1y if vol_1y != 0 else 0.0
-            
-            # 计算今年以来夏普比率
-            ytd_start = pd.Timestamp(year=now.year, month=1, day=1)
-            ytd_data = hist_data_copy[hist_data_copy[date_col] >= ytd_start]
-            if len(ytd_data) >= 10:  # 至少10个交易日数据
-                ytd_returns = daily_returns[-len(ytd_data):]
-                if len(ytd_returns) > 0:
-                    vol_ytd = ytd_returns.std() * np.sqrt(trading_days)
-                    # 计算今年以来年化收益率
-                    start_nav_ytd = float(ytd_data[nav_col].iloc[0]) if nav_col in ytd_data.columns else start_nav
-                    end_nav_ytd = float(ytd_data[nav_col].iloc[-1]) if nav_col in ytd_data.columns else end_nav
-                    if start_nav_ytd != 0:
-                        total_return_ytd = (end_nav_ytd - start_nav_ytd) / start_nav_ytd
-                        days_ytd = len(ytd_data)
-                        annualized_return_ytd = (1 + total_return_ytd) ** (trading_days / days_ytd) - 1 if days_ytd > 0 else 0.0
-                        sharpe_ratio_ytd = (annualized_return_ytd - risk_free_rate) / vol_ytd if vol_ytd != 0 else 0.0
-        
-        # 计算最大回撤
-        if nav_col in hist_data.columns:
-            nav_series = pd.to_numeric(hist_data[nav_col], errors='coerce')
-            cumulative_max = nav_series.expanding().max()
-            drawdown = (nav_series - cumulative_max) / cumulative_max
-            max_drawdown = drawdown.min()
-        else:
-            max_drawdown = 0.0
-        
-        # 计算Calmar比率
-        calmar_ratio = annualized_return / abs(max_drawdown) if max_drawdown != 0 else 0.0
-        
-        # 计算Sortino比率
-        negative_returns = daily_returns[daily_returns < 0]
-        downside_deviation = negative_returns.std() * np.sqrt(trading_days) if len(negative_returns) > 0 else volatility
-        sortino_ratio = (annualized_return - risk_free_rate) / downside_deviation if downside_deviation != 0 else 0.0
-        
-        # 计算VaR (95%)
-        var_95 = daily_returns.quantile(var_confidence) if not daily_returns.empty else 0.0
-        
-        # 计算胜率
-        win_rate = (daily_returns > 0).sum() / len(daily_returns) if len(daily_returns) > 0 else 0.0
-        
-        # 计算盈亏比
-        positive_returns = daily_returns[daily_returns > 0]
-        negative_returns = daily_returns[daily_returns < 0]
-        avg_positive = positive_returns.mean() if len(positive_returns) > 0 else 0.0
-        avg_negative = abs(negative_returns.mean()) if len(negative_returns) > 0 else 0.0
-        profit_loss_ratio = avg_positive / avg_negative if avg_negative != 0 else 0.0
-        
-        # 计算综合评分
-        weights = PERFORMANCE_CONFIG['weights']
-        composite_score = (
-            weights['annualized_return'] * max(0, min(1, (annualized_return + 0.5) / 1.0)) +
-            weights['sharpe_ratio'] * max(0, min(1, (sharpe_ratio_all + 2) / 4.0)) +
-            weights['max_drawdown'] * max(0, min(1, 1 - abs(max_drawdown) / 0.5)) +
-            weights['volatility'] * max(0, min(1, 1 - volatility / 0.5)) +
-            weights['win_rate'] * win_rate
-        )
-        
-        return {
-            'annualized_return': annualized_return,
-            'sharpe_ratio': sharpe_ratio_all,  # 默认使用成立以来
-            'sharpe_ratio_ytd': sharpe_ratio_ytd,
-            'sharpe_ratio_1y': sharpe_ratio_1y,
-            'sharpe_ratio_all': sharpe_ratio_all,
-            'max_drawdown': max_drawdown,
-            'volatility': volatility,
-            'calmar_ratio': calmar_ratio,
-            'sortino_ratio': sortino_ratio,
-            'var_95': var_95,
-            'win_rate': win_rate,
-            'profit_loss_ratio': profit_loss_ratio,
-            'composite_score': composite_score,
-            'total_return': total_return,
-            'data_days': days
-        }
+            dates = hist_data[date_col]
+        
+        # 近一年/今年以来以当前日期为锚，数据不足（30/10个交易日）时沿用成立以来的夏普比率；
+        # 收益率按位置对齐到最后 len(daily_returns) 行，回撤按净值计算
+        metrics = compute_cross_section_metrics(
+            pd.to_numeric(hist_data[nav_col], errors='coerce').to_numpy(),
+            dates=dates,
+            returns=align_returns(daily_returns, len(hist_data)),
+            risk_free_rate=INVESTMENT_STRATEGY_CONFIG['risk_free_rate'],
+            trading_days=PERFORMANCE_CONFIG['trading_days_per_year'],
+            var_confidence=PERFORMANCE_CONFIG['var_confidence'],
+            as_of=pd.Timestamp.now(),
+            min_window_days={'1y': 30, 'ytd': 10},
+            short_window='all',
+            drawdown_basis='nav',
+            score_weights=PERFORMANCE_CONFIG['weights']
+        ).get(0)
+        metrics['data_days'] = len(hist_data)
+        return metrics
     
-    def _get_default_metrics(self) -> Dict:
+    @staticmethod
+    def _get_default_metrics() -> Dict:
         """
         获取默认绩效指标
         """
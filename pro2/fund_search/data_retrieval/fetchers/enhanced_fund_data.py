@@ -780,122 +780,21 @@ class EnhancedFundData:
         dict: 绩效指标
         """
         from shared.enhanced_config import PERFORMANCE_CONFIG, INVESTMENT_STRATEGY_CONFIG
+        from shared.fund_metrics import align_returns, compute_cross_section_metrics
         
-        # 获取配置参数
-        risk_free_rate = INVESTMENT_STRATEGY_CONFIG['risk_free_rate']
-        trading_days = PERFORMANCE_CONFIG['trading_days_per_year']
-        var_confidence = PERFORMANCE_CONFIG['var_confidence']
-        
-        # 计算总收益率
-        start_nav = hist_data['nav'].iloc[0]
-        end_nav = hist_data['nav'].iloc[-1]
-        total_return = (end_nav - start_nav) / start_nav if start_nav != 0 else 0.0
-        
-        # 计算年化收益率
-        days = len(hist_data)
-        if days > 0:
-            annualized_return = (1 + total_return) ** (trading_days / days) - 1
-        else:
-            annualized_return = 0.0
-        
-        # 计算年化波动率
-        volatility = daily_returns.std() * np.sqrt(trading_days)
-        
-        # 计算夏普比率（默认使用全部数据）
-        sharpe_ratio = (annualized_return - risk_free_rate) / volatility if volatility != 0 else 0.0
-        
-        # 计算今年以来的夏普比率（YTD - Year to Date）
-        current_date = hist_data['date'].iloc[-1]
-        year_start_date = pd.Timestamp(year=current_date.year, month=1, day=1)
-        ytd_data = hist_data[hist_data['date'] >= year_start_date]
-        if len(ytd_data) >= 2:
-            ytd_returns = ytd_data['daily_return'].dropna()
-            ytd_volatility = ytd_returns.std() * np.sqrt(trading_days)
-            ytd_start_nav = ytd_data['nav'].iloc[0]
-            ytd_end_nav = ytd_data['nav'].iloc[-1]
-            ytd_total_return = (ytd_end_nav - ytd_start_nav) / ytd_start_nav if ytd_start_nav != 0 else 0.0
-            ytd_annualized_return = (1 + ytd_total_return) ** (trading_days / len(ytd_data)) - 1
-            sharpe_ratio_ytd = (ytd_annualized_return - risk_free_rate) / ytd_volatility if ytd_volatility != 0 else 0.0
-        else:
-            sharpe_ratio_ytd = 0.0
-        
-        # 计算近一年的夏普比率（1Y - 1 Year）
-        one_year_ago = current_date - pd.Timedelta(days=365)
-        one_year_data = hist_data[hist_data['date'] >= one_year_ago]
-        if len(one_year_data) >= 2:
-            one_year_returns = one_year_data['daily_return'].dropna()
-            one_year_volatility = one_year_returns.std() * np.sqrt(trading_days)
-            one_year_start_nav = one_year_data['nav'].iloc[0]
-            one_year_end_nav = one_year_data['nav'].iloc[-1]
-            one_year_total_return = (one_year_end_nav - one_year_start_nav) / one_year_start_nav if one_year_start_nav != 0 else 0.0
-            one_year_annualized_return = (1 + one_year_total_return) ** (trading_days / len(one_year_data)) - 1
-            sharpe_ratio_1y = (one_year_annualized_return - risk_free_rate) / one_year_volatility if one_year_volatility != 0 else 0.0
-        else:
-            sharpe_ratio_1y = 0.0
-        
-        # 计算成立以来的夏普比率（All - All Time）
-        if len(hist_data) >= 2:
-            all_returns = daily_returns
-            all_volatility = volatility
-            all_annualized_return = annualized_return
-            sharpe_ratio_all = (all_annualized_return - risk_free_rate) / all_volatility if all_volatility != 0 else 0.0
-        else:
-            sharpe_ratio_all = 0.0
-        
-        # 计算最大回撤
-        cumulative_returns = (1 + daily_returns).cumprod()
-        running_max = cumulative_returns.expanding().max()
-        drawdown = (cumulative_returns - running_max) / running_max
-        max_drawdown = drawdown.min() if not drawdown.empty else 0.0
-        
-        # 计算卡玛比率
-        calmar_ratio = annualized_return / abs(max_drawdown) if max_drawdown != 0 else 0.0
-        
-        # 计算索提诺比率
-        negative_returns = daily_returns[daily_returns < 0]
-        downside_deviation = negative_returns.std() * np.sqrt(trading_days) if len(negative_returns) > 0 else volatility
-        sortino_ratio = (annualized_return - risk_free_rate) / downside_deviation if downside_deviation != 0 else 0.0
-        
-        # 计算VaR (95%)
-        var_95 = daily_returns.quantile(var_confidence) if not daily_returns.empty else 0.0
-        
-        # 计算胜率
-        win_rate = (daily_returns > 0).sum() / len(daily_returns) if len(daily_returns) > 0 else 0.0
-        
-        # 计算盈亏比
-        positive_returns = daily_returns[daily_returns > 0]
-        negative_returns = daily_returns[daily_returns < 0]
-        avg_positive = positive_returns.mean() if len(positive_returns) > 0 else 0.0
-        avg_negative = abs(negative_returns.mean()) if len(negative_returns) > 0 else 0.0
-        profit_loss_ratio = avg_positive / avg_negative if avg_negative != 0 else 0.0
-        
-        # 计算综合评分
-        weights = PERFORMANCE_CONFIG['weights']
-        composite_score = (
-            weights['annualized_return'] * max(0, min(1, (annualized_return + 0.5) / 1.0)) +
-            weights['sharpe_ratio'] * max(0, min(1, (sharpe_ratio + 2) / 4.0)) +
-            weights['max_drawdown'] * max(0, min(1, 1 - abs(max_drawdown) / 0.5)) +
-            weights['volatility'] * max(0, min(1, 1 - volatility / 0.5)) +
-            weights['win_rate'] * win_rate
-        )
-        
-        return {
-            'annualized_return': annualized_return,
-            'sharpe_ratio': sharpe_ratio,
-            'sharpe_ratio_ytd': sharpe_ratio_ytd,
-            'sharpe_ratio_1y': sharpe_ratio_1y,
-            'sharpe_ratio_all': sharpe_ratio_all,
-            'max_drawdown': max_drawdown,
-            'volatility': volatility,
-            'calmar_ratio': calmar_ratio,
-            'sortino_ratio': sortino_ratio,
-            'var_95': var_95,
-            'win_rate': win_rate,
-            'profit_loss_ratio': profit_loss_ratio,
-            'composite_score': composite_score,
-            'total_return': total_return,
-            'data_days': days
-        }
+        # 单只基金作为一列的截面计算，窗口以最后净值日为锚
+        dates = hist_data['date'] if 'date' in hist_data.columns else None
+        metrics = compute_cross_section_metrics(
+            pd.to_numeric(hist_data['nav'], errors='coerce').to_numpy(),
+            dates=dates,
+            returns=align_returns(daily_returns, hist_data.index),
+            risk_free_rate=INVESTMENT_STRATEGY_CONFIG['risk_free_rate'],
+            trading_days=PERFORMANCE_CONFIG['trading_days_per_year'],
+            var_confidence=PERFORMANCE_CONFIG['var_confidence'],
+            score_weights=PERFORMANCE_CONFIG['weights']
+        ).get(0)
+        metrics['data_days'] = len(hist_data)
+        return metrics
     
     @staticmethod
     def _get_default_metrics() -> Dict:
@@ -20,47 +20,257 @@ API速率限制器
     limiter.wait_if_needed()
     call_api()
     limiter.record_call()
+    
+    # 方式4: 协程中使用
+    async with limiter.acquire():
+        await call_api_async()
+    
+    # 多进程共享配额（Flask + Celery worker）
+    limiter = RateLimiter(max_calls=80, period=60, name='fund_nav',
+                          backend=RedisBucketBackend.from_url('redis://localhost:6379/0'))
 """
 
+import asyncio
+import math
+import os
+import struct
 import time
 import threading
 from typing import Optional, Callable, Any
 from functools import wraps
-from collections import deque
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
 logger = logging.getLogger(__name__)
 
 
+def _reserve_tokens(tokens: Optional[float], updated_at: Optional[float], now: float, requested: float,
+                    rate: float, capacity: float, max_wait: Optional[float]):
+    """
+    令牌桶补充并预留令牌（各后端共用的计算）
+
+    令牌数允许为负：负值表示已被排队的调用预留，后来者需要等待更久，
+    因此等待顺序与预留顺序一致，不会出现多个线程同时醒来抢占。
+
+    Returns:
+        (是否预留成功, 需要等待的秒数, 新的令牌数)
+    """
+    if tokens is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+    remaining = tokens - requested
+    wait = -remaining / rate if remaining < 0 else 0.0
+    if max_wait is not None and wait > max_wait:
+        return False, wait, tokens
+    return True, wait, remaining
+
+
+class LocalBucketBackend:
+    """进程内令牌桶状态"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def reserve(self, key: str, requested: float, rate: float, capacity: float,
+                max_wait: Optional[float]):
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._state.get(key, (None, None))
+            ok, wait, tokens = _reserve_tokens(tokens, updated_at, now, requested, rate, capacity, max_wait)
+            self._state[key] = (tokens, now)
+            return ok, wait
+
+    def available(self, key: str, rate: float, capacity: float) -> float:
+        with self._lock:
+            tokens, updated_at = self._state.get(key, (None, None))
+            return _reserve_tokens(tokens, updated_at, time.monotonic(), 0, rate, capacity, None)[2]
+
+
+class FileBucketBackend:
+    """
+    基于文件锁的令牌桶状态，同一台机器上的多个进程（Flask、Celery worker）共享配额
+
+    每个限制器一个16字节文件（令牌数、更新时间），读改写期间持有排他文件锁。
+    """
+
+    _STATE = struct.Struct('<dd')
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.bucket')
+
+    def _update(self, key: str, apply):
+        fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _lock_file(fd)
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                raw = os.read(fd, self._STATE.size)
+                tokens, updated_at = self._STATE.unpack(raw) if len(raw) == self._STATE.size else (None, None)
+                result, tokens, updated_at = apply(tokens, updated_at)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, self._STATE.pack(tokens, updated_at))
+                return result
+            finally:
+                _unlock_file(fd)
+        finally:
+            os.close(fd)
+
+    def reserve(self, key: str, requested: float, rate: float, capacity: float,
+                max_wait: Optional[float]):
+        def apply(tokens, updated_at):
+            now = time.time()
+            ok, wait, tokens = _reserve_tokens(tokens, updated_at, now, requested, rate, capacity, max_wait)
+            return (ok, wait), tokens, now
+        return self._update(key, apply)
+
+    def available(self, key: str, rate: float, capacity: float) -> float:
+        def apply(tokens, updated_at):
+            now = time.time()
+            tokens = _reserve_tokens(tokens, updated_at, now, 0, rate, capacity, None)[2]
+            return tokens, tokens, now
+        return self._update(key, apply)
+
+
+def _lock_file(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class RedisBucketBackend:
+    """
+    基于Redis的令牌桶状态，所有进程和机器共享配额
+
+    补充与预留在Lua脚本中原子执行，时间取Redis服务器时间，避免各机器时钟偏差。
+    """
+
+    _RESERVE_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local requested = tonumber(ARGV[3])
+    local max_wait = tonumber(ARGV[4])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1])
+    if tokens == nil then
+        tokens = capacity
+    else
+        tokens = math.min(capacity, tokens + math.max(0, now - tonumber(state[2])) * rate)
+    end
+    local remaining = tokens - requested
+    local wait = 0
+    if remaining < 0 then wait = -remaining / rate end
+    local ok = 1
+    if max_wait >= 0 and wait > max_wait then
+        ok = 0
+        remaining = tokens
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(remaining), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil((capacity - remaining) / rate) + 60)
+    return {ok, tostring(wait), tostring(remaining)}
+    """
+
+    def __init__(self, client, key_prefix: str = 'fund_search:rate_limiter:'):
+        self._client = client
+        self._prefix = key_prefix
+        self._script = client.register_script(self._RESERVE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisBucketBackend':
+        """根据连接URL创建，如 redis://localhost:6379/0"""
+        if redis is None:
+            raise ImportError("redis package is required. Install with: pip install redis")
+        return cls(redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2), **kwargs)
+
+    def ping(self) -> bool:
+        """检查连接是否可用"""
+        return bool(self._client.ping())
+
+    def _call(self, key: str, requested: float, rate: float, capacity: float, max_wait: Optional[float]):
+        ok, wait, tokens = self._script(
+            keys=[f'{self._prefix}{key}'],
+            args=[repr(rate), repr(capacity), repr(requested), repr(-1.0 if max_wait is None else max_wait)]
+        )
+        return bool(int(ok)), float(wait), float(tokens)
+
+    def reserve(self, key: str, requested: float, rate: float, capacity: float,
+                max_wait: Optional[float]):
+        ok, wait, _ = self._call(key, requested, rate, capacity, max_wait)
+        return ok, wait
+
+    def available(self, key: str, rate: float, capacity: float) -> float:
+        return self._call(key, 0, rate, capacity, None)[2]
+
+
 class RateLimiter:
     """
     令牌桶算法实现的速率限制器
     
     特性:
-    1. 线程安全
-    2. 支持突发流量平滑处理
-    3. 支持等待超时配置
+    1. 线程安全，支持 async 获取
+    2. 公平：调用按到达顺序预留令牌，各自只等待到自己的令牌可用，不会集中唤醒后超发
+    3. 支持突发流量（桶容量 burst_size）
+    4. 可选共享后端（文件锁 / Redis），多个进程共用同一配额
+    5. 支持等待超时配置
+    
+    任意长度为 period 的时间窗内最多放行 max_calls 次：桶满时立即放行 burst_size 次，
+    其余按 (max_calls - burst_size + 1)/period 的速率补充。burst_size 越大突发越多、
+    持续速率越低，默认 1 即均匀放行（Tushare 等按分钟计的共享配额应保持默认）。
     """
     
     def __init__(self, max_calls: int = 80, period: int = 60, 
-                 burst_size: Optional[int] = None, name: str = "default"):
+                 burst_size: Optional[int] = None, name: str = "default",
+                 backend=None):
         """
         初始化速率限制器
         
         Args:
             max_calls: 周期内最大调用次数（默认80次）
             period: 时间周期（秒，默认60秒）
-            burst_size: 突发流量大小（默认等于max_calls）
-            name: 限制器名称，用于日志区分
+            burst_size: 突发流量大小（默认1，取值范围 1~max_calls）
+            name: 限制器名称，用于日志区分，也是共享后端中的键
+            backend: 令牌桶状态后端（LocalBucketBackend / FileBucketBackend / RedisBucketBackend），
+                     默认进程内
         """
         self.max_calls = max_calls
         self.period = period
-        self.burst_size = burst_size or max_calls
+        self.burst_size = min(max(burst_size or 1, 1), max_calls)
         self.name = name
+        # 补充速率扣除突发部分，保证任意 period 时间窗内合计不超过 max_calls
+        self.rate = (max_calls - self.burst_size + 1) / period
+        self.backend = backend or LocalBucketBackend()
         
-        # 调用时间记录队列
-        self._call_times = deque()
         self._lock = threading.RLock()
+        # wait_if_needed 已预留、尚未由 record_call 确认的令牌（按线程记录）
+        self._pending = threading.local()
         
         # 统计信息
         self._stats = {
@@ -69,95 +279,115 @@ class RateLimiter:
             'total_wait_time': 0.0
         }
         
-        logger.info(f"速率限制器 '{name}' 初始化: {max_calls}次/{period}秒")
+        logger.info(f"速率限制器 '{name}' 初始化: {max_calls}次/{period}秒，突发{self.burst_size}次，"
+                    f"后端: {type(self.backend).__name__}")
     
-    def wait_if_needed(self, timeout: Optional[float] = None) -> bool:
+    def _reserve(self, tokens: float, timeout: Optional[float]) -> Optional[float]:
+        """预留令牌，返回需要等待的秒数；超过timeout时不预留并返回None"""
+        ok, wait = self.backend.reserve(self.name, tokens, self.rate, self.burst_size, timeout)
+        if not ok:
+            logger.warning(f"速率限制器 '{self.name}': 等待时间{wait:.2f}s超过超时{timeout}s")
+            return None
+        
+        with self._lock:
+            self._stats['total_calls'] += 1
+            if wait > 0:
+                self._stats['throttled_calls'] += 1
+                self._stats['total_wait_time'] += wait
+        if wait > 0:
+            logger.debug(f"速率限制器 '{self.name}': 等待 {wait:.2f}s")
+        return wait
+    
+    def try_acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
         """
-        检查是否需要等待，如需等待则阻塞
+        获取令牌，需要时阻塞等待
         
         Args:
+            tokens: 需要的令牌数
             timeout: 最大等待时间（秒），None表示无限等待
             
         Returns:
-            bool: True表示可以调用，False表示超时
+            bool: True表示已获取，False表示超时（未消耗令牌）
         """
-        with self._lock:
-            now = time.time()
-            
-            # 清理过期记录
-            cutoff_time = now - self.period
-            while self._call_times and self._call_times[0] < cutoff_time:
-                self._call_times.popleft()
-            
-            # 检查当前调用次数
-            if len(self._call_times) < self.max_calls:
-                return True
-            
-            # 需要等待
-            if not self._call_times:
-                return True
-            
-            # 计算需要等待的时间
-            oldest_call = self._call_times[0]
-            wait_time = oldest_call + self.period - now
-            
-            if wait_time <= 0:
-                return True
-            
-            if timeout is not None and wait_time > timeout:
-                logger.warning(f"速率限制器 '{self.name}': 等待时间{wait_time:.2f}s超过超时{timeout}s")
-                return False
-            
-            self._stats['throttled_calls'] += 1
-            logger.debug(f"速率限制器 '{self.name}': 等待 {wait_time:.2f}s")
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+    
+    async def acquire_async(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        异步获取令牌，等待期间不阻塞事件循环
         
-        # 在锁外等待
-        start_wait = time.time()
-        time.sleep(wait_time)
-        actual_wait = time.time() - start_wait
+        Returns:
+            bool: True表示已获取，False表示超时（未消耗令牌）
+        """
+        wait = self._reserve(tokens, timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+    
+    def wait_if_needed(self, timeout: Optional[float] = None) -> bool:
+        """
+        检查是否需要等待，如需等待则阻塞
         
-        with self._lock:
-            self._stats['total_wait_time'] += actual_wait
+        令牌在此预留，随后的 record_call 只确认不再重复扣减。
         
+        Args:
+            timeout: 最大等待时间（秒），None表示无限等待
+            
+        Returns:
+            bool: True表示可以调用，False表示超时
+        """
+        if not self.try_acquire(1, timeout):
+            return False
+        self._pending.count = getattr(self._pending, 'count', 0) + 1
         return True
     
     def record_call(self):
-        """记录一次API调用"""
-        with self._lock:
-            self._call_times.append(time.time())
-            self._stats['total_calls'] += 1
+        """记录一次API调用（未经 wait_if_needed 预留时直接扣减一个令牌）"""
+        pending = getattr(self._pending, 'count', 0)
+        if pending:
+            self._pending.count = pending - 1
+            return
+        self._reserve(1, None)
     
     def acquire(self, timeout: Optional[float] = None):
         """
-        获取调用许可的上下文管理器
+        获取调用许可的上下文管理器（同时支持 with 和 async with）
         
         使用示例:
             with limiter.acquire():
                 api_call()
+            
+            async with limiter.acquire():
+                await api_call()
         """
         return _RateLimiterContext(self, timeout)
     
     def get_current_usage(self) -> int:
-        """获取当前周期内的调用次数"""
-        with self._lock:
-            now = time.time()
-            cutoff_time = now - self.period
-            while self._call_times and self._call_times[0] < cutoff_time:
-                self._call_times.popleft()
-            return len(self._call_times)
+        """获取当前已占用（含排队预留）的令牌数"""
+        available = self.backend.available(self.name, self.rate, self.burst_size)
+        return max(0, math.ceil(self.burst_size - available))
     
     def get_stats(self) -> dict:
         """获取统计信息"""
+        usage = self.get_current_usage()
         with self._lock:
             return {
                 'name': self.name,
                 'max_calls': self.max_calls,
                 'period': self.period,
-                'current_usage': self.get_current_usage(),
+                'burst_size': self.burst_size,
+                'backend': type(self.backend).__name__,
+                'current_usage': usage,
                 'total_calls': self._stats['total_calls'],
                 'throttled_calls': self._stats['throttled_calls'],
                 'total_wait_time': round(self._stats['total_wait_time'], 2),
-                'usage_percent': round(self.get_current_usage() / self.max_calls * 100, 1)
+                'usage_percent': round(usage / self.burst_size * 100, 1)
             }
     
     def reset_stats(self):
@@ -179,18 +409,23 @@ class _RateLimiterContext:
         self.acquired = False
     
     def __enter__(self):
-        self.acquired = self.limiter.wait_if_needed(self.timeout)
-        if self.acquired:
-            self.limiter.record_call()
+        self.acquired = self.limiter.try_acquire(1, self.timeout)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
+    
+    async def __aenter__(self):
+        self.acquired = await self.limiter.acquire_async(1, self.timeout)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
 
 
 def rate_limited(limiter: RateLimiter, timeout: Optional[float] = None):
     """
-    速率限制装饰器
+    速率限制装饰器（同步函数和协程函数均可）
     
     使用示例:
         limiter = RateLimiter(max_calls=80, period=60)
@@ -200,11 +435,18 @@ def rate_limited(limiter: RateLimiter, timeout: Optional[float] = None):
             return pro.fund_nav(ts_code='000001.OF')
     """
     def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not await limiter.acquire_async(1, timeout):
+                    raise RateLimitExceeded(f"速率限制器 '{limiter.name}': 获取调用许可超时")
+                return await func(*args, **kwargs)
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            if not limiter.wait_if_needed(timeout):
+            if not limiter.try_acquire(1, timeout):
                 raise RateLimitExceeded(f"速率限制器 '{limiter.name}': 获取调用许可超时")
-            limiter.record_call()
             return func(*args, **kwargs)
         return wrapper
     return decorator
@@ -222,42 +464,48 @@ class MultiRateLimiter:
     为不同API接口配置不同的速率限制
     """
     
-    # 默认配置
+    # 默认配置（Tushare 按分钟计配额，不允许突发，以免窗口内超出）
     DEFAULT_LIMITS = {
-        'fund_nav': {'max_calls': 80, 'period': 60},      # 净值接口: 80次/分钟
-        'fund_basic': {'max_calls': 80, 'period': 60},    # 基础信息接口: 80次/分钟
-        'fund_daily': {'max_calls': 80, 'period': 60},    # 日线数据: 80次/分钟
-        'default': {'max_calls': 80, 'period': 60}        # 默认: 80次/分钟
+        'fund_nav': {'max_calls': 80, 'period': 60, 'burst_size': 1},      # 净值接口: 80次/分钟
+        'fund_basic': {'max_calls': 80, 'period': 60, 'burst_size': 1},    # 基础信息接口: 80次/分钟
+        'fund_daily': {'max_calls': 80, 'period': 60, 'burst_size': 1},    # 日线数据: 80次/分钟
+        'default': {'max_calls': 80, 'period': 60, 'burst_size': 1}        # 默认: 80次/分钟
     }
     
-    def __init__(self, config: Optional[dict] = None):
+    def __init__(self, config: Optional[dict] = None, backend=None):
         """
         初始化多接口限制器
         
         Args:
-            config: 自定义配置，格式为 {api_name: {'max_calls': x, 'period': y}}
+            config: 自定义配置，格式为 {api_name: {'max_calls': x, 'period': y, 'burst_size': z}}
+            backend: 共享的令牌桶状态后端，默认进程内（各进程独立计数）
         """
         self._limiters = {}
         self._config = config or self.DEFAULT_LIMITS
+        self._backend = backend or LocalBucketBackend()
+        self._lock = threading.Lock()
         
         # 初始化各个接口的限制器
         for api_name, settings in self._config.items():
-            self._limiters[api_name] = RateLimiter(
-                max_calls=settings['max_calls'],
-                period=settings['period'],
-                name=api_name
-            )
+            self._limiters[api_name] = self._create_limiter(api_name, settings)
+    
+    def _create_limiter(self, api_name: str, settings: dict) -> RateLimiter:
+        return RateLimiter(
+            max_calls=settings['max_calls'],
+            period=settings['period'],
+            burst_size=settings.get('burst_size'),
+            name=api_name,
+            backend=self._backend
+        )
     
     def get_limiter(self, api_name: str) -> RateLimiter:
         """获取指定接口的速率限制器"""
         if api_name not in self._limiters:
-            # 使用默认配置创建
-            default = self._config.get('default', {'max_calls': 80, 'period': 60})
-            self._limiters[api_name] = RateLimiter(
-                max_calls=default['max_calls'],
-                period=default['period'],
-                name=api_name
-            )
+            with self._lock:
+                if api_name not in self._limiters:
+                    # 使用默认配置创建
+                    default = self._config.get('default', self.DEFAULT_LIMITS['default'])
+                    self._limiters[api_name] = self._create_limiter(api_name, default)
         return self._limiters[api_name]
     
     def get_all_stats(self) -> dict:
@@ -265,8 +513,31 @@ class MultiRateLimiter:
         return {name: limiter.get_stats() for name, limiter in self._limiters.items()}
 
 
+def create_shared_backend():
+    """
+    根据环境变量创建跨进程共享的令牌桶后端
+    
+    - RATE_LIMITER_REDIS_URL: 使用Redis（跨机器）
+    - RATE_LIMITER_STATE_DIR: 使用文件锁（同一台机器的多个进程）
+    - 都未设置或Redis不可用时使用进程内后端
+    """
+    redis_url = os.environ.get('RATE_LIMITER_REDIS_URL')
+    if redis_url:
+        try:
+            backend = RedisBucketBackend.from_url(redis_url)
+            backend.ping()
+            return backend
+        except Exception as e:
+            logger.warning(f"Redis速率限制后端不可用，退回本地后端: {e}")
+    
+    state_dir = os.environ.get('RATE_LIMITER_STATE_DIR')
+    if state_dir:
+        return FileBucketBackend(state_dir)
+    return LocalBucketBackend()
+
+
 # 全局速率限制器实例
-tushare_limiter = MultiRateLimiter()
+tushare_limiter = MultiRateLimiter(backend=create_shared_backend())
 
 
 def get_tushare_limiter(api_name: str = 'default') -> RateLimiter:
@@ -23,10 +23,13 @@ from config import settings  # 使用统一配置管理
 # 使用方式: settings.system (替代 BASE_CONFIG), settings.database (替代 DATABASE_CONFIG), settings.notification (替代 NOTIFICATION_CONFIG)
 from data_retrieval.adapters.multi_source_adapter import MultiSourceDataAdapter
 from backtesting import EnhancedInvestmentStrategy
-from backtesting import get_all_advanced_strategies  # 导入高级策略
 from backtesting.analysis.enhanced_analytics import EnhancedFundAnalytics
 from data_access.enhanced_database import EnhancedDatabaseManager
 from services.notification import EnhancedNotificationManager
+from strategies import InvestmentStrategyRules
+from services.fund_analysis_pipeline import (
+    FundAnalysisPipeline, evaluate_best_strategy, evaluate_fund, failed_fund_result, prefetch_fund
+)
 
 # 设置日志
 logging.basicConfig(
@@ -43,8 +46,21 @@ logger = logging.getLogger(__name__)
 class EnhancedFundAnalysisSystem:
     """增强版基金分析系统主类"""
     
-    def __init__(self):
-        """初始化系统组件"""
+    def __init__(self, fetch_workers: int = 8, eval_workers: Optional[int] = None, resume: bool = True):
+        """
+        初始化系统组件
+        
+        参数：
+        fetch_workers: 批量分析时并发获取数据的线程数
+        eval_workers: 批量分析时计算指标和策略的进程数，None 为 CPU 核数，1 表示不使用子进程
+        resume: 批量分析是否从同一分析日期的断点继续
+        """
+        self.fetch_workers = fetch_workers
+        self.eval_workers = eval_workers
+        self.resume = resume
+        self.stage_timings: Dict = {}
+        self._unpersisted_results: Optional[List[Dict]] = None
+        self._pipeline: Optional[FundAnalysisPipeline] = None
         self.fund_data_manager = MultiSourceDataAdapter()
         self.strategy_engine = EnhancedInvestmentStrategy()
         self.analytics_engine = EnhancedFundAnalytics()
@@ -269,7 +285,7 @@ class EnhancedFundAnalysisSystem:
     
     def _evaluate_best_strategy(self, history_df: pd.DataFrame) -> Optional[Dict]:
         """
-        评估并选择表现最好的高级策略
+        评估并选择表现最好的高级策略（实现见 services.fund_analysis_pipeline.evaluate_best_strategy）
         
         Args:
             history_df: 历史数据DataFrame
@@ -277,108 +293,7 @@ class EnhancedFundAnalysisSystem:
         Returns:
             Dict: 最佳策略生成的今日建议，如果无法评估则返回None
         """
-        try:
-            if history_df.empty or len(history_df) < 60:
-                return None
-                
-            strategies = get_all_advanced_strategies()
-            best_return = -float('inf')
-            best_strategy_key = None
-            
-            # 简易回测窗口：最近60个交易日
-            backtest_window = min(60, len(history_df) - 1)
-            start_idx = len(history_df) - backtest_window
-            
-            # 获取净值序列
-            if '单位净值' in history_df.columns:
-                nav_series = history_df['单位净值']
-            elif 'nav' in history_df.columns:
-                nav_series = history_df['nav']
-            else:
-                return None
-                
-            # 对每个策略进行回测
-            for key, strategy in strategies.items():
-                # 初始资金10000，持有0
-                cash = 10000.0
-                holdings = 0.0
-                
-                # 模拟交易
-                for i in range(start_idx, len(history_df)):
-                    # 获取当日信号
-                    try:
-                        signal = strategy.generate_signal(
-                            history_df=history_df,
-                            current_index=i,
-                            current_holdings=holdings * nav_series.iloc[i],
-                            cash=cash
-                        )
-                        
-                        current_nav = nav_series.iloc[i]
-                        
-                        if signal.action == 'buy':
-                            amount = 1000 * signal.amount_multiplier  # 假设基准定投1000
-                            if cash >= amount:
-                                shares = amount / current_nav
-                                holdings += shares
-                                cash -= amount
-                        elif signal.action == 'sell':
-                            amount = 1000 * signal.amount_multiplier
-                            if holdings * current_nav >= amount:
-                                shares = amount / current_nav
-                                holdings -= shares
-                                cash += amount
-                    except Exception:
-                        continue
-                        
-                # 计算最终价值
-                final_value = cash + holdings * nav_series.iloc[-1]
-                returns = (final_value - 10000.0) / 10000.0
-                
-                if returns > best_return:
-                    best_return = returns
-                    best_strategy_key = key
-                    
-            # 使用最佳策略生成今日信号
-            if best_strategy_key:
-                best_strategy = strategies[best_strategy_key]
-                today_idx = len(history_df) - 1
-                # 假设持有10000市值用于生成建议
-                current_signal = best_strategy.generate_signal(
-                    history_df=history_df,
-                    current_index=today_idx,
-                    current_holdings=10000,
-                    cash=5000
-                )
-                
-                # 转换为标准格式
-                action_map = {
-                    'buy': '买入',
-                    'sell': '卖出',
-                    'hold': '持有'
-                }
-                
-                # 构造操作建议文本
-                suggestion = f"{best_strategy.name}: {action_map.get(current_signal.action, '观望')}"
-                if current_signal.reason:
-                    suggestion += f" ({current_signal.reason})"
-                
-                return {
-                    'strategy_name': best_strategy.name,
-                    'action': current_signal.action,
-                    'buy_multiplier': current_signal.amount_multiplier,
-                    'redeem_amount': 0 if current_signal.action == 'buy' else (1000 * current_signal.amount_multiplier),
-                    'status_label': f"🏆 {best_strategy.name[:4]}",
-                    'operation_suggestion': suggestion,
-                    'execution_amount': f"{current_signal.amount_multiplier:.1f}倍",
-                    'comparison_value': best_return * 100
-                }
-                
-            return None
-            
-        except Exception as e:
-            logger.warning(f"高级策略评估失败: {e}")
-            return None
+        return evaluate_best_strategy(history_df)
 
     def analyze_single_fund(self, fund_code: str, fund_name: str, analysis_date: str) -> Dict:
         """
@@ -392,192 +307,20 @@ class EnhancedFundAnalysisSystem:
         返回：
         dict: 基金分析结果
         """
-        try:
-            logger.info(f"开始分析基金: {fund_code} - {fund_name}")
-            
-            # 获取基金基本信息
-            basic_info = self.fund_data_manager.get_fund_basic_info(fund_code)
-            logger.debug(f"基金 {fund_code} 基本信息: {basic_info}")
-            
-            # 获取实时数据
-            realtime_data = self.fund_data_manager.get_realtime_data(fund_code, fund_name)
-            logger.info(f"基金 {fund_code} 实时数据: current_nav={realtime_data.get('current_nav')}, "
-                       f"previous_nav={realtime_data.get('previous_nav')}, "
-                       f"daily_return={realtime_data.get('daily_return')}, "
-                       f"prev_day_return={realtime_data.get('prev_day_return')}, "
-                       f"data_source={realtime_data.get('data_source')}")
-            
-            # 获取绩效指标
-            performance_metrics = self.fund_data_manager.get_performance_metrics(fund_code)
-            logger.debug(f"基金 {fund_code} 绩效指标: sharpe_ratio={performance_metrics.get('sharpe_ratio')}, "
-                        f"composite_score={performance_metrics.get('composite_score')}")
-            
-            # 获取历史数据用于策略分析 (增加天数以支持高级策略)
-            historical_data = self.fund_data_manager.get_historical_data(fund_code, days=365)
-            
-            # 计算今日和昨日收益率
-            # 从实时数据获取今日收益率，并添加验证
-            today_return = realtime_data.get('today_return', 0.0)
-            try:
-                today_return = float(today_return)
-                # 检查今日收益率是否异常（超过±100%）
-                if abs(today_return) > 100:
-                    logger.warning(f"基金 {fund_code} 今日收益率异常: {today_return}%，使用默认值0.0%")
-                    today_return = 0.0
-            except (ValueError, TypeError):
-                logger.warning(f"基金 {fund_code} 今日收益率解析失败，使用默认值0.0%")
-                today_return = 0.0
-            
-            yesterday_return = 0.0
-            
-            # 首先尝试从实时数据获取昨日收益率（更可靠）
-            if 'prev_day_return' in realtime_data:
-                yesterday_return = realtime_data['prev_day_return']
-                try:
-                    yesterday_return = float(yesterday_return)
-                    # 检查昨日收益率是否异常（超过±100%）
-                    if abs(yesterday_return) > 100:
-                        logger.warning(f"基金 {fund_code} 实时数据中的昨日收益率异常: {yesterday_return}%，从历史数据获取")
-                        yesterday_return = 0.0
-                    else:
-                        # 如果实时数据中的昨日收益率正常，直接使用
-                        logger.debug(f"基金 {fund_code} 从实时数据获取昨日收益率: {yesterday_return}%")
-                except (ValueError, TypeError):
-                    logger.warning(f"基金 {fund_code} 实时数据中的昨日收益率解析失败，从历史数据获取")
-                    yesterday_return = 0.0
-            
-            # 如果实时数据中的昨日收益率不可用或异常，从历史数据获取
-            if yesterday_return == 0.0 and not historical_data.empty:
-                # 支持两种列名：daily_return (来自adapter) 或 daily_growth_rate (旧格式)
-                growth_rate_col = 'daily_return' if 'daily_return' in historical_data.columns else 'daily_growth_rate'
-                if growth_rate_col in historical_data.columns:
-                    recent_growth_series = historical_data[growth_rate_col].dropna()
-                    
-                    if len(recent_growth_series) >= 1:
-                        try:
-                            # 检查是否为QDII基金
-                            is_qdii = MultiSourceDataAdapter.is_qdii_fund(fund_code, fund_name)
-                            logger.debug(f"基金 {fund_code} 名称={fund_name}, QDII判断结果={is_qdii}")
-                            
-                            # 向前追溯寻找非零值（特别针对QDII基金）
-                            if is_qdii and yesterday_return == 0.0:
-                                logger.info(f"检测到QDII基金 {fund_code} ({fund_name}) 且昨日收益率为0，开始向前追溯获取非零值")
-                                logger.debug(f"QDII基金 {fund_code} 历史数据共 {len(recent_growth_series)} 条: {recent_growth_series.tolist()}")
-                                
-                                # 从最新的数据开始向前查找非零值（QDII基金可能延迟更多天）
-                                max_trace_days = 15  # QDII基金最多追溯15天
-                                for i in range(len(recent_growth_series) - 1, -1, -1):
-                                    raw_value = float(recent_growth_series.iloc[i]) if pd.notna(recent_growth_series.iloc[i]) else 0.0
-                                    # AKShare返回的日增长率已经是百分比格式
-                                    candidate_return = raw_value
-                                    
-                                    # 检查是否为有效非零值
-                                    if abs(candidate_return) <= 100 and abs(candidate_return) > 0.001:  # 允许微小非零值
-                                        yesterday_return = candidate_return
-                                        days_back = len(recent_growth_series) - 1 - i
-                                        logger.info(f"QDII基金 {fund_code} 向前追溯成功，往前第{days_back}天收益率: {yesterday_return}%")
-                                        break
-                                    
-                                    # 限制追溯范围
-                                    if len(recent_growth_series) - 1 - i >= max_trace_days:
-                                        logger.warning(f"QDII基金 {fund_code} 追溯{max_trace_days}天仍未找到非零值，停止追溯")
-                                        break
-                            
-                            # 如果仍然为0且不是QDII，使用最新的数据
-                            if yesterday_return == 0.0 and not is_qdii:
-                                raw_value = float(recent_growth_series.iloc[-1]) if pd.notna(recent_growth_series.iloc[-1]) else 0.0
-                                # AKShare返回的日增长率已经是百分比格式
-                                yesterday_return = raw_value
-                                logger.debug(f"基金 {fund_code} 从历史数据{growth_rate_col}获取昨日收益率: {yesterday_return}%")
-                                
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"基金 {fund_code} 历史数据{growth_rate_col}解析失败: {str(e)}，使用默认值")
-                            yesterday_return = 0.0
-            
-            # 确保收益率格式正确，保留两位小数
-            today_return = round(today_return, 2)
-            prev_day_return = round(yesterday_return, 2)
-            
-            # 记录最终计算的收益率
-            logger.info(f"基金 {fund_code} 收益率计算完成: today_return={today_return}%, prev_day_return={prev_day_return}%")
-            
-            # 1. 尝试使用高级策略评估
-            advanced_strategy_result = self._evaluate_best_strategy(historical_data)
-            
-            if advanced_strategy_result:
-                logger.info(f"基金 {fund_code} 选出最佳高级策略: {advanced_strategy_result['strategy_name']}")
-                strategy_result = advanced_strategy_result
-            else:
-                # 2. 降级使用原有策略引擎
-                logger.info(f"基金 {fund_code} 使用基础策略引擎")
-                strategy_result = self.strategy_engine.analyze_strategy(today_return, prev_day_return, performance_metrics)
-            
-            # 从策略结果中提取字段
-            strategy_name = strategy_result.get('strategy_name', 'momentum_strategy')
-            action = strategy_result.get('action', 'hold')
-            buy_multiplier = strategy_result.get('buy_multiplier', 0.0)
-            redeem_amount = strategy_result.get('redeem_amount', 0.0)
-            status_label = strategy_result.get('status_label', '🔴 未知状态')
-            operation_suggestion = strategy_result.get('operation_suggestion', '持有不动')
-            execution_amount = strategy_result.get('execution_amount', '持有不动')
-            comparison_value = strategy_result.get('comparison_value', today_return - prev_day_return)
-            
-            # 兼容性：设置is_buy字段
-            is_buy = action in ['buy', 'strong_buy', 'weak_buy']
-            
-            # 合并所有数据
-            fund_result = {
-                'fund_code': fund_code,
-                'fund_name': fund_name,  # 优先使用传入的基金名称
-                'analysis_date': analysis_date,
-                'strategy_name': strategy_name,  # 使用策略引擎返回的策略名称
-                'status_label': status_label,
-                'operation_suggestion': operation_suggestion,
-                'execution_amount': execution_amount,
-                'is_buy': is_buy,
-                'redeem_amount': redeem_amount,
-                'buy_multiplier': buy_multiplier,
-                'action': action,  # 添加action字段供策略引擎使用
-                'comparison_value': comparison_value,  # 添加比较值字段
-                **basic_info,
-                **realtime_data,
-                **performance_metrics,
-                # 最后设置收益率相关字段，确保不会被覆盖
-                'today_return': today_return,
-                'prev_day_return': prev_day_return,
-            }
-            
-            # 确保使用传入的基金名称覆盖API获取的名称
-            fund_result['fund_name'] = fund_name
-            
-            logger.info(f"基金 {fund_code} 分析完成: status={status_label}, action={action}, "
-                       f"buy_multiplier={buy_multiplier}, redeem_amount={redeem_amount}")
-            return fund_result
-            
-        except Exception as e:
-            logger.error(f"分析基金 {fund_code} 失败: {str(e)}")
-            # 返回默认结果
-            return {
-                'fund_code': fund_code,
-                'fund_name': fund_name,
-                'analysis_date': analysis_date,
-                'today_return': 0.0,
-                'prev_day_return': 0.0,
-                'strategy_name': 'default_strategy',  # 添加默认策略名称
-                'status_label': "🔴 分析失败",
-                'operation_suggestion': "数据获取失败，建议人工核查",
-                'execution_amount': "持有不动",
-                'action': 'hold',  # 添加默认action
-                'buy_multiplier': 0.0,  # 添加默认买入倍数
-                'redeem_amount': 0.0,  # 添加默认赎回金额
-                'comparison_value': 0.0,  # 添加默认比较值
-                'composite_score': 0.0
-            }
+        logger.info(f"开始分析基金: {fund_code} - {fund_name}")
+        task = prefetch_fund(self.fund_data_manager, fund_code, fund_name, analysis_date)
+        if 'error' in task:
+            return failed_fund_result(fund_code, fund_name, analysis_date)
+        result, _ = evaluate_fund(task, self.strategy_engine)
+        return result
     
     def analyze_all_funds(self, fund_data: pd.DataFrame, analysis_date: str) -> List[Dict]:
         """
         分析所有基金
         
+        分阶段并行执行（并发预取 → 多进程评估 → 分批写入数据库），
+        同一分析日期中断后重新运行会从断点继续
+        
         参数：
         fund_data: 基金基础数据DataFrame
         analysis_date: 分析日期
@@ -588,15 +331,19 @@ class EnhancedFundAnalysisSystem:
         try:
             logger.info(f"开始分析所有基金，共 {len(fund_data)} 只基金")
             
-            results = []
-            
-            for _, row in fund_data.iterrows():
-                fund_code = row['代码']
-                fund_name = row['名称']
-                
-                # 分析单个基金
-                result = self.analyze_single_fund(fund_code, fund_name, analysis_date)
-                results.append(result)
+            funds = list(zip(fund_data['代码'], fund_data['名称']))
+            pipeline = FundAnalysisPipeline(
+                self.fund_data_manager,
+                db_manager=self.db_manager,
+                fetch_workers=self.fetch_workers,
+                eval_workers=self.eval_workers,
+                checkpoint_path=self._checkpoint_path(analysis_date),
+                strategy_engine=self.strategy_engine
+            )
+            results = pipeline.run(funds, analysis_date, resume=self.resume)
+            self.stage_timings = pipeline.stage_timings
+            self._unpersisted_results = pipeline.unpersisted_results
+            self._pipeline = pipeline
             
             logger.info(f"所有基金分析完成，共分析 {len(results)} 只基金")
             return results
@@ -604,6 +351,11 @@ class EnhancedFundAnalysisSystem:
         except Exception as e:
             logger.error(f"分析所有基金失败: {str(e)}")
             return []
+
+    def _checkpoint_path(self, analysis_date: str) -> str:
+        """分析断点文件路径（按分析日期区分）"""
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            f'.analysis_checkpoint_{analysis_date}.jsonl')
     
     def generate_strategy_summary(self, results: List[Dict]) -> Dict:
         """
@@ -731,6 +483,12 @@ class EnhancedFundAnalysisSystem:
         try:
             logger.info("开始保存分析结果到数据库")
             
+            # analyze_all_funds 已分批写入的结果不再重复写入
+            if self._unpersisted_results is not None:
+                logger.info(f"分析阶段已写入 {len(results) - len(self._unpersisted_results)} 条结果，"
+                            f"剩余 {len(self._unpersisted_results)} 条")
+                results = self._unpersisted_results
+            
             # 批量插入数据
             success = self.db_manager.batch_insert_data(results, {
                 'analysis_date': datetime.now().date(),
@@ -739,6 +497,11 @@ class EnhancedFundAnalysisSystem:
             })
             
             if success:
+                self._unpersisted_results = None
+                # 最终汇总写入成功后才删除分析断点
+                if self._pipeline is not None:
+                    self._pipeline.complete()
+                    self._pipeline = None
                 logger.info("分析结果已成功保存到数据库")
             else:
                 logger.error("保存分析结果到数据库失败")
@@ -924,171 +687,10 @@ class EnhancedFundAnalysisSystem:
         
         返回：
         tuple: (status_label, is_buy, redeem_amount, comparison_value, operation_suggestion, execution_amount, buy_multiplier)
-        """
-        return_diff = today_return - prev_day_return
         
-        # 1. 今日>0 昨日>0 today-prev>1%
-        if today_return > 0 and prev_day_return > 0:
-            if return_diff > 1:
-                status_label = "🟢 大涨"
-                is_buy = False
-                redeem_amount = 0
-                buy_multiplier = 0
-                operation_suggestion = "不买入，不赎回"
-                execution_amount = "持有不动"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 2. 今日>0 昨日>0 0<today-prev≤1%
-            elif 0 < return_diff <= 1:
-                status_label = "🟡 连涨"
-                is_buy = False
-                redeem_amount = 15
-                buy_multiplier = 0
-                operation_suggestion = "不买入，赎回15元"
-                execution_amount = "赎回¥15"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 3. 今日>0 昨日>0 -1%≤today-prev≤0
-            elif -1 <= return_diff <= 0:
-                status_label = "🟠 连涨放缓"
-                is_buy = False
-                redeem_amount = 0
-                buy_multiplier = 0
-                operation_suggestion = "不买入，不赎回"
-                execution_amount = "持有不动"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 4. 今日>0 昨日>0 today-prev<-1%
-            elif return_diff < -1:
-                status_label = "🟠 连涨回落"
-                is_buy = False
-                redeem_amount = 0
-                buy_multiplier = 0
-                operation_suggestion = "不买入，不赎回"
-                execution_amount = "持有不动"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 5. 今日>0 昨日≤0
-        elif today_return > 0 and prev_day_return <= 0:
-            status_label = "🔵 反转涨"
-            is_buy = True
-            redeem_amount = 0
-            buy_multiplier = 1.5
-            operation_suggestion = "定投买入，不赎回"
-            execution_amount = f"买入{buy_multiplier}×定额"
-            return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 6. 今日=0 昨日>0
-        elif today_return == 0 and prev_day_return > 0:
-            status_label = "🔴 转势休整"
-            is_buy = False
-            redeem_amount = 30
-            buy_multiplier = 0
-            operation_suggestion = "不买入，赎回30元"
-            execution_amount = "赎回¥30"
-            return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 7. 今日<0 昨日>0
-        elif today_return < 0 and prev_day_return > 0:
-            status_label = "🔴 反转跌"
-            is_buy = False
-            redeem_amount = 30
-            buy_multiplier = 0
-            operation_suggestion = "不买入，赎回30元"
-            execution_amount = "赎回¥30"
-            return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 8. 今日=0 昨日≤0
-        elif today_return == 0 and prev_day_return <= 0:
-            status_label = "⚪ 持平"
-            is_buy = True
-            redeem_amount = 0
-            buy_multiplier = 2.0
-            operation_suggestion = "定投买入，不赎回"
-            execution_amount = f"买入{buy_multiplier}×定额"
-            return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 9. 今日<0 昨日=0 today≤-2%
-        elif today_return < 0 and prev_day_return == 0:
-            if today_return <= -2:
-                status_label = "🔴 首次大跌"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 0.5
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 10. 今日<0 昨日=0 -2%<today≤-0.5%
-            elif -2 < today_return <= -0.5:
-                status_label = "🟠 首次下跌"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 1.5
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 11. 今日<0 昨日=0 today>-0.5%
-            elif today_return > -0.5:
-                status_label = "🔵 微跌试探"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 1.0
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 12. 今日<0 昨日<0 (today-prev)>1% & today≤-2%
-        elif today_return < 0 and prev_day_return < 0:
-            if return_diff > 1 and today_return <= -2:
-                status_label = "🔴 暴跌加速"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 0.5
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 13. 今日<0 昨日<0 (today-prev)>1% & today>-2%
-            elif return_diff > 1 and today_return > -2:
-                status_label = "🟣 跌速扩大"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 1.0
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 14. 今日<0 昨日<0 (prev-today)>0 & prev≤-2%
-            elif (prev_day_return - today_return) > 0 and prev_day_return <= -2:
-                status_label = "🔵 暴跌回升"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 1.5
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 15. 今日<0 昨日<0 (prev-today)>0 & prev>-2%
-            elif (prev_day_return - today_return) > 0 and prev_day_return > -2:
-                status_label = "🟦 跌速放缓"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 1.0
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-            # 16. 今日<0 昨日<0 abs差值≤1%
-            elif abs(return_diff) <= 1:
-                status_label = "🟣 阴跌筑底"
-                is_buy = True
-                redeem_amount = 0
-                buy_multiplier = 1.0
-                operation_suggestion = "定投买入，不赎回"
-                execution_amount = f"买入{buy_multiplier}×定额"
-                return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
-        
-        # 默认情况
-        status_label = "🔴 下跌"
-        is_buy = True
-        redeem_amount = 0
-        buy_multiplier = 1.0
-        operation_suggestion = "定投买入，不赎回"
-        execution_amount = f"买入{buy_multiplier}×定额"
-        return status_label, is_buy, redeem_amount, return_diff, operation_suggestion, execution_amount, buy_multiplier
+        批量计算请使用 InvestmentStrategyRules.get_investment_strategy_arrays
+        """
+        return InvestmentStrategyRules.get_investment_strategy(today_return, prev_day_return).as_tuple()
     
     def run_complete_analysis(self, excel_file_path: str = None, output_dir: str = "../reports/") -> bool:
         """
@@ -1179,6 +781,10 @@ class EnhancedFundAnalysisSystem:
                 print(f"  下跌基金: {strategy_summary.get('negative_return_funds', 0)}")
                 print(f"  持平基金: {strategy_summary.get('zero_return_funds', 0)}")
             
+            if self.stage_timings:
+                print("\n⏱️ 分析阶段耗时:")
+                print(self._format_stage_timings())
+            
             print("\n📊 生成报告文件:")
             for report_type, file_path in report_files.items():
                 print(f"  {report_type}: {file_path}")
@@ -1197,6 +803,18 @@ class EnhancedFundAnalysisSystem:
             
         except Exception as e:
             logger.error(f"打印分析摘要失败: {str(e)}")
+
+    def _format_stage_timings(self) -> str:
+        """格式化最近一次批量分析的各阶段耗时"""
+        timings = self.stage_timings
+        return (f"  总耗时: {timings.get('total_seconds', 0):.2f}s "
+                f"(基金 {timings.get('funds', 0)} 只，断点恢复 {timings.get('resumed', 0)} 只，"
+                f"失败 {timings.get('failed', 0)} 只)\n"
+                f"  数据获取: {timings.get('prefetch_wall_seconds', 0):.2f}s "
+                f"(累计 {timings.get('prefetch_seconds', 0):.2f}s，{timings.get('fetch_workers', 0)} 线程)\n"
+                f"  指标与策略计算: 累计 {timings.get('evaluate_seconds', 0):.2f}s "
+                f"({timings.get('eval_workers', 0)} 进程)\n"
+                f"  数据库写入: {timings.get('write_seconds', 0):.2f}s ({timings.get('write_batches', 0)} 批)")
     
     def _run_test_mode(self):
         """运行测试模式"""
@@ -1287,6 +905,9 @@ class EnhancedFundAnalysisSystem:
                 logger.error("基金分析失败")
                 return pd.DataFrame()
             
+            if self.stage_timings:
+                logger.info("分析阶段耗时:\n" + self._format_stage_timings())
+            
             # 转换为DataFrame
             results_df = pd.DataFrame(results)
             
@@ -1492,6 +1113,8 @@ def main():
    python enhanced_main.py --output ./my_reports/      # 指定输出目录
    python enhanced_main.py --test                     # 运行测试模式
    python enhanced_main.py --analyze                  # 分析持仓基金
+   python enhanced_main.py -a --workers 4 --fetch-workers 16   # 指定计算进程数和数据获取并发数
+   python enhanced_main.py -a --no-resume             # 忽略今日断点，重新分析全部基金
    python enhanced_main.py --compare                  # 对比基金绩效
    python enhanced_main.py --all                      # 执行完整分析流程
 
@@ -1614,6 +1237,26 @@ def main():
         help='策略分析不生成详细报告'
     )
 
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='基金分析计算进程数（默认: CPU核数，1 表示不使用子进程）'
+    )
+
+    parser.add_argument(
+        '--fetch-workers',
+        type=int,
+        default=8,
+        help='基金分析数据获取并发数（默认: 8）'
+    )
+
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='忽略同一分析日期的断点，重新分析全部基金'
+    )
+
     parser.add_argument(
         '--backtest', '-b',
         type=str,
@@ -1628,7 +1271,11 @@ def main():
     
     try:
         # 创建基金分析系统
-        system = EnhancedFundAnalysisSystem()
+        system = EnhancedFundAnalysisSystem(
+            fetch_workers=args.fetch_workers,
+            eval_workers=args.workers,
+            resume=not args.no_resume
+        )
         
         # 运行单基金回测
         if args.backtest:
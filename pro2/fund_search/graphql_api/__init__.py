@@ -26,6 +26,7 @@ GraphQL API模块
 
 from .schema import schema
 from .blueprint import graphql_blueprint
+from .context import GraphQLContext, BatchLoader, FundListIndex, configure_graphql_context
 from .types import (
     FundType, FundNavType, FundPerformanceType,
     StrategyType, BacktestResultType, HoldingType,
@@ -35,6 +36,10 @@ from .types import (
 __all__ = [
     'schema',
     'graphql_blueprint',
+    'GraphQLContext',
+    'BatchLoader',
+    'FundListIndex',
+    'configure_graphql_context',
     'FundType',
     'FundNavType',
     'FundPerformanceType',
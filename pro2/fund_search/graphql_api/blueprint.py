@@ -11,6 +11,8 @@ from flask import Blueprint, request, jsonify
 
 logger = logging.getLogger(__name__)
 
+from .context import GraphQLContext, configure_graphql_context
+
 # 尝试导入Graphene
 try:
     from graphene import Schema
@@ -55,13 +57,16 @@ def graphql_endpoint():
                 'errors': [{'message': '查询不能为空'}]
             }), 400
         
-        # 执行查询
+        # 执行查询（每个请求一个上下文，loader 在请求内批量加载）
+        context = GraphQLContext(request)
         result = schema.execute(
             query,
             variables=variables,
             operation_name=operation_name,
-            context={'request': request}
+            context=context
         )
+        logger.debug("GraphQL批量加载次数: " + ", ".join(
+            f"{name}={loader.batch_count}" for name, loader in context.loaders.items()))
         
         # 构建响应
         response = {}
@@ -197,12 +202,15 @@ def graphql_schema():
 
 
 # 注册到Flask应用的辅助函数
-def init_graphql(app):
+def init_graphql(app, **components):
     """
     初始化GraphQL蓝图
     
     Args:
         app: Flask应用实例
+        components: 应用级共享组件（db_manager, holding_service, preloader 等），
+            所有GraphQL请求复用，见 configure_graphql_context
     """
+    configure_graphql_context(**components)
     app.register_blueprint(graphql_blueprint, url_prefix='')
     logger.info("GraphQL API已注册")
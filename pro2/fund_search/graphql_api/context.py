@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GraphQL执行上下文
+
+每个GraphQL请求创建一个 GraphQLContext，作为 info.context 传给所有 resolver：
+- 数据库管理器、持仓服务、实时数据获取器为应用级共享组件（init_graphql 时注入，
+  未注入时首次使用创建一次），不再每个请求新建数据库引擎
+- BatchLoader 按基金代码批量加载基本信息、绩效指标和实时数据，请求内按代码缓存。
+  返回列表的 resolver 先用 want() 登记子节点会用到的代码，子节点第一次 load()
+  时把登记的代码合并为一次批量查询，避免逐条查询（N+1）
+- FundListIndex 缓存全市场基金列表，搜索、过滤、排序在内存 DataFrame 上完成
+
+本模块不依赖 graphene。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 基金列表缓存时间（秒）
+DEFAULT_FUND_LIST_TTL = 600
+
+
+class BatchLoader:
+    """
+    请求内批量加载器
+
+    batch_fn 接收基金代码列表，返回 代码 -> 数据 的字典（缺失的代码视为 None）。
+    同一请求中每个代码只加载一次，加载失败记为 None。
+    """
+
+    def __init__(self, batch_fn: Callable[[List[str]], Dict[str, Any]], name: str = ''):
+        self.batch_fn = batch_fn
+        self.name = name
+        self._cache: Dict[str, Any] = {}
+        self._pending: Dict[str, None] = {}
+        self.batch_count = 0
+
+    def want(self, keys: Iterable[str]) -> None:
+        """登记稍后会用到的代码，下一次 load 时一起加载"""
+        for key in keys:
+            key = str(key)
+            if key not in self._cache:
+                self._pending[key] = None
+
+    def load(self, key: str) -> Any:
+        """获取单个代码的数据（未缓存时连同已登记的代码批量加载）"""
+        key = str(key)
+        if key not in self._cache:
+            self.want([key])
+            self._dispatch()
+        return self._cache.get(key)
+
+    def load_many(self, keys: Iterable[str]) -> List[Any]:
+        """获取多个代码的数据，一次批量加载"""
+        keys = [str(key) for key in keys]
+        self.want(keys)
+        self._dispatch()
+        return [self._cache.get(key) for key in keys]
+
+    def prime(self, key: str, value: Any) -> None:
+        """写入已知数据（如上层 resolver 已经查到的结果）"""
+        key = str(key)
+        self._cache[key] = value
+        self._pending.pop(key, None)
+
+    def clear(self, key: Optional[str] = None) -> None:
+        """清除缓存（key 为 None 时清除全部）"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(str(key), None)
+
+    def _dispatch(self) -> None:
+        keys = list(self._pending)
+        self._pending.clear()
+        if not keys:
+            return
+        self.batch_count += 1
+        try:
+            results = self.batch_fn(keys) or {}
+        except Exception as e:
+            logger.warning(f"批量加载 {self.name} 失败 ({len(keys)} 个代码): {e}")
+            results = {}
+        for key in keys:
+            self._cache[key] = results.get(key)
+
+
+# ============ 批量加载函数 ============
+
+def load_fund_basic_info(fund_codes: List[str], preloader=None, db_manager=None) -> Dict[str, Dict]:
+    """
+    批量获取基金基本信息：先取预加载缓存，未命中的代码用一次 fund_basic_info 查询补齐
+
+    Returns:
+        Dict[code, info]，info 的键与预加载缓存一致（fund_name, fund_type, fund_company, ...）
+    """
+    results = _preloaded(preloader, 'basic_info', fund_codes)
+    missing = [code for code in fund_codes if code not in results]
+    if not missing or db_manager is None:
+        return results
+
+    sql = """
+        SELECT fund_code, fund_name, fund_type, fund_company, fund_manager, establish_date
+        FROM fund_basic_info
+        WHERE fund_code IN :fund_codes
+    """
+    try:
+        df = db_manager.execute_query(sql, {'fund_codes': tuple(missing)})
+    except Exception as e:
+        logger.warning(f"批量查询基金基本信息失败: {e}")
+        return results
+    if df is not None and not df.empty:
+        df = df.astype({'fund_code': str}).drop_duplicates('fund_code')
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
+        results.update({record['fund_code']: record for record in records})
+    return results
+
+
+def load_fund_performance(fund_codes: List[str], preloader=None) -> Dict[str, Dict]:
+    """批量获取基金绩效指标（预加载缓存）"""
+    return _preloaded(preloader, 'performance', fund_codes)
+
+
+def _preloaded(preloader, kind: str, fund_codes: List[str]) -> Dict[str, Any]:
+    """从预加载缓存批量读取，返回 代码 -> 数据（只含命中的代码）"""
+    if preloader is None:
+        return {}
+    prefix = f"{preloader.KEY_PREFIX[kind]}:"
+    try:
+        cached = preloader.cache.mget([prefix + code for code in fund_codes])
+    except Exception as e:
+        logger.debug(f"读取预加载缓存失败: {e}")
+        return {}
+    return {key[len(prefix):]: value for key, value in cached.items() if value}
+
+
+# ============ 基金列表索引 ============
+
+class FundListIndex:
+    """
+    全市场基金列表索引
+
+    基金列表（akshare fund_open_fund_daily_em）缓存 ttl 秒，过期后下一次查询时重新拉取，
+    拉取失败时继续使用旧列表。列统一为 code, name, type，另存小写的搜索列。
+    """
+
+    COLUMNS = {'基金代码': 'code', '基金简称': 'name', '类型': 'type'}
+
+    def __init__(self, loader: Optional[Callable[[], pd.DataFrame]] = None, ttl: float = DEFAULT_FUND_LIST_TTL):
+        self.loader = loader or _fetch_open_fund_list
+        self.ttl = ttl
+        self._frame: Optional[pd.DataFrame] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def frame(self) -> pd.DataFrame:
+        """当前基金列表（过期时重新加载）"""
+        if self._frame is None or time.time() - self._loaded_at > self.ttl:
+            with self._lock:
+                if self._frame is None or time.time() - self._loaded_at > self.ttl:
+                    self._reload()
+        return self._frame
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def search(self, search: Optional[str] = None, fund_type: Optional[str] = None,
+               sort_by: str = 'code', sort_order: str = 'asc', limit: Optional[int] = 100) -> pd.DataFrame:
+        """
+        搜索基金列表
+
+        Args:
+            search: 代码或简称包含的关键词（不区分大小写）
+            fund_type: 基金类型（精确匹配）
+            sort_by: code / name / type，其他值按 code 排序
+            sort_order: asc / desc
+            limit: 返回数量，None 表示全部
+
+        Returns:
+            pd.DataFrame: 列为 code, name, type
+        """
+        df = self.frame()
+        mask = pd.Series(True, index=df.index)
+        if search:
+            mask &= df['_search'].str.contains(search.lower(), regex=False)
+        if fund_type:
+            mask &= df['type'] == fund_type
+        result = df[mask]
+
+        sort_by = sort_by if sort_by in ('code', 'name', 'type') else 'code'
+        result = result.sort_values(sort_by, ascending=str(sort_order).lower() != 'desc', kind='stable')
+        if limit is not None:
+            result = result.head(limit)
+        return result[['code', 'name', 'type']]
+
+    def _reload(self) -> None:
+        started = time.perf_counter()
+        try:
+            raw = self.loader()
+        except Exception as e:
+            logger.warning(f"获取基金列表失败: {e}")
+            raw = None
+        if raw is None or raw.empty:
+            if self._frame is None:
+                self._frame = self._normalize(pd.DataFrame())
+            # 失败后隔一段时间再重试，不在每个请求上重复拉取
+            self._loaded_at = time.time() - self.ttl / 2
+            return
+        self._frame = self._normalize(raw)
+        self._loaded_at = time.time()
+        logger.info(f"基金列表索引已加载: {len(self._frame)} 只基金, "
+                    f"耗时 {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    @classmethod
+    def _normalize(cls, raw: pd.DataFrame) -> pd.DataFrame:
+        df = pd.DataFrame(index=raw.index)
+        for source, target in cls.COLUMNS.items():
+            df[target] = raw[source].fillna('').astype(str) if source in raw.columns else ''
+        df['_search'] = (df['code'] + ' ' + df['name']).str.lower()
+        return df.reset_index(drop=True)
+
+
+def _fetch_open_fund_list() -> pd.DataFrame:
+    import akshare as ak
+    return ak.fund_open_fund_daily_em()
+
+
+# ============ 共享组件 ============
+
+_shared: Dict[str, Any] = {}
+_shared_lock = threading.RLock()
+
+
+def configure_graphql_context(**components) -> None:
+    """
+    注入应用级共享组件
+
+    可用的键：db_manager, holding_service, preloader, realtime_fetcher, fund_list_index。
+    值为 None 的键忽略。
+    """
+    with _shared_lock:
+        _shared.update({key: value for key, value in components.items() if value is not None})
+
+
+def _shared_component(name: str, factory: Callable[[], Any]) -> Any:
+    """获取共享组件，未注入时用 factory 创建一次"""
+    component = _shared.get(name)
+    if component is not None:
+        return component
+    with _shared_lock:
+        if _shared.get(name) is None:
+            _shared[name] = factory()
+        return _shared[name]
+
+
+def _create_db_manager():
+    from data_access.enhanced_database import EnhancedDatabaseManager
+    from shared.config_manager import config_manager
+
+    config = config_manager.get_database_config()
+    logger.info("GraphQL 使用共享数据库管理器")
+    return EnhancedDatabaseManager({
+        'host': config.host,
+        'user': config.user,
+        'password': config.password,
+        'database': config.database,
+        'port': config.port,
+        'charset': config.charset
+    })
+
+
+def get_shared_db_manager():
+    return _shared_component('db_manager', _create_db_manager)
+
+
+def get_shared_holding_service():
+    def create():
+        from services.fund_nav_cache_manager import FundNavCacheManager
+        from services.holding_realtime_service import HoldingRealtimeService
+        db_manager = get_shared_db_manager()
+        return HoldingRealtimeService(db_manager, FundNavCacheManager(db_manager))
+    return _shared_component('holding_service', create)
+
+
+def get_shared_realtime_fetcher():
+    def create():
+        holding_service = _shared.get('holding_service')
+        if holding_service is not None:
+            return holding_service.realtime_fetcher
+        from services.holding_realtime_service import RealtimeDataFetcher
+        return RealtimeDataFetcher()
+    return _shared_component('realtime_fetcher', create)
+
+
+def get_shared_preloader():
+    def create():
+        from services.fund_data_preloader import get_preloader
+        return get_preloader()
+    return _shared_component('preloader', create)
+
+
+def get_fund_list_index() -> FundListIndex:
+    return _shared_component('fund_list_index', FundListIndex)
+
+
+# ============ 请求上下文 ============
+
+class GraphQLContext:
+    """
+    单个GraphQL请求的执行上下文
+
+    共享组件按需获取（只在 resolver 用到时初始化）；loader 和 memo 只在本次请求内有效。
+    """
+
+    def __init__(self, request=None, db_manager=None, holding_service=None,
+                 preloader=None, realtime_fetcher=None):
+        self.request = request
+        self._db_manager = db_manager
+        self._holding_service = holding_service
+        self._preloader = preloader
+        self._realtime_fetcher = realtime_fetcher
+        self._memo: Dict[Any, Any] = {}
+
+        self.fund_basic = BatchLoader(
+            lambda codes: load_fund_basic_info(codes, self._optional(lambda: self.preloader),
+                                               self._optional(lambda: self.db_manager)),
+            'fund_basic')
+        self.fund_performance = BatchLoader(
+            lambda codes: load_fund_performance(codes, self.preloader), 'fund_performance')
+        self.fund_realtime = BatchLoader(
+            lambda codes: self.realtime_fetcher.get_batch_realtime(codes), 'fund_realtime')
+
+    @property
+    def db_manager(self):
+        return self._db_manager or get_shared_db_manager()
+
+    @property
+    def holding_service(self):
+        return self._holding_service or get_shared_holding_service()
+
+    @property
+    def preloader(self):
+        return self._preloader or get_shared_preloader()
+
+    @property
+    def realtime_fetcher(self):
+        if self._realtime_fetcher is None and self._holding_service is not None:
+            return self._holding_service.realtime_fetcher
+        return self._realtime_fetcher or get_shared_realtime_fetcher()
+
+    @property
+    def fund_list(self) -> FundListIndex:
+        return get_fund_list_index()
+
+    @property
+    def loaders(self) -> Dict[str, BatchLoader]:
+        return {loader.name: loader for loader in (self.fund_basic, self.fund_performance, self.fund_realtime)}
+
+    def memo(self, key: Any, factory: Callable[[], Any]) -> Any:
+        """请求内缓存（如同一查询中多个字段使用的同一用户组合）"""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """兼容以字典形式读取上下文（context.get('request')）"""
+        return getattr(self, key, default)
+
+    @staticmethod
+    def _optional(getter: Callable[[], Any]) -> Any:
+        """获取可选组件，不可用时返回 None"""
+        try:
+            return getter()
+        except Exception as e:
+            logger.debug(f"可选组件不可用: {e}")
+            return None
+
+
+def get_graphql_context(info) -> GraphQLContext:
+    """
+    从 resolver 的 info 获取请求上下文
+
+    schema.execute 未传 GraphQLContext 时（如脚本或测试中直接执行），字典上下文上会
+    保存一个新建的上下文，同一次执行内共用；没有上下文时每次返回新的上下文。
+    """
+    context = getattr(info, 'context', None)
+    if isinstance(context, GraphQLContext):
+        return context
+    if isinstance(context, dict):
+        if not isinstance(context.get('graphql_context'), GraphQLContext):
+            context['graphql_context'] = GraphQLContext(context.get('request'))
+        return context['graphql_context']
+    return GraphQLContext()
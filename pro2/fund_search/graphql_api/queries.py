@@ -9,14 +9,20 @@ GraphQL查询定义
 import graphene
 from graphene import relay
 from graphene.types import datetime
+from graphql_relay.connection.arrayconnection import cursor_to_offset
 from typing import List, Optional
 
+from .context import get_graphql_context
 from .types import (
     FundType, FundConnection, FundPerformanceType,
     StrategyType, BacktestResultType, BacktestConnection,
-    PortfolioType, AnalysisResultType, HoldingType
+    PortfolioType, AnalysisResultType, HoldingType,
+    fund_from_basic_info, performance_from_metrics
 )
 
+# 基金列表查询返回的最大数量
+MAX_FUND_LIST_SIZE = 100
+
 
 class MarketOverviewType(graphene.ObjectType):
     """市场概览类型"""
@@ -143,75 +149,40 @@ class Query(graphene.ObjectType):
     
     def resolve_fund(self, info, code: str) -> Optional[FundType]:
         """解析单个基金"""
-        try:
-            from services.fund_data_preloader import get_preloader
-            preloader = get_preloader()
-            
-            basic_info = preloader.get_fund_basic_info(code)
-            if basic_info:
-                return FundType(
-                    code=code,
-                    name=basic_info.get('name'),
-                    type=basic_info.get('type'),
-                    manager=basic_info.get('manager'),
-                    company=basic_info.get('company')
-                )
-        except Exception as e:
-            print(f"获取基金信息失败: {e}")
-        return None
+        basic_info = get_graphql_context(info).fund_basic.load(code)
+        return fund_from_basic_info(code, basic_info)
     
     def resolve_funds(self, info, **kwargs) -> List[FundType]:
-        """解析基金列表"""
+        """解析基金列表（基于缓存的基金列表索引）"""
+        context = get_graphql_context(info)
         try:
-            import akshare as ak
-            
-            # 获取基金列表
-            fund_df = ak.fund_open_fund_daily_em()
-            
-            # 搜索过滤
-            search = kwargs.get('search')
-            if search:
-                fund_df = fund_df[
-                    fund_df['基金代码'].str.contains(search, na=False) |
-                    fund_df['基金简称'].str.contains(search, na=False)
-                ]
-            
-            # 类型过滤
-            fund_type = kwargs.get('fund_type')
-            if fund_type and '类型' in fund_df.columns:
-                fund_df = fund_df[fund_df['类型'] == fund_type]
-            
-            # 排序
-            sort_by = kwargs.get('sort_by', 'code')
-            sort_order = kwargs.get('sort_order', 'asc')
-            
-            # 转换为FundType列表
-            funds = []
-            for _, row in fund_df.head(100).iterrows():
-                funds.append(FundType(
-                    code=str(row.get('基金代码', '')),
-                    name=str(row.get('基金简称', '')),
-                    type=str(row.get('类型', ''))
-                ))
-            
-            return funds
-            
+            fund_df = context.fund_list.search(
+                search=kwargs.get('search'),
+                fund_type=kwargs.get('fund_type'),
+                sort_by=kwargs.get('sort_by', 'code'),
+                sort_order=kwargs.get('sort_order', 'asc'),
+                limit=MAX_FUND_LIST_SIZE
+            )
         except Exception as e:
             print(f"获取基金列表失败: {e}")
             return []
+        
+        codes = fund_df['code'].tolist()
+        # 子字段（绩效、实时数据）按当前分页批量加载
+        after = cursor_to_offset(kwargs['after']) if kwargs.get('after') else None
+        offset = after + 1 if after is not None else 0
+        page = codes[offset:offset + kwargs['first']] if kwargs.get('first') else codes[offset:]
+        context.fund_performance.want(page)
+        context.fund_realtime.want(page)
+        return [
+            FundType(code=code, name=name, type=fund_type)
+            for code, name, fund_type in zip(codes, fund_df['name'], fund_df['type'])
+        ]
     
     def resolve_fund_performance(self, info, code: str, period: str = '1y') -> Optional[FundPerformanceType]:
         """解析基金绩效"""
-        try:
-            from services.fund_data_preloader import get_preloader
-            preloader = get_preloader()
-            
-            perf = preloader.get_fund_performance(code)
-            if perf:
-                return FundPerformanceType(**perf)
-        except Exception as e:
-            print(f"获取基金绩效失败: {e}")
-        return None
+        perf = get_graphql_context(info).fund_performance.load(code)
+        return performance_from_metrics(perf)
     
     def resolve_strategy(self, info, id: str) -> Optional[StrategyType]:
         """解析策略"""
@@ -273,57 +244,18 @@ class Query(graphene.ObjectType):
             return []
     
     def resolve_portfolio(self, info, user_id: str, realtime: bool = True) -> Optional[PortfolioType]:
-        """解析投资组合"""
+        """解析投资组合（同一请求内只加载一次）"""
+        context = get_graphql_context(info)
         try:
-            from services.holding_realtime_service import HoldingRealtimeService
-            from data_access.enhanced_database import EnhancedDatabaseManager
-            from shared.config_manager import config_manager
-            
-            config = config_manager.get_database_config()
-            db_manager = EnhancedDatabaseManager({
-                'host': config.host,
-                'user': config.user,
-                'password': config.password,
-                'database': config.database,
-                'port': config.port,
-                'charset': config.charset
-            })
-            
-            service = HoldingRealtimeService(db_manager)
-            holdings_data = service.get_holdings_realtime(user_id)
-            
-            holdings = []
-            for h in holdings_data.get('holdings', []):
-                holdings.append(HoldingType(
-                    fund_code=h.get('fund_code'),
-                    fund_name=h.get('fund_name'),
-                    shares=h.get('shares'),
-                    cost_price=h.get('cost_price'),
-                    current_nav=h.get('current_nav'),
-                    current_value=h.get('current_value'),
-                    profit_loss=h.get('profit_loss'),
-                    profit_loss_percent=h.get('profit_loss_percent')
-                ))
-            
-            return PortfolioType(
-                user_id=user_id,
-                total_cost=holdings_data.get('total_cost'),
-                total_value=holdings_data.get('total_value'),
-                total_profit_loss=holdings_data.get('total_profit_loss'),
-                total_return=holdings_data.get('total_return'),
-                daily_profit=holdings_data.get('daily_profit'),
-                daily_return=holdings_data.get('daily_return'),
-                holdings=holdings
-            )
-            
+            return context.memo(('portfolio', user_id), lambda: _load_portfolio(context, user_id))
         except Exception as e:
             print(f"获取投资组合失败: {e}")
             return None
     
     def resolve_holding(self, info, user_id: str, fund_code: str) -> Optional[HoldingType]:
         """解析单个持仓"""
-        # 复用portfolio的解析逻辑
-        portfolio = self.resolve_portfolio(info, user_id)
+        # 复用portfolio的解析逻辑（根对象为 None，通过类调用）
+        portfolio = Query.resolve_portfolio(self, info, user_id)
         if portfolio:
             for h in portfolio.holdings:
                 if h.fund_code == fund_code:
@@ -358,3 +290,59 @@ class Query(graphene.ObjectType):
     def resolve_market_overview(self, info):
         """解析市场概览"""
         return MarketOverviewType()
+
+
+def _load_portfolio(context, user_id: str) -> PortfolioType:
+    """
+    用共享持仓服务加载组合
+
+    持仓服务已批量获取实时数据，结果写入实时数据 loader；持仓的基金信息、绩效指标
+    登记到 loader，子字段解析时合并为一次批量查询。
+    """
+    holdings_data = context.holding_service.get_holdings_data(user_id)
+    
+    holdings = []
+    for h in holdings_data:
+        fund_code = str(h.get('fund_code'))
+        context.fund_realtime.prime(fund_code, {
+            'current_nav': h.get('current_nav'),
+            'estimate_nav': h.get('estimate_nav'),
+            'today_return': h.get('today_return')
+        })
+        holdings.append(HoldingType(
+            fund_code=fund_code,
+            fund_name=h.get('fund_name'),
+            shares=h.get('holding_shares'),
+            cost_price=h.get('cost_price'),
+            cost_amount=h.get('holding_amount'),
+            current_nav=h.get('current_nav'),
+            current_value=h.get('current_market_value'),
+            profit_loss=h.get('holding_profit'),
+            profit_loss_percent=h.get('holding_profit_rate'),
+            daily_return=h.get('today_return'),
+            daily_profit=h.get('today_profit')
+        ))
+    
+    codes = [h.fund_code for h in holdings]
+    context.fund_basic.want(codes)
+    context.fund_performance.want(codes)
+    
+    def total(values):
+        return sum(v for v in values if v is not None)
+    
+    total_cost = total(h.cost_amount for h in holdings)
+    total_value = total(h.current_value for h in holdings)
+    total_profit = total(h.profit_loss for h in holdings)
+    daily_profit = total(h.daily_profit for h in holdings)
+    previous_value = total_value - daily_profit
+    
+    return PortfolioType(
+        user_id=user_id,
+        total_cost=total_cost,
+        total_value=total_value,
+        total_profit_loss=total_profit,
+        total_return=total_profit / total_cost * 100 if total_cost else None,
+        daily_profit=daily_profit,
+        daily_return=daily_profit / previous_value * 100 if previous_value else None,
+        holdings=holdings
+    )
@@ -11,6 +11,8 @@ from graphene import relay
 from graphene.types import datetime
 from typing import List
 
+from .context import get_graphql_context
+
 
 class FundType(graphene.ObjectType):
     """基金类型"""
@@ -29,6 +31,11 @@ class FundType(graphene.ObjectType):
     # 日期字段
     established_date = graphene.Date(description="成立日期")
     
+    # 实时数据（请求内按基金代码批量获取）
+    current_nav = graphene.Float(description="当前净值")
+    estimate_nav = graphene.Float(description="估算净值")
+    today_return = graphene.Float(description="估算涨跌幅(%)")
+    
     # 关联字段
     nav_history = graphene.List(lambda: FundNavType, 
                                  days=graphene.Int(default_value=30),
@@ -61,16 +68,20 @@ class FundType(graphene.ObjectType):
     
     def resolve_performance(self, info):
         """解析绩效指标"""
-        try:
-            from services.fund_data_preloader import get_preloader
-            preloader = get_preloader()
-            perf = preloader.get_fund_performance(self.code)
-            
-            if perf:
-                return FundPerformanceType(**perf)
-        except Exception:
-            pass
-        return None
+        perf = get_graphql_context(info).fund_performance.load(self.code)
+        return performance_from_metrics(perf)
+    
+    def resolve_current_nav(self, info):
+        return self._realtime(info).get('current_nav')
+    
+    def resolve_estimate_nav(self, info):
+        return self._realtime(info).get('estimate_nav')
+    
+    def resolve_today_return(self, info):
+        return self._realtime(info).get('today_return')
+    
+    def _realtime(self, info):
+        return get_graphql_context(info).fund_realtime.load(self.code) or {}
 
 
 class FundNavType(graphene.ObjectType):
@@ -221,6 +232,14 @@ class HoldingType(graphene.ObjectType):
     # 日涨跌
     daily_return = graphene.Float(description="日涨跌幅")
     daily_profit = graphene.Float(description="日盈亏")
+    
+    # 关联基金
+    fund = graphene.Field(FundType, description="基金信息")
+    
+    def resolve_fund(self, info):
+        """解析关联基金（同一组合的持仓合并为一次批量查询）"""
+        basic_info = get_graphql_context(info).fund_basic.load(self.fund_code)
+        return fund_from_basic_info(self.fund_code, basic_info, self.fund_name)
 
 
 class PortfolioType(graphene.ObjectType):
@@ -275,6 +294,28 @@ class AnalysisResultType(graphene.ObjectType):
     analyzed_at = graphene.DateTime(description="分析时间")
 
 
+def fund_from_basic_info(code, basic_info, default_name=None):
+    """由基金基本信息字典（预加载缓存或 fund_basic_info 表的一行）构建 FundType"""
+    if not basic_info:
+        return FundType(code=code, name=default_name) if default_name else None
+    return FundType(
+        code=code,
+        name=basic_info.get('fund_name') or basic_info.get('name') or default_name,
+        type=basic_info.get('fund_type') or basic_info.get('type'),
+        manager=basic_info.get('fund_manager') or basic_info.get('manager'),
+        company=basic_info.get('fund_company') or basic_info.get('company'),
+        established_date=basic_info.get('establish_date')
+    )
+
+
+def performance_from_metrics(perf):
+    """由绩效指标字典构建 FundPerformanceType（忽略类型中没有的键）"""
+    if not perf:
+        return None
+    fields = FundPerformanceType._meta.fields
+    return FundPerformanceType(**{key: value for key, value in perf.items() if key in fields})
+
+
 class PageInfo(graphene.ObjectType):
     """分页信息"""
     
@@ -27,6 +27,8 @@ def create_app() -> Flask:
     # 初始化服务
     service = get_service()
     service.init_components()
+    # 启动工作池，继续执行上次退出时队列中未完成的任务
+    service.start_workers()
     
     # ============ 健康检查 ============
     
@@ -77,15 +79,16 @@ def create_app() -> Flask:
     
     @app.route('/api/backtest/tasks/<task_id>/run', methods=['POST'])
     def run_task(task_id):
-        """执行回测任务"""
+        """提交回测任务（异步执行，通过 status 接口查询进度）"""
         try:
             success = service.run_task(task_id)
             
             if success:
                 return jsonify({
                     'success': True,
-                    'message': '任务开始执行'
-                })
+                    'message': '任务已提交执行',
+                    'data': service.get_task_status(task_id)
+                }), 202
             else:
                 return jsonify({
                     'success': False,
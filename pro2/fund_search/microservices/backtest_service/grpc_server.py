@@ -149,6 +149,9 @@ def serve(port: int = 50051, max_workers: int = 10):
     try:
         server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
         
+        # 回测在工作进程池中执行，gRPC 线程只负责提交和查询
+        get_service().start_workers()
+        
         # 注册服务（需要.proto文件生成）
         # add_BacktestServiceServicer_to_server(BacktestServicer(), server)
         
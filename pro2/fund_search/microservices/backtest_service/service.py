@@ -4,13 +4,16 @@
 回测引擎服务核心
 
 实现回测引擎的独立服务逻辑，与原系统解耦。
+
+任务保存在持久化队列中（见 task_queue），run_task 只负责入队，
+由工作进程池异步执行，HTTP/gRPC 请求线程不会被回测阻塞。
 """
 
 import os
 import sys
 import logging
 import uuid
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -18,12 +21,17 @@ from enum import Enum
 # 添加项目路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from .task_queue import (
+    BacktestWorkerPool, PARAM_FIELDS, create_task_queue, params_hash
+)
+
 logger = logging.getLogger(__name__)
 
 
 class TaskStatus(Enum):
     """任务状态"""
     PENDING = 'pending'
+    QUEUED = 'queued'
     RUNNING = 'running'
     COMPLETED = 'completed'
     FAILED = 'failed'
@@ -47,6 +55,7 @@ class BacktestTask:
     progress: float = 0.0
     result: Optional[Dict] = None
     error: Optional[str] = None
+    params_hash: Optional[str] = None
     
     def to_dict(self) -> Dict:
         return {
@@ -63,8 +72,84 @@ class BacktestTask:
             'completed_at': self.completed_at,
             'progress': self.progress,
             'result': self.result,
-            'error': self.error
+            'error': self.error,
+            'params_hash': self.params_hash
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BacktestTask':
+        """从队列中的任务字典还原"""
+        return cls(
+            task_id=data['task_id'],
+            strategy_id=data.get('strategy_id'),
+            user_id=data.get('user_id'),
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            initial_capital=data.get('initial_capital'),
+            rebalance_freq=data.get('rebalance_freq'),
+            status=TaskStatus(data['status']),
+            created_at=data.get('created_at'),
+            started_at=data.get('started_at'),
+            completed_at=data.get('completed_at'),
+            progress=data.get('progress') or 0.0,
+            result=data.get('result'),
+            error=data.get('error'),
+            params_hash=data.get('params_hash')
+        )
+
+
+# 工作进程内的数据库管理器（由 _init_worker 创建）
+_worker_db_manager = None
+
+
+def _init_worker(db_config: Optional[Dict]):
+    """工作进程初始化：每个进程建立自己的数据库连接"""
+    global _worker_db_manager
+    if not db_config:
+        return
+    try:
+        from data_access.enhanced_database import EnhancedDatabaseManager
+        _worker_db_manager = EnhancedDatabaseManager(db_config)
+    except Exception as e:
+        logger.error(f"工作进程初始化数据库失败: {e}")
+
+
+def execute_backtest(params: Dict, progress: Optional[Callable[[float], None]] = None,
+                     db_manager=None) -> Dict:
+    """
+    执行回测逻辑（在工作进程中调用）
+    
+    Args:
+        params: 回测参数（strategy_id、user_id、起止日期、初始资金、再平衡频率）
+        progress: 进度回调
+        db_manager: 数据库管理器，默认使用工作进程初始化时创建的实例
+        
+    Returns:
+        Dict: {'success', 'data', 'error'}
+    """
+    try:
+        from backtesting.core.backtest_api import BacktestAPIHandler
+        
+        handler = BacktestAPIHandler(
+            db_manager=db_manager or _worker_db_manager,
+            fund_data_manager=None
+        )
+        
+        success, result = handler.run_backtest(
+            strategy_id=params['strategy_id'],
+            user_id=params['user_id'],
+            start_date=params['start_date'],
+            end_date=params['end_date'],
+            initial_capital=params['initial_capital'],
+            rebalance_freq=params['rebalance_freq'],
+            progress_callback=progress
+        )
+        
+        return {'success': success, 'data': result if success else None, 'error': None if success else result.get('error')}
+        
+    except Exception as e:
+        logger.error(f"执行回测失败: {e}")
+        return {'success': False, 'error': str(e)}
 
 
 class BacktestService:
@@ -87,7 +172,12 @@ class BacktestService:
         if self._initialized:
             return
         
-        self._tasks: Dict[str, BacktestTask] = {}
+        self._queue = None
+        self._worker_pool: Optional[BacktestWorkerPool] = None
+        self._max_workers = int(os.environ.get('BACKTEST_WORKERS', '0')) or None
+        self._execute = execute_backtest
+        self._use_processes = True
+        self._db_config = None
         self._db_manager = None
         self._strategy_engine = None
         self._evaluator = None
@@ -119,6 +209,7 @@ class BacktestService:
                     'charset': config.charset
                 }
             
+            self._db_config = db_config
             self._db_manager = EnhancedDatabaseManager(db_config)
             self._strategy_engine = UnifiedStrategyEngine()
             self._evaluator = StrategyEvaluator()
@@ -129,6 +220,62 @@ class BacktestService:
             logger.error(f"初始化组件失败: {e}")
             raise
     
+    # ============ 队列与工作池 ============
+    
+    @property
+    def queue(self):
+        """任务队列（默认由环境变量 BACKTEST_QUEUE_URL 决定，见 create_task_queue）"""
+        if self._queue is None:
+            self._queue = create_task_queue()
+        return self._queue
+    
+    def configure_queue(self, queue=None, max_workers: Optional[int] = None,
+                        execute: Optional[Callable] = None, use_processes: bool = True):
+        """
+        配置任务队列和工作池（需在第一次提交任务前调用）
+        
+        Args:
+            queue: 任务队列实例，None 时使用默认队列
+            max_workers: 工作进程数，None 时为 CPU 核数
+            execute: 执行函数，签名同 execute_backtest
+            use_processes: False 时使用线程执行
+        """
+        self.stop_workers()
+        if queue is not None:
+            self._queue = queue
+        if max_workers is not None:
+            self._max_workers = max_workers
+        self._execute = execute or execute_backtest
+        self._use_processes = use_processes
+    
+    def start_workers(self) -> BacktestWorkerPool:
+        """启动工作池（已启动时直接返回），同时接手队列中尚未执行的任务"""
+        if self._worker_pool is None or not self._worker_pool.is_running:
+            self._worker_pool = BacktestWorkerPool(
+                self.queue,
+                self._execute,
+                max_workers=self._max_workers,
+                use_processes=self._use_processes,
+                initializer=_init_worker if self._use_processes else None,
+                initargs=(self._db_config,) if self._use_processes else (),
+                on_finished=self._on_task_finished
+            ).start()
+        return self._worker_pool
+    
+    def stop_workers(self, wait: bool = True):
+        """停止工作池；未完成的任务保留在队列中，下次启动后继续执行"""
+        if self._worker_pool is not None:
+            self._worker_pool.stop(wait=wait)
+            self._worker_pool = None
+    
+    def _on_task_finished(self, task_data: Dict):
+        task = BacktestTask.from_dict(task_data)
+        if task.status == TaskStatus.COMPLETED:
+            # 触发完成事件
+            self._emit_completed_event(task)
+    
+    # ============ 任务管理 ============
+    
     def create_task(self, strategy_id: str, user_id: str,
                     start_date: str, end_date: str,
                     initial_capital: float = 100000.0,
@@ -136,6 +283,9 @@ class BacktestService:
         """
         创建回测任务
         
+        参数相同且尚未结束的任务直接返回已有任务。已完成的结果不按参数复用
+        （策略内容修改后参数不变），重复执行时由回测处理器的结果缓存命中。
+        
         Args:
             strategy_id: 策略ID
             user_id: 用户ID
@@ -147,78 +297,73 @@ class BacktestService:
         Returns:
             BacktestTask: 创建的任务
         """
+        params = {
+            'strategy_id': strategy_id,
+            'user_id': user_id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'initial_capital': initial_capital,
+            'rebalance_freq': rebalance_freq
+        }
+        hash_value = params_hash(params)
+        
+        existing = self.queue.find_active(hash_value)
+        if existing:
+            logger.info(f"复用参数相同的回测任务: {existing['task_id']}")
+            return BacktestTask.from_dict(existing)
+        
         task = BacktestTask(
             task_id=str(uuid.uuid4()),
-            strategy_id=strategy_id,
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date,
-            initial_capital=initial_capital,
-            rebalance_freq=rebalance_freq,
             status=TaskStatus.PENDING,
-            created_at=datetime.now().isoformat()
+            created_at=datetime.now().isoformat(),
+            params_hash=hash_value,
+            **params
         )
         
-        self._tasks[task.task_id] = task
+        self.queue.add(task.to_dict())
         logger.info(f"创建回测任务: {task.task_id}")
         
         return task
     
     def run_task(self, task_id: str) -> bool:
         """
-        执行任务
+        提交任务到执行队列（异步执行，通过 get_task_status 查询进度）
         
         Args:
             task_id: 任务ID
             
         Returns:
-            bool: 是否成功启动
+            bool: 是否成功提交（已在排队、运行中或已完成的任务也返回 True）
         """
-        task = self._tasks.get(task_id)
+        task = self.get_task(task_id)
         if not task:
             logger.error(f"任务不存在: {task_id}")
             return False
         
+        if task.status in (TaskStatus.QUEUED, TaskStatus.RUNNING, TaskStatus.COMPLETED):
+            logger.info(f"任务已提交: {task_id}, 状态: {task.status.value}")
+            return True
+        
         if task.status != TaskStatus.PENDING:
             logger.warning(f"任务状态不允许执行: {task.status}")
             return False
         
         try:
-            task.status = TaskStatus.RUNNING
-            task.started_at = datetime.now().isoformat()
-            
-            logger.info(f"开始执行回测任务: {task_id}")
-            
-            # 执行回测
-            result = self._execute_backtest(task)
+            if not self.queue.enqueue(task_id):
+                # 并发提交时已被其他请求入队
+                return self.get_task(task_id).status != TaskStatus.CANCELLED
             
-            if result.get('success'):
-                task.status = TaskStatus.COMPLETED
-                task.result = result.get('data')
-                task.progress = 100.0
-                
-                # 触发完成事件
-                self._emit_completed_event(task)
-                
-            else:
-                task.status = TaskStatus.FAILED
-                task.error = result.get('error', '未知错误')
-                
-            task.completed_at = datetime.now().isoformat()
-            
-            logger.info(f"回测任务完成: {task_id}, 状态: {task.status.value}")
+            self.start_workers().notify()
+            logger.info(f"回测任务已入队: {task_id}")
             return True
             
         except Exception as e:
-            task.status = TaskStatus.FAILED
-            task.error = str(e)
-            task.completed_at = datetime.now().isoformat()
-            logger.error(f"执行回测任务失败: {e}")
+            logger.error(f"提交回测任务失败: {e}")
             return False
     
     def _execute_backtest(self, task: BacktestTask) -> Dict:
         """
-        执行回测逻辑
+        在当前进程中同步执行回测逻辑
         
         Args:
             task: 回测任务
@@ -226,28 +371,8 @@ class BacktestService:
         Returns:
             Dict: 回测结果
         """
-        try:
-            from backtesting.core.backtest_api import BacktestAPIHandler
-            
-            handler = BacktestAPIHandler(
-                db_manager=self._db_manager,
-                fund_data_manager=None
-            )
-            
-            success, result = handler.run_backtest(
-                strategy_id=task.strategy_id,
-                user_id=task.user_id,
-                start_date=task.start_date,
-                end_date=task.end_date,
-                initial_capital=task.initial_capital,
-                rebalance_freq=task.rebalance_freq
-            )
-            
-            return {'success': success, 'data': result if success else None, 'error': None if success else result.get('error')}
-            
-        except Exception as e:
-            logger.error(f"执行回测失败: {e}")
-            return {'success': False, 'error': str(e)}
+        params = {field: getattr(task, field) for field in PARAM_FIELDS}
+        return execute_backtest(params, db_manager=self._db_manager)
     
     def _emit_completed_event(self, task: BacktestTask):
         """触发回测完成事件"""
@@ -266,18 +391,19 @@ class BacktestService:
     
     def get_task(self, task_id: str) -> Optional[BacktestTask]:
         """获取任务"""
-        return self._tasks.get(task_id)
+        data = self.queue.get(task_id)
+        return BacktestTask.from_dict(data) if data else None
     
     def get_task_status(self, task_id: str) -> Optional[Dict]:
         """获取任务状态"""
-        task = self._tasks.get(task_id)
+        task = self.get_task(task_id)
         if not task:
             return None
         return task.to_dict()
     
     def get_task_result(self, task_id: str) -> Optional[Dict]:
         """获取任务结果"""
-        task = self._tasks.get(task_id)
+        task = self.get_task(task_id)
         if not task:
             return None
         
@@ -292,23 +418,18 @@ class BacktestService:
         """
         取消任务
         
+        排队中的任务不会再被执行；运行中的任务完成后结果被丢弃
+        
         Args:
             task_id: 任务ID
             
         Returns:
             bool: 是否成功取消
         """
-        task = self._tasks.get(task_id)
-        if not task:
+        if not self.queue.cancel(task_id):
             return False
         
-        if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
-            return False
-        
-        task.status = TaskStatus.CANCELLED
-        task.completed_at = datetime.now().isoformat()
         logger.info(f"任务已取消: {task_id}")
-        
         return True
     
     def list_tasks(self, user_id: str = None, status: str = None) -> List[Dict]:
@@ -320,35 +441,23 @@ class BacktestService:
             status: 状态过滤
             
         Returns:
-            List[Dict]: 任务列表
+            List[Dict]: 任务列表（按创建时间倒序）
         """
-        tasks = self._tasks.values()
-        
-        if user_id:
-            tasks = [t for t in tasks if t.user_id == user_id]
-        
-        if status:
-            tasks = [t for t in tasks if t.status.value == status]
-        
-        # 按创建时间倒序
-        tasks = sorted(tasks, key=lambda t: t.created_at, reverse=True)
-        
-        return [t.to_dict() for t in tasks]
+        return [BacktestTask.from_dict(t).to_dict() for t in self.queue.list(user_id=user_id, status=status)]
     
     def get_stats(self) -> Dict:
         """获取服务统计信息"""
-        total = len(self._tasks)
-        pending = sum(1 for t in self._tasks.values() if t.status == TaskStatus.PENDING)
-        running = sum(1 for t in self._tasks.values() if t.status == TaskStatus.RUNNING)
-        completed = sum(1 for t in self._tasks.values() if t.status == TaskStatus.COMPLETED)
-        failed = sum(1 for t in self._tasks.values() if t.status == TaskStatus.FAILED)
+        counts = self.queue.counts()
         
         return {
-            'total_tasks': total,
-            'pending': pending,
-            'running': running,
-            'completed': completed,
-            'failed': failed,
+            'total_tasks': sum(counts.values()),
+            'pending': counts.get(TaskStatus.PENDING.value, 0),
+            'queued': counts.get(TaskStatus.QUEUED.value, 0),
+            'running': counts.get(TaskStatus.RUNNING.value, 0),
+            'completed': counts.get(TaskStatus.COMPLETED.value, 0),
+            'failed': counts.get(TaskStatus.FAILED.value, 0),
+            'workers': self._worker_pool.max_workers if self._worker_pool else 0,
+            'active_workers': self._worker_pool.active_count() if self._worker_pool else 0,
             'initialized': self._initialized
         }
 
@@ -0,0 +1,629 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回测任务持久化队列与工作进程池
+
+任务提交后写入持久化队列，由工作进程池异步执行，HTTP/gRPC 线程只负责入队和查询：
+- SQLiteTaskQueue: 本地 SQLite 文件（默认），服务重启后未完成的任务继续执行
+- RedisTaskQueue: Redis（可选），多个服务实例共享同一个队列
+- BacktestWorkerPool: 调度线程从队列领取任务，交给进程池执行，子进程直接向队列写入进度
+
+参数完全相同的任务按参数哈希去重：排队或运行中的相同任务直接复用。
+已完成的结果不在这里保存（参数不含策略内容，策略修改后会取到旧结果），
+结果复用由 BacktestAPIHandler 按策略配置和基金数据的内容哈希缓存完成。
+
+运行中的任务由调度线程定期刷新心跳；进程退出后心跳过期的任务被重新放回队列。
+
+使用示例:
+    queue = SQLiteTaskQueue('/tmp/backtest_tasks.db')
+    pool = BacktestWorkerPool(queue, execute_backtest, max_workers=4)
+    pool.start()
+"""
+
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# 任务状态（与 service.TaskStatus 的取值一致）
+PENDING = 'pending'
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+ACTIVE_STATUSES = (PENDING, QUEUED, RUNNING)
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+# 任务参数字段（参与去重哈希）
+PARAM_FIELDS = ('strategy_id', 'user_id', 'start_date', 'end_date', 'initial_capital', 'rebalance_freq')
+
+# 运行中任务的心跳超时（秒）
+DEFAULT_STALE_SECONDS = 120
+
+
+def params_hash(params: Dict) -> str:
+    """
+    回测参数的哈希
+
+    结束日期为空表示回测到当天，按当天日期参与哈希，避免跨天复用结果
+    """
+    normalized = {field: params.get(field) for field in PARAM_FIELDS}
+    if not normalized['end_date']:
+        normalized['end_date'] = datetime.now().strftime('%Y-%m-%d')
+    if normalized['initial_capital'] is not None:
+        normalized['initial_capital'] = float(normalized['initial_capital'])
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+class SQLiteTaskQueue:
+    """
+    基于 SQLite 的持久化任务队列
+
+    每个进程、每个线程使用独立连接；领取任务在 IMMEDIATE 事务中完成，
+    多个进程同时领取时同一任务只会被领取一次。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS backtest_tasks (
+            task_id TEXT PRIMARY KEY,
+            params_hash TEXT NOT NULL,
+            user_id TEXT,
+            status TEXT NOT NULL,
+            params TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            queued_at REAL,
+            started_at TEXT,
+            completed_at TEXT,
+            progress REAL NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            worker_id TEXT,
+            heartbeat REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_backtest_tasks_hash ON backtest_tasks (params_hash, status);
+        CREATE INDEX IF NOT EXISTS idx_backtest_tasks_queue ON backtest_tasks (status, queued_at);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self._SCHEMA)
+
+    def __getstate__(self):
+        # 传给子进程时只保留路径，连接在子进程中重新建立
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict]:
+        if row is None:
+            return None
+        task = json.loads(row['params'])
+        task.update({
+            'task_id': row['task_id'],
+            'params_hash': row['params_hash'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'completed_at': row['completed_at'],
+            'progress': row['progress'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+        })
+        return task
+
+    # ==================== 任务 ====================
+
+    def add(self, task: Dict) -> None:
+        """写入新任务（status 取 task['status']）"""
+        params = {field: task.get(field) for field in PARAM_FIELDS}
+        self._connect().execute(
+            """INSERT INTO backtest_tasks
+               (task_id, params_hash, user_id, status, params, created_at, started_at, completed_at,
+                progress, result, error)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (task['task_id'], task['params_hash'], task.get('user_id'), task['status'],
+             json.dumps(params, ensure_ascii=False, default=str), task['created_at'],
+             task.get('started_at'), task.get('completed_at'), task.get('progress', 0.0),
+             json.dumps(task['result'], ensure_ascii=False, default=str) if task.get('result') is not None else None,
+             task.get('error'))
+        )
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        row = self._connect().execute('SELECT * FROM backtest_tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return self._to_dict(row)
+
+    def find_active(self, hash_value: str) -> Optional[Dict]:
+        """参数哈希相同、尚未结束的任务"""
+        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+        row = self._connect().execute(
+            f"""SELECT * FROM backtest_tasks WHERE params_hash = ? AND status IN ({placeholders})
+                ORDER BY created_at LIMIT 1""",
+            (hash_value, *ACTIVE_STATUSES)
+        ).fetchone()
+        return self._to_dict(row)
+
+    def enqueue(self, task_id: str) -> bool:
+        """pending → queued"""
+        cursor = self._connect().execute(
+            'UPDATE backtest_tasks SET status = ?, queued_at = ? WHERE task_id = ? AND status = ?',
+            (QUEUED, time.time(), task_id, PENDING)
+        )
+        return cursor.rowcount == 1
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """领取最早入队的任务：queued → running"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT task_id FROM backtest_tasks WHERE status = ? ORDER BY queued_at LIMIT 1', (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                """UPDATE backtest_tasks SET status = ?, started_at = ?, worker_id = ?, heartbeat = ?, progress = 0
+                   WHERE task_id = ?""",
+                (RUNNING, _now(), worker_id, time.time(), row['task_id'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(row['task_id'])
+
+    def heartbeat(self, task_ids: List[str]) -> None:
+        if not task_ids:
+            return
+        placeholders = ','.join('?' * len(task_ids))
+        self._connect().execute(
+            f'UPDATE backtest_tasks SET heartbeat = ? WHERE status = ? AND task_id IN ({placeholders})',
+            (time.time(), RUNNING, *task_ids)
+        )
+
+    def update_progress(self, task_id: str, progress: float) -> None:
+        self._connect().execute(
+            'UPDATE backtest_tasks SET progress = ?, heartbeat = ? WHERE task_id = ? AND status = ?',
+            (float(progress), time.time(), task_id, RUNNING)
+        )
+
+    def finish(self, task_id: str, status: str, result: Optional[Dict] = None,
+               error: Optional[str] = None) -> bool:
+        """运行中的任务结束；任务已被取消或重新入队时不覆盖"""
+        cursor = self._connect().execute(
+            """UPDATE backtest_tasks SET status = ?, result = ?, error = ?, completed_at = ?,
+                      progress = CASE WHEN ? = ? THEN 100 ELSE progress END
+               WHERE task_id = ? AND status = ?""",
+            (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+             error, _now(), status, COMPLETED, task_id, RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def cancel(self, task_id: str) -> bool:
+        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+        cursor = self._connect().execute(
+            f'UPDATE backtest_tasks SET status = ?, completed_at = ? WHERE task_id = ? AND status IN ({placeholders})',
+            (CANCELLED, _now(), task_id, *ACTIVE_STATUSES)
+        )
+        return cursor.rowcount == 1
+
+    def requeue_stale(self, stale_seconds: float) -> int:
+        """心跳超时的运行中任务重新入队"""
+        cursor = self._connect().execute(
+            """UPDATE backtest_tasks SET status = ?, worker_id = NULL, progress = 0
+               WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)""",
+            (QUEUED, RUNNING, time.time() - stale_seconds)
+        )
+        return cursor.rowcount
+
+    def list(self, user_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+        sql, args = 'SELECT * FROM backtest_tasks WHERE 1 = 1', []
+        if user_id:
+            sql += ' AND user_id = ?'
+            args.append(user_id)
+        if status:
+            sql += ' AND status = ?'
+            args.append(status)
+        sql += ' ORDER BY created_at DESC'
+        return [self._to_dict(row) for row in self._connect().execute(sql, args).fetchall()]
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connect().execute('SELECT status, COUNT(*) AS n FROM backtest_tasks GROUP BY status')
+        return {row['status']: row['n'] for row in rows}
+
+
+class RedisTaskQueue:
+    """
+    基于 Redis 的任务队列（多实例共享）
+
+    - {prefix}:task:{id}      任务 JSON
+    - {prefix}:tasks          全部任务 ID（按创建时间排序的有序集合）
+    - {prefix}:queue          待执行任务 ID 列表（LPUSH / RPOP）
+    - {prefix}:running        运行中任务 ID → 心跳时间
+    - {prefix}:active:{hash}  尚未结束的相同参数任务 ID
+    """
+
+    def __init__(self, client, prefix: str = 'backtest'):
+        """
+        Args:
+            client: redis.Redis 客户端（需 decode_responses=True）
+            prefix: 键前缀
+        """
+        if redis is None:
+            raise ImportError('redis 未安装')
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisTaskQueue':
+        if redis is None:
+            raise ImportError('redis 未安装')
+        client = redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=5, decode_responses=True)
+        return cls(client, **kwargs)
+
+    def __getstate__(self):
+        kwargs = self.client.connection_pool.connection_kwargs
+        return {'prefix': self.prefix, 'kwargs': {k: v for k, v in kwargs.items() if k != 'connection_class'}}
+
+    def __setstate__(self, state):
+        self.prefix = state['prefix']
+        self.client = redis.Redis(**state['kwargs'])
+
+    def _key(self, *parts: str) -> str:
+        return ':'.join((self.prefix,) + parts)
+
+    def _save(self, task: Dict) -> None:
+        self.client.set(self._key('task', task['task_id']), json.dumps(task, ensure_ascii=False, default=str))
+
+    def add(self, task: Dict) -> None:
+        task = dict(task)
+        pipe = self.client.pipeline()
+        pipe.set(self._key('task', task['task_id']), json.dumps(task, ensure_ascii=False, default=str))
+        pipe.zadd(self._key('tasks'), {task['task_id']: time.time()})
+        if task['status'] in ACTIVE_STATUSES:
+            pipe.set(self._key('active', task['params_hash']), task['task_id'])
+        pipe.execute()
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        raw = self.client.get(self._key('task', task_id))
+        return json.loads(raw) if raw else None
+
+    def find_active(self, hash_value: str) -> Optional[Dict]:
+        task_id = self.client.get(self._key('active', hash_value))
+        task = self.get(task_id) if task_id else None
+        return task if task and task['status'] in ACTIVE_STATUSES else None
+
+    def _transition(self, task_id: str, allowed, **changes) -> Optional[Dict]:
+        """带乐观锁的状态转换：任务状态不在 allowed 中时返回 None"""
+        key = self._key('task', task_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    task = json.loads(raw) if raw else None
+                    if task is None or task['status'] not in allowed:
+                        pipe.unwatch()
+                        return None
+                    task.update(changes)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(task, ensure_ascii=False, default=str))
+                    if task['status'] == QUEUED:
+                        pipe.lpush(self._key('queue'), task_id)
+                        pipe.zrem(self._key('running'), task_id)
+                    elif task['status'] == RUNNING:
+                        pipe.zadd(self._key('running'), {task_id: time.time()})
+                    else:
+                        pipe.zrem(self._key('running'), task_id)
+                    if task['status'] in FINISHED_STATUSES:
+                        pipe.delete(self._key('active', task['params_hash']))
+                    pipe.execute()
+                    return task
+                except redis.WatchError:
+                    continue
+
+    def enqueue(self, task_id: str) -> bool:
+        return self._transition(task_id, (PENDING,), status=QUEUED) is not None
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        while True:
+            task_id = self.client.rpop(self._key('queue'))
+            if task_id is None:
+                return None
+            # 已取消的任务仍留在列表中，领取时跳过
+            task = self._transition(task_id, (QUEUED,), status=RUNNING, started_at=_now(),
+                                    worker_id=worker_id, progress=0.0)
+            if task is not None:
+                return task
+
+    def heartbeat(self, task_ids: List[str]) -> None:
+        if task_ids:
+            now = time.time()
+            self.client.zadd(self._key('running'), {task_id: now for task_id in task_ids}, xx=True)
+
+    def update_progress(self, task_id: str, progress: float) -> None:
+        self._transition(task_id, (RUNNING,), progress=float(progress))
+
+    def finish(self, task_id: str, status: str, result: Optional[Dict] = None,
+               error: Optional[str] = None) -> bool:
+        changes = {'status': status, 'result': result, 'error': error, 'completed_at': _now()}
+        if status == COMPLETED:
+            changes['progress'] = 100.0
+        return self._transition(task_id, (RUNNING,), **changes) is not None
+
+    def cancel(self, task_id: str) -> bool:
+        return self._transition(task_id, ACTIVE_STATUSES, status=CANCELLED, completed_at=_now()) is not None
+
+    def requeue_stale(self, stale_seconds: float) -> int:
+        stale = self.client.zrangebyscore(self._key('running'), '-inf', time.time() - stale_seconds)
+        requeued = 0
+        for task_id in stale:
+            if self._transition(task_id, (RUNNING,), status=QUEUED, worker_id=None, progress=0.0) is not None:
+                requeued += 1
+        return requeued
+
+    def list(self, user_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict]:
+        task_ids = self.client.zrevrange(self._key('tasks'), 0, -1)
+        if not task_ids:
+            return []
+        raws = self.client.mget([self._key('task', task_id) for task_id in task_ids])
+        tasks = [json.loads(raw) for raw in raws if raw]
+        if user_id:
+            tasks = [t for t in tasks if t.get('user_id') == user_id]
+        if status:
+            tasks = [t for t in tasks if t['status'] == status]
+        return tasks
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for task in self.list():
+            counts[task['status']] = counts.get(task['status'], 0) + 1
+        return counts
+
+
+def create_task_queue(url: Optional[str] = None):
+    """
+    根据地址创建任务队列
+
+    - redis:// 或 rediss:// 开头时使用 Redis，不可用时退回本地 SQLite
+    - 其他值作为 SQLite 文件路径
+    - 为空时读取环境变量 BACKTEST_QUEUE_URL，默认为本模块目录下的 .queue/backtest_tasks.db
+    """
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.queue', 'backtest_tasks.db')
+    url = url or os.environ.get('BACKTEST_QUEUE_URL') or default_path
+    if url.startswith(('redis://', 'rediss://')):
+        try:
+            queue = RedisTaskQueue.from_url(url)
+            queue.client.ping()
+            return queue
+        except Exception as e:
+            logger.warning(f"Redis任务队列不可用，退回本地SQLite队列: {e}")
+            url = default_path
+    return SQLiteTaskQueue(url)
+
+
+# ==================== 工作进程池 ====================
+
+def _run_queued_task(queue, execute: Callable, task: Dict) -> Dict:
+    """子进程入口：执行任务，进度直接写入队列"""
+    task_id = task['task_id']
+
+    def report(progress: float):
+        try:
+            queue.update_progress(task_id, progress)
+        except Exception as e:
+            logger.debug(f"更新任务进度失败 {task_id}: {e}")
+
+    params = {field: task.get(field) for field in PARAM_FIELDS}
+    return execute(params, report)
+
+
+class BacktestWorkerPool:
+    """
+    回测工作进程池
+
+    调度线程在有空闲进程时从队列领取任务；execute(params, progress) 在子进程中执行，
+    返回 {'success': bool, 'data': 结果, 'error': 错误信息}。
+    """
+
+    def __init__(self, queue, execute: Callable[[Dict, Callable[[float], None]], Dict],
+                 max_workers: Optional[int] = None, poll_interval: float = 0.5,
+                 stale_seconds: float = DEFAULT_STALE_SECONDS, use_processes: bool = True,
+                 initializer: Optional[Callable] = None, initargs: tuple = (),
+                 on_finished: Optional[Callable[[Dict], None]] = None):
+        """
+        Args:
+            queue: 任务队列（SQLiteTaskQueue / RedisTaskQueue）
+            execute: 执行函数，需可被子进程导入（模块级函数）
+            max_workers: 并发执行数，默认 CPU 核数
+            poll_interval: 队列为空时的轮询间隔（秒）
+            stale_seconds: 运行中任务的心跳超时（秒）
+            use_processes: False 时使用线程池执行（调试或执行函数无法序列化时）
+            initializer / initargs: 子进程初始化函数及参数
+            on_finished: 任务结束后在调度进程中调用，参数为任务字典
+        """
+        self.queue = queue
+        self.execute = execute
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self.use_processes = use_processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self.on_finished = on_finished
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._executor = None
+        self._running: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'BacktestWorkerPool':
+        if self.is_running:
+            return self
+        self._executor = self._create_executor()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._dispatch_loop, name='backtest-dispatcher', daemon=True)
+        self._thread.start()
+        logger.info(f"回测工作池已启动: {self.max_workers} 个{'进程' if self.use_processes else '线程'}")
+        return self
+
+    def notify(self) -> None:
+        """有新任务入队时唤醒调度线程"""
+        self._wakeup.set()
+
+    def stop(self, wait: bool = True) -> None:
+        """停止领取新任务；wait=True 时等待运行中的任务结束"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def _create_executor(self):
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer,
+                                       initargs=self.initargs)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='backtest-worker',
+                                  initializer=self.initializer, initargs=self.initargs)
+
+    def _rebuild_executor(self, broken) -> None:
+        """
+        子进程异常退出（OOM、段错误等）后进程池不可再用，关闭并重建
+
+        broken 为出错的进程池，已被其他线程重建时不重复处理
+        """
+        with self._lock:
+            if self._executor is not broken or self._stop.is_set():
+                return
+            self._executor = self._create_executor()
+        logger.warning("回测进程池已损坏，已重建")
+        try:
+            broken.shutdown(wait=False, cancel_futures=True)
+        except Exception as e:
+            logger.debug(f"关闭损坏的进程池失败: {e}")
+
+    def _dispatch_loop(self) -> None:
+        last_maintenance = 0.0
+        while not self._stop.is_set():
+            try:
+                now = time.time()
+                if now - last_maintenance >= min(self.stale_seconds / 4, 10.0):
+                    with self._lock:
+                        running_ids = list(self._running)
+                    self.queue.heartbeat(running_ids)
+                    requeued = self.queue.requeue_stale(self.stale_seconds)
+                    if requeued:
+                        logger.warning(f"{requeued} 个回测任务心跳超时，已重新入队")
+                    last_maintenance = now
+
+                claimed = False
+                while self.active_count() < self.max_workers:
+                    task = self.queue.claim(self.worker_id)
+                    if task is None:
+                        break
+                    claimed = True
+                    self._submit(task)
+                if claimed:
+                    continue
+            except Exception as e:
+                logger.error(f"回测任务调度失败: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _submit(self, task: Dict) -> None:
+        task_id = task['task_id']
+        logger.info(f"开始执行回测任务: {task_id}")
+        # 进程池损坏时重建后重试一次，仍失败则将已领取的任务标记为失败，不留在运行状态
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                future = executor.submit(_run_queued_task, self.queue, self.execute, task)
+                break
+            except BrokenExecutor as e:
+                self._rebuild_executor(executor)
+                if attempt == 1:
+                    logger.error(f"回测任务提交失败 {task_id}: {e}")
+                    self.queue.finish(task_id, FAILED, error=f"执行进程池不可用: {e}")
+                    return
+        with self._lock:
+            self._running[task_id] = future
+        future.add_done_callback(lambda f, task=task, executor=executor: self._on_done(task, f, executor))
+
+    def _on_done(self, task: Dict, future: Future, executor=None) -> None:
+        task_id = task['task_id']
+        try:
+            outcome = future.result()
+        except BrokenExecutor as e:
+            # 进程池中有子进程异常退出：该池上所有未完成的任务都会以此结束
+            self._rebuild_executor(executor)
+            outcome = {'success': False, 'error': f"执行进程异常退出: {e}"}
+        except Exception as e:
+            outcome = {'success': False, 'error': f"执行进程异常: {e}"}
+        try:
+            if outcome.get('success'):
+                finished = self.queue.finish(task_id, COMPLETED, result=outcome.get('data'))
+            else:
+                finished = self.queue.finish(task_id, FAILED, error=outcome.get('error') or '未知错误')
+            if finished:
+                logger.info(f"回测任务完成: {task_id}, 状态: {COMPLETED if outcome.get('success') else FAILED}")
+                if self.on_finished is not None:
+                    self.on_finished(self.queue.get(task_id))
+        except Exception as e:
+            logger.error(f"保存回测任务结果失败 {task_id}: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(task_id, None)
+            self._wakeup.set()
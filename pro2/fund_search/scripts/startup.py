@@ -182,10 +182,9 @@ class FundAnalysisSystem:
             # 1. 清除内存缓存
             from services.cache.persistent_cache import FundDataCache
             cache = FundDataCache()
-            with cache._cache_lock:
-                count = len(cache._memory_cache)
-                cache._memory_cache.clear()
-                logger.info(f"✓ 内存缓存已清除: {count} 项")
+            count = cache.get_cache_stats()['memory_cache_keys']
+            cache.invalidate_cache()
+            logger.info(f"✓ 内存缓存已清除: {count} 项")
         except Exception as e:
             logger.warning(f"清除内存缓存失败: {e}")
         
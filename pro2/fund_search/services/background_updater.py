@@ -296,16 +296,8 @@ class BackgroundUpdater:
             for i in range(0, min(len(codes), 200), batch_size):
                 batch = codes[i:i + batch_size]
                 results = fetcher.batch_get_fund_nav(batch, days=30)  # 最近30天
-                
-                for code, df in results.items():
-                    if not df.empty:
-                        key = f"fund:nav:{code}"
-                        data = {
-                            'records': df.to_dict('records'),
-                            'columns': df.columns.tolist(),
-                            'last_date': str(df.iloc[-1]['date']) if 'date' in df.columns else None
-                        }
-                        self.preloader.cache.set(key, data, 24 * 3600)
+                # 增量并入净值面板
+                self.preloader.store_nav_history(results)
                 
                 time.sleep(1)  # 避免频率限制
             
@@ -323,22 +315,10 @@ class BackgroundUpdater:
             if not codes:
                 return
             
-            for code in codes[:100]:  # 限制数量
-                try:
-                    # 获取历史数据
-                    hist_key = f"fund:nav:{code}"
-                    hist_data = self.preloader.cache.get(hist_key)
-                    
-                    if hist_data:
-                        # 重新计算
-                        metrics = self.preloader._calculate_metrics(hist_data['records'])
-                        perf_key = f"fund:perf:{code}"
-                        self.preloader.cache.set(perf_key, metrics, 24 * 3600)
-                        
-                except Exception as e:
-                    logger.debug(f"计算 {code} 绩效指标失败: {e}")
+            # 净值面板上一次向量化重算
+            count = self.preloader.recalculate_performance(codes[:100])  # 限制数量
             
-            logger.info("绩效指标重算完成")
+            logger.info(f"绩效指标重算完成: {count} 只基金")
             
         except Exception as e:
             logger.error(f"重算绩效指标失败: {e}")
@@ -2,17 +2,26 @@
 # -*- coding: utf-8 -*-
 """
 缓存模块
-提供多级缓存支持
+提供多级缓存支持（内存 → Redis → MySQL）
 """
 
 from .base import CacheBackend, CacheEntry
 from .memory_cache import MemoryCache
+from .tiered_cache import (
+    CacheNamespace, MySQLCache, NamespaceCache, RedisCache, TieredCache, get_tiered_cache
+)
 from .fund_cache import FundDataCache, fund_cache
 
 __all__ = [
     'CacheBackend',
     'CacheEntry',
     'MemoryCache',
+    'CacheNamespace',
+    'RedisCache',
+    'MySQLCache',
+    'TieredCache',
+    'NamespaceCache',
+    'get_tiered_cache',
     'FundDataCache',
     'fund_cache'
 ]
@@ -10,7 +10,7 @@ import logging
 from typing import Optional
 from datetime import datetime
 
-from .memory_cache import MemoryCache
+from .tiered_cache import get_tiered_cache
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +23,12 @@ class FundDataCache:
     - 实时数据（日涨跌幅）：TTL = 5分钟
     - 净值历史：TTL = 1小时
     - 基金基本信息：TTL = 1天
+    
+    数据保存在多级缓存的 fund 命名空间中，与其他缓存共享内存预算和统计。
     """
     
     def __init__(self):
-        self._cache = MemoryCache(max_size=2000)
+        self._cache = get_tiered_cache().namespace('fund')
         self.logger = logging.getLogger(__name__)
     
     def _make_key(self, fund_code: str, data_type: str, **params) -> str:
@@ -122,8 +124,8 @@ class FundDataCache:
     
     def invalidate_fund(self, fund_code: str):
         """使某基金的所有缓存失效"""
-        # 简单实现：目前不支持前缀删除，通过设置短TTL实现
-        self.logger.info(f"缓存失效: {fund_code}")
+        count = self._cache.invalidate(f"fund:{fund_code}:*")
+        self.logger.info(f"缓存失效: {fund_code}，共{count}条")
     
     def get_stats(self) -> dict:
         """获取缓存统计"""
@@ -2,198 +2,296 @@
 # -*- coding: utf-8 -*-
 """
 内存缓存实现
-基于线程安全的字典实现
+基于分段锁 + OrderedDict 的 LRU 缓存
+
+- 每个分段一把锁、一个按访问顺序排列的 OrderedDict，命中时移到末尾，淘汰时弹出头部，均为 O(1)
+- 过期时间放在最小堆中，只弹出已到期的条目（惰性删除），不再整表扫描
+- 可选按字节数限制容量
+- 键按哈希分配到不同分段，并发线程只在落到同一分段时才互相等待
 """
 
+import heapq
+import itertools
+import sys
 import threading
 import logging
+import time
+from collections import OrderedDict
 from typing import Any, Optional
-from datetime import datetime, timedelta
 
 try:
-    from .base import CacheBackend, CacheEntry
+    from .base import CacheBackend
 except ImportError:
     # 支持直接作为脚本运行或测试时使用
-    from services.cache.base import CacheBackend, CacheEntry
+    from services.cache.base import CacheBackend
 
 logger = logging.getLogger(__name__)
 
 
+def estimate_size(value: Any) -> int:
+    """
+    估算缓存值占用的字节数
+
+    DataFrame/Series 使用 memory_usage(deep=True)，NumPy 数组使用 nbytes，
+    容器类型累加一层元素大小，其余使用 sys.getsizeof。
+    """
+    memory_usage = getattr(value, 'memory_usage', None)
+    if callable(memory_usage):
+        try:
+            usage = memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+        except TypeError:
+            pass
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class _CacheShard:
+    """缓存分段：独立的锁、LRU 字典、过期堆和统计"""
+
+    __slots__ = ('lock', 'entries', 'expiry_heap', 'max_size', 'max_bytes', 'bytes_used',
+                 'hits', 'misses', 'sets', 'deletes', 'evictions', 'expirations')
+
+    def __init__(self, max_size: int, max_bytes: Optional[int]):
+        self.lock = threading.RLock()
+        # key -> (value, expires_at, size)，expires_at 为 time.monotonic() 时间，None 表示不过期
+        self.entries = OrderedDict()
+        # (expires_at, seq, key)
+        self.expiry_heap = []
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def remove(self, key: str) -> bool:
+        item = self.entries.pop(key, None)
+        if item is None:
+            return False
+        self.bytes_used -= item[2]
+        return True
+
+    def purge_expired(self, now: float):
+        """弹出堆顶所有已到期的条目；堆中过时的记录（键已删除或已被重新设置）直接丢弃"""
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            item = self.entries.get(key)
+            if item is not None and item[1] == expires_at:
+                self.remove(key)
+                self.expirations += 1
+
+        # 同一个键反复设置会在堆中留下过时记录，过多时重建
+        if len(heap) > 2 * len(self.entries) + 64:
+            self.expiry_heap = [entry for entry in heap
+                                if (item := self.entries.get(entry[2])) is not None and item[1] == entry[0]]
+            heapq.heapify(self.expiry_heap)
+
+    def evict(self):
+        """按 LRU 顺序淘汰，直到满足条目数和字节数限制（至少保留最新写入的一条）"""
+        entries = self.entries
+        while len(entries) > 1 and (
+                len(entries) > self.max_size or
+                (self.max_bytes is not None and self.bytes_used > self.max_bytes)):
+            key, item = entries.popitem(last=False)
+            self.bytes_used -= item[2]
+            self.evictions += 1
+            logger.debug(f"LRU淘汰: {key}")
+
+
 class MemoryCache(CacheBackend):
     """
     线程安全的内存缓存
-    
+
     特性：
-    - 支持过期时间（TTL）
-    - 自动清理过期数据
-    - 最大容量限制
-    - LRU 淘汰策略
+    - 支持过期时间（TTL），过期条目由最小堆按到期顺序清理
+    - 最大容量限制（条目数，可选字节数）
+    - LRU 淘汰策略（访问时提升）
+    - 分段锁，减少并发线程之间的锁竞争
     """
-    
+
     def __init__(
         self,
         max_size: int = 1000,
-        cleanup_interval: int = 100
+        cleanup_interval: int = 100,
+        max_bytes: Optional[int] = None,
+        num_shards: int = 1
     ):
         """
         初始化内存缓存
-        
+
         Args:
             max_size: 最大缓存条目数
-            cleanup_interval: 清理间隔（每N次操作清理一次）
+            cleanup_interval: 兼容保留；过期清理改为每次写入时检查过期堆堆顶
+            max_bytes: 最大占用字节数（估算值），None 表示不限制
+            num_shards: 分段数，大于1时容量和LRU顺序按分段独立维护
         """
-        self._cache = {}
-        self._lock = threading.RLock()
         self._max_size = max_size
+        self._max_bytes = max_bytes
         self._cleanup_interval = cleanup_interval
-        self._operation_count = 0
-        
-        # 统计信息
-        self._hits = 0
-        self._misses = 0
-        self._sets = 0
-        self._deletes = 0
-        
-        logger.info(f"内存缓存初始化完成，最大容量: {max_size}")
-    
+        self._seq = itertools.count()
+
+        num_shards = max(1, min(num_shards, max_size))
+        self._shards = [
+            _CacheShard(
+                max_size=max_size // num_shards + (1 if i < max_size % num_shards else 0),
+                max_bytes=None if max_bytes is None else max_bytes // num_shards
+            )
+            for i in range(num_shards)
+        ]
+
+        logger.info(f"内存缓存初始化完成，最大容量: {max_size}，分段数: {num_shards}")
+
+    def _shard_for(self, key: str) -> _CacheShard:
+        shards = self._shards
+        if len(shards) == 1:
+            return shards[0]
+        return shards[hash(key) % len(shards)]
+
     def get(self, key: str) -> Optional[Any]:
         """获取缓存值"""
-        with self._lock:
-            self._operation_count += 1
-            
-            entry = self._cache.get(key)
-            
-            if entry is None:
-                self._misses += 1
+        shard = self._shard_for(key)
+        with shard.lock:
+            item = shard.entries.get(key)
+
+            if item is None:
+                shard.misses += 1
                 return None
-            
-            if entry.is_expired:
-                del self._cache[key]
-                self._misses += 1
+
+            if item[1] is not None and item[1] <= time.monotonic():
+                shard.remove(key)
+                shard.expirations += 1
+                shard.misses += 1
                 return None
-            
-            self._hits += 1
-            
-            # 触发清理
-            self._maybe_cleanup()
-            
-            return entry.value
-    
+
+            shard.entries.move_to_end(key)
+            shard.hits += 1
+            return item[0]
+
     def set(
-        self, 
-        key: str, 
-        value: Any, 
+        self,
+        key: str,
+        value: Any,
         ttl: Optional[int] = None
     ) -> bool:
         """设置缓存值"""
-        with self._lock:
-            self._operation_count += 1
-            self._sets += 1
-            
+        size = estimate_size(value) if self._max_bytes is not None else 0
+        shard = self._shard_for(key)
+        with shard.lock:
+            now = time.monotonic()
+            shard.sets += 1
+
             # 计算过期时间
             expires_at = None
             if ttl is not None:
-                expires_at = datetime.now() + timedelta(seconds=ttl)
-            
-            # 创建条目
-            entry = CacheEntry(
-                value=value,
-                created_at=datetime.now(),
-                expires_at=expires_at
-            )
-            
-            # 检查容量
-            if len(self._cache) >= self._max_size and key not in self._cache:
-                self._evict_lru()
-            
-            self._cache[key] = entry
-            
-            # 触发清理
-            self._maybe_cleanup()
-            
+                expires_at = now + ttl
+                heapq.heappush(shard.expiry_heap, (expires_at, next(self._seq), key))
+
+            shard.remove(key)
+            shard.entries[key] = (value, expires_at, size)
+            shard.bytes_used += size
+
+            shard.purge_expired(now)
+            shard.evict()
+
             return True
-    
+
     def delete(self, key: str) -> bool:
         """删除缓存"""
-        with self._lock:
-            self._operation_count += 1
-            
-            if key in self._cache:
-                del self._cache[key]
-                self._deletes += 1
+        shard = self._shard_for(key)
+        with shard.lock:
+            if shard.remove(key):
+                shard.deletes += 1
                 return True
-            
+
             return False
-    
+
     def exists(self, key: str) -> bool:
         """检查键是否存在"""
-        with self._lock:
-            entry = self._cache.get(key)
-            
-            if entry is None:
+        shard = self._shard_for(key)
+        with shard.lock:
+            item = shard.entries.get(key)
+
+            if item is None:
                 return False
-            
-            if entry.is_expired:
-                del self._cache[key]
+
+            if item[1] is not None and item[1] <= time.monotonic():
+                shard.remove(key)
+                shard.expirations += 1
                 return False
-            
+
             return True
-    
+
+    def keys(self) -> list:
+        """当前未过期的键（快照）"""
+        now = time.monotonic()
+        result = []
+        for shard in self._shards:
+            with shard.lock:
+                result.extend(key for key, item in shard.entries.items()
+                              if item[1] is None or item[1] > now)
+        return result
+
     def clear(self) -> bool:
         """清空缓存"""
-        with self._lock:
-            self._cache.clear()
-            logger.info("内存缓存已清空")
-            return True
-    
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.expiry_heap.clear()
+                shard.bytes_used = 0
+        logger.info("内存缓存已清空")
+        return True
+
     def get_stats(self) -> dict:
         """获取缓存统计信息"""
-        with self._lock:
-            total_requests = self._hits + self._misses
-            hit_rate = self._hits / total_requests if total_requests > 0 else 0
-            
-            return {
-                'size': len(self._cache),
-                'max_size': self._max_size,
-                'hits': self._hits,
-                'misses': self._misses,
-                'hit_rate': round(hit_rate, 4),
-                'sets': self._sets,
-                'deletes': self._deletes
-            }
-    
-    def _maybe_cleanup(self):
-        """触发清理（如果达到间隔）"""
-        if self._operation_count % self._cleanup_interval == 0:
-            self._cleanup_expired()
-    
+        totals = dict.fromkeys(('size', 'bytes', 'hits', 'misses', 'sets', 'deletes', 'evictions', 'expirations'), 0)
+        for shard in self._shards:
+            with shard.lock:
+                totals['size'] += len(shard.entries)
+                totals['bytes'] += shard.bytes_used
+                totals['hits'] += shard.hits
+                totals['misses'] += shard.misses
+                totals['sets'] += shard.sets
+                totals['deletes'] += shard.deletes
+                totals['evictions'] += shard.evictions
+                totals['expirations'] += shard.expirations
+
+        total_requests = totals['hits'] + totals['misses']
+        hit_rate = totals['hits'] / total_requests if total_requests > 0 else 0
+
+        return {
+            'size': totals['size'],
+            'max_size': self._max_size,
+            'hits': totals['hits'],
+            'misses': totals['misses'],
+            'hit_rate': round(hit_rate, 4),
+            'sets': totals['sets'],
+            'deletes': totals['deletes'],
+            'evictions': totals['evictions'],
+            'expirations': totals['expirations'],
+            'bytes': totals['bytes'],
+            'max_bytes': self._max_bytes,
+            'shards': len(self._shards)
+        }
+
     def _cleanup_expired(self):
-        """清理过期数据"""
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if entry.is_expired
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
-        if expired_keys:
-            logger.debug(f"清理过期缓存: {len(expired_keys)} 条")
-    
-    def _evict_lru(self):
-        """LRU 淘汰策略：删除最旧的条目"""
-        if not self._cache:
-            return
-        
-        # 找到最旧的条目
-        oldest_key = min(
-            self._cache.keys(),
-            key=lambda k: self._cache[k].created_at
-        )
-        
-        del self._cache[oldest_key]
-        logger.debug(f"LRU淘汰: {oldest_key}")
+        """清理所有分段中已过期的数据"""
+        now = time.monotonic()
+        for shard in self._shards:
+            with shard.lock:
+                shard.purge_expired(now)
 
 
 # 全局内存缓存实例
-memory_cache = MemoryCache(max_size=2000)
+memory_cache = MemoryCache(max_size=2000, num_shards=8)
@@ -15,7 +15,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import logging
-import threading
+
+from .tiered_cache import get_tiered_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +30,8 @@ class FundDataCache:
     2. 数据库缓存：持久化，长期有效（1天）
     """
     
-    # 内存缓存（类级别共享）
-    _memory_cache = {}
-    _cache_lock = threading.RLock()
+    # 内存缓存（多级缓存的 fund_data 命名空间，所有实例共享）
+    _memory_cache = get_tiered_cache().namespace('fund_data')
     
     # 缓存有效期配置（分钟）
     CACHE_TTL = {
@@ -86,51 +86,18 @@ class FundDataCache:
     
     def _get_from_memory(self, fund_code: str, data_type: str) -> Optional[Any]:
         """从内存缓存获取数据"""
-        with self._cache_lock:
-            key = self._get_memory_key(fund_code, data_type)
-            cached = self._memory_cache.get(key)
-            
-            if cached is None:
-                return None
-            
-            data, timestamp, ttl = cached
-            age_minutes = (datetime.now() - timestamp).total_seconds() / 60
-            
-            if age_minutes > ttl:
-                # 缓存过期
-                del self._memory_cache[key]
-                return None
-            
+        data = self._memory_cache.get(self._get_memory_key(fund_code, data_type))
+        if data is not None:
             logger.debug(f"内存缓存命中: {fund_code} {data_type}")
-            return data
+        return data
     
     def _save_to_memory(self, fund_code: str, data_type: str, data: Any, ttl_minutes: int = None):
-        """保存数据到内存缓存"""
+        """保存数据到内存缓存（过期和容量淘汰由多级缓存负责）"""
         if ttl_minutes is None:
             ttl_minutes = self.CACHE_TTL.get(data_type, 15)
         
-        with self._cache_lock:
-            key = self._get_memory_key(fund_code, data_type)
-            self._memory_cache[key] = (data, datetime.now(), ttl_minutes)
-            
-            # 清理过期缓存（如果缓存过大）
-            if len(self._memory_cache) > 1000:
-                self._cleanup_memory_cache()
-    
-    def _cleanup_memory_cache(self):
-        """清理过期内存缓存"""
-        now = datetime.now()
-        expired_keys = []
-        
-        for key, (data, timestamp, ttl) in self._memory_cache.items():
-            age_minutes = (now - timestamp).total_seconds() / 60
-            if age_minutes > ttl:
-                expired_keys.append(key)
-        
-        for key in expired_keys[:100]:  # 每次最多清理100条
-            del self._memory_cache[key]
-        
-        logger.debug(f"清理 {len(expired_keys)} 条过期内存缓存")
+        key = self._get_memory_key(fund_code, data_type)
+        self._memory_cache.set(key, data, ttl=ttl_minutes * 60)
     
     def _get_from_db(self, fund_code: str, data_type: str) -> Optional[Any]:
         """从数据库缓存获取数据"""
@@ -289,38 +256,28 @@ class FundDataCache:
             fund_code: 基金代码，如果为None则清除所有
             data_type: 数据类型，如果为None则清除该基金所有类型
         """
-        with self._cache_lock:
-            if fund_code is None:
-                # 清除所有缓存
-                self._memory_cache.clear()
-                logger.info("所有内存缓存已清除")
-            else:
-                # 清除指定基金或类型的缓存
-                keys_to_remove = []
-                for key in self._memory_cache.keys():
-                    if key.startswith(f"{fund_code}:"):
-                        if data_type is None or f":{data_type}:" in key:
-                            keys_to_remove.append(key)
-                
-                for key in keys_to_remove:
-                    del self._memory_cache[key]
-                
-                logger.debug(f"清除 {len(keys_to_remove)} 条缓存: {fund_code} {data_type or 'all'}")
+        if fund_code is None:
+            # 清除所有缓存
+            self._memory_cache.clear()
+            logger.info("所有内存缓存已清除")
+        else:
+            # 清除指定基金或类型的缓存
+            count = self._memory_cache.invalidate(f"{fund_code}:{data_type or '*'}:*")
+            logger.debug(f"清除 {count} 条缓存: {fund_code} {data_type or 'all'}")
     
     def get_cache_stats(self) -> Dict:
         """获取缓存统计信息"""
-        with self._cache_lock:
-            total_keys = len(self._memory_cache)
-            
-            # 按类型统计
-            type_stats = {}
-            for key in self._memory_cache.keys():
-                parts = key.split(':')
-                if len(parts) >= 2:
-                    data_type = parts[1]
-                    type_stats[data_type] = type_stats.get(data_type, 0) + 1
-            
-            return {
-                'memory_cache_keys': total_keys,
-                'type_distribution': type_stats
-            }
+        keys = self._memory_cache.keys()
+        
+        # 按类型统计
+        type_stats = {}
+        for key in keys:
+            parts = key.split(':')
+            if len(parts) >= 2:
+                data_type = parts[1]
+                type_stats[data_type] = type_stats.get(data_type, 0) + 1
+        
+        return {
+            'memory_cache_keys': len(keys),
+            'type_distribution': type_stats
+        }
@@ -0,0 +1,656 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多级缓存实现
+L1 进程内存 → L2 Redis（可选）→ L3 MySQL（可选）
+
+- 读穿透：逐级查找，命中后回填上层缓存（沿用下层剩余的过期时间）
+- 写穿透：写入命名空间配置的所有层
+- 按命名空间配置 TTL、条目数和内存字节预算，各命名空间的 L1 独立淘汰，互不挤占
+- 每个命名空间、每一层分别统计命中率，便于横向比较
+- L2/L3 访问失败时记录日志并按未命中处理，不影响主流程
+
+L2/L3 中的键为 "<命名空间>:<键>"，值使用 pickle 序列化。
+"""
+
+import fnmatch
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from .base import CacheBackend
+    from .memory_cache import MemoryCache
+except ImportError:
+    # 支持直接作为脚本运行或测试时使用
+    from services.cache.base import CacheBackend
+    from services.cache.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+# 缓存层名称
+MEMORY_TIER = 'memory'
+REDIS_TIER = 'redis'
+MYSQL_TIER = 'mysql'
+
+_MB = 1024 * 1024
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis 缓存后端（L2）
+
+    客户端由外部注入，便于使用 fakeredis 测试；客户端不能开启 decode_responses。
+    """
+
+    def __init__(self, client, key_prefix: str = 'fund_search:cache:'):
+        self._client = client
+        self._prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisCache':
+        """根据连接URL创建，如 redis://localhost:6379/0"""
+        if redis is None:
+            raise ImportError("redis package is required. Install with: pip install redis")
+        client = redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+        return cls(client, **kwargs)
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    def ping(self) -> bool:
+        """检查连接是否可用"""
+        return bool(self._client.ping())
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值"""
+        raw = self._client.get(self._key(key))
+        return None if raw is None else pickle.loads(raw)
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[int]]:
+        """获取缓存值及剩余过期时间（秒），不过期时为None"""
+        pipe = self._client.pipeline()
+        pipe.get(self._key(key))
+        pipe.pttl(self._key(key))
+        raw, pttl = pipe.execute()
+        if raw is None:
+            return None, None
+        return pickle.loads(raw), (max(1, pttl // 1000) if pttl and pttl > 0 else None)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """设置缓存值"""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return bool(self._client.set(self._key(key), payload, ex=ttl))
+
+    def delete(self, key: str) -> bool:
+        """删除缓存"""
+        return bool(self._client.delete(self._key(key)))
+
+    def exists(self, key: str) -> bool:
+        """检查键是否存在"""
+        return bool(self._client.exists(self._key(key)))
+
+    def delete_matching(self, pattern: str) -> int:
+        """按通配符模式删除（模式不含键前缀）"""
+        count = 0
+        batch = []
+        for redis_key in self._client.scan_iter(match=self._key(pattern), count=500):
+            batch.append(redis_key)
+            if len(batch) >= 500:
+                count += self._client.delete(*batch)
+                batch = []
+        if batch:
+            count += self._client.delete(*batch)
+        return count
+
+    def clear(self) -> bool:
+        """清空本前缀下的所有缓存"""
+        self.delete_matching('*')
+        return True
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息"""
+        size = sum(1 for _ in self._client.scan_iter(match=self._key('*'), count=500))
+        return {'size': size, 'key_prefix': self._prefix}
+
+
+class MySQLCache(CacheBackend):
+    """
+    MySQL 缓存后端（L3）
+
+    使用 cache_entries 表保存序列化后的值，过期条目在读取时忽略，并定期批量清理。
+    db_manager 需提供 execute_sql(sql, params) 和 execute_query(sql, params)。
+    """
+
+    TABLE_NAME = 'cache_entries'
+    MAX_KEY_LENGTH = 255
+
+    def __init__(self, db_manager, cleanup_interval: int = 500):
+        """
+        初始化MySQL缓存
+
+        Args:
+            db_manager: 数据库管理器
+            cleanup_interval: 每写入多少次清理一次过期条目
+        """
+        self.db = db_manager
+        self._cleanup_interval = cleanup_interval
+        self._writes = 0
+        self._init_table()
+
+    def _init_table(self):
+        """初始化缓存表"""
+        try:
+            sql = f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} (
+                cache_key VARCHAR({self.MAX_KEY_LENGTH}) NOT NULL,
+                cache_value LONGBLOB NOT NULL,
+                expires_at DATETIME NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (cache_key),
+                INDEX idx_expires_at (expires_at)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """
+            self.db.execute_sql(sql)
+        except Exception as e:
+            logger.warning(f"初始化缓存表失败: {e}")
+
+    def _key(self, key: str) -> str:
+        """超长的键保留前缀并以摘要结尾，保证前缀匹配仍然可用"""
+        if len(key) <= self.MAX_KEY_LENGTH:
+            return key
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return key[:self.MAX_KEY_LENGTH - len(digest) - 1] + '#' + digest
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值"""
+        return self.get_with_ttl(key)[0]
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[int]]:
+        """获取缓存值及剩余过期时间（秒），不过期时为None"""
+        now = datetime.now()
+        df = self.db.execute_query(f"""
+            SELECT cache_value, expires_at FROM {self.TABLE_NAME}
+            WHERE cache_key = :cache_key AND (expires_at IS NULL OR expires_at > :now)
+        """, {'cache_key': self._key(key), 'now': now})
+        if df is None or df.empty:
+            return None, None
+
+        row = df.iloc[0]
+        expires_at = row['expires_at']
+        ttl = None
+        if pd.notna(expires_at):
+            ttl = max(1, int((expires_at - now).total_seconds()))
+        return pickle.loads(row['cache_value']), ttl
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """设置缓存值"""
+        expires_at = datetime.now() + timedelta(seconds=ttl) if ttl is not None else None
+        ok = self.db.execute_sql(f"""
+            INSERT INTO {self.TABLE_NAME} (cache_key, cache_value, expires_at)
+            VALUES (:cache_key, :cache_value, :expires_at)
+            ON DUPLICATE KEY UPDATE
+                cache_value = VALUES(cache_value),
+                expires_at = VALUES(expires_at)
+        """, {
+            'cache_key': self._key(key),
+            'cache_value': pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            'expires_at': expires_at
+        })
+
+        self._writes += 1
+        if self._writes % self._cleanup_interval == 0:
+            self.cleanup_expired()
+        return bool(ok)
+
+    def delete(self, key: str) -> bool:
+        """删除缓存"""
+        return bool(self.db.execute_sql(
+            f"DELETE FROM {self.TABLE_NAME} WHERE cache_key = :cache_key",
+            {'cache_key': self._key(key)}
+        ))
+
+    def exists(self, key: str) -> bool:
+        """检查键是否存在"""
+        return self.get_with_ttl(key)[0] is not None
+
+    def delete_matching(self, pattern: str) -> bool:
+        """按通配符模式删除（* 匹配任意字符）"""
+        like = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('*', '%')
+        return bool(self.db.execute_sql(
+            f"DELETE FROM {self.TABLE_NAME} WHERE cache_key LIKE :pattern",
+            {'pattern': like}
+        ))
+
+    def cleanup_expired(self) -> bool:
+        """删除已过期的条目"""
+        return bool(self.db.execute_sql(
+            f"DELETE FROM {self.TABLE_NAME} WHERE expires_at IS NOT NULL AND expires_at <= :now",
+            {'now': datetime.now()}
+        ))
+
+    def clear(self) -> bool:
+        """清空缓存表"""
+        return bool(self.db.execute_sql(f"DELETE FROM {self.TABLE_NAME}"))
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息"""
+        df = self.db.execute_query(f"SELECT COUNT(*) AS size FROM {self.TABLE_NAME}")
+        size = int(df.iloc[0]['size']) if df is not None and not df.empty else 0
+        return {'size': size, 'table': self.TABLE_NAME}
+
+
+@dataclass
+class CacheNamespace:
+    """
+    缓存命名空间配置
+
+    Attributes:
+        name: 命名空间名称
+        ttl: 默认过期时间（秒），None 表示不过期
+        max_entries: L1 最大条目数
+        max_bytes: L1 内存字节预算（估算值），None 表示不限制
+        tiers: 使用的缓存层，按查找顺序排列
+    """
+    name: str
+    ttl: Optional[int] = 900
+    max_entries: int = 1000
+    max_bytes: Optional[int] = None
+    tiers: Tuple[str, ...] = (MEMORY_TIER, REDIS_TIER)
+
+
+# 默认命名空间
+DEFAULT_NAMESPACES = (
+    CacheNamespace('default', ttl=60, max_entries=2000, max_bytes=64 * _MB),
+    CacheNamespace('fund', ttl=3600, max_entries=2000, max_bytes=128 * _MB,
+                   tiers=(MEMORY_TIER, REDIS_TIER, MYSQL_TIER)),
+    CacheNamespace('nav', ttl=900, max_entries=2000, max_bytes=256 * _MB),
+    CacheNamespace('fund_data', ttl=900, max_entries=1000, max_bytes=32 * _MB),
+    CacheNamespace('preload', ttl=3600, max_entries=50000, max_bytes=512 * _MB),
+)
+
+
+@dataclass
+class _NamespaceState:
+    """命名空间运行状态：配置、L1 缓存和各层命中统计"""
+    config: CacheNamespace
+    memory: MemoryCache
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # 层名称 -> [命中数, 未命中数]
+    counters: Dict[str, list] = field(default_factory=dict)
+
+    def record(self, tier: str, hit: bool):
+        with self.lock:
+            counter = self.counters.setdefault(tier, [0, 0])
+            counter[0 if hit else 1] += 1
+
+
+class TieredCache(CacheBackend):
+    """
+    多级缓存
+
+    所有操作都可以指定命名空间，未指定时使用默认命名空间；
+    未预先配置的命名空间在首次使用时按默认命名空间的配置创建。
+    """
+
+    def __init__(
+        self,
+        namespaces=DEFAULT_NAMESPACES,
+        redis_backend: Optional[CacheBackend] = None,
+        mysql_backend: Optional[CacheBackend] = None,
+        default_namespace: str = 'default'
+    ):
+        """
+        初始化多级缓存
+
+        Args:
+            namespaces: 命名空间配置列表
+            redis_backend: L2 后端，None 表示不启用
+            mysql_backend: L3 后端，None 表示不启用
+            default_namespace: 默认命名空间
+        """
+        self._lock = threading.RLock()
+        self._backends: Dict[str, CacheBackend] = {}
+        self._namespaces: Dict[str, _NamespaceState] = {}
+        self._default_namespace = default_namespace
+
+        for config in namespaces:
+            self._namespaces[config.name] = self._create_state(config)
+        if default_namespace not in self._namespaces:
+            self._namespaces[default_namespace] = self._create_state(CacheNamespace(default_namespace))
+
+        if redis_backend is not None:
+            self.attach_backend(REDIS_TIER, redis_backend)
+        if mysql_backend is not None:
+            self.attach_backend(MYSQL_TIER, mysql_backend)
+
+    @staticmethod
+    def _create_state(config: CacheNamespace) -> _NamespaceState:
+        memory = MemoryCache(max_size=config.max_entries, max_bytes=config.max_bytes,
+                             num_shards=8 if config.max_entries >= 1000 else 1)
+        return _NamespaceState(config=config, memory=memory)
+
+    # ==================== 配置 ====================
+
+    def attach_backend(self, tier: str, backend: CacheBackend):
+        """启用 L2（redis）或 L3（mysql）缓存层"""
+        if tier not in (REDIS_TIER, MYSQL_TIER):
+            raise ValueError(f"未知的缓存层: {tier}")
+        with self._lock:
+            self._backends[tier] = backend
+        logger.info(f"多级缓存启用 {tier} 层: {type(backend).__name__}")
+
+    def has_backend(self, tier: str) -> bool:
+        """缓存层是否已启用"""
+        return tier in self._backends
+
+    def configure_namespace(self, name: str, **overrides) -> CacheNamespace:
+        """
+        配置命名空间，L1 容量变化时重建该命名空间的 L1 缓存
+
+        Args:
+            name: 命名空间名称
+            **overrides: CacheNamespace 的字段（ttl, max_entries, max_bytes, tiers）
+        """
+        with self._lock:
+            state = self._namespaces.get(name)
+            base = state.config if state else replace(self._namespaces[self._default_namespace].config, name=name)
+            config = replace(base, **overrides)
+
+            if state is None or (config.max_entries, config.max_bytes) != (base.max_entries, base.max_bytes):
+                self._namespaces[name] = self._create_state(config)
+            else:
+                state.config = config
+            return config
+
+    def namespace(self, name: str) -> 'NamespaceCache':
+        """获取绑定到某个命名空间的缓存视图"""
+        self._state(name)
+        return NamespaceCache(self, name)
+
+    def _state(self, namespace: Optional[str]) -> _NamespaceState:
+        name = namespace or self._default_namespace
+        state = self._namespaces.get(name)
+        if state is None:
+            with self._lock:
+                state = self._namespaces.get(name)
+                if state is None:
+                    config = replace(self._namespaces[self._default_namespace].config, name=name)
+                    state = self._namespaces[name] = self._create_state(config)
+        return state
+
+    def _remote_tiers(self, state: _NamespaceState):
+        """命名空间启用的 L2/L3 层，按查找顺序"""
+        return [(tier, self._backends[tier]) for tier in state.config.tiers
+                if tier != MEMORY_TIER and tier in self._backends]
+
+    # ==================== CacheBackend 接口 ====================
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        """逐级读取缓存，命中下层时回填上层"""
+        state = self._state(namespace)
+        value = state.memory.get(key)
+        if value is not None:
+            state.record(MEMORY_TIER, True)
+            return value
+        state.record(MEMORY_TIER, False)
+
+        full_key = f"{state.config.name}:{key}"
+        missed = []
+        for tier, backend in self._remote_tiers(state):
+            try:
+                value, ttl = backend.get_with_ttl(full_key)
+            except Exception as e:
+                logger.warning(f"[多级缓存] {tier} 读取失败 {full_key}: {e}")
+                value, ttl = None, None
+
+            if value is None:
+                state.record(tier, False)
+                missed.append((tier, backend))
+                continue
+
+            state.record(tier, True)
+            state.memory.set(key, value, ttl=ttl)
+            for upper_tier, upper in missed:
+                self._safe_set(upper_tier, upper, full_key, value, ttl)
+            return value
+
+        return None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        namespace: Optional[str] = None
+    ) -> bool:
+        """写入命名空间配置的所有缓存层"""
+        state = self._state(namespace)
+        if ttl is None:
+            ttl = state.config.ttl
+
+        ok = state.memory.set(key, value, ttl=ttl)
+        full_key = f"{state.config.name}:{key}"
+        for tier, backend in self._remote_tiers(state):
+            self._safe_set(tier, backend, full_key, value, ttl)
+        return ok
+
+    @staticmethod
+    def _safe_set(tier: str, backend: CacheBackend, key: str, value: Any, ttl: Optional[int]):
+        try:
+            backend.set(key, value, ttl=ttl)
+        except Exception as e:
+            logger.warning(f"[多级缓存] {tier} 写入失败 {key}: {e}")
+
+    def delete(self, key: str, namespace: Optional[str] = None) -> bool:
+        """从所有缓存层删除"""
+        state = self._state(namespace)
+        deleted = state.memory.delete(key)
+        full_key = f"{state.config.name}:{key}"
+        for tier, backend in self._remote_tiers(state):
+            try:
+                deleted = backend.delete(full_key) or deleted
+            except Exception as e:
+                logger.warning(f"[多级缓存] {tier} 删除失败 {full_key}: {e}")
+        return deleted
+
+    def exists(self, key: str, namespace: Optional[str] = None) -> bool:
+        """检查键是否存在于任一缓存层"""
+        state = self._state(namespace)
+        if state.memory.exists(key):
+            return True
+        full_key = f"{state.config.name}:{key}"
+        for tier, backend in self._remote_tiers(state):
+            try:
+                if backend.exists(full_key):
+                    return True
+            except Exception as e:
+                logger.warning(f"[多级缓存] {tier} 查询失败 {full_key}: {e}")
+        return False
+
+    def clear(self, namespace: Optional[str] = None) -> bool:
+        """清空指定命名空间；未指定时清空所有命名空间"""
+        if namespace is not None:
+            self.invalidate('*', namespace=namespace)
+            return True
+
+        for state in list(self._namespaces.values()):
+            state.memory.clear()
+        for tier, backend in list(self._backends.items()):
+            try:
+                backend.clear()
+            except Exception as e:
+                logger.warning(f"[多级缓存] {tier} 清空失败: {e}")
+        return True
+
+    # ==================== 扩展操作 ====================
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        namespace: Optional[str] = None
+    ) -> Optional[Any]:
+        """读取缓存，全部未命中时调用 loader 并写入各层（loader 返回 None 时不缓存）"""
+        value = self.get(key, namespace=namespace)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl=ttl, namespace=namespace)
+        return value
+
+    def invalidate(self, pattern: str = '*', namespace: Optional[str] = None) -> int:
+        """
+        按通配符模式使缓存失效（* 匹配任意字符）
+
+        Returns:
+            int: L1 中删除的条目数
+        """
+        state = self._state(namespace)
+        keys = [key for key in state.memory.keys() if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            state.memory.delete(key)
+
+        full_pattern = f"{state.config.name}:{pattern}"
+        for tier, backend in self._remote_tiers(state):
+            try:
+                backend.delete_matching(full_pattern)
+            except Exception as e:
+                logger.warning(f"[多级缓存] {tier} 失效失败 {full_pattern}: {e}")
+        return len(keys)
+
+    def keys(self, namespace: Optional[str] = None) -> list:
+        """命名空间 L1 中未过期的键"""
+        return self._state(namespace).memory.keys()
+
+    def get_namespace_stats(self, namespace: Optional[str] = None) -> dict:
+        """单个命名空间的统计：L1 缓存状态 + 各层命中率"""
+        state = self._state(namespace)
+        stats = state.memory.get_stats()
+        with state.lock:
+            counters = {tier: tuple(counter) for tier, counter in state.counters.items()}
+
+        layers = {}
+        for tier in state.config.tiers:
+            if tier != MEMORY_TIER and tier not in self._backends:
+                continue
+            hits, misses = counters.get(tier, (0, 0))
+            total = hits + misses
+            layers[tier] = {'hits': hits, 'misses': misses,
+                            'hit_rate': round(hits / total, 4) if total else 0}
+
+        requests_total = sum(counters.get(MEMORY_TIER, (0, 0)))
+        hits_total = sum(layer['hits'] for layer in layers.values())
+        stats.update({
+            'namespace': state.config.name,
+            'ttl': state.config.ttl,
+            'layers': layers,
+            'overall_hit_rate': round(hits_total / requests_total, 4) if requests_total else 0
+        })
+        return stats
+
+    def get_stats(self) -> dict:
+        """获取所有命名空间和各层的统计信息"""
+        namespaces = {name: self.get_namespace_stats(name) for name in list(self._namespaces)}
+
+        layers = {}
+        for ns_stats in namespaces.values():
+            for tier, layer in ns_stats['layers'].items():
+                total = layers.setdefault(tier, {'hits': 0, 'misses': 0})
+                total['hits'] += layer['hits']
+                total['misses'] += layer['misses']
+        for layer in layers.values():
+            requests_total = layer['hits'] + layer['misses']
+            layer['hit_rate'] = round(layer['hits'] / requests_total, 4) if requests_total else 0
+
+        return {
+            'namespaces': namespaces,
+            'layers': layers,
+            'backends': sorted(self._backends),
+            'memory_bytes': sum(ns['bytes'] for ns in namespaces.values())
+        }
+
+
+class NamespaceCache(CacheBackend):
+    """绑定到单个命名空间的多级缓存视图"""
+
+    def __init__(self, cache: TieredCache, name: str):
+        self._cache = cache
+        self.name = name
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值"""
+        return self._cache.get(key, namespace=self.name)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """设置缓存值，ttl为None时使用命名空间默认TTL"""
+        return self._cache.set(key, value, ttl=ttl, namespace=self.name)
+
+    def delete(self, key: str) -> bool:
+        """删除缓存"""
+        return self._cache.delete(key, namespace=self.name)
+
+    def exists(self, key: str) -> bool:
+        """检查键是否存在"""
+        return self._cache.exists(key, namespace=self.name)
+
+    def clear(self) -> bool:
+        """清空命名空间"""
+        return self._cache.clear(namespace=self.name)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: Optional[int] = None) -> Optional[Any]:
+        """读取缓存，未命中时加载并写入"""
+        return self._cache.get_or_load(key, loader, ttl=ttl, namespace=self.name)
+
+    def invalidate(self, pattern: str = '*') -> int:
+        """按通配符模式使缓存失效"""
+        return self._cache.invalidate(pattern, namespace=self.name)
+
+    def keys(self) -> list:
+        """L1 中未过期的键"""
+        return self._cache.keys(namespace=self.name)
+
+    def get_stats(self) -> dict:
+        """获取命名空间统计信息"""
+        return self._cache.get_namespace_stats(self.name)
+
+
+# 全局多级缓存
+_tiered_cache: Optional[TieredCache] = None
+_tiered_cache_lock = threading.Lock()
+
+
+def get_tiered_cache() -> TieredCache:
+    """
+    获取全局多级缓存
+
+    设置环境变量 CACHE_REDIS_URL 时启用 Redis 层（连接失败则只使用内存）；
+    MySQL 层由持有数据库连接的组件通过 attach_backend 启用。
+    """
+    global _tiered_cache
+    with _tiered_cache_lock:
+        if _tiered_cache is None:
+            cache = TieredCache()
+            redis_url = os.environ.get('CACHE_REDIS_URL')
+            if redis_url:
+                try:
+                    backend = RedisCache.from_url(redis_url)
+                    backend.ping()
+                    cache.attach_backend(REDIS_TIER, backend)
+                except Exception as e:
+                    logger.warning(f"Redis缓存不可用，仅使用内存缓存: {e}")
+            _tiered_cache = cache
+        return _tiered_cache
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+图表渲染服务
+Chart Render Service
+
+matplotlib 图表在独立的渲染进程池中生成，不再占用 Web 请求线程：
+- 渲染进程启动时完成中文字体查找并导入各渲染函数所在模块，之后每次渲染只做绘图和编码
+- 以（渲染器, 图表数据, 格式, DPI）的内容哈希为键，PNG/SVG 文件缓存在磁盘上，相同图表只渲染一次
+- submit 立即返回图表键和 URL，渲染在后台完成；render / render_base64 同步等待结果
+- 相同键的并发请求共享同一个渲染任务
+
+渲染函数以 "模块:函数" 的形式登记在 CHART_RENDERERS 中，接收图表数据字典，
+返回 matplotlib.figure.Figure（不使用 pyplot，便于在线程中渲染）。
+
+目录结构：
+    <root>/<键前两位>/<键>.<格式>
+"""
+
+import atexit
+import base64
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 渲染输出变化时递增，使旧的缓存文件失效
+RENDER_VERSION = 1
+
+SUPPORTED_FORMATS = ('png', 'svg')
+CHART_URL_PREFIX = '/api/charts'
+
+DEFAULT_WORKERS = 2
+DEFAULT_DISK_ENTRIES = 5000
+DEFAULT_TIMEOUT = 60
+
+# 渲染器名称 -> (渲染函数 "模块:函数", matplotlib 样式)
+CHART_RENDERERS: Dict[str, Tuple[str, Optional[str]]] = {
+    'correlation': ('backtesting.analysis.enhanced_correlation:draw_correlation_chart', 'seaborn-v0_8-whitegrid'),
+    'backtest': ('backtesting.core.backtest_engine:draw_backtest_chart', None),
+}
+
+# 渲染进程内已导入的渲染函数
+_resolved: Dict[str, Callable] = {}
+
+
+def register_renderer(name: str, target: str, style: Optional[str] = None) -> None:
+    """
+    登记渲染器
+
+    需在渲染服务创建之前调用，渲染进程启动时会继承当前的登记表。
+
+    Args:
+        name: 渲染器名称
+        target: 渲染函数，格式为 "模块:函数"
+        style: 渲染时使用的 matplotlib 样式
+    """
+    CHART_RENDERERS[name] = (target, style)
+
+
+def _resolve(target: str) -> Callable:
+    func = _resolved.get(target)
+    if func is None:
+        module_name, func_name = target.split(':')
+        func = getattr(importlib.import_module(module_name), func_name)
+        _resolved[target] = func
+    return func
+
+
+def _init_worker(renderers: Dict[str, Tuple[str, Optional[str]]]) -> None:
+    """渲染进程初始化：字体查找和渲染函数导入只在进程启动时做一次"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from shared.chart_fonts import chinese_font_rc
+
+    CHART_RENDERERS.update(renderers)
+    chinese_font_rc()
+    for target, _ in renderers.values():
+        try:
+            _resolve(target)
+        except Exception as e:
+            logger.warning(f"预加载渲染函数失败 {target}: {e}")
+
+
+def _render_to_file(target: str, style: Optional[str], payload: Dict[str, Any], fmt: str, dpi: int,
+                    path: str) -> str:
+    """在渲染进程（或线程）中绘制图表并原子写入 path"""
+    import matplotlib
+    import matplotlib.style
+    from shared.chart_fonts import chinese_font_rc
+
+    with matplotlib.rc_context():
+        if style:
+            matplotlib.style.use(style)
+        matplotlib.rcParams.update(chinese_font_rc())
+        fig = _resolve(target)(payload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                fig.savefig(f, format=fmt, dpi=dpi, bbox_inches='tight',
+                            facecolor=fig.get_facecolor(), edgecolor='none')
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return path
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    return str(value)
+
+
+def make_chart_key(renderer: str, payload: Dict[str, Any], fmt: str = 'png', dpi: int = 100) -> str:
+    """图表的缓存键：渲染器、图表数据、输出格式和 DPI 的内容哈希"""
+    encoded = json.dumps({
+        'renderer': renderer,
+        'target': CHART_RENDERERS.get(renderer),
+        'payload': payload,
+        'format': fmt,
+        'dpi': dpi,
+        'version': RENDER_VERSION,
+    }, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ChartRenderService:
+    """
+    图表渲染服务
+
+    渲染结果只写磁盘；进程内只记录进行中和失败的任务。
+    渲染进程池异常退出时自动重建，重建失败则改为线程渲染。
+    """
+
+    def __init__(self, root_dir: str, max_workers: int = DEFAULT_WORKERS, use_processes: bool = True,
+                 max_disk_entries: int = DEFAULT_DISK_ENTRIES):
+        """
+        初始化渲染服务
+
+        Args:
+            root_dir: 图表缓存目录
+            max_workers: 渲染进程（线程）数
+            use_processes: False 时在线程池中渲染（测试或无法创建子进程的环境）
+            max_disk_entries: 缓存文件数上限，超出时删除最久未写入的文件
+        """
+        self.root_dir = root_dir
+        self.max_workers = max(1, max_workers)
+        self.use_processes = use_processes
+        self.max_disk_entries = max_disk_entries
+        self._executor = None
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._errors: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats = {'hits': 0, 'renders': 0, 'joined': 0, 'failures': 0}
+
+    # ------------------------------------------------------------------
+    # 执行器
+    # ------------------------------------------------------------------
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.use_processes:
+                try:
+                    # spawn：Web 进程中有多个线程，fork 后的子进程可能继承被占用的锁
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker, initargs=(dict(CHART_RENDERERS),))
+                    logger.info(f"图表渲染进程池已启动: {self.max_workers} 个进程")
+                except (OSError, ValueError, NotImplementedError) as e:
+                    logger.warning(f"无法创建图表渲染进程池，改为线程渲染: {e}")
+                    self.use_processes = False
+            if not self.use_processes:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='chart-render')
+        return self._executor
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    # ------------------------------------------------------------------
+    # 提交与查询
+    # ------------------------------------------------------------------
+
+    def path(self, key: str, fmt: str = 'png') -> str:
+        return os.path.join(self.root_dir, key[:2], f'{key}.{fmt}')
+
+    @staticmethod
+    def url(key: str, fmt: str = 'png') -> str:
+        return f'{CHART_URL_PREFIX}/{key}.{fmt}'
+
+    def submit(self, renderer: str, payload: Dict[str, Any], fmt: str = 'png', dpi: int = 100) -> Dict[str, Any]:
+        """
+        提交渲染任务，立即返回
+
+        Returns:
+            dict: {'key', 'format', 'url', 'status'}，status 为 'ready' 或 'pending'
+        """
+        self._check(renderer, fmt)
+        key = make_chart_key(renderer, payload, fmt, dpi)
+        self._ensure(key, renderer, payload, fmt, dpi)
+        return {'key': key, 'format': fmt, 'url': self.url(key, fmt), 'status': self.status(key, fmt)}
+
+    def render(self, renderer: str, payload: Dict[str, Any], fmt: str = 'png', dpi: int = 100,
+               timeout: Optional[float] = DEFAULT_TIMEOUT) -> bytes:
+        """同步渲染并返回图片字节（命中缓存时直接读取文件）"""
+        self._check(renderer, fmt)
+        key = make_chart_key(renderer, payload, fmt, dpi)
+        future = self._ensure(key, renderer, payload, fmt, dpi)
+        if future is not None:
+            future.result(timeout=timeout)
+        with open(self.path(key, fmt), 'rb') as f:
+            return f.read()
+
+    def render_base64(self, renderer: str, payload: Dict[str, Any], fmt: str = 'png', dpi: int = 100,
+                      timeout: Optional[float] = DEFAULT_TIMEOUT) -> str:
+        return base64.b64encode(self.render(renderer, payload, fmt, dpi, timeout)).decode('utf-8')
+
+    def status(self, key: str, fmt: str = 'png') -> str:
+        """图表状态：'ready' / 'pending' / 'failed' / 'missing'"""
+        with self._lock:
+            if (key, fmt) in self._pending:
+                return 'pending'
+            if (key, fmt) in self._errors:
+                return 'failed'
+        return 'ready' if os.path.exists(self.path(key, fmt)) else 'missing'
+
+    def error(self, key: str, fmt: str = 'png') -> Optional[str]:
+        with self._lock:
+            return self._errors.get((key, fmt))
+
+    def wait(self, key: str, fmt: str = 'png', timeout: Optional[float] = DEFAULT_TIMEOUT) -> str:
+        """等待进行中的渲染完成，返回最终状态"""
+        with self._lock:
+            future = self._pending.get((key, fmt))
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        return self.status(key, fmt)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'pending': len(self._pending)}
+
+    @staticmethod
+    def _check(renderer: str, fmt: str) -> None:
+        if renderer not in CHART_RENDERERS:
+            raise ValueError(f"未登记的图表渲染器: {renderer}")
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"不支持的图片格式: {fmt}")
+
+    def _ensure(self, key: str, renderer: str, payload: Dict[str, Any], fmt: str, dpi: int) -> Optional[Future]:
+        """返回进行中的渲染任务；已有缓存文件时返回 None"""
+        path = self.path(key, fmt)
+        with self._lock:
+            future = self._pending.get((key, fmt))
+            if future is not None:
+                self._stats['joined'] += 1
+                return future
+            if os.path.exists(path):
+                self._stats['hits'] += 1
+                return None
+            self._errors.pop((key, fmt), None)
+            target, style = CHART_RENDERERS[renderer]
+            future = self._submit_job(target, style, payload, fmt, dpi, path)
+            self._pending[(key, fmt)] = future
+            self._stats['renders'] += 1
+        future.add_done_callback(lambda f: self._finish(key, fmt, f))
+        return future
+
+    def _submit_job(self, target, style, payload, fmt, dpi, path) -> Future:
+        try:
+            return self._get_executor().submit(_render_to_file, target, style, payload, fmt, dpi, path)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"图表渲染进程池不可用，重新创建: {e}")
+            self._executor = None
+            return self._get_executor().submit(_render_to_file, target, style, payload, fmt, dpi, path)
+
+    def _finish(self, key: str, fmt: str, future: Future) -> None:
+        error = future.exception()
+        with self._lock:
+            self._pending.pop((key, fmt), None)
+            if error is not None:
+                self._errors[(key, fmt)] = str(error)
+                self._stats['failures'] += 1
+                if isinstance(error, BrokenProcessPool):
+                    self._executor = None
+            else:
+                self._writes_since_prune += 1
+                should_prune = self._writes_since_prune >= max(1, self.max_disk_entries // 10)
+                if should_prune:
+                    self._writes_since_prune = 0
+        if error is not None:
+            logger.error(f"图表渲染失败 {key}.{fmt}: {error}")
+        elif should_prune:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """缓存文件超出上限时按修改时间删除最旧的文件"""
+        entries = []
+        for shard in os.listdir(self.root_dir):
+            shard_dir = os.path.join(self.root_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if name.rsplit('.', 1)[-1] in SUPPORTED_FORMATS:
+                    path = os.path.join(shard_dir, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+        excess = len(entries) - self.max_disk_entries
+        if excess <= 0:
+            return
+        for _, path in sorted(entries)[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# 全局图表渲染服务
+_render_service: Optional[ChartRenderService] = None
+_render_service_lock = threading.Lock()
+
+
+def get_chart_render_service() -> ChartRenderService:
+    """
+    获取全局图表渲染服务
+
+    缓存目录可通过环境变量 CHART_CACHE_DIR 指定，渲染进程数通过 CHART_RENDER_WORKERS 指定，
+    CHART_RENDER_WORKERS=0 表示在线程中渲染。
+    """
+    global _render_service
+    with _render_service_lock:
+        if _render_service is None:
+            default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'charts')
+            root_dir = os.environ.get('CHART_CACHE_DIR', default_dir)
+            workers = int(os.environ.get('CHART_RENDER_WORKERS', DEFAULT_WORKERS))
+            _render_service = ChartRenderService(root_dir, max_workers=workers or 1, use_processes=workers > 0)
+            atexit.register(_render_service.shutdown, False)
+        return _render_service
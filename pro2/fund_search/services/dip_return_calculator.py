@@ -3,6 +3,8 @@
 """
 日投收益计算服务
 用于计算定投的累计收益和收益率曲线
+
+交易记录通过 merge_asof 对齐到净值日历后按基金累计求和，多只基金在同一张长表上一次计算。
 """
 
 import logging
@@ -13,6 +15,99 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# 模拟定投的每日金额
+SIMULATED_DAILY_AMOUNT = 100
+
+
+def _date_window(start_date=None, end_date=None) -> tuple:
+    """计算区间：结束日期默认今天，开始日期默认结束日期前一年"""
+    end = pd.Timestamp(end_date) if end_date else pd.Timestamp(datetime.now())
+    start = pd.Timestamp(start_date) if start_date else end - pd.Timedelta(days=365)
+    return start, end
+
+
+def _nav_window(nav_data: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    """区间内的净值（按日期排序，同一日期保留最后一条）"""
+    navs = nav_data[(nav_data['date'] >= start_date) & (nav_data['date'] <= end_date)]
+    navs = navs[['date', 'nav']].copy()
+    navs['date'] = pd.to_datetime(navs['date']).dt.normalize()
+    return navs.drop_duplicates('date', keep='last').sort_values('date').reset_index(drop=True)
+
+
+def _safe_ratio(numerator, denominator) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def simulated_dip_trades(navs: pd.DataFrame, amount: float = SIMULATED_DAILY_AMOUNT) -> pd.DataFrame:
+    """每个净值日买入固定金额的模拟交易（fund_code, trade_date, trade_type, amount, shares）"""
+    return pd.DataFrame({
+        'fund_code': navs['fund_code'].to_numpy(),
+        'trade_date': navs['date'].to_numpy(),
+        'trade_type': 'buy',
+        'amount': float(amount),
+        'shares': amount / navs['nav'].to_numpy(dtype=float),
+    })
+
+
+def accumulate_dip_positions(navs: pd.DataFrame, transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    将买入交易对齐到净值日历并累计份额和成本
+    
+    交易按 merge_asof 归入当日或之后最近的净值日（非交易日的买入计入下一个净值日，
+    区间开始前的买入计入第一个净值日），每个净值日的买入汇总后按基金累计求和。
+    
+    Args:
+        navs: fund_code, date, nav（每只基金每个日期一行）
+        transactions: fund_code, trade_date, trade_type, amount, shares，只计入 trade_type 为 buy 的交易
+        
+    Returns:
+        DataFrame: fund_code, date（datetime.date）, nav, shares, market_value, total_cost, total_return, return_rate，
+        按基金、日期排序
+    """
+    calendar = navs[['fund_code', 'date', 'nav']].copy()
+    # 两侧统一基金代码类型和日期精度（DATE 列读出为秒精度，净值日期为微秒精度，merge_asof 要求一致）
+    calendar['fund_code'] = calendar['fund_code'].astype(str)
+    calendar['date'] = pd.to_datetime(calendar['date']).astype('datetime64[ns]')
+    calendar = calendar.sort_values(['date', 'fund_code'], kind='stable').reset_index(drop=True)
+    
+    daily = pd.DataFrame(columns=['shares', 'amount'])
+    if transactions is not None and not transactions.empty:
+        buys = transactions[transactions['trade_type'] == 'buy']
+        if not buys.empty:
+            buys = pd.DataFrame({
+                'fund_code': buys['fund_code'].astype(str),
+                'trade_date': pd.to_datetime(buys['trade_date']).dt.normalize().astype('datetime64[ns]'),
+                'shares': pd.to_numeric(buys['shares'], errors='coerce').astype(float),
+                'amount': pd.to_numeric(buys['amount'], errors='coerce').astype(float),
+            }).sort_values('trade_date', kind='stable').reset_index(drop=True)
+            aligned = pd.merge_asof(
+                buys, calendar[['fund_code', 'date']],
+                left_on='trade_date', right_on='date', by='fund_code', direction='forward'
+            ).dropna(subset=['date'])
+            daily = aligned.groupby(['fund_code', 'date'])[['shares', 'amount']].sum()
+    
+    key = pd.MultiIndex.from_arrays([calendar['fund_code'], calendar['date']])
+    daily = daily.reindex(key).fillna(0.0)
+    
+    result = calendar.copy()
+    result['shares'] = daily['shares'].to_numpy(dtype=float)
+    result['total_cost'] = daily['amount'].to_numpy(dtype=float)
+    result = result.sort_values(['fund_code', 'date'], kind='stable').reset_index(drop=True)
+    
+    grouped = result.groupby('fund_code', sort=False)
+    result['shares'] = grouped['shares'].cumsum()
+    result['total_cost'] = grouped['total_cost'].cumsum()
+    result['market_value'] = result['shares'] * result['nav']
+    result['total_return'] = result['market_value'] - result['total_cost']
+    result['return_rate'] = _safe_ratio(result['total_return'], result['total_cost'])
+    result['date'] = result['date'].dt.date
+    return result[['fund_code', 'date', 'nav', 'shares', 'market_value', 'total_cost',
+                   'total_return', 'return_rate']]
+
 
 class DipReturnCalculator:
     """日投收益计算器"""
@@ -113,10 +208,7 @@ class DipReturnCalculator:
             - total_return: 累计收益
             - return_rate: 收益率
         """
-        if end_date is None:
-            end_date = datetime.now()
-        if start_date is None:
-            start_date = end_date - timedelta(days=365)
+        start, end = _date_window(start_date, end_date)
         
         nav_data = self.get_fund_nav_from_tushare(fund_code, days=400)
         
@@ -128,25 +220,31 @@ class DipReturnCalculator:
         
         if transactions.empty:
             logger.warning(f"没有 {fund_code} 的交易记录")
-            return self._calculate_simulated_returns(fund_code, nav_data, start_date, end_date)
+            return self._calculate_simulated_returns(fund_code, nav_data, start, end)
         
-        return self._calculate_real_returns(nav_data, transactions, start_date, end_date)
+        return self._calculate_real_returns(nav_data, transactions, start, end)
     
     def _get_transactions_from_db(self, fund_code: str, user_id: str = 'default_user') -> pd.DataFrame:
         """从数据库获取交易记录"""
-        if self.db_manager is None:
+        transactions = self._get_transactions_for_funds([fund_code], user_id)
+        return transactions.drop(columns='fund_code') if not transactions.empty else transactions
+    
+    def _get_transactions_for_funds(self, fund_codes: List[str], user_id: str = 'default_user') -> pd.DataFrame:
+        """一次查询获取多只基金的交易记录"""
+        if self.db_manager is None or not fund_codes:
             return pd.DataFrame()
         
         try:
             sql = """
-                SELECT trade_date, trade_type, amount, nav, shares, total_shares, total_cost, avg_cost
+                SELECT fund_code, trade_date, trade_type, amount, nav, shares, total_shares, total_cost, avg_cost
                 FROM dip_transactions
-                WHERE user_id = %s AND fund_code = %s
+                WHERE user_id = :user_id AND fund_code IN :fund_codes
                 ORDER BY trade_date ASC
             """
-            df = self.db_manager.execute_query(sql, (user_id, fund_code))
+            df = self.db_manager.execute_query(sql, {'user_id': user_id, 'fund_codes': tuple(fund_codes)})
             if df is not None and not df.empty:
                 df['trade_date'] = pd.to_datetime(df['trade_date'])
+                df['fund_code'] = df['fund_code'].astype(str)
             return df if df is not None else pd.DataFrame()
         except Exception as e:
             logger.warning(f"获取交易记录失败: {e}")
@@ -155,46 +253,12 @@ class DipReturnCalculator:
     def _calculate_real_returns(self, nav_data: pd.DataFrame, transactions: pd.DataFrame,
                                  start_date: datetime, end_date: datetime) -> pd.DataFrame:
         """基于真实交易记录计算收益"""
-        
-        nav_data = nav_data[(nav_data['date'] >= start_date) & (nav_data['date'] <= end_date)]
-        
-        if nav_data.empty:
+        navs = _nav_window(nav_data, start_date, end_date)
+        if navs.empty:
             return pd.DataFrame()
         
-        results = []
-        total_shares = 0
-        total_cost = 0
-        
-        nav_dict = dict(zip(nav_data['date'].dt.date, nav_data['nav']))
-        
-        dates = sorted(nav_dict.keys())
-        
-        for date in dates:
-            nav = nav_dict[date]
-            
-            day_transactions = transactions[transactions['trade_date'].dt.date == date]
-            
-            if not day_transactions.empty:
-                for _, trade in day_transactions.iterrows():
-                    if trade['trade_type'] == 'buy':
-                        total_shares += float(trade['shares'])
-                        total_cost += float(trade['amount'])
-            
-            market_value = total_shares * nav
-            total_return = market_value - total_cost
-            return_rate = total_return / total_cost if total_cost > 0 else 0
-            
-            results.append({
-                'date': date,
-                'nav': nav,
-                'shares': total_shares,
-                'market_value': market_value,
-                'total_cost': total_cost,
-                'total_return': total_return,
-                'return_rate': return_rate
-            })
-        
-        return pd.DataFrame(results)
+        result = accumulate_dip_positions(navs.assign(fund_code=''), transactions.assign(fund_code=''))
+        return result.drop(columns='fund_code')
     
     def _calculate_simulated_returns(self, fund_code: str, nav_data: pd.DataFrame,
                                      start_date: datetime, end_date: datetime) -> pd.DataFrame:
@@ -202,41 +266,50 @@ class DipReturnCalculator:
         模拟定投收益（假设每日定投）
         用于没有交易记录的情况
         """
-        
-        nav_data = nav_data[(nav_data['date'] >= start_date) & (nav_data['date'] <= end_date)]
-        
-        if nav_data.empty:
+        navs = _nav_window(nav_data, start_date, end_date)
+        if navs.empty:
             return pd.DataFrame()
         
-        daily_invest = 100
-        
-        results = []
-        total_shares = 0
-        total_cost = 0
+        navs = navs.assign(fund_code=fund_code)
+        result = accumulate_dip_positions(navs, simulated_dip_trades(navs))
+        return result.drop(columns='fund_code')
+    
+    def get_fund_returns_panel(self, fund_codes: List[str], start_date: str = None,
+                               end_date: str = None) -> pd.DataFrame:
+        """
+        计算多只基金的每日定投收益（长表，每行一只基金一个交易日）
         
-        for _, row in nav_data.iterrows():
-            nav = row['nav']
-            date = row['date']
-            
-            shares_bought = daily_invest / nav
-            total_shares += shares_bought
-            total_cost += daily_invest
-            
-            market_value = total_shares * nav
-            total_return = market_value - total_cost
-            return_rate = total_return / total_cost if total_cost > 0 else 0
-            
-            results.append({
-                'date': date.date() if hasattr(date, 'date') else date,
-                'nav': nav,
-                'shares': total_shares,
-                'market_value': market_value,
-                'total_cost': total_cost,
-                'total_return': total_return,
-                'return_rate': return_rate
-            })
+        交易记录一次查询获取；没有交易记录的基金按每日定投模拟。
         
-        return pd.DataFrame(results)
+        Returns:
+            DataFrame: fund_code, date, nav, shares, market_value, total_cost, total_return, return_rate
+        """
+        start, end = _date_window(start_date, end_date)
+        
+        nav_frames = []
+        for code in dict.fromkeys(fund_codes):
+            nav_data = self.get_fund_nav_from_tushare(code, days=400)
+            if nav_data.empty:
+                logger.warning(f"无法获取 {code} 的净值数据")
+                continue
+            navs = _nav_window(nav_data, start, end)
+            if not navs.empty:
+                nav_frames.append(navs.assign(fund_code=str(code)))
+        
+        if not nav_frames:
+            return pd.DataFrame()
+        navs = pd.concat(nav_frames, ignore_index=True)
+        
+        transactions = self._get_transactions_for_funds(list(navs['fund_code'].unique()))
+        traded = set(transactions['fund_code']) if not transactions.empty else set()
+        simulated = navs[~navs['fund_code'].isin(traded)]
+        if not simulated.empty:
+            logger.info(f"没有交易记录的基金按每日定投模拟: {sorted(simulated['fund_code'].unique())}")
+            trades = pd.concat([transactions, simulated_dip_trades(simulated)], ignore_index=True)
+        else:
+            trades = transactions
+        
+        return accumulate_dip_positions(navs, trades)
     
     def get_portfolio_returns(self, fund_codes: List[str], weights: List[float] = None,
                              start_date: str = None, end_date: str = None) -> pd.DataFrame:
@@ -259,46 +332,24 @@ class DipReturnCalculator:
             logger.error("基金数量与权重数量不匹配")
             return pd.DataFrame()
         
-        all_dates = set()
-        fund_returns = {}
-        
-        for code in fund_codes:
-            df = self.calculate_daily_returns(code, start_date, end_date)
-            if not df.empty:
-                fund_returns[code] = df
-                all_dates.update(df['date'].tolist())
-        
-        if not fund_returns:
+        panel = self.get_fund_returns_panel(fund_codes, start_date, end_date)
+        if panel.empty:
             return pd.DataFrame()
         
-        all_dates = sorted(all_dates)
+        # 同一基金出现多次时权重累加；某只基金某日无净值时当日不计入该基金
+        weight_map = pd.Series(weights, index=[str(code) for code in fund_codes], dtype=float)
+        weight_map = weight_map.groupby(level=0).sum()
+        weight = panel['fund_code'].map(weight_map)
         
-        results = []
-        for date in all_dates:
-            total_market_value = 0
-            total_cost = 0
-            
-            for code, weight in zip(fund_codes, weights):
-                if code in fund_returns:
-                    fund_df = fund_returns[code]
-                    day_data = fund_df[fund_df['date'] == date]
-                    
-                    if not day_data.empty:
-                        total_market_value += day_data.iloc[0]['market_value'] * weight
-                        total_cost += day_data.iloc[0]['total_cost'] * weight
-            
-            total_return = total_market_value - total_cost
-            return_rate = total_return / total_cost if total_cost > 0 else 0
-            
-            results.append({
-                'date': date,
-                'market_value': total_market_value,
-                'total_cost': total_cost,
-                'total_return': total_return,
-                'return_rate': return_rate
-            })
+        totals = pd.DataFrame({
+            'date': panel['date'],
+            'market_value': panel['market_value'] * weight,
+            'total_cost': panel['total_cost'] * weight
+        }).groupby('date', sort=True).sum().reset_index()
         
-        return pd.DataFrame(results)
+        totals['total_return'] = totals['market_value'] - totals['total_cost']
+        totals['return_rate'] = _safe_ratio(totals['total_return'], totals['total_cost'])
+        return totals
     
     def get_return_summary(self, fund_code: str, start_date: str = None) -> Dict[str, Any]:
         """
@@ -311,7 +362,15 @@ class DipReturnCalculator:
             start_date = datetime.now() - timedelta(days=365)
         
         df = self.calculate_daily_returns(fund_code, start_date)
+        return self.summarize_returns(fund_code, df)
+    
+    def summarize_returns(self, fund_code: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        根据已计算的每日收益数据生成收益汇总（避免重复获取净值）
         
+        Returns:
+            Dict: 包含各项收益指标
+        """
         if df.empty:
             return {
                 'fund_code': fund_code,
@@ -339,8 +398,8 @@ class DipReturnCalculator:
             'return_rate': float(latest['return_rate']),
             'annualized_return': float(annualized_return) if annualized_return else None,
             'holding_days': holding_days,
-            'start_date': str(df['date'].iloc[0].date()),
-            'end_date': str(df['date'].iloc[-1].date())
+            'start_date': str(df['date'].iloc[0]),
+            'end_date': str(df['date'].iloc[-1])
         }
 
 
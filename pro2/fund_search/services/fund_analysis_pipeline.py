@@ -0,0 +1,695 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基金批量分析流水线
+
+enhanced_main --analyze 的分阶段执行：
+1. 预取：线程池并发获取基本信息、实时数据和历史净值（fetch_workers 限制并发，
+   数据源的限流由适配器内部的令牌桶控制）
+2. 评估：进程池计算绩效指标并选择策略（纯计算，不访问网络）
+3. 写入：评估结果按 write_chunk 分批流式写入数据库，并追加到断点文件
+
+断点文件按分析日期记录已完成的基金；同一天重新运行时跳过这些基金，
+进程中途退出后可以从最后完成的一批继续。全部基金完成且结果都已写入数据库后断点文件被删除；
+还有未写入的结果时，由调用方在最终汇总写入成功后调用 complete() 删除。
+
+使用示例:
+    pipeline = FundAnalysisPipeline(adapter, db_manager, fetch_workers=8, eval_workers=4)
+    results = pipeline.run([('000001', '华夏成长混合')], '2024-06-01')
+    pipeline.stage_timings    # 各阶段耗时
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 策略分析使用的历史数据行数 / 绩效指标使用的历史数据行数
+STRATEGY_HISTORY_DAYS = 365
+PERFORMANCE_HISTORY_DAYS = 3650
+
+
+# ==================== 单只基金的分析步骤 ====================
+
+def failed_fund_result(fund_code: str, fund_name: str, analysis_date: str) -> Dict:
+    """分析失败时的默认结果"""
+    return {
+        'fund_code': fund_code,
+        'fund_name': fund_name,
+        'analysis_date': analysis_date,
+        'today_return': 0.0,
+        'prev_day_return': 0.0,
+        'strategy_name': 'default_strategy',
+        'status_label': "🔴 分析失败",
+        'operation_suggestion': "数据获取失败，建议人工核查",
+        'execution_amount': "持有不动",
+        'action': 'hold',
+        'buy_multiplier': 0.0,
+        'redeem_amount': 0.0,
+        'comparison_value': 0.0,
+        'composite_score': 0.0
+    }
+
+
+def _tail_history(hist_data: pd.DataFrame, days: int) -> pd.DataFrame:
+    """与 get_historical_data(days=...) 相同的截取规则：超过 days 行时按日期排序取最后 days 行"""
+    if hist_data is None or hist_data.empty:
+        return pd.DataFrame()
+    if len(hist_data) > days:
+        return hist_data.sort_values('date', ascending=True).tail(days)
+    return hist_data
+
+
+def prefetch_fund(data_adapter, fund_code: str, fund_name: str, analysis_date: str) -> Dict:
+    """
+    获取单只基金分析所需的全部数据（网络 I/O 阶段）
+
+    历史净值只请求一次（绩效指标所需的最长区间），策略分析使用其中最近的部分
+
+    Returns:
+        评估任务字典；获取失败时包含 error 字段
+    """
+    started = time.perf_counter()
+    task = {'fund_code': fund_code, 'fund_name': fund_name, 'analysis_date': analysis_date}
+    try:
+        task['basic_info'] = data_adapter.get_fund_basic_info(fund_code)
+        task['realtime_data'] = data_adapter.get_realtime_data(fund_code, fund_name)
+        history = data_adapter.get_historical_data(fund_code, days=PERFORMANCE_HISTORY_DAYS)
+        task['performance_history'] = history
+        task['historical_data'] = _tail_history(history, STRATEGY_HISTORY_DAYS)
+    except Exception as e:
+        logger.error(f"获取基金 {fund_code} 数据失败: {e}")
+        task['error'] = str(e)
+    task['fetch_seconds'] = time.perf_counter() - started
+    return task
+
+
+def resolve_returns(fund_code: str, fund_name: str, realtime_data: Dict,
+                    historical_data: pd.DataFrame) -> Tuple[float, float]:
+    """
+    计算今日和昨日收益率（百分比，保留两位小数）
+
+    今日收益率取实时数据；昨日收益率优先取实时数据，不可用时从历史数据获取，
+    QDII 基金向前追溯最近的非零值
+    """
+    from data_retrieval.adapters.multi_source_adapter import MultiSourceDataAdapter
+
+    today_return = realtime_data.get('today_return', 0.0)
+    try:
+        today_return = float(today_return)
+        # 检查今日收益率是否异常（超过±100%）
+        if abs(today_return) > 100:
+            logger.warning(f"基金 {fund_code} 今日收益率异常: {today_return}%，使用默认值0.0%")
+            today_return = 0.0
+    except (ValueError, TypeError):
+        logger.warning(f"基金 {fund_code} 今日收益率解析失败，使用默认值0.0%")
+        today_return = 0.0
+
+    yesterday_return = 0.0
+
+    # 首先尝试从实时数据获取昨日收益率（更可靠）
+    if 'prev_day_return' in realtime_data:
+        try:
+            yesterday_return = float(realtime_data['prev_day_return'])
+            if abs(yesterday_return) > 100:
+                logger.warning(f"基金 {fund_code} 实时数据中的昨日收益率异常: {yesterday_return}%，从历史数据获取")
+                yesterday_return = 0.0
+        except (ValueError, TypeError):
+            logger.warning(f"基金 {fund_code} 实时数据中的昨日收益率解析失败，从历史数据获取")
+            yesterday_return = 0.0
+
+    # 如果实时数据中的昨日收益率不可用或异常，从历史数据获取
+    if yesterday_return == 0.0 and not historical_data.empty:
+        # 支持两种列名：daily_return (来自adapter) 或 daily_growth_rate (旧格式)
+        growth_rate_col = 'daily_return' if 'daily_return' in historical_data.columns else 'daily_growth_rate'
+        if growth_rate_col in historical_data.columns:
+            recent_growth_series = historical_data[growth_rate_col].dropna()
+
+            if len(recent_growth_series) >= 1:
+                try:
+                    is_qdii = MultiSourceDataAdapter.is_qdii_fund(fund_code, fund_name)
+
+                    # 向前追溯寻找非零值（QDII基金可能延迟更多天，最多追溯15天）
+                    if is_qdii:
+                        max_trace_days = 15
+                        for i in range(len(recent_growth_series) - 1, -1, -1):
+                            value = recent_growth_series.iloc[i]
+                            # AKShare返回的日增长率已经是百分比格式
+                            candidate_return = float(value) if pd.notna(value) else 0.0
+                            if 0.001 < abs(candidate_return) <= 100:
+                                yesterday_return = candidate_return
+                                logger.info(f"QDII基金 {fund_code} 向前追溯成功，往前第"
+                                            f"{len(recent_growth_series) - 1 - i}天收益率: {yesterday_return}%")
+                                break
+                            if len(recent_growth_series) - 1 - i >= max_trace_days:
+                                logger.warning(f"QDII基金 {fund_code} 追溯{max_trace_days}天仍未找到非零值，停止追溯")
+                                break
+                    else:
+                        value = recent_growth_series.iloc[-1]
+                        yesterday_return = float(value) if pd.notna(value) else 0.0
+
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"基金 {fund_code} 历史数据{growth_rate_col}解析失败: {str(e)}，使用默认值")
+                    yesterday_return = 0.0
+
+    return round(today_return, 2), round(yesterday_return, 2)
+
+
+def evaluate_best_strategy(history_df: pd.DataFrame) -> Optional[Dict]:
+    """
+    评估并选择表现最好的高级策略
+
+    Args:
+        history_df: 历史数据DataFrame
+
+    Returns:
+        Dict: 最佳策略生成的今日建议，如果无法评估则返回None
+    """
+    try:
+        if history_df.empty or len(history_df) < 60:
+            return None
+
+        from backtesting import get_all_advanced_strategies
+
+        strategies = get_all_advanced_strategies()
+        best_return = -float('inf')
+        best_strategy_key = None
+
+        # 简易回测窗口：最近60个交易日
+        backtest_window = min(60, len(history_df) - 1)
+        start_idx = len(history_df) - backtest_window
+
+        # 获取净值序列
+        if '单位净值' in history_df.columns:
+            nav_series = history_df['单位净值']
+        elif 'nav' in history_df.columns:
+            nav_series = history_df['nav']
+        else:
+            return None
+
+        # 对每个策略进行回测
+        for key, strategy in strategies.items():
+            # 初始资金10000，持有0
+            cash = 10000.0
+            holdings = 0.0
+
+            # 模拟交易
+            for i in range(start_idx, len(history_df)):
+                try:
+                    signal = strategy.generate_signal(
+                        history_df=history_df,
+                        current_index=i,
+                        current_holdings=holdings * nav_series.iloc[i],
+                        cash=cash
+                    )
+
+                    current_nav = nav_series.iloc[i]
+
+                    if signal.action == 'buy':
+                        amount = 1000 * signal.amount_multiplier  # 假设基准定投1000
+                        if cash >= amount:
+                            holdings += amount / current_nav
+                            cash -= amount
+                    elif signal.action == 'sell':
+                        amount = 1000 * signal.amount_multiplier
+                        if holdings * current_nav >= amount:
+                            holdings -= amount / current_nav
+                            cash += amount
+                except Exception:
+                    continue
+
+            # 计算最终价值
+            final_value = cash + holdings * nav_series.iloc[-1]
+            returns = (final_value - 10000.0) / 10000.0
+
+            if returns > best_return:
+                best_return = returns
+                best_strategy_key = key
+
+        # 使用最佳策略生成今日信号
+        if best_strategy_key:
+            best_strategy = strategies[best_strategy_key]
+            # 假设持有10000市值用于生成建议
+            current_signal = best_strategy.generate_signal(
+                history_df=history_df,
+                current_index=len(history_df) - 1,
+                current_holdings=10000,
+                cash=5000
+            )
+
+            action_map = {
+                'buy': '买入',
+                'sell': '卖出',
+                'hold': '持有'
+            }
+
+            # 构造操作建议文本
+            suggestion = f"{best_strategy.name}: {action_map.get(current_signal.action, '观望')}"
+            if current_signal.reason:
+                suggestion += f" ({current_signal.reason})"
+
+            return {
+                'strategy_name': best_strategy.name,
+                'action': current_signal.action,
+                'buy_multiplier': current_signal.amount_multiplier,
+                'redeem_amount': 0 if current_signal.action == 'buy' else (1000 * current_signal.amount_multiplier),
+                'status_label': f"🏆 {best_strategy.name[:4]}",
+                'operation_suggestion': suggestion,
+                'execution_amount': f"{current_signal.amount_multiplier:.1f}倍",
+                'comparison_value': best_return * 100
+            }
+
+        return None
+
+    except Exception as e:
+        logger.warning(f"高级策略评估失败: {e}")
+        return None
+
+
+# 子进程内复用的基础策略引擎
+_strategy_engine = None
+
+
+def _get_strategy_engine():
+    global _strategy_engine
+    if _strategy_engine is None:
+        from backtesting import EnhancedInvestmentStrategy
+        _strategy_engine = EnhancedInvestmentStrategy()
+    return _strategy_engine
+
+
+def evaluate_fund(task: Dict, strategy_engine=None) -> Tuple[Dict, bool]:
+    """
+    由预取的数据计算单只基金的分析结果（纯计算阶段，可在子进程中执行）
+
+    Args:
+        task: prefetch_fund 返回的任务字典
+        strategy_engine: 基础策略引擎，默认使用进程内共享实例
+
+    Returns:
+        (分析结果, 是否成功)
+    """
+    from data_retrieval.adapters.multi_source_adapter import MultiSourceDataAdapter
+
+    fund_code = task['fund_code']
+    fund_name = task['fund_name']
+    analysis_date = task['analysis_date']
+    try:
+        basic_info = task.get('basic_info') or {}
+        realtime_data = task.get('realtime_data') or {}
+        historical_data = task.get('historical_data')
+        if historical_data is None:
+            historical_data = pd.DataFrame()
+
+        try:
+            performance_metrics = MultiSourceDataAdapter.calculate_performance_from_history(
+                task.get('performance_history', pd.DataFrame())
+            )
+        except Exception as e:
+            logger.error(f"计算基金 {fund_code} 绩效指标失败: {e}")
+            performance_metrics = MultiSourceDataAdapter._get_default_metrics()
+
+        today_return, prev_day_return = resolve_returns(fund_code, fund_name, realtime_data, historical_data)
+
+        # 1. 尝试使用高级策略评估，2. 降级使用原有策略引擎
+        strategy_result = evaluate_best_strategy(historical_data)
+        if strategy_result:
+            logger.info(f"基金 {fund_code} 选出最佳高级策略: {strategy_result['strategy_name']}")
+        else:
+            engine = strategy_engine or _get_strategy_engine()
+            strategy_result = engine.analyze_strategy(today_return, prev_day_return, performance_metrics)
+
+        action = strategy_result.get('action', 'hold')
+        fund_result = {
+            'fund_code': fund_code,
+            'fund_name': fund_name,
+            'analysis_date': analysis_date,
+            'strategy_name': strategy_result.get('strategy_name', 'momentum_strategy'),
+            'status_label': strategy_result.get('status_label', '🔴 未知状态'),
+            'operation_suggestion': strategy_result.get('operation_suggestion', '持有不动'),
+            'execution_amount': strategy_result.get('execution_amount', '持有不动'),
+            # 兼容性：设置is_buy字段
+            'is_buy': action in ['buy', 'strong_buy', 'weak_buy'],
+            'redeem_amount': strategy_result.get('redeem_amount', 0.0),
+            'buy_multiplier': strategy_result.get('buy_multiplier', 0.0),
+            'action': action,
+            'comparison_value': strategy_result.get('comparison_value', today_return - prev_day_return),
+            **basic_info,
+            **realtime_data,
+            **performance_metrics,
+            # 最后设置收益率相关字段，确保不会被覆盖
+            'today_return': today_return,
+            'prev_day_return': prev_day_return,
+        }
+        # 确保使用传入的基金名称覆盖API获取的名称
+        fund_result['fund_name'] = fund_name
+
+        logger.info(f"基金 {fund_code} 分析完成: status={fund_result['status_label']}, action={action}, "
+                    f"buy_multiplier={fund_result['buy_multiplier']}, redeem_amount={fund_result['redeem_amount']}")
+        return fund_result, True
+
+    except Exception as e:
+        logger.error(f"分析基金 {fund_code} 失败: {str(e)}")
+        return failed_fund_result(fund_code, fund_name, analysis_date), False
+
+
+def _evaluate_timed(task: Dict) -> Tuple[Dict, bool, float]:
+    """进程池入口：附带计算耗时"""
+    started = time.perf_counter()
+    result, ok = evaluate_fund(task)
+    return result, ok, time.perf_counter() - started
+
+
+def _release_history(task: Dict) -> None:
+    """评估完成后释放任务中的历史净值，避免整批基金的长历史驻留到运行结束"""
+    task.pop('performance_history', None)
+    task.pop('historical_data', None)
+
+
+# ==================== 断点与流式写入 ====================
+
+def _json_default(value: Any):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+
+class AnalysisCheckpoint:
+    """
+    断点文件（JSON Lines）
+
+    每行一只基金：{'fund_code', 'analysis_date', 'persisted', 'result'}，
+    persisted 表示该结果是否已写入数据库
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self, analysis_date: str) -> Dict[str, Dict]:
+        """读取同一分析日期已完成的基金，{基金代码: {'result', 'persisted'}}"""
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 最后一行可能在写入时中断
+                    continue
+                if entry.get('analysis_date') != analysis_date:
+                    continue
+                completed[entry['fund_code']] = {'result': entry['result'], 'persisted': entry['persisted']}
+        return completed
+
+    def append(self, results: List[Dict], analysis_date: str, persisted: bool) -> None:
+        if not results:
+            return
+        lines = [
+            json.dumps({'fund_code': result['fund_code'], 'analysis_date': analysis_date,
+                        'persisted': persisted, 'result': result},
+                       ensure_ascii=False, default=_json_default)
+            for result in results
+        ]
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def remove(self) -> None:
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class StreamingResultWriter:
+    """
+    后台线程分批写入分析结果
+
+    每攒够 chunk_size 条（或关闭时）调用 db_manager.batch_upsert_fund_data 写入一批，
+    写入后追加到断点文件；数据库写入失败的结果留给最终汇总时统一写入
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_manager, checkpoint: Optional[AnalysisCheckpoint], analysis_date: str,
+                 chunk_size: int = 20):
+        self.db_manager = db_manager
+        self.checkpoint = checkpoint
+        self.analysis_date = analysis_date
+        self.chunk_size = max(1, chunk_size)
+        self.write_seconds = 0.0
+        self.batches = 0
+        self.persisted_codes: set = set()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='analysis-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, result: Dict) -> None:
+        self._queue.put(result)
+
+    def close(self) -> None:
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        buffer = []
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            buffer.append(item)
+            if len(buffer) >= self.chunk_size:
+                self._flush(buffer)
+                buffer = []
+        self._flush(buffer)
+
+    def _flush(self, results: List[Dict]) -> None:
+        if not results:
+            return
+        started = time.perf_counter()
+        persisted = False
+        if self.db_manager is not None:
+            try:
+                self.db_manager.batch_upsert_fund_data(results, None)
+                persisted = True
+                self.persisted_codes.update(result['fund_code'] for result in results)
+            except Exception as e:
+                logger.warning(f"分批写入 {len(results)} 条分析结果失败，将在汇总时重试: {e}")
+        if self.checkpoint is not None:
+            try:
+                self.checkpoint.append(results, self.analysis_date, persisted)
+            except OSError as e:
+                logger.warning(f"写入断点文件失败: {e}")
+        self.write_seconds += time.perf_counter() - started
+        self.batches += 1
+
+
+# ==================== 流水线 ====================
+
+class FundAnalysisPipeline:
+    """
+    基金批量分析流水线
+
+    Attributes:
+        stage_timings: 最近一次运行的各阶段耗时（秒）和计数
+        unpersisted_results: 最近一次运行中尚未写入数据库的结果（含分析失败的基金）
+    """
+
+    def __init__(self, data_adapter, db_manager=None, fetch_workers: int = 8,
+                 eval_workers: Optional[int] = None, write_chunk: int = 20,
+                 checkpoint_path: Optional[str] = None, strategy_engine=None):
+        """
+        Args:
+            data_adapter: 数据适配器（MultiSourceDataAdapter）
+            db_manager: 数据库管理器，None 表示不流式写入
+            fetch_workers: 预取阶段的并发数
+            eval_workers: 评估进程数，None 为 CPU 核数，1 表示在当前进程评估
+            write_chunk: 每批写入数据库的结果数
+            checkpoint_path: 断点文件路径，None 表示不记录断点
+            strategy_engine: 当前进程评估时使用的基础策略引擎
+        """
+        self.data_adapter = data_adapter
+        self.db_manager = db_manager
+        self.fetch_workers = max(1, fetch_workers)
+        self.eval_workers = eval_workers if eval_workers is not None else (os.cpu_count() or 1)
+        self.write_chunk = write_chunk
+        self.checkpoint = AnalysisCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.strategy_engine = strategy_engine
+        self.stage_timings: Dict[str, float] = {}
+        self.unpersisted_results: List[Dict] = []
+        self._has_failures = False
+
+    def run(self, funds: List[Tuple[str, str]], analysis_date: str, resume: bool = True) -> List[Dict]:
+        """
+        分析全部基金
+
+        Args:
+            funds: [(基金代码, 基金名称)]
+            analysis_date: 分析日期
+            resume: 是否跳过断点文件中同一日期已完成的基金
+
+        Returns:
+            与 funds 顺序一致的分析结果列表
+        """
+        started = time.perf_counter()
+        completed = self.checkpoint.load(analysis_date) if (self.checkpoint and resume) else {}
+        if self.checkpoint and not resume:
+            self.checkpoint.remove()
+
+        results: Dict[str, Dict] = {code: entry['result'] for code, entry in completed.items()}
+        unpersisted = {code for code, entry in completed.items() if not entry['persisted']}
+        failed: Dict[str, Dict] = {}
+        pending = [(code, name) for code, name in funds if code not in results]
+        if completed:
+            logger.info(f"从断点恢复: 已完成 {len(results)} 只基金，剩余 {len(pending)} 只")
+
+        timings = {'prefetch': 0.0, 'evaluate': 0.0}
+        lock = threading.Lock()
+        writer = StreamingResultWriter(self.db_manager, self.checkpoint, analysis_date, self.write_chunk)
+
+        def record(result: Dict, ok: bool, eval_seconds: float) -> None:
+            with lock:
+                timings['evaluate'] += eval_seconds
+                if ok:
+                    results[result['fund_code']] = result
+                    writer.put(result)
+                else:
+                    failed[result['fund_code']] = result
+
+        # 进程池评估的结果在 future 完成时立即记录，不必等待预取阶段结束；
+        # 子进程失败的任务留到预取结束后在当前进程重新评估
+        outstanding: set = set()
+        retry_tasks: List[Dict] = []
+
+        def on_evaluated(future, task: Dict) -> None:
+            try:
+                outcome = future.result()
+            except Exception as e:
+                # 子进程崩溃或结果无法序列化
+                logger.warning(f"基金 {task['fund_code']} 子进程评估失败，改为当前进程评估: {e}")
+                with lock:
+                    retry_tasks.append(task)
+            else:
+                record(*outcome)
+                _release_history(task)
+            with lock:
+                outstanding.discard(future)
+
+        eval_pool = self._create_eval_pool(len(pending))
+        prefetch_started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix='analysis-fetch') as fetch_pool:
+                fetch_futures = [
+                    fetch_pool.submit(prefetch_fund, self.data_adapter, code, name, analysis_date)
+                    for code, name in pending
+                ]
+                for future in as_completed(fetch_futures):
+                    task = future.result()
+                    timings['prefetch'] += task.pop('fetch_seconds')
+                    if 'error' in task:
+                        record(failed_fund_result(task['fund_code'], task['fund_name'], analysis_date), False, 0.0)
+                        continue
+                    if eval_pool is not None:
+                        try:
+                            eval_future = eval_pool.submit(_evaluate_timed, task)
+                            with lock:
+                                outstanding.add(eval_future)
+                            eval_future.add_done_callback(lambda f, t=task: on_evaluated(f, t))
+                            continue
+                        except (BrokenProcessPool, RuntimeError) as e:
+                            logger.warning(f"评估进程池不可用，改为当前进程评估: {e}")
+                            eval_pool.shutdown(wait=False, cancel_futures=True)
+                            eval_pool = None
+                    record(*self._evaluate_local(task))
+                    _release_history(task)
+                prefetch_wall = time.perf_counter() - prefetch_started
+
+            with lock:
+                waiting = list(outstanding)
+            wait(waiting)
+            for task in retry_tasks:
+                record(*self._evaluate_local(task))
+                _release_history(task)
+        finally:
+            if eval_pool is not None:
+                eval_pool.shutdown(wait=True)
+            writer.close()
+
+        unpersisted.update(code for code in results if code not in writer.persisted_codes
+                           and code not in completed)
+        self.unpersisted_results = (
+            [results[code] for code, _ in funds if code in unpersisted] + list(failed.values())
+        )
+
+        # 还有未写入数据库的结果时保留断点，最终汇总写入失败后仍可从断点恢复
+        self._has_failures = bool(failed)
+        if not self.unpersisted_results:
+            self.complete()
+
+        total = time.perf_counter() - started
+        self.stage_timings = {
+            'total_seconds': round(total, 3),
+            'prefetch_wall_seconds': round(prefetch_wall if pending else 0.0, 3),
+            'prefetch_seconds': round(timings['prefetch'], 3),
+            'evaluate_seconds': round(timings['evaluate'], 3),
+            'write_seconds': round(writer.write_seconds, 3),
+            'write_batches': writer.batches,
+            'funds': len(funds),
+            'resumed': len(completed),
+            'failed': len(failed),
+            'fetch_workers': self.fetch_workers,
+            'eval_workers': self.eval_workers,
+        }
+        logger.info(f"基金分析流水线完成: {self.stage_timings}")
+
+        ordered = []
+        for code, name in funds:
+            ordered.append(results.get(code) or failed.get(code) or failed_fund_result(code, name, analysis_date))
+        return ordered
+
+    def complete(self) -> None:
+        """
+        unpersisted_results 已由调用方写入数据库后调用：没有分析失败的基金时删除断点文件
+
+        有失败的基金时保留断点，重新运行只分析这些基金
+        """
+        self.unpersisted_results = []
+        if self.checkpoint and not self._has_failures:
+            self.checkpoint.remove()
+
+    def _create_eval_pool(self, n_tasks: int) -> Optional[ProcessPoolExecutor]:
+        if self.eval_workers <= 1 or n_tasks <= 1:
+            return None
+        try:
+            return ProcessPoolExecutor(max_workers=min(self.eval_workers, n_tasks))
+        except (OSError, ValueError, NotImplementedError) as e:
+            logger.warning(f"无法创建评估进程池，改为当前进程评估: {e}")
+            return None
+
+    def _evaluate_local(self, task: Dict) -> Tuple[Dict, bool, float]:
+        started = time.perf_counter()
+        result, ok = evaluate_fund(task, self.strategy_engine)
+        return result, ok, time.perf_counter() - started
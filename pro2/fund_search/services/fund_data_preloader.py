@@ -34,6 +34,9 @@ from typing import Dict, List, Optional, Set, Tuple, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 
+from services.nav_panel import NavPanel
+from shared.fund_metrics import compute_cross_section_metrics
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -60,6 +63,9 @@ class PreloadConfig:
     # 内存缓存最大条目数
     max_cache_size: int = 50000  # 支持更多基金
     
+    # 历史净值面板的数值类型（float32 内存减半，净值保留约7位有效数字）
+    nav_panel_dtype: str = 'float64'
+    
     # 预加载超时时间（秒）
     preload_timeout: int = 600  # 10分钟
 
@@ -68,16 +74,18 @@ class MemoryCacheManager:
     """
     内存缓存管理器 - 兼容层
     
-    已重构：使用 services.cache.memory_cache 作为后端实现
+    已重构：使用多级缓存的 preload 命名空间作为后端实现
     保留此类以维持向后兼容性
     
     高性能内存缓存，支持TTL和LRU淘汰
     """
     
     def __init__(self, max_size: int = 10000):
-        # 使用标准缓存作为后端
-        from services.cache.memory_cache import MemoryCache
-        self._backend = MemoryCache(max_size=max_size)
+        # 使用多级缓存作为后端，容量写入命名空间配置
+        from services.cache.tiered_cache import get_tiered_cache
+        tiered_cache = get_tiered_cache()
+        tiered_cache.configure_namespace('preload', max_entries=max_size)
+        self._backend = tiered_cache.namespace('preload')
         self._max_size = max_size
         
     def get(self, key: str) -> Optional[Any]:
@@ -160,6 +168,11 @@ class FundDataPreloader:
         
         self.config = PreloadConfig()
         self.cache = MemoryCacheManager(max_size=self.config.max_cache_size)
+        # 历史净值使用列式面板保存（日期 × 基金矩阵），不再逐只基金存 records
+        self.nav_panel = NavPanel(
+            dtype=self.config.nav_panel_dtype,
+            max_age_seconds=self.CACHE_TTL['nav_history']
+        )
         
         # 数据获取器（延迟初始化）
         self._fetcher = None
@@ -630,17 +643,7 @@ class FundDataPreloader:
             try:
                 # 批量获取
                 results = self.fetcher.batch_get_fund_nav(batch)
-                
-                for code, df in results.items():
-                    if not df.empty:
-                        key = f"{self.KEY_PREFIX['nav_history']}:{code}"
-                        # 将DataFrame转换为更紧凑的格式存储
-                        data = {
-                            'records': df.to_dict('records'),
-                            'columns': df.columns.tolist(),
-                            'last_date': str(df.iloc[-1]['date']) if 'date' in df.columns else None
-                        }
-                        self.cache.set(key, data, self.CACHE_TTL['nav_history'])
+                self.store_nav_history(results)
                 
                 # 更新进度
                 progress = 0.5 + (batch_num / total_batches) * 0.3
@@ -651,77 +654,120 @@ class FundDataPreloader:
         
         logger.info("历史净值预加载完成")
     
+    def store_nav_history(self, results: Dict[str, pd.DataFrame], publish: bool = False) -> int:
+        """
+        写入历史净值到列式面板
+        
+        Args:
+            results: {基金代码: 历史净值DataFrame}，已有日期被覆盖，其余日期保留
+            publish: 同时把紧凑列式数据写入共享缓存（供其他进程读取，如 Celery worker → Web）
+            
+        Returns:
+            int: 写入的基金数量
+        """
+        stored = self.nav_panel.upsert(results)
+        
+        if publish:
+            payloads = {}
+            for code in results:
+                payload = self.nav_panel.to_payload(code)
+                if payload is not None:
+                    payloads[f"{self.KEY_PREFIX['nav_history']}:{code}"] = payload
+            self.cache.mset(payloads, self.CACHE_TTL['nav_history'])
+        
+        return stored
+    
     def _preload_performance(self, fund_codes: List[str]):
         """预计算绩效指标"""
         logger.info(f"预计算 {len(fund_codes)} 只基金的绩效指标...")
+        count = self.recalculate_performance(fund_codes)
+        logger.info(f"绩效指标预计算完成: {count} 只基金")
+    
+    def recalculate_performance(self, fund_codes: Optional[List[str]] = None,
+                                chunk_size: int = 2000) -> int:
+        """
+        基于净值面板批量计算绩效指标（向量化，一次处理一批基金列）
         
-        for code in fund_codes:
-            try:
-                # 从历史数据计算绩效指标
-                hist_key = f"{self.KEY_PREFIX['nav_history']}:{code}"
-                hist_data = self.cache.get(hist_key)
-                
-                if hist_data:
-                    # 计算绩效指标
-                    metrics = self._calculate_metrics(hist_data['records'])
-                    key = f"{self.KEY_PREFIX['performance']}:{code}"
-                    self.cache.set(key, metrics, self.CACHE_TTL['performance'])
-                    
-            except Exception as e:
-                logger.debug(f"计算 {code} 绩效指标失败: {e}")
+        Args:
+            fund_codes: 基金代码列表，None 表示面板中全部基金
+            chunk_size: 每批计算的基金数，控制中间矩阵的内存
+            
+        Returns:
+            int: 写入缓存的基金数量
+        """
+        dates, matrix, codes = self.nav_panel.get_matrix('nav', fund_codes)
+        
+        count = 0
+        for start in range(0, len(codes), chunk_size):
+            chunk_codes = codes[start:start + chunk_size]
+            metrics_list = self._calculate_metrics_matrix(matrix[:, start:start + chunk_size], dates)
+            
+            payloads = {
+                f"{self.KEY_PREFIX['performance']}:{code}": metrics
+                for code, metrics in zip(chunk_codes, metrics_list)
+            }
+            self.cache.mset(payloads, self.CACHE_TTL['performance'])
+            count += len(payloads)
         
-        logger.info("绩效指标预计算完成")
+        return count
     
-    def _calculate_metrics(self, records: List[Dict]) -> Dict:
-        """计算绩效指标"""
+    def _calculate_metrics(self, records) -> Dict:
+        """计算单只基金的绩效指标（records 列表或 DataFrame）"""
         try:
-            if len(records) < 2:
+            df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+            if len(df) < 2:
                 return {}
             
             # 提取净值序列
-            navs = [r.get('nav', r.get('单位净值', 0)) for r in records if r.get('nav') or r.get('单位净值')]
-            
-            if len(navs) < 2:
+            nav_col = 'nav' if 'nav' in df.columns else '单位净值'
+            if nav_col not in df.columns:
+                return {}
+            navs = pd.to_numeric(df[nav_col], errors='coerce')
+            mask = (navs.notna() & (navs != 0)).to_numpy()
+            if mask.sum() < 2:
                 return {}
             
-            navs = pd.Series(navs)
-            
-            # 计算收益率
-            returns = navs.pct_change().dropna()
-            
-            # 计算指标
-            total_return = (navs.iloc[-1] - navs.iloc[0]) / navs.iloc[0] if navs.iloc[0] > 0 else 0
-            
-            # 年化收益率（假设250个交易日）
-            years = len(navs) / 250
-            annualized_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else 0
-            
-            # 波动率
-            volatility = returns.std() * np.sqrt(250)
-            
-            # 夏普比率（假设无风险利率2%）
-            risk_free_rate = 0.02
-            sharpe_ratio = (annualized_return - risk_free_rate) / volatility if volatility > 0 else 0
-            
-            # 最大回撤
-            cumulative = (1 + returns).cumprod()
-            running_max = cumulative.expanding().max()
-            drawdown = (cumulative - running_max) / running_max
-            max_drawdown = drawdown.min()
-            
-            return {
-                'total_return': round(total_return * 100, 2),
-                'annualized_return': round(annualized_return * 100, 2),
-                'volatility': round(volatility * 100, 2),
-                'sharpe_ratio': round(sharpe_ratio, 2),
-                'max_drawdown': round(max_drawdown * 100, 2),
-                'data_days': len(navs)
-            }
+            dates = df['date'].to_numpy()[mask] if 'date' in df.columns else None
+            return self._calculate_metrics_matrix(navs.to_numpy()[mask][:, None], dates)[0]
             
         except Exception as e:
             logger.debug(f"计算指标失败: {e}")
             return {}
     
+    @staticmethod
+    def _calculate_metrics_matrix(navs: np.ndarray, dates: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        向量化计算绩效指标
+        
+        Args:
+            navs: (日期 × 基金) 净值矩阵，NaN 表示当天无净值（0 视为无效）
+            dates: 日期轴，用于近一年/今年以来夏普比率
+            
+        Returns:
+            每只基金一个指标字典（有效净值少于2个时为空字典）
+        """
+        # 250个交易日、无风险利率2%
+        metrics = compute_cross_section_metrics(navs, dates=dates, risk_free_rate=0.02, trading_days=250)
+        values = metrics.values
+        
+        results = []
+        for j in range(len(metrics)):
+            if values['data_days'][j] < 2:
+                results.append({})
+                continue
+            results.append({
+                'total_return': round(float(values['total_return'][j]) * 100, 2),
+                'annualized_return': round(float(values['annualized_return'][j]) * 100, 2),
+                'volatility': round(float(values['volatility'][j]) * 100, 2),
+                'sharpe_ratio': round(float(values['sharpe_ratio'][j]), 2),
+                'sharpe_ratio_ytd': round(float(values['sharpe_ratio_ytd'][j]), 2),
+                'sharpe_ratio_1y': round(float(values['sharpe_ratio_1y'][j]), 2),
+                'sharpe_ratio_all': round(float(values['sharpe_ratio_all'][j]), 2),
+                'max_drawdown': round(float(values['max_drawdown'][j]) * 100, 2),
+                'data_days': int(values['data_days'][j])
+            })
+        return results
+    
     def _update_progress(self, progress: float, message: str):
         """更新进度"""
         with self._lock:
@@ -864,13 +910,23 @@ class FundDataPreloader:
         return self.cache.get(key)
     
     def get_fund_nav_history(self, fund_code: str) -> Optional[pd.DataFrame]:
-        """获取基金历史净值（从缓存）"""
+        """
+        获取基金历史净值（从净值面板，列为面板内存的视图，调用方不应原地修改）
+        
+        面板中没有时回退到共享缓存（其他进程发布的列式数据），读取后并入面板
+        """
+        df = self.nav_panel.get_fund_nav_history(fund_code)
+        if df is not None:
+            return df
+        
         key = f"{self.KEY_PREFIX['nav_history']}:{fund_code}"
-        data = self.cache.get(key)
+        payload = self.cache.get(key)
+        df = NavPanel.payload_to_frame(payload) if payload else None
+        if df is None or df.empty:
+            return None
         
-        if data:
-            return pd.DataFrame(data['records'], columns=data['columns'])
-        return None
+        self.nav_panel.upsert({fund_code: df})
+        return self.nav_panel.get_fund_nav_history(fund_code)
     
     def get_fund_latest_nav(self, fund_code: str) -> Optional[Dict]:
         """获取基金最新净值（从缓存）"""
@@ -904,7 +960,9 @@ class FundDataPreloader:
     
     def get_cache_stats(self) -> Dict:
         """获取缓存统计"""
-        return self.cache.get_stats()
+        stats = self.cache.get_stats()
+        stats['nav_panel'] = self.nav_panel.get_stats()
+        return stats
     
     def get_all_fund_codes(self) -> List[str]:
         """获取所有已缓存的基金代码"""
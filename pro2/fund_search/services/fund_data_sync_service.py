@@ -100,7 +100,7 @@ class FundDataSyncService:
                     df = self.cache.fetch_fund_nav_from_source(fund_code, days=30)
                     
                     if not df.empty:
-                        self.cache.save_fund_nav_to_db(fund_code, df, 'akshare')
+                        self.cache.save_fund_nav_to_db(fund_code, df, 'akshare', delta=True)
                         success += 1
                         logger.debug(f"[{i}/{total}] 同步成功: {fund_code}")
                     else:
@@ -292,7 +292,7 @@ class FundDataSyncService:
                 try:
                     df_nav = self.cache.fetch_fund_nav_from_source(fund_code, days=30)
                     if not df_nav.empty:
-                        self.cache.save_fund_nav_to_db(fund_code, df_nav, 'akshare')
+                        self.cache.save_fund_nav_to_db(fund_code, df_nav, 'akshare', delta=True)
                         logger.info(f"重试同步成功: {fund_code}")
                 except Exception as e:
                     logger.warning(f"重试同步失败: {fund_code}, {e}")
@@ -4,7 +4,7 @@
 基金净值缓存管理器
 
 三级缓存策略：
-1. L1 - 内存缓存（15分钟TTL）：使用LRU缓存最近访问的基金数据
+1. L1 - 内存缓存（15分钟TTL）：多级缓存的 nav 命名空间（内存LRU，配置Redis时读写穿透到Redis）
 2. L2 - 数据库缓存（1天有效）：按日期存储每只基金的历史净值
 3. L3 - 数据源（降级方案）：当缓存缺失时从Tushare/AKShare获取
 """
@@ -15,23 +15,15 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import logging
 import threading
+import time
 from functools import wraps
 import hashlib
 from sqlalchemy import text
 
-logger = logging.getLogger(__name__)
-
+from .cache.tiered_cache import MYSQL_TIER, MySQLCache, get_tiered_cache
+from shared.fund_metrics import align_returns, compute_cross_section_metrics
 
-class MemoryCacheEntry:
-    """内存缓存条目"""
-    def __init__(self, data: Any, ttl_minutes: int = 15):
-        self.data = data
-        self.timestamp = datetime.now()
-        self.ttl = timedelta(minutes=ttl_minutes)
-        self.access_count = 1
-    
-    def is_expired(self) -> bool:
-        return datetime.now() - self.timestamp > self.ttl
+logger = logging.getLogger(__name__)
 
 
 class FundNavCacheManager:
@@ -63,9 +55,11 @@ class FundNavCacheManager:
             
         self.db = db_manager
         self.default_ttl = default_ttl_minutes
-        self._memory_cache: Dict[str, MemoryCacheEntry] = {}
-        self._cache_lock = threading.RLock()
-        self._max_memory_entries = 200
+        # L1 使用多级缓存的 nav 命名空间（容量和内存预算在命名空间中统一配置）
+        tiered_cache = get_tiered_cache()
+        self._memory_cache = tiered_cache.namespace('nav')
+        if db_manager is not None and not tiered_cache.has_backend(MYSQL_TIER):
+            tiered_cache.attach_backend(MYSQL_TIER, MySQLCache(db_manager))
         self._initialized = True
         
         logger.info(f"FundNavCacheManager 初始化完成，默认内存缓存TTL={default_ttl_minutes}分钟")
@@ -80,52 +74,26 @@ class FundNavCacheManager:
     
     def get_from_memory(self, key: str) -> Optional[Any]:
         """从内存缓存获取数据"""
-        with self._cache_lock:
-            entry = self._memory_cache.get(key)
-            if entry is None:
-                return None
-            
-            if entry.is_expired():
-                del self._memory_cache[key]
-                logger.debug(f"内存缓存过期清除: {key}")
-                return None
-            
-            entry.access_count += 1
-            logger.debug(f"内存缓存命中: {key}, 访问次数: {entry.access_count}")
-            return entry.data
+        data = self._memory_cache.get(key)
+        if data is not None:
+            logger.debug(f"内存缓存命中: {key}")
+        return data
     
     def set_to_memory(self, key: str, data: Any, ttl_minutes: int = None):
-        """写入内存缓存"""
+        """写入内存缓存（过期和LRU淘汰由多级缓存负责）"""
         if ttl_minutes is None:
             ttl_minutes = self.default_ttl
-            
-        with self._cache_lock:
-            self._memory_cache[key] = MemoryCacheEntry(data, ttl_minutes)
-            
-            # LRU清理：当内存缓存超过上限时，清理最久未访问的
-            if len(self._memory_cache) > self._max_memory_entries:
-                oldest_key = min(
-                    self._memory_cache.keys(),
-                    key=lambda k: self._memory_cache[k].timestamp
-                )
-                del self._memory_cache[oldest_key]
-                logger.debug(f"内存缓存LRU清理: {oldest_key}")
+        self._memory_cache.set(key, data, ttl=ttl_minutes * 60)
     
     def invalidate_memory_cache(self, pattern: str = None):
         """使内存缓存失效"""
-        with self._cache_lock:
-            if pattern is None:
-                count = len(self._memory_cache)
-                self._memory_cache.clear()
-                logger.info(f"清除所有内存缓存，共{count}条")
-            else:
-                keys_to_remove = [
-                    k for k in list(self._memory_cache.keys())
-                    if pattern in k
-                ]
-                for key in keys_to_remove:
-                    del self._memory_cache[key]
-                logger.info(f"清除匹配'{pattern}'的内存缓存，共{len(keys_to_remove)}条")
+        if pattern is None:
+            count = len(self._memory_cache.keys())
+            self._memory_cache.clear()
+            logger.info(f"清除所有内存缓存，共{count}条")
+        else:
+            count = self._memory_cache.invalidate(f"*{pattern}*")
+            logger.info(f"清除匹配'{pattern}'的内存缓存，共{count}条")
     
     # ==================== L2 数据库缓存操作 ====================
     
@@ -175,55 +143,181 @@ class FundNavCacheManager:
             logger.error(f"从数据库获取缓存失败 {fund_code}: {e}")
             return None
     
-    def save_fund_nav_to_db(self, fund_code: str, df: pd.DataFrame, source: str):
-        """保存净值数据到数据库缓存"""
+    # 净值缓存批量写入语句（executemany 时由驱动合并为多行 INSERT）
+    NAV_UPSERT_SQL = """
+        INSERT INTO fund_nav_cache 
+        (fund_code, nav_date, nav_value, accum_nav, daily_return, data_source)
+        VALUES (:fund_code, :nav_date, :nav_value, 
+                :accum_nav, :daily_return, :source)
+        ON DUPLICATE KEY UPDATE
+        nav_value = VALUES(nav_value),
+        accum_nav = VALUES(accum_nav),
+        daily_return = VALUES(daily_return),
+        data_source = VALUES(data_source),
+        updated_at = NOW()
+    """
+    
+    # 每批写入的行数
+    NAV_UPSERT_CHUNK_SIZE = 1000
+    
+    @staticmethod
+    def _build_nav_records(fund_code: str, df: pd.DataFrame, source: str,
+                           since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        按列构造写入记录（不逐行遍历）
+        
+        Args:
+            fund_code: 基金代码
+            df: 包含 date, nav，可选 accum_nav, daily_return 列的净值数据
+            source: 数据来源
+            since: 只保留该日期之后的记录（增量模式）
+        
+        Returns:
+            DataFrame: 与 NAV_UPSERT_SQL 参数同名的列，缺失值为None
+        """
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        mask = dates.notna()
+        if since is not None:
+            mask &= dates > pd.Timestamp(since)
+        
+        def numeric(column):
+            if column not in df.columns:
+                index = df.index[mask.to_numpy()]
+                return pd.Series([None] * len(index), index=index, dtype=object)
+            values = pd.to_numeric(df.loc[mask, column], errors='coerce')
+            return values.astype(object).where(values.notna(), None)
+        
+        records = pd.DataFrame({
+            'fund_code': fund_code,
+            'nav_date': dates[mask].dt.strftime('%Y-%m-%d'),
+            'nav_value': numeric('nav'),
+            'accum_nav': numeric('accum_nav'),
+            'daily_return': numeric('daily_return'),
+            'source': source
+        })
+        return records.drop_duplicates('nav_date', keep='last')
+    
+    def _get_last_synced_dates(self, fund_codes: List[str]) -> Dict[str, pd.Timestamp]:
+        """从 fund_cache_metadata 一次性读取各基金最后同步的净值日期"""
+        if not fund_codes:
+            return {}
+        
+        params = {f'code_{i}': code for i, code in enumerate(fund_codes)}
+        placeholders = ', '.join(f':{name}' for name in params)
+        df = self.db.execute_query(f"""
+            SELECT fund_code, latest_date FROM fund_cache_metadata
+            WHERE fund_code IN ({placeholders})
+        """, params)
+        
+        if df is None or df.empty:
+            return {}
+        df = df.dropna(subset=['latest_date'])
+        return dict(zip(df['fund_code'].astype(str), pd.to_datetime(df['latest_date'])))
+    
+    def _bulk_upsert_nav(self, records: pd.DataFrame, chunk_size: int = None) -> Dict:
+        """
+        分批 executemany 写入净值缓存表，所有批次在同一事务中提交
+        
+        Returns:
+            Dict: rows, batches, seconds, rows_per_second
+        """
+        chunk_size = chunk_size or self.NAV_UPSERT_CHUNK_SIZE
+        rows = records.to_dict('records')
+        batches = (len(rows) + chunk_size - 1) // chunk_size
+        
+        started = time.perf_counter()
+        with self.db.engine.connect() as conn:
+            statement = text(self.NAV_UPSERT_SQL)
+            for batch_no, start in enumerate(range(0, len(rows), chunk_size), 1):
+                chunk = rows[start:start + chunk_size]
+                batch_started = time.perf_counter()
+                conn.execute(statement, chunk)
+                elapsed = time.perf_counter() - batch_started
+                logger.debug(
+                    f"[净值批量写入] 批次 {batch_no}/{batches}: {len(chunk)} 条, "
+                    f"{elapsed * 1000:.1f} ms, {len(chunk) / max(elapsed, 1e-9):.0f} 条/秒"
+                )
+            conn.commit()
+        seconds = time.perf_counter() - started
+        
+        return {
+            'rows': len(rows),
+            'batches': batches,
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(len(rows) / seconds, 1) if seconds > 0 else 0.0
+        }
+    
+    def save_fund_nav_to_db(self, fund_code: str, df: pd.DataFrame, source: str,
+                            delta: bool = False, chunk_size: int = None) -> Optional[Dict]:
+        """
+        保存净值数据到数据库缓存
+        
+        Args:
+            fund_code: 基金代码
+            df: 净值数据
+            source: 数据来源
+            delta: 增量模式，只写入 fund_cache_metadata 中最后同步日期之后的净值
+            chunk_size: 每批写入行数，默认 NAV_UPSERT_CHUNK_SIZE
+        
+        Returns:
+            Dict: 写入统计（rows, skipped, batches, seconds, rows_per_second），失败时返回None
+        """
         if not self.db or df.empty:
-            return
+            return None
         
         try:
-            insert_sql = """
-                INSERT INTO fund_nav_cache 
-                (fund_code, nav_date, nav_value, accum_nav, daily_return, data_source)
-                VALUES (:fund_code, :nav_date, :nav_value, 
-                        :accum_nav, :daily_return, :source)
-                ON DUPLICATE KEY UPDATE
-                nav_value = VALUES(nav_value),
-                accum_nav = VALUES(accum_nav),
-                daily_return = VALUES(daily_return),
-                data_source = VALUES(data_source),
-                updated_at = NOW()
-            """
-            
-            records = []
-            for _, row in df.iterrows():
-                nav_date = row['date']
-                if isinstance(nav_date, pd.Timestamp):
-                    nav_date = nav_date.strftime('%Y-%m-%d')
-                elif isinstance(nav_date, datetime):
-                    nav_date = nav_date.strftime('%Y-%m-%d')
-                
-                records.append({
-                    'fund_code': fund_code,
-                    'nav_date': nav_date,
-                    'nav_value': float(row['nav']) if pd.notna(row.get('nav')) else None,
-                    'accum_nav': float(row['accum_nav']) if pd.notna(row.get('accum_nav')) else None,
-                    'daily_return': float(row['daily_return']) if pd.notna(row.get('daily_return')) else None,
-                    'source': source
-                })
-            
-            # 批量插入
-            with self.db.engine.connect() as conn:
-                for record in records:
-                    conn.execute(text(insert_sql), record)
-                conn.commit()
-            
-            # 更新元数据
-            self._update_cache_metadata(fund_code, df, source)
-            
-            logger.info(f"保存到数据库缓存: {fund_code}, {len(records)}条记录")
-            
+            return self.save_fund_nav_batch({fund_code: df}, source, delta=delta, chunk_size=chunk_size)
         except Exception as e:
             logger.error(f"保存到数据库缓存失败 {fund_code}: {e}")
+            return None
+    
+    def save_fund_nav_batch(self, nav_data: Dict[str, pd.DataFrame], source: str,
+                            delta: bool = True, chunk_size: int = None) -> Dict:
+        """
+        批量保存多只基金的净值数据（全量刷新时使用）
+        
+        所有基金的记录合并后分批写入，元数据只为实际写入的基金更新。
+        
+        Args:
+            nav_data: {基金代码: 净值数据}
+            source: 数据来源
+            delta: 增量模式，只写入各基金最后同步日期之后的净值
+            chunk_size: 每批写入行数，默认 NAV_UPSERT_CHUNK_SIZE
+        
+        Returns:
+            Dict: 写入统计（funds, rows, skipped, batches, seconds, rows_per_second）
+        """
+        nav_data = {code: df for code, df in nav_data.items() if df is not None and not df.empty}
+        last_synced = self._get_last_synced_dates(list(nav_data)) if delta else {}
+        
+        frames = []
+        total_input = 0
+        for fund_code, df in nav_data.items():
+            total_input += len(df)
+            records = self._build_nav_records(fund_code, df, source, since=last_synced.get(fund_code))
+            if not records.empty:
+                frames.append(records)
+        
+        summary = {'funds': len(frames), 'rows': 0, 'skipped': total_input, 'batches': 0,
+                   'seconds': 0.0, 'rows_per_second': 0.0}
+        if not frames:
+            logger.info(f"数据库缓存无新增净值: {len(nav_data)}只基金")
+            return summary
+        
+        records = pd.concat(frames, ignore_index=True)
+        summary.update(self._bulk_upsert_nav(records, chunk_size))
+        summary['skipped'] = total_input - summary['rows']
+        
+        # 更新元数据
+        for fund_code, fund_records in records.groupby('fund_code', sort=False):
+            self._update_cache_metadata(fund_code, fund_records.rename(columns={'nav_date': 'date'}), source)
+        
+        logger.info(
+            f"保存到数据库缓存: {summary['funds']}只基金, {summary['rows']}条记录"
+            f"（跳过{summary['skipped']}条）, {summary['batches']}批, "
+            f"{summary['seconds']:.2f}s, {summary['rows_per_second']:.0f} 条/秒"
+        )
+        return summary
     
     def get_performance_from_db(self, fund_code: str) -> Optional[Dict]:
         """从数据库获取绩效指标（1天内有效）- 使用 fund_analysis_results 表"""
@@ -575,7 +669,7 @@ class FundNavCacheManager:
                 return None
             
             # 确保数据排序
-            df = df.sort_values('date')
+            df = df.sort_values('date').reset_index(drop=True)
             
             # 提取收益率序列
             daily_returns = pd.to_numeric(df['daily_return'], errors='coerce').dropna()
@@ -583,92 +677,28 @@ class FundNavCacheManager:
             if len(daily_returns) < 30:
                 return None
             
-            # 处理百分比格式
-            if abs(daily_returns.mean()) < 0.1:
-                daily_returns = daily_returns * 100
-            
-            # 获取配置
-            risk_free_rate = 0.02
-            trading_days = 250
-            
-            # 计算指标
-            nav_values = pd.to_numeric(df['nav'], errors='coerce').dropna()
-            
-            # 总收益率
-            total_return = (nav_values.iloc[-1] - nav_values.iloc[0]) / nav_values.iloc[0]
-            
-            # 年化收益率
-            years = len(df) / trading_days
-            annualized_return = (1 + total_return) ** (1 / max(years, 0.01)) - 1 if years > 0 else 0
-            
-            # 年化波动率
-            volatility = daily_returns.std() * np.sqrt(trading_days) / 100  # 转换为小数
-            
-            # 夏普比率（成立以来）- 使用全部数据
-            sharpe_ratio = (annualized_return - risk_free_rate) / volatility if volatility != 0 else 0
-            
-            # 计算不同时期的夏普比率
-            sharpe_ratio_1y = sharpe_ratio  # 默认使用全部数据
-            sharpe_ratio_ytd = sharpe_ratio  # 默认使用全部数据
-            sharpe_ratio_all = sharpe_ratio  # 成立以来
-            
-            # 根据日期范围分别计算近一年和今年以来的夏普比率
-            if 'date' in df.columns:
-                df_copy = df.copy()
-                df_copy['date'] = pd.to_datetime(df_copy['date'])
-                now = pd.Timestamp.now()
-                
-                # 计算近一年夏普比率
-                one_year_ago = now - pd.DateOffset(years=1)
-                last_year_data = df_copy[df_copy['date'] >= one_year_ago]
-                if len(last_year_data) >= 30:  # 至少30个交易日数据
-                    # 获取近一年的收益率序列
-                    start_idx = max(0, len(daily_returns) - len(last_year_data))
-                    last_year_returns = daily_returns.iloc[start_idx:]
-                    if len(last_year_returns) > 0:
-                        vol_1y = last_year_returns.std() * np.sqrt(trading_days) / 100
-                        # 计算近一年年化收益率
-                        nav_1y_start = pd.to_numeric(last_year_data['nav'].iloc[0], errors='coerce')
-                        nav_1y_end = pd.to_numeric(last_year_data['nav'].iloc[-1], errors='coerce')
-                        if pd.notna(nav_1y_start) and nav_1y_start != 0 and pd.notna(nav_1y_end):
-                            total_return_1y = (nav_1y_end - nav_1y_start) / nav_1y_start
-                            days_1y = len(last_year_data)
-                            annualized_return_1y = (1 + total_return_1y) ** (trading_days / max(days_1y, 1)) - 1
-                            sharpe_ratio_1y = (annualized_return_1y - risk_free_rate) / vol_1y if vol_1y != 0 else 0.0
-                
-                # 计算今年以来夏普比率
-                ytd_start = pd.Timestamp(year=now.year, month=1, day=1)
-                ytd_data = df_copy[df_copy['date'] >= ytd_start]
-                if len(ytd_data) >= 10:  # 至少10个交易日数据
-                    # 获取今年以来的收益率序列
-                    start_idx = max(0, len(daily_returns) - len(ytd_data))
-                    ytd_returns = daily_returns.iloc[start_idx:]
-                    if len(ytd_returns) > 0:
-                        vol_ytd = ytd_returns.std() * np.sqrt(trading_days) / 100
-                        # 计算今年以来年化收益率
-                        nav_ytd_start = pd.to_numeric(ytd_data['nav'].iloc[0], errors='coerce')
-                        nav_ytd_end = pd.to_numeric(ytd_data['nav'].iloc[-1], errors='coerce')
-                        if pd.notna(nav_ytd_start) and nav_ytd_start != 0 and pd.notna(nav_ytd_end):
-                            total_return_ytd = (nav_ytd_end - nav_ytd_start) / nav_ytd_start
-                            days_ytd = len(ytd_data)
-                            annualized_return_ytd = (1 + total_return_ytd) ** (trading_days / max(days_ytd, 1)) - 1 if days_ytd > 0 else 0.0
-                            sharpe_ratio_ytd = (annualized_return_ytd - risk_free_rate) / vol_ytd if vol_ytd != 0 else 0.0
-            
-            # 最大回撤
-            cumulative_max = nav_values.expanding().max()
-            drawdown = (nav_values - cumulative_max) / cumulative_max
-            max_drawdown = drawdown.min()
-            
-            # 卡玛比率
-            calmar_ratio = annualized_return / abs(max_drawdown) if max_drawdown != 0 else 0
-            
-            # 索提诺比率
-            negative_returns = daily_returns[daily_returns < 0] / 100  # 转换为小数
-            downside_deviation = negative_returns.std() * np.sqrt(trading_days) if len(negative_returns) > 0 else volatility
-            sortino_ratio = (annualized_return - risk_free_rate) / downside_deviation if downside_deviation != 0 else 0
-            
-            # VaR (95%)
-            var_95 = daily_returns.quantile(0.05) / 100  # 转换为小数
+            # 处理百分比格式（统一为小数）
+            if abs(daily_returns.mean()) >= 0.1:
+                daily_returns = daily_returns / 100
+            
+            # 近一年/今年以来以当前日期为锚，数据不足时沿用成立以来的夏普比率；回撤按净值计算
+            metrics = compute_cross_section_metrics(
+                pd.to_numeric(df['nav'], errors='coerce').to_numpy(),
+                dates=df['date'],
+                returns=align_returns(daily_returns, len(df)),
+                risk_free_rate=0.02,
+                trading_days=250,
+                as_of=pd.Timestamp.now(),
+                min_window_days={'1y': 30, 'ytd': 10},
+                short_window='all',
+                drawdown_basis='nav'
+            ).get(0)
+            
+            annualized_return = metrics['annualized_return']
+            max_drawdown = metrics['max_drawdown']
+            volatility = metrics['volatility']
+            sharpe_ratio = metrics['sharpe_ratio_all']
+            sharpe_ratio_1y = metrics['sharpe_ratio_1y']
             
             # 综合评分
             return_score = max(0, min(1, (annualized_return + 0.5) / 1.0))
@@ -690,11 +720,11 @@ class FundNavCacheManager:
                 'volatility': round(volatility * 100, 2),
                 'sharpe_ratio': round(sharpe_ratio_1y, 4) if sharpe_ratio_1y != sharpe_ratio else round(sharpe_ratio, 4),  # 默认使用近一年
                 'sharpe_ratio_1y': round(sharpe_ratio_1y, 4),
-                'sharpe_ratio_ytd': round(sharpe_ratio_ytd, 4),
-                'sharpe_ratio_all': round(sharpe_ratio_all, 4),
-                'calmar_ratio': round(calmar_ratio, 4),
-                'sortino_ratio': round(sortino_ratio, 4),
-                'var_95': round(var_95 * 100, 2),
+                'sharpe_ratio_ytd': round(metrics['sharpe_ratio_ytd'], 4),
+                'sharpe_ratio_all': round(sharpe_ratio, 4),
+                'calmar_ratio': round(metrics['calmar_ratio'], 4),
+                'sortino_ratio': round(metrics['sortino_ratio'], 4),
+                'var_95': round(metrics['var_95'] * 100, 2),
                 'composite_score': round(composite_score, 4),
                 'risk_score': round(risk_score, 4),
                 'return_score': round(return_score, 4),
@@ -733,11 +763,13 @@ class FundNavCacheManager:
     
     def get_cache_stats(self) -> Dict:
         """获取缓存统计信息"""
-        with self._cache_lock:
-            mem_stats = {
-                'total_entries': len(self._memory_cache),
-                'total_access': sum(e.access_count for e in self._memory_cache.values()),
-            }
+        nav_stats = self._memory_cache.get_stats()
+        mem_stats = {
+            'total_entries': nav_stats['size'],
+            'total_access': nav_stats['hits'] + nav_stats['misses'],
+            'bytes': nav_stats['bytes'],
+            'layers': nav_stats['layers'],
+        }
         
         db_stats = {'total_funds': 0, 'total_records': 0, 'perf_records': 0}
         
@@ -16,13 +16,23 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 import logging
+import re
 import requests
 import json
 import threading
 
 logger = logging.getLogger(__name__)
 
+# aiohttp 为可选依赖，缺失时批量实时数据回退到线程池模式
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
 # 交易日缓存
 _trading_dates_cache = None
 _trading_dates_cache_expiry = None
@@ -209,9 +219,34 @@ class RealtimeDataFetcher:
     3. 东方财富（备用）
     4. Tushare（稳定性高）
     5. AKShare（降级）
+
+    批量获取默认使用异步模式（需要 aiohttp）：
+    - 整批请求共享一个连接池
+    - 每个数据源独立限制并发数
+    - 对冲请求：当前数据源发出请求后 hedge_delay_ms 内未返回时，同时请求下一个数据源，先成功者胜出
+    - 有配额限制或开销大的数据源（Tushare/AKShare）不参与对冲，只在前面的数据源都失败后才请求
+    - 新浪接口将同一时间窗口内的多只基金合并为一次请求
+    - SDK 数据源在有界的专用线程池中执行并限时等待，卡住的调用不会拖住整批请求
     """
-    
-    def __init__(self, cache_ttl_seconds: int = 120):
+
+    TIANTIAN_URL = "http://fundgz.1234567.com.cn/js/{code}.js"
+    SINA_URL = "https://hq.sinajs.cn/list={codes}"
+    SINA_BATCH_SIZE = 50
+    SOURCE_ORDER = ('tiantian', 'sina', 'eastmoney', 'tushare', 'akshare')
+    # 不参与对冲的数据源：Tushare 按分钟限额，AKShare 需要下载完整净值历史
+    NO_HEDGE_SOURCES = frozenset({'tushare', 'akshare'})
+    # 异步模式下各数据源的并发上限（新浪按批计）
+    DEFAULT_SOURCE_CONCURRENCY = {
+        'tiantian': 16,
+        'sina': 4,
+        'eastmoney': 4,
+        'tushare': 2,
+        'akshare': 2,
+    }
+
+    def __init__(self, cache_ttl_seconds: int = 120, hedge_delay_ms: int = 300,
+                 source_concurrency: Optional[Dict[str, int]] = None,
+                 use_async: Optional[bool] = None, request_timeout: float = 5.0):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -220,6 +255,34 @@ class RealtimeDataFetcher:
         self._cache = {}
         self._cache_ttl = timedelta(seconds=cache_ttl_seconds)
         self._cache_lock = threading.RLock()
+
+        # 异步批量模式配置
+        self.hedge_delay_ms = hedge_delay_ms
+        self.request_timeout = request_timeout
+        self.source_order = self.SOURCE_ORDER
+        self.source_concurrency = dict(self.DEFAULT_SOURCE_CONCURRENCY)
+        if source_concurrency:
+            self.source_concurrency.update(source_concurrency)
+        self.use_async = AIOHTTP_AVAILABLE if use_async is None else (use_async and AIOHTTP_AVAILABLE)
+        self._sdk_executor = None
+        self._sdk_executor_lock = threading.Lock()
+
+    @property
+    def sdk_executor(self) -> ThreadPoolExecutor:
+        """
+        SDK 数据源专用线程池
+
+        不使用事件循环的默认线程池：asyncio.run 退出时会等待默认线程池中的线程结束，
+        卡住的 SDK 调用无法取消，会拖住整批请求。
+        """
+        if self._sdk_executor is None:
+            with self._sdk_executor_lock:
+                if self._sdk_executor is None:
+                    workers = sum(self.source_concurrency.get(source, 1)
+                                  for source in ('eastmoney', 'tushare', 'akshare'))
+                    self._sdk_executor = ThreadPoolExecutor(max_workers=max(1, workers),
+                                                            thread_name_prefix='realtime-sdk')
+        return self._sdk_executor
     
     def _get_cache_key(self, fund_code: str) -> str:
         """生成缓存键（按分钟级时间戳，2分钟有效期）"""
@@ -323,70 +386,83 @@ class RealtimeDataFetcher:
             logger.debug(f"AKShare获取失败 {fund_code}: {e}")
         
         logger.warning(f"所有实时数据源都失败: {fund_code}")
-        result = {
-            'current_nav': None,
-            'estimate_nav': None,
-            'today_return': 0.0,
-            'source': 'failed'
-        }
+        result = self._failed_result('failed')
         self._save_to_cache(fund_code, result)
         return result
     
     def _from_tiantian(self, fund_code: str) -> Optional[Dict]:
         """天天基金实时估值接口"""
-        url = f"http://fundgz.1234567.com.cn/js/{fund_code}.js"
-        response = self.session.get(url, timeout=5)
-        
-        if response.status_code == 200 and 'jsonpgz' in response.text:
-            json_str = response.text.replace('jsonpgz(', '').replace(');', '')
-            data = json.loads(json_str)
-            
-            gztime = data.get('gztime', '')
-            today = datetime.now().strftime('%Y-%m-%d')
-            
-            # 验证是今天数据
-            if today in gztime:
-                gszzl = float(data.get('gszzl', 0)) if data.get('gszzl') else 0.0
-                jzrq = data.get('jzrq', '')  # 最新确认净值日期
-                # gszzl=0 且净值日期不是今天：QDII/港股等开盘前估值未更新，
-                # 让后续数据源（Tushare/AKShare）尝试获取最新已确认涨跌幅
-                if gszzl == 0 and jzrq != today:
-                    return None
-                return {
-                    'current_nav': float(data.get('dwjz', 0)) if data.get('dwjz') else None,
-                    'estimate_nav': float(data.get('gsz', 0)) if data.get('gsz') else None,
-                    'today_return': gszzl,
-                    'source': 'tiantian'
-                }
+        url = self.TIANTIAN_URL.format(code=fund_code)
+        response = self.session.get(url, timeout=self.request_timeout)
+
+        if response.status_code == 200:
+            return self._parse_tiantian(response.text)
         return None
-    
+
+    @staticmethod
+    def _parse_tiantian(text: str) -> Optional[Dict]:
+        """解析天天基金估值接口返回的 jsonpgz(...) 文本"""
+        if 'jsonpgz' not in text:
+            return None
+        json_str = text.replace('jsonpgz(', '').replace(');', '')
+        data = json.loads(json_str)
+
+        gztime = data.get('gztime', '')
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        # 验证是今天数据
+        if today in gztime:
+            gszzl = float(data.get('gszzl', 0)) if data.get('gszzl') else 0.0
+            jzrq = data.get('jzrq', '')  # 最新确认净值日期
+            # gszzl=0 且净值日期不是今天：QDII/港股等开盘前估值未更新，
+            # 让后续数据源（Tushare/AKShare）尝试获取最新已确认涨跌幅
+            if gszzl == 0 and jzrq != today:
+                return None
+            return {
+                'current_nav': float(data.get('dwjz', 0)) if data.get('dwjz') else None,
+                'estimate_nav': float(data.get('gsz', 0)) if data.get('gsz') else None,
+                'today_return': gszzl,
+                'source': 'tiantian'
+            }
+        return None
+
     def _from_sina(self, fund_code: str) -> Optional[Dict]:
         """新浪实时接口"""
-        url = f"https://hq.sinajs.cn/list=f_{fund_code}"
+        url = self.SINA_URL.format(codes=f"f_{fund_code}")
         headers = {'Referer': 'https://finance.sina.com.cn'}
-        response = self.session.get(url, headers=headers, timeout=5)
-        
+        response = self.session.get(url, headers=headers, timeout=self.request_timeout)
+
         if response.status_code == 200:
-            data = response.text
-            key = f'f_{fund_code}="'
-            if key in data:
-                parts = data.split('"')[1].split(',')
-                if len(parts) >= 6:
-                    current_nav = float(parts[1]) if parts[1] else None
-                    prev_nav = float(parts[3]) if len(parts) > 3 and parts[3] else None
-                    
-                    # 新浪接口的涨跌幅字段不可靠，直接使用计算值
-                    today_return = 0.0
-                    if current_nav and prev_nav and prev_nav > 0:
-                        today_return = round((current_nav - prev_nav) / prev_nav * 100, 2)
-                    
-                    return {
-                        'current_nav': current_nav,
-                        'estimate_nav': current_nav,
-                        'today_return': today_return,
-                        'source': 'sina'
-                    }
+            return self._parse_sina(response.text).get(fund_code)
         return None
+
+    @staticmethod
+    def _parse_sina(text: str) -> Dict[str, Dict]:
+        """
+        解析新浪行情接口文本，支持一次返回多只基金
+
+        每只基金一行：var hq_str_f_000001="名称,净值,累计净值,前一日净值,...";
+        """
+        results = {}
+        for fund_code, payload in re.findall(r'f_(\w+)="([^"]*)"', text):
+            parts = payload.split(',')
+            if len(parts) < 6:
+                continue
+            current_nav = float(parts[1]) if parts[1] else None
+            prev_nav = float(parts[3]) if parts[3] else None
+
+            # 新浪接口的涨跌幅字段不可靠，直接使用计算值
+            today_return = 0.0
+            if current_nav and prev_nav and prev_nav > 0:
+                today_return = round((current_nav - prev_nav) / prev_nav * 100, 2)
+
+            results[fund_code] = {
+                'current_nav': current_nav,
+                'estimate_nav': current_nav,
+                'today_return': today_return,
+                'source': 'sina'
+            }
+        return results
     
     def _from_eastmoney(self, fund_code: str) -> Optional[Dict]:
         """东方财富实时接口"""
@@ -429,6 +505,11 @@ class RealtimeDataFetcher:
             
             ts_pro = ts.pro_api(token)
             
+            # 与其他 Tushare 调用共用按分钟计的配额，实时请求不长时间排队
+            from data_retrieval.utils.rate_limiter import get_tushare_limiter
+            if not get_tushare_limiter('fund_nav').try_acquire(timeout=self.request_timeout):
+                return None
+            
             # Tushare 需要 .OF 后缀
             ts_code = fund_code if fund_code.endswith('.OF') else f"{fund_code}.OF"
             
@@ -483,17 +564,35 @@ class RealtimeDataFetcher:
             }
         return None
     
-    def get_batch_realtime(self, fund_codes: List[str], max_workers: int = 5) -> Dict[str, Dict]:
+    def get_batch_realtime(self, fund_codes: List[str], max_workers: int = 5,
+                           mode: Optional[str] = None) -> Dict[str, Dict]:
         """
         批量获取实时数据（并行请求）
         
         Args:
             fund_codes: 基金代码列表
-            max_workers: 最大并发数
+            max_workers: 线程池模式的最大并发数
+            mode: 'async'（aiohttp + 对冲请求）或 'thread'（线程池），默认按 aiohttp 是否可用选择
         
         Returns:
             Dict[code, data]
         """
+        mode = mode or ('async' if self.use_async else 'thread')
+        if mode == 'async':
+            if not AIOHTTP_AVAILABLE:
+                logger.warning("aiohttp 未安装，批量实时数据回退到线程池模式")
+            else:
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return asyncio.run(self.get_batch_realtime_async(fund_codes))
+                # 已处于事件循环中（调用方应直接 await get_batch_realtime_async）
+                logger.debug("当前线程已有运行中的事件循环，批量实时数据使用线程池模式")
+
+        return self._get_batch_realtime_threaded(fund_codes, max_workers)
+
+    def _get_batch_realtime_threaded(self, fund_codes: List[str], max_workers: int = 5) -> Dict[str, Dict]:
+        """线程池模式：每只基金在独立线程中按优先级依次尝试各数据源"""
         results = {}
         
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -508,15 +607,218 @@ class RealtimeDataFetcher:
                     results[code] = future.result()
                 except Exception as e:
                     logger.error(f"获取 {code} 实时数据失败: {e}")
-                    results[code] = {
-                        'current_nav': None,
-                        'estimate_nav': None,
-                        'today_return': 0.0,
-                        'source': 'error'
-                    }
+                    results[code] = self._failed_result('error')
         
         return results
 
+    async def get_batch_realtime_async(self, fund_codes: List[str], session=None) -> Dict[str, Dict]:
+        """
+        异步批量获取实时数据
+
+        Args:
+            fund_codes: 基金代码列表
+            session: 可选的 aiohttp.ClientSession（长连接复用），不传时为本批请求创建共享连接池
+
+        Returns:
+            Dict[code, data]
+        """
+        results = {}
+        pending = []
+        for code in dict.fromkeys(fund_codes):
+            cached = self._get_from_cache(code)
+            if cached:
+                results[code] = cached
+            else:
+                pending.append(code)
+        if not pending:
+            return results
+
+        started = datetime.now()
+        own_session = session is None
+        if own_session:
+            connector = aiohttp.TCPConnector(limit=sum(self.source_concurrency.values()), ttl_dns_cache=300)
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers=dict(self.session.headers),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+
+        context = _AsyncFetchContext(self, session)
+        try:
+            fetched = await asyncio.gather(*(self._fetch_hedged(context, code) for code in pending))
+        finally:
+            context.close()
+            if own_session:
+                await session.close()
+
+        for code, data in zip(pending, fetched):
+            self._save_to_cache(code, data)
+            results[code] = data
+
+        elapsed = (datetime.now() - started).total_seconds()
+        sources = pd.Series([data['source'] for data in fetched]).value_counts().to_dict()
+        logger.info(f"异步获取 {len(pending)} 只基金实时数据完成，耗时 {elapsed:.2f}s，来源分布: {sources}")
+        return results
+
+    async def _fetch_hedged(self, context: '_AsyncFetchContext', fund_code: str) -> Dict:
+        """
+        对冲请求：按优先级启动数据源，当前数据源发出请求后 hedge_delay_ms 内未返回
+        或已失败时立即启动下一个，已启动的请求继续等待，取最先成功的结果
+
+        对冲计时从请求拿到数据源并发许可后开始，仅在信号量上排队的请求不会触发对冲；
+        NO_HEDGE_SOURCES 中的数据源只在已启动的请求全部失败后才启动。
+        """
+        hedge_delay = self.hedge_delay_ms / 1000
+        sources = self.source_order
+        running = {}
+        next_index = 0
+
+        def can_hedge(index):
+            return index < len(sources) and sources[index] not in self.NO_HEDGE_SOURCES
+
+        try:
+            while next_index < len(sources) or running:
+                if next_index < len(sources) and (not running or can_hedge(next_index)):
+                    started = asyncio.Event()
+                    task = asyncio.ensure_future(context.fetch(sources[next_index], fund_code, started))
+                    running[task] = next_index
+                    next_index += 1
+                    if can_hedge(next_index):
+                        waiter = asyncio.ensure_future(started.wait())
+                        try:
+                            await asyncio.wait([*running, waiter], return_when=asyncio.FIRST_COMPLETED)
+                        finally:
+                            waiter.cancel()
+
+                timeout = hedge_delay if can_hedge(next_index) else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                # 同一轮有多个完成时按优先级取结果
+                for task in sorted(done, key=running.get):
+                    source = sources[running.pop(task)]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.debug(f"{source} 获取失败 {fund_code}: {e}")
+                        continue
+                    if result:
+                        return result
+        finally:
+            for task in running:
+                task.cancel()
+
+        logger.warning(f"所有实时数据源都失败: {fund_code}")
+        return self._failed_result('failed')
+
+    @staticmethod
+    def _failed_result(source: str) -> Dict:
+        return {
+            'current_nav': None,
+            'estimate_nav': None,
+            'today_return': 0.0,
+            'source': source
+        }
+
+
+class _AsyncFetchContext:
+    """
+    单次异步批量请求的上下文
+
+    持有共享 session、各数据源的并发信号量，以及新浪请求的合并窗口：
+    同一轮对冲中需要新浪数据的基金会被合并为一次多代码请求
+    """
+
+    # 合并窗口：对冲请求几乎同时触发，窗口内到达的代码合并为一批
+    SINA_BATCH_WINDOW = 0.01
+
+    def __init__(self, fetcher: RealtimeDataFetcher, session):
+        self.fetcher = fetcher
+        self.session = session
+        self.semaphores = {
+            source: asyncio.Semaphore(max(1, limit))
+            for source, limit in fetcher.source_concurrency.items()
+        }
+        self._sina_pending: Dict[str, asyncio.Future] = {}
+        self._sina_started: Dict[str, asyncio.Event] = {}
+        self._sina_flush_handle = None
+
+    def close(self):
+        """取消尚未触发的新浪合并请求"""
+        if self._sina_flush_handle is not None:
+            self._sina_flush_handle.cancel()
+            self._sina_flush_handle = None
+
+    def _semaphore(self, source: str) -> asyncio.Semaphore:
+        if source not in self.semaphores:
+            self.semaphores[source] = asyncio.Semaphore(1)
+        return self.semaphores[source]
+
+    async def fetch(self, source: str, fund_code: str, started: Optional[asyncio.Event] = None) -> Optional[Dict]:
+        """请求单个数据源；拿到该数据源的并发许可、真正发出请求时设置 started"""
+        started = started or asyncio.Event()
+        if source == 'tiantian':
+            async with self._semaphore(source):
+                started.set()
+                url = self.fetcher.TIANTIAN_URL.format(code=fund_code)
+                async with self.session.get(url) as response:
+                    if response.status != 200:
+                        return None
+                    text = await response.text()
+            return self.fetcher._parse_tiantian(text)
+
+        if source == 'sina':
+            return await self._fetch_sina(fund_code, started)
+
+        # 基于 SDK 的数据源（东方财富/Tushare/AKShare）在专用线程池中执行，超时后不再等待
+        async with self._semaphore(source):
+            started.set()
+            loop = asyncio.get_running_loop()
+            call = loop.run_in_executor(self.fetcher.sdk_executor,
+                                        getattr(self.fetcher, f'_from_{source}'), fund_code)
+            return await asyncio.wait_for(call, timeout=self.fetcher.request_timeout)
+
+    async def _fetch_sina(self, fund_code: str, started: asyncio.Event) -> Optional[Dict]:
+        future = self._sina_pending.get(fund_code)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._sina_pending[fund_code] = future
+            self._sina_started[fund_code] = started
+            if len(self._sina_pending) >= self.fetcher.SINA_BATCH_SIZE:
+                self._flush_sina()
+            elif self._sina_flush_handle is None:
+                self._sina_flush_handle = asyncio.get_running_loop().call_later(
+                    self.SINA_BATCH_WINDOW, self._flush_sina
+                )
+        # shield：单只基金的对冲请求被取消时不影响同批其他基金
+        return await asyncio.shield(future)
+
+    def _flush_sina(self):
+        if self._sina_flush_handle is not None:
+            self._sina_flush_handle.cancel()
+            self._sina_flush_handle = None
+        batch, self._sina_pending = self._sina_pending, {}
+        started, self._sina_started = self._sina_started, {}
+        if batch:
+            asyncio.ensure_future(self._run_sina_batch(batch, started))
+
+    async def _run_sina_batch(self, batch: Dict[str, asyncio.Future], started: Dict[str, asyncio.Event]):
+        data = {}
+        try:
+            async with self._semaphore('sina'):
+                for event in started.values():
+                    event.set()
+                url = self.fetcher.SINA_URL.format(codes=','.join(f"f_{code}" for code in batch))
+                headers = {'Referer': 'https://finance.sina.com.cn'}
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 200:
+                        data = self.fetcher._parse_sina(await response.text(encoding='gbk', errors='ignore'))
+        except Exception as e:
+            logger.debug(f"新浪批量获取失败 {list(batch)}: {e}")
+
+        for code, future in batch.items():
+            if not future.done():
+                future.set_result(data.get(code))
+
 
 class HoldingRealtimeService:
     """
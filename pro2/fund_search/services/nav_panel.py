@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+内存净值面板
+
+以列式矩阵保存全部基金的历史净值，替代每只基金一份 df.to_dict('records')：
+- 每个字段一个 (日期 × 基金) 矩阵，按列存储（order='F'），单只基金的序列在内存中连续
+- 日期轴为所有基金日期的并集，基金在自身起止区间之外为 NaN
+- 基金代码 → 列号索引，单只基金的读取返回零拷贝视图
+- 追加新交易日时按倍数扩容，避免每日更新都重新分配整个矩阵
+
+使用示例:
+    panel = NavPanel()
+    panel.upsert({'000001': df1, '000002': df2})
+    nav = panel.get_fund_values('000001')          # np.ndarray 视图
+    hist = panel.get_fund_nav_history('000001')     # DataFrame（列为视图）
+    dates, matrix, codes = panel.get_matrix('nav')  # 整个面板，用于向量化计算
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 数据源列名 → 面板字段名
+COLUMN_ALIASES = {
+    '净值日期': 'date',
+    'nav_date': 'date',
+    '单位净值': 'nav',
+    'unit_nav': 'nav',
+    'nav_value': 'nav',
+    '累计净值': 'accum_nav',
+    '日增长率': 'daily_return',
+}
+
+DEFAULT_FIELDS = ('nav', 'accum_nav', 'daily_return')
+
+_DATE_DTYPE = 'datetime64[ns]'
+
+
+class NavPanel:
+    """
+    列式净值面板
+
+    写入在锁内完成；读取返回的视图在之后的扩容中仍然有效（指向扩容前的数组），
+    但同一位置被后续写入覆盖时视图会看到新值。
+    """
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS, dtype=np.float64,
+                 max_age_seconds: Optional[float] = None):
+        """
+        Args:
+            fields: 保存的数值字段
+            dtype: 矩阵数据类型（float64 或 float32）
+            max_age_seconds: 单只基金数据的有效期，超过后视为缺失；None 表示不过期
+        """
+        self.fields = tuple(fields)
+        self.dtype = np.dtype(dtype)
+        self.max_age_seconds = max_age_seconds
+
+        self._dates = np.empty(0, dtype=_DATE_DTYPE)
+        self._values = {field: self._allocate(0, 0) for field in self.fields}
+        self._n_rows = 0
+        self._n_cols = 0
+
+        self._code_index: Dict[str, int] = {}
+        self._codes: List[str] = []
+        self._first_row = np.empty(0, dtype=np.int64)
+        self._last_row = np.empty(0, dtype=np.int64)
+        self._updated_at = np.empty(0, dtype=np.float64)
+
+        self._lock = threading.RLock()
+
+    def _allocate(self, rows: int, cols: int) -> np.ndarray:
+        return np.full((rows, cols), np.nan, dtype=self.dtype, order='F')
+
+    # ==================== 写入 ====================
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame, fields: Tuple[str, ...]) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """提取排序去重后的日期数组和各字段数值数组"""
+        if df is None or df.empty:
+            return None
+        df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if k in df.columns})
+        if 'date' not in df.columns:
+            return None
+
+        dates = pd.to_datetime(df['date'], errors='coerce').values.astype(_DATE_DTYPE)
+        valid = ~np.isnat(dates)
+        if not valid.any():
+            return None
+        order = np.argsort(dates[valid], kind='stable')
+        dates = dates[valid][order]
+        # 同一日期保留最后一条
+        keep = np.r_[dates[1:] != dates[:-1], True]
+
+        columns = {}
+        for field in fields:
+            if field in df.columns:
+                values = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=np.float64)
+                columns[field] = values[valid][order][keep]
+        return dates[keep], columns
+
+    def upsert(self, frames: Dict[str, pd.DataFrame]) -> int:
+        """
+        写入多只基金的净值，已有日期的数值被覆盖，其余日期保留
+
+        Args:
+            frames: {基金代码: 包含 date 及数值字段的 DataFrame}
+
+        Returns:
+            写入的基金数量
+        """
+        normalized = {}
+        for code, df in frames.items():
+            item = self._normalize(df, self.fields)
+            if item is not None:
+                normalized[code] = item
+        if not normalized:
+            return 0
+
+        new_dates = np.unique(np.concatenate([dates for dates, _ in normalized.values()]))
+        now = time.time()
+
+        with self._lock:
+            self._ensure_dates(new_dates)
+            self._ensure_columns([code for code in normalized if code not in self._code_index])
+
+            dates_axis = self._dates[:self._n_rows]
+            for code, (dates, columns) in normalized.items():
+                col = self._code_index[code]
+                rows = np.searchsorted(dates_axis, dates)
+                for field in self.fields:
+                    values = columns.get(field)
+                    self._values[field][rows, col] = np.nan if values is None else values
+
+                if self._first_row[col] < 0:
+                    self._first_row[col] = rows[0]
+                    self._last_row[col] = rows[-1]
+                else:
+                    self._first_row[col] = min(self._first_row[col], rows[0])
+                    self._last_row[col] = max(self._last_row[col], rows[-1])
+                self._updated_at[col] = now
+
+        return len(normalized)
+
+    def _ensure_dates(self, new_dates: np.ndarray):
+        """把新日期并入日期轴：尾部追加按倍数扩容，中间插入时重建矩阵"""
+        current = self._dates[:self._n_rows]
+        missing = np.setdiff1d(new_dates, current, assume_unique=True)
+        if missing.size == 0:
+            return
+
+        if self._n_rows == 0 or missing[0] > current[-1]:
+            needed = self._n_rows + missing.size
+            if needed > len(self._dates):
+                capacity = max(needed, 2 * len(self._dates), 64)
+                self._resize(capacity, self._values_capacity_cols())
+            self._dates[self._n_rows:needed] = missing
+            self._n_rows = needed
+            return
+
+        merged = np.union1d(current, missing)
+        positions = np.searchsorted(merged, current)
+        capacity = max(len(merged), len(self._dates))
+        cols = self._values_capacity_cols()
+        for field in self.fields:
+            rebuilt = self._allocate(capacity, cols)
+            rebuilt[positions, :] = self._values[field][:self._n_rows, :]
+            self._values[field] = rebuilt
+        dates = np.empty(capacity, dtype=_DATE_DTYPE)
+        dates[:len(merged)] = merged
+        self._dates = dates
+        self._n_rows = len(merged)
+
+        has_data = self._first_row[:self._n_cols] >= 0
+        self._first_row[:self._n_cols][has_data] = positions[self._first_row[:self._n_cols][has_data]]
+        self._last_row[:self._n_cols][has_data] = positions[self._last_row[:self._n_cols][has_data]]
+
+    def _values_capacity_cols(self) -> int:
+        return self._values[self.fields[0]].shape[1]
+
+    def _ensure_columns(self, codes: List[str]):
+        if not codes:
+            return
+        needed = self._n_cols + len(codes)
+        capacity_cols = self._values_capacity_cols()
+        if needed > capacity_cols:
+            capacity_cols = max(needed, 2 * capacity_cols, 16)
+            self._resize(len(self._dates), capacity_cols)
+            self._first_row = np.r_[self._first_row, np.full(capacity_cols - len(self._first_row), -1)]
+            self._last_row = np.r_[self._last_row, np.full(capacity_cols - len(self._last_row), -1)]
+            self._updated_at = np.r_[self._updated_at, np.zeros(capacity_cols - len(self._updated_at))]
+
+        for code in codes:
+            self._code_index[code] = self._n_cols
+            self._codes.append(code)
+            self._first_row[self._n_cols] = -1
+            self._last_row[self._n_cols] = -1
+            self._n_cols += 1
+
+    def _resize(self, rows: int, cols: int):
+        for field in self.fields:
+            resized = self._allocate(rows, cols)
+            old = self._values[field]
+            resized[:old.shape[0], :old.shape[1]] = old
+            self._values[field] = resized
+        if rows != len(self._dates):
+            dates = np.empty(rows, dtype=_DATE_DTYPE)
+            dates[:self._n_rows] = self._dates[:self._n_rows]
+            self._dates = dates
+
+    def clear(self):
+        """清空面板"""
+        with self._lock:
+            self.__init__(self.fields, self.dtype, self.max_age_seconds)
+
+    # ==================== 读取 ====================
+
+    def _column(self, code: str) -> Optional[int]:
+        col = self._code_index.get(code)
+        if col is None or self._first_row[col] < 0:
+            return None
+        if self.max_age_seconds is not None and time.time() - self._updated_at[col] > self.max_age_seconds:
+            return None
+        return col
+
+    def __contains__(self, code: str) -> bool:
+        return self._column(code) is not None
+
+    def __len__(self) -> int:
+        return self._n_cols
+
+    @property
+    def codes(self) -> List[str]:
+        return list(self._codes)
+
+    def get_fund_values(self, code: str, field: str = 'nav') -> Optional[np.ndarray]:
+        """单只基金在其起止区间内的数值（零拷贝视图，只读）"""
+        with self._lock:
+            col = self._column(code)
+            if col is None:
+                return None
+            view = self._values[field][self._first_row[col]:self._last_row[col] + 1, col]
+        view = view.view()
+        view.flags.writeable = False
+        return view
+
+    def get_fund_dates(self, code: str) -> Optional[np.ndarray]:
+        with self._lock:
+            col = self._column(code)
+            if col is None:
+                return None
+            return self._dates[self._first_row[col]:self._last_row[col] + 1]
+
+    def get_fund_nav_history(self, code: str) -> Optional[pd.DataFrame]:
+        """
+        单只基金的历史净值 DataFrame
+
+        各列直接引用面板内存；区间内存在缺失日期（其他基金有净值而本基金没有）时才会拷贝过滤
+        """
+        with self._lock:
+            col = self._column(code)
+            if col is None:
+                return None
+            start, stop = self._first_row[col], self._last_row[col] + 1
+            data = {'date': self._dates[start:stop]}
+            for field in self.fields:
+                data[field] = self._values[field][start:stop, col]
+
+        df = pd.DataFrame(data, copy=False)
+        nav = data.get('nav')
+        if nav is not None and np.isnan(nav).any():
+            df = df[~np.isnan(nav)].reset_index(drop=True)
+        return df
+
+    def get_matrix(self, field: str = 'nav',
+                   codes: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        返回 (日期轴, 矩阵, 基金代码)
+
+        codes 为空时返回整个面板的视图；指定 codes 时按顺序选取（拷贝），不存在的代码被跳过
+        """
+        with self._lock:
+            dates = self._dates[:self._n_rows]
+            matrix = self._values[field][:self._n_rows, :self._n_cols]
+            if codes is None:
+                selected = [code for code in self._codes if self._column(code) is not None]
+                if len(selected) == self._n_cols:
+                    return dates, matrix, selected
+            else:
+                selected = [code for code in codes if self._column(code) is not None]
+            columns = [self._code_index[code] for code in selected]
+            return dates, matrix[:, columns], selected
+
+    def memory_bytes(self) -> int:
+        """面板占用的内存（含预留容量）"""
+        return int(sum(values.nbytes for values in self._values.values()) + self._dates.nbytes)
+
+    def get_stats(self) -> Dict:
+        return {
+            'funds': self._n_cols,
+            'dates': self._n_rows,
+            'fields': list(self.fields),
+            'dtype': str(self.dtype),
+            'memory_mb': round(self.memory_bytes() / 1024 / 1024, 2),
+        }
+
+    # ==================== 跨进程传输 ====================
+
+    def to_payload(self, code: str) -> Optional[Dict]:
+        """单只基金的紧凑列式数据（numpy 数组），用于写入共享缓存层"""
+        df = self.get_fund_nav_history(code)
+        if df is None:
+            return None
+        payload = {'dates': df['date'].values.astype('int64')}
+        for field in self.fields:
+            payload[field] = df[field].to_numpy(dtype=self.dtype, copy=True)
+        return payload
+
+    @staticmethod
+    def payload_to_frame(payload: Dict) -> Optional[pd.DataFrame]:
+        """to_payload 的逆操作，兼容旧版 {'records', 'columns'} 格式"""
+        if not payload:
+            return None
+        if 'records' in payload:
+            return pd.DataFrame(payload['records'], columns=payload.get('columns'))
+        if 'dates' not in payload:
+            return None
+        data = {'date': pd.to_datetime(np.asarray(payload['dates'], dtype='int64'))}
+        for key, values in payload.items():
+            if key != 'dates':
+                data[key] = values
+        return pd.DataFrame(data)
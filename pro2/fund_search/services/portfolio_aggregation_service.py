@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+持仓组合聚合服务
+Portfolio Aggregation Service
+
+持仓看板的多个接口（组合绩效、组合优化、持仓分布、重仓股）共用同一份用户数据：
+- load_snapshot 用一组批量查询读取用户持仓、各基金最新绩效指标、基金类型和重仓股，
+  结果按用户缓存一小段时间，同一次页面加载触发的多个接口不再重复查库
+- 权重、加权指标、类型分布和重仓股暴露都在 DataFrame 上用向量化运算和 groupby 完成
+
+持仓写入（新增、修改、删除、导入、清空）后调用 invalidate 使缓存失效。
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from shared.fund_helpers import get_fund_types_for_allocation
+
+logger = logging.getLogger(__name__)
+
+# 快照缓存时间（秒）
+DEFAULT_SNAPSHOT_TTL = 30
+
+# 各基金最新绩效指标的列
+METRIC_COLUMNS = ['annualized_return', 'sharpe_ratio', 'max_drawdown', 'volatility', 'win_rate',
+                  'today_return', 'prev_day_return', 'current_estimate', 'yesterday_nav']
+
+# 重仓股的列
+STOCK_COLUMNS = ['fund_code', 'stock_code', 'stock_name', 'holding_ratio', 'report_period']
+
+
+@dataclass
+class PortfolioSnapshot:
+    """
+    一个用户的持仓快照
+
+    holdings: 每只基金一行（fund_code, fund_name, holding_shares, cost_price, holding_amount,
+              amount, fund_type），amount = 持仓份额 × 成本价
+    metrics: 以 fund_code 为索引的最新绩效指标
+    stocks: 持仓基金最新报告期的重仓股（fund_code, stock_code, stock_name, holding_ratio, report_period）
+    """
+    user_id: str
+    holdings: pd.DataFrame
+    metrics: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=METRIC_COLUMNS))
+    stocks: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=STOCK_COLUMNS))
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def fund_codes(self) -> List[str]:
+        return self.holdings['fund_code'].tolist()
+
+    def weights(self, fund_codes: Optional[Sequence[str]] = None, column: str = 'holding_amount') -> pd.Series:
+        """持仓权重，见 holding_weights"""
+        return holding_weights(self.holdings, fund_codes, column)
+
+    def type_distribution(self) -> pd.DataFrame:
+        """按基金类型统计持仓金额和基金数量，金额降序"""
+        return group_distribution(self.holdings, 'fund_type', 'amount')
+
+    def fund_stocks(self, fund_codes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """指定基金（None 表示全部持仓基金）的重仓股"""
+        if fund_codes is None:
+            return self.stocks
+        return self.stocks[self.stocks['fund_code'].isin([str(code) for code in fund_codes])].reset_index(drop=True)
+
+    def stock_exposure(self, fund_codes: Optional[Sequence[str]] = None, top_n: Optional[int] = 10) -> pd.DataFrame:
+        """
+        按持仓权重加权的重仓股暴露（组合层面持有每只股票的比例）
+
+        权重见 weights(fund_codes)：未持有这些基金时等权
+        """
+        stocks = self.fund_stocks(fund_codes)
+        if stocks.empty:
+            return _empty_exposure()
+        names = dict(zip(self.holdings['fund_code'], self.holdings['fund_name'])) if not self.holdings.empty else {}
+        return stock_exposure(stocks, self.weights(fund_codes), top_n, fund_names=names)
+
+
+def holding_weights(holdings: pd.DataFrame, fund_codes: Optional[Sequence[str]] = None,
+                    column: str = 'holding_amount') -> pd.Series:
+    """
+    持仓权重
+
+    fund_codes 为 None 时使用全部持仓；给定 fund_codes 时只在这些基金内归一化，
+    持仓金额合计为 0（或没有持仓）时等权分配，未持有的基金权重为 0。
+
+    Returns:
+        pd.Series: 基金代码 -> 权重
+    """
+    if fund_codes is None:
+        fund_codes = holdings['fund_code'].tolist() if not holdings.empty else []
+    fund_codes = list(dict.fromkeys(fund_codes))
+    if holdings.empty:
+        amounts = pd.Series(dtype=float)
+    else:
+        selected = holdings[holdings['fund_code'].isin(fund_codes)]
+        amounts = pd.to_numeric(selected[column], errors='coerce').fillna(0).groupby(selected['fund_code']).sum()
+    total = amounts.sum()
+    if total > 0:
+        return (amounts / total).reindex(fund_codes, fill_value=0.0)
+    if not fund_codes:
+        return pd.Series(dtype=float)
+    return pd.Series(1.0 / len(fund_codes), index=fund_codes)
+
+
+def weighted_sum(values: pd.DataFrame, weights: pd.Series, columns: Iterable[str]) -> Dict[str, float]:
+    """
+    各列按权重求和，NaN / inf 项不计入（与逐项跳过无效值的加总一致）
+
+    Args:
+        values: 以基金代码为索引的指标表
+        weights: 基金代码 -> 权重
+        columns: 需要加权的列
+    """
+    columns = list(columns)
+    if values.empty:
+        return {col: 0.0 for col in columns}
+    aligned = weights.reindex(values.index).fillna(0).to_numpy()
+    matrix = values[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float) * aligned[:, None]
+    matrix[~np.isfinite(matrix)] = 0.0
+    return dict(zip(columns, matrix.sum(axis=0).tolist()))
+
+
+def group_distribution(frame: pd.DataFrame, key: str, value: str) -> pd.DataFrame:
+    """
+    按 key 分组统计 value 合计、占比（百分比）和行数，按合计降序
+
+    Returns:
+        pd.DataFrame: 列为 key, amount, count, percentage
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=[key, 'amount', 'count', 'percentage'])
+    grouped = frame.groupby(key, sort=False).agg(amount=(value, 'sum'), count=(value, 'size')).reset_index()
+    total = grouped['amount'].sum()
+    grouped['percentage'] = grouped['amount'] / total * 100 if total else 0.0
+    return grouped.sort_values('amount', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _empty_exposure() -> pd.DataFrame:
+    return pd.DataFrame(columns=['stock_code', 'stock_name', 'proportion', 'fund_count', 'related_funds'])
+
+
+def stock_exposure(stocks: pd.DataFrame, weights: Optional[pd.Series] = None, top_n: Optional[int] = 10,
+                   ratio_column: str = 'holding_ratio', fund_names: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    重仓股暴露：各基金的个股持仓比例按基金权重加总
+
+    Args:
+        stocks: 每行一只基金的一只重仓股（fund_code, stock_code, stock_name, ratio_column），
+                股票代码或名称为空的行不计入
+        weights: 基金代码 -> 权重，None 表示各基金权重为 1（直接加总）
+        top_n: 返回的股票数量，None 表示全部
+        ratio_column: 个股占基金净值比例的列
+        fund_names: 基金代码 -> 基金名称，用于 related_funds
+
+    Returns:
+        pd.DataFrame: stock_code, stock_name, proportion, fund_count, related_funds，按 proportion 降序；
+        related_funds 为 [{'fund_code', 'fund_name', 'proportion'}]，每只基金只出现一次（取首次出现的比例）
+    """
+    if stocks.empty:
+        return _empty_exposure()
+    frame = stocks.dropna(subset=['stock_code', 'stock_name']).copy()
+    frame['stock_code'] = frame['stock_code'].astype(str)
+    frame['stock_name'] = frame['stock_name'].astype(str)
+    frame['fund_code'] = frame['fund_code'].astype(str)
+    frame['_ratio'] = pd.to_numeric(frame[ratio_column], errors='coerce').fillna(0.0)
+    if weights is not None:
+        frame['_ratio'] = frame['_ratio'] * frame['fund_code'].map(weights).fillna(0.0)
+
+    keys = ['stock_code', 'stock_name']
+    totals = frame.groupby(keys)['_ratio'].sum().rename('proportion')
+    totals = totals.sort_values(ascending=False, kind='stable')
+    if top_n is not None:
+        totals = totals.head(top_n)
+
+    # 只为入选的股票整理关联基金
+    related = frame[frame['fund_code'] != ''].drop_duplicates(keys + ['fund_code'])
+    related = related.set_index(keys).loc[lambda df: df.index.isin(totals.index)]
+    names = fund_names or {}
+    related_funds = {}
+    for key, group in related.groupby(level=[0, 1], sort=False):
+        related_funds[key] = [
+            {'fund_code': code, 'fund_name': names.get(code, code), 'proportion': round(float(ratio), 2)}
+            for code, ratio in zip(group['fund_code'], pd.to_numeric(group[ratio_column], errors='coerce').fillna(0.0))
+        ]
+
+    result = totals.reset_index()
+    result['related_funds'] = [related_funds.get(key, []) for key in zip(result['stock_code'], result['stock_name'])]
+    result['fund_count'] = result['related_funds'].map(len)
+    return result[['stock_code', 'stock_name', 'proportion', 'fund_count', 'related_funds']]
+
+
+class PortfolioAggregationService:
+    """持仓组合聚合服务（快照按用户缓存，线程安全）"""
+
+    def __init__(self, db_manager, ttl: float = DEFAULT_SNAPSHOT_TTL):
+        self.db_manager = db_manager
+        self.ttl = ttl
+        self._snapshots: Dict[str, PortfolioSnapshot] = {}
+        self._lock = threading.Lock()
+        # 同一用户的并发加载只查一次库
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def load_snapshot(self, user_id: str = 'default_user') -> PortfolioSnapshot:
+        """获取用户持仓快照，缓存过期或不存在时批量查询"""
+        cached = self._cached(user_id)
+        if cached is not None:
+            return cached
+        with self._lock:
+            user_lock = self._loading.setdefault(user_id, threading.Lock())
+        with user_lock:
+            cached = self._cached(user_id)
+            if cached is not None:
+                return cached
+            snapshot = self._load(user_id)
+            with self._lock:
+                self._snapshots[user_id] = snapshot
+            return snapshot
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """使用户（None 表示所有用户）的快照失效"""
+        with self._lock:
+            if user_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(user_id, None)
+
+    def _cached(self, user_id: str) -> Optional[PortfolioSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+        if snapshot is None or time.time() - snapshot.loaded_at > self.ttl:
+            return None
+        return snapshot
+
+    def _load(self, user_id: str) -> PortfolioSnapshot:
+        started = time.perf_counter()
+        holdings = self._query_holdings(user_id)
+        fund_codes = holdings['fund_code'].tolist()
+        types = get_fund_types_for_allocation(fund_codes, self.db_manager) if fund_codes else {}
+        holdings['fund_type'] = holdings['fund_code'].map(types).fillna('unknown')
+        metrics = self._query_metrics(fund_codes)
+        stocks = self._query_stocks(fund_codes)
+        logger.debug(f"持仓快照加载完成: user_id={user_id}, 基金 {len(fund_codes)} 只, "
+                     f"耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+        return PortfolioSnapshot(user_id, holdings, metrics, stocks)
+
+    def _query_holdings(self, user_id: str) -> pd.DataFrame:
+        sql = """
+            SELECT fund_code, fund_name, holding_shares, cost_price, holding_amount
+            FROM user_holdings
+            WHERE user_id = :user_id
+        """
+        df = self.db_manager.execute_query(sql, {'user_id': user_id})
+        columns = ['fund_code', 'fund_name', 'holding_shares', 'cost_price', 'holding_amount']
+        if df is None or df.empty:
+            return pd.DataFrame(columns=columns + ['amount'])
+        df = df.copy()
+        df['fund_code'] = df['fund_code'].astype(str)
+        for col in ('holding_shares', 'cost_price', 'holding_amount'):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df['amount'] = (df['holding_shares'] * df['cost_price']).fillna(0.0)
+        return df.reset_index(drop=True)
+
+    def _query_metrics(self, fund_codes: List[str]) -> pd.DataFrame:
+        empty = pd.DataFrame(columns=METRIC_COLUMNS)
+        if not fund_codes:
+            return empty
+        # 只取每只基金最新分析日期的一行，不读取整段分析历史
+        sql = f"""
+            SELECT r.fund_code, {', '.join('r.' + col for col in METRIC_COLUMNS)}
+            FROM fund_analysis_results r
+            INNER JOIN (
+                SELECT fund_code, MAX(analysis_date) AS latest_date
+                FROM fund_analysis_results
+                WHERE fund_code IN :fund_codes
+                GROUP BY fund_code
+            ) latest ON r.fund_code = latest.fund_code AND r.analysis_date = latest.latest_date
+        """
+        try:
+            df = self.db_manager.execute_query(sql, {'fund_codes': tuple(fund_codes)})
+        except Exception as e:
+            logger.warning(f"批量获取基金绩效指标失败: {e}")
+            return empty
+        if df is None or df.empty:
+            return empty
+        df['fund_code'] = df['fund_code'].astype(str)
+        return df.drop_duplicates('fund_code').set_index('fund_code')
+
+    def _query_stocks(self, fund_codes: List[str]) -> pd.DataFrame:
+        empty = pd.DataFrame(columns=STOCK_COLUMNS)
+        if not fund_codes:
+            return empty
+        sql = """
+            SELECT fund_code, stock_code, stock_name, holding_ratio, report_period, ranking
+            FROM fund_heavyweight_stocks
+            WHERE fund_code IN :fund_codes
+            ORDER BY fund_code, ranking
+        """
+        try:
+            df = self.db_manager.execute_query(sql, {'fund_codes': tuple(fund_codes)})
+        except Exception as e:
+            logger.warning(f"批量获取重仓股失败: {e}")
+            return empty
+        if df is None or df.empty:
+            return empty
+        df['fund_code'] = df['fund_code'].astype(str)
+        # 每只基金只保留最新报告期
+        latest = df.groupby('fund_code')['report_period'].transform('max')
+        return df[df['report_period'] == latest][STOCK_COLUMNS].reset_index(drop=True)
+
+
+# 全局服务（按 db_manager 区分）
+_services: Dict[int, PortfolioAggregationService] = {}
+_services_lock = threading.Lock()
+
+
+def get_portfolio_aggregation_service(db_manager) -> PortfolioAggregationService:
+    """获取与 db_manager 绑定的全局聚合服务"""
+    with _services_lock:
+        service = _services.get(id(db_manager))
+        if service is None or service.db_manager is not db_manager:
+            service = PortfolioAggregationService(db_manager)
+            _services[id(db_manager)] = service
+        return service
+
+
+def invalidate_portfolio_snapshots(user_id: Optional[str] = None) -> None:
+    """持仓变更后使所有聚合服务中该用户的快照失效"""
+    with _services_lock:
+        services = list(_services.values())
+    for service in services:
+        service.invalidate(user_id)
@@ -3,7 +3,7 @@
 """
 缓存工具 - 兼容层
 
-已重构：现在使用 services.cache.memory_cache 作为后端实现
+已重构：现在使用多级缓存（services.cache.tiered_cache）的 default 命名空间作为后端实现
 保留此模块以维持向后兼容性
 """
 
@@ -11,8 +11,10 @@ import functools
 import logging
 from typing import Any, Dict, Optional, Callable
 
-# 使用标准缓存实现作为后端
-from services.cache.memory_cache import memory_cache
+# 使用多级缓存作为后端
+from services.cache.tiered_cache import get_tiered_cache
+
+memory_cache = get_tiered_cache().namespace('default')
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +23,8 @@ class MemoryCache:
     """
     内存缓存兼容类
     
-    包装 services.cache.memory_cache，提供兼容的 API
-    新代码应直接使用 services.cache.memory_cache
+    包装多级缓存的 default 命名空间，提供兼容的 API
+    新代码应直接使用 services.cache.tiered_cache.get_tiered_cache()
     """
     
     def __init__(self):
@@ -101,8 +103,8 @@ def cached(ttl: int = 60, key_prefix: str = None):
             return result
         
         # 附加缓存控制方法
-        wrapper.cache_clear = lambda: memory_cache.delete(
-            f"{key_prefix or func.__name__}:"
+        wrapper.cache_clear = lambda: memory_cache.invalidate(
+            f"{key_prefix or func.__name__}:*"
         )
         
         return wrapper
@@ -116,5 +118,5 @@ def get_cache_stats() -> Dict[str, int]:
 
 def clear_all_cache():
     """清空所有缓存"""
-    memory_cache.clear()
+    get_tiered_cache().clear()
     logger.info("所有缓存已清空")
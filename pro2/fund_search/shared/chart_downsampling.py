@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+图表数据降采样模块
+在序列化为JSON之前减少折线图的数据点数，并提供紧凑的数组编码
+
+- 单条序列使用 LTTB（Largest-Triangle-Three-Buckets），保留视觉上的拐点
+- 共用横轴的多条序列使用 min-max 分桶，保留每条序列在每个桶内的极值
+- 首尾两点始终保留，所有序列按同一组下标取点，横轴保持对齐
+- encoding='base64' 时数值数组编码为 float32 小端字节的 base64 字符串
+"""
+
+import base64
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .enhanced_config import CHART_CONFIG
+
+# 降采样后的最少点数（首、尾和至少一个中间点）
+MIN_POINTS = 3
+
+SUPPORTED_METHODS = ('lttb', 'minmax')
+SUPPORTED_ENCODINGS = ('json', 'base64')
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    """把中间点 [1, n-1) 分成 buckets 个非空的桶，返回 buckets+1 个边界"""
+    return np.linspace(1, n - 1, buckets + 1).astype(int)
+
+
+def lttb_indices(y: Sequence[float], max_points: int, x: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    LTTB 降采样，返回保留点的下标（升序）
+
+    Args:
+        y: 序列值，NaN 点不会被优先选中
+        max_points: 最多保留的点数
+        x: 横坐标，默认为等间距
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    buckets = max_points - 2
+    edges = _bucket_edges(n, buckets)
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for b in range(buckets):
+        start, end = edges[b], edges[b + 1]
+        next_end = edges[b + 2] if b + 2 <= buckets else n
+        next_y = y[end:next_end]
+        avg_x = x[end:next_end].mean()
+        avg_y = np.nanmean(next_y) if np.isfinite(next_y).any() else y[a]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[b + 1] = a
+    return selected
+
+
+def minmax_indices(columns: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    min-max 分桶降采样，返回保留点的下标（升序）
+
+    每个桶内保留每条序列的最小值和最大值所在的点，桶的数量保证总点数不超过 max_points。
+
+    Args:
+        columns: （点数 × 序列数）矩阵
+        max_points: 最多保留的点数
+    """
+    columns = np.asarray(columns, dtype=float)
+    if columns.ndim == 1:
+        columns = columns[:, None]
+    n, k = columns.shape
+    if max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    buckets = max(1, (max_points - 2) // (2 * k))
+    edges = _bucket_edges(n, buckets)
+    low = np.where(np.isnan(columns), np.inf, columns)
+    high = np.where(np.isnan(columns), -np.inf, columns)
+
+    keep = [np.array([0, n - 1])]
+    for start, end in zip(edges[:-1], edges[1:]):
+        keep.append(start + np.argmin(low[start:end], axis=0))
+        keep.append(start + np.argmax(high[start:end], axis=0))
+    indices = np.unique(np.concatenate(keep))
+    if len(indices) > max_points:
+        # 单个桶时 2k+2 可能超过 max_points，退化为等间距取点
+        indices = np.unique(np.linspace(0, n - 1, max_points).astype(int))
+    return indices
+
+
+def select_indices(series: Iterable[Sequence[float]], max_points: Optional[int],
+                   method: str = 'lttb') -> np.ndarray:
+    """
+    为共用横轴的一组序列选择保留点的下标
+
+    单条序列按 method 降采样；多条序列使用 LTTB 时每条分配 max_points // 序列数 个点后取并集，
+    分配不足 MIN_POINTS 时改用 min-max 分桶。
+
+    Args:
+        series: 等长序列列表
+        max_points: 最多保留的点数，None 或 0 表示不降采样
+        method: 'lttb' 或 'minmax'
+    """
+    columns = [np.asarray(values, dtype=float) for values in series]
+    if not columns:
+        return np.arange(0)
+    n = len(columns[0])
+    if not max_points or n <= max_points:
+        return np.arange(n)
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"不支持的降采样方法: {method}")
+
+    if method == 'lttb':
+        budget = max_points // len(columns)
+        if budget >= MIN_POINTS:
+            return np.unique(np.concatenate([lttb_indices(values, budget) for values in columns]))
+    return minmax_indices(np.column_stack(columns), max_points)
+
+
+def downsample_chart_data(chart_data: Dict[str, Any], max_points: Optional[int], x_key: str = 'dates',
+                          method: str = 'lttb') -> Dict[str, Any]:
+    """
+    对 {横轴: [...], 序列名: [...]} 格式的图表数据降采样
+
+    与横轴等长的列表都视为序列，按同一组下标取点；其他字段原样保留。
+    """
+    x_values = chart_data.get(x_key)
+    if x_values is None or not max_points or len(x_values) <= max_points:
+        return chart_data
+    n = len(x_values)
+    keys = [key for key, value in chart_data.items()
+            if key != x_key and isinstance(value, (list, np.ndarray)) and len(value) == n]
+    indices = select_indices([chart_data[key] for key in keys], max_points, method)
+    result = dict(chart_data)
+    for key in [x_key] + keys:
+        result[key] = take(chart_data[key], indices)
+    return result
+
+
+def take(values: Sequence[Any], indices: np.ndarray) -> List[Any]:
+    """按下标取出列表元素"""
+    if isinstance(values, np.ndarray):
+        return values[indices].tolist()
+    return [values[i] for i in indices]
+
+
+def encode_array(values: Sequence[float], encoding: str = 'json') -> Any:
+    """
+    编码数值数组
+
+    json: 原样返回列表；base64: {'dtype': 'float32', 'length': n, 'data': base64字符串}，
+    前端用 new Float32Array(Uint8Array.from(atob(data), c => c.charCodeAt(0)).buffer) 解码
+    """
+    if encoding == 'json':
+        return values if isinstance(values, list) else np.asarray(values).tolist()
+    if encoding != 'base64':
+        raise ValueError(f"不支持的编码方式: {encoding}")
+    array = np.asarray(values, dtype='<f4')
+    return {
+        'dtype': 'float32',
+        'length': int(array.size),
+        'data': base64.b64encode(array.tobytes()).decode('ascii')
+    }
+
+
+def decode_array(encoded: Any) -> np.ndarray:
+    """encode_array 的逆操作"""
+    if isinstance(encoded, dict):
+        return np.frombuffer(base64.b64decode(encoded['data']), dtype='<f4').astype(float)
+    return np.asarray(encoded, dtype=float)
+
+
+def encode_chart_data(chart_data: Dict[str, Any], encoding: str = 'json',
+                      x_key: str = 'dates') -> Dict[str, Any]:
+    """编码图表数据中除横轴外的数值序列"""
+    if encoding == 'json':
+        return chart_data
+    result = dict(chart_data)
+    for key, value in chart_data.items():
+        if key != x_key and isinstance(value, (list, np.ndarray)) and _is_numeric(value):
+            result[key] = encode_array(value, encoding)
+    return result
+
+
+def _is_numeric(values: Sequence[Any]) -> bool:
+    return all(v is None or isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool)
+               for v in values)
+
+
+def parse_chart_options(params: Optional[Dict[str, Any]]) -> Tuple[Optional[int], str, str]:
+    """
+    从请求参数中读取降采样选项
+
+    Args:
+        params: 请求参数（JSON请求体或查询参数）
+
+    Returns:
+        (max_points, method, encoding)；max_points 缺省时使用 CHART_CONFIG['max_points']，
+        传 0 表示返回全部数据点
+    """
+    params = params or {}
+    raw = params.get('max_points')
+    if raw is None or raw == '':
+        max_points = CHART_CONFIG.get('max_points')
+    else:
+        try:
+            max_points = int(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"max_points 必须是整数: {raw}")
+        if max_points < 0:
+            raise ValueError(f"max_points 不能为负数: {raw}")
+    if max_points:
+        max_points = max(max_points, MIN_POINTS)
+
+    method = params.get('downsample') or 'lttb'
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"不支持的降采样方法: {method}")
+    encoding = params.get('encoding') or 'json'
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise ValueError(f"不支持的编码方式: {encoding}")
+    return max_points or None, method, encoding
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+matplotlib 中文字体配置
+字体查找需要遍历系统字体列表，结果在进程内只计算一次，之后直接复用
+"""
+
+import logging
+import platform
+import threading
+import warnings
+from typing import Any, Dict, Optional
+
+import matplotlib
+matplotlib.use('Agg')  # 设置matplotlib后端为非GUI模式
+from matplotlib import font_manager
+
+logger = logging.getLogger(__name__)
+
+# 各平台优先使用的中文字体
+CHINESE_FONTS = {
+    'Windows': ['Microsoft YaHei', 'SimHei', 'SimSun', 'NSimSun', 'FangSong', 'KaiTi', '微软雅黑', '黑体', '宋体'],
+    'Darwin': ['Arial Unicode MS', 'Heiti TC', 'Heiti SC', 'PingFang SC', 'STHeiti'],
+    'Linux': ['WenQuanYi Micro Hei', 'WenQuanYi Zen Hei', 'Noto Sans CJK SC', 'SimHei'],
+}
+
+# 找不到中文字体时的备选关键词
+CHINESE_FONT_KEYWORDS = ['yahei', 'hei', 'song', 'fang', 'pingfang', 'wenquan', 'noto']
+
+FALLBACK_FONTS = ['DejaVu Sans', 'Bitstream Vera Sans', 'Lucida Grande', 'Verdana', 'Geneva', 'Lucid',
+                  'Arial', 'Helvetica', 'sans-serif']
+
+_font_rc: Optional[Dict[str, Any]] = None
+_font_lock = threading.Lock()
+
+
+def find_chinese_font() -> Optional[str]:
+    """在系统字体中查找第一个可用的中文字体，找不到时返回 None"""
+    system = platform.system()
+    candidates = CHINESE_FONTS.get(system, CHINESE_FONTS['Linux'])
+    available_fonts = {f.name for f in font_manager.fontManager.ttflist}
+
+    for font in candidates:
+        if font in available_fonts:
+            logger.info(f"选择中文字体: {font}")
+            return font
+
+    for font_prop in font_manager.fontManager.ttflist:
+        font_name = font_prop.name.lower()
+        if any(keyword in font_name for keyword in CHINESE_FONT_KEYWORDS):
+            logger.info(f"选择备选中文字体: {font_prop.name}")
+            return font_prop.name
+    return None
+
+
+def chinese_font_rc() -> Dict[str, Any]:
+    """
+    中文显示所需的 rcParams（首次调用时查找字体，之后返回缓存结果）
+
+    返回的字典可直接用于 matplotlib.rcParams.update 或 matplotlib.rc_context
+    """
+    global _font_rc
+    with _font_lock:
+        if _font_rc is not None:
+            return dict(_font_rc)
+
+        selected_font = find_chinese_font()
+        rc: Dict[str, Any] = {'font.family': 'sans-serif', 'axes.unicode_minus': False}
+        if selected_font:
+            rc['font.sans-serif'] = [selected_font] + FALLBACK_FONTS
+            # 针对Windows系统额外优化
+            if platform.system() == 'Windows':
+                rc['font.serif'] = ['Times New Roman', 'SimSun', selected_font]
+                rc['font.monospace'] = ['Courier New', 'FangSong', selected_font]
+            logger.info(f"已设置中文字体: {selected_font}")
+        else:
+            logger.warning("未找到合适的中文字体，图表中文可能显示为方块")
+            rc['font.sans-serif'] = list(FALLBACK_FONTS)
+        _font_rc = rc
+        return dict(rc)
+
+
+def setup_chinese_font() -> None:
+    """配置matplotlib支持中文显示（全局 rcParams）"""
+    matplotlib.rcParams.update(chinese_font_rc())
+    # 抑制字体警告信息
+    warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
@@ -145,6 +145,8 @@ CHART_CONFIG = {
     'dpi': int(os.environ.get('CHART_DPI', 350)),
     'figsize': (16, 10),
     'style': 'seaborn-v0_8',
+    # 折线图接口默认返回的最大数据点数（见 shared/chart_downsampling.py）
+    'max_points': int(os.environ.get('CHART_MAX_POINTS', 1000)),
     'color_palette': {
         'positive': ['#2E8B57', '#3CB371', '#219C55'],
         'neutral': ['#E7C628', '#F39C12', '#E67E22'],
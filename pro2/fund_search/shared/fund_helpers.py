@@ -7,11 +7,12 @@
 提供：
   - get_fund_name_from_db(fund_code) -> Optional[str]
   - get_fund_type_for_allocation(fund_code, db_manager) -> str
+  - get_fund_types_for_allocation(fund_codes, db_manager) -> Dict[str, str]  （批量版本）
   - classify_fund(fund_name, fund_code, official_type) -> str  （依赖各文件已有实现时直接复用）
 """
 
 import logging
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -174,6 +175,68 @@ def get_fund_type_for_allocation(fund_code: str, db_manager=None) -> str:
     return 'unknown'
 
 
+def get_fund_types_for_allocation(fund_codes: Iterable[str], db_manager=None) -> Dict[str, str]:
+    """
+    批量获取基金的资产配置分类，查询优先级与 get_fund_type_for_allocation 相同，
+    但每个数据源只查询一次（IN 查询），不再逐只基金查库。
+
+    Args:
+        fund_codes: 基金代码列表
+        db_manager: 数据库管理器，可选
+
+    Returns:
+        基金代码 -> 基金类型，无法识别的基金为 'unknown'
+    """
+    pending = list(dict.fromkeys(str(code) for code in fund_codes))
+    types: Dict[str, str] = {}
+    if not pending:
+        return types
+    if db_manager is None:
+        db_manager = _get_db_manager()
+
+    # 1. 预加载器缓存
+    try:
+        from services.fund_data_preloader import get_preloader
+        preloader = get_preloader()
+        for code in pending:
+            basic_info = preloader.get_fund_basic_info(code)
+            if basic_info and (basic_info.get('fund_name') or basic_info.get('fund_type')):
+                types[code] = _classify_fund(basic_info.get('fund_name', ''), code, basic_info.get('fund_type', ''))
+    except Exception:
+        pass
+    pending = [code for code in pending if code not in types]
+
+    # 2. fund_basic_info
+    if pending and db_manager is not None:
+        try:
+            sql = ("SELECT fund_code, fund_name, fund_type FROM fund_basic_info "
+                   "WHERE fund_code IN :fund_codes")
+            df = db_manager.execute_query(sql, {'fund_codes': tuple(pending)})
+            for row in df.drop_duplicates('fund_code').itertuples(index=False):
+                fund_name = row.fund_name if _notna(row.fund_name) else ''
+                official_type = row.fund_type if _notna(row.fund_type) else ''
+                types[str(row.fund_code)] = _classify_fund(fund_name, str(row.fund_code), official_type)
+        except Exception:
+            pass
+        pending = [code for code in pending if code not in types]
+
+    # 3. fund_analysis_results（每只基金最新一条）
+    if pending and db_manager is not None:
+        try:
+            sql = ("SELECT fund_code, fund_name FROM fund_analysis_results "
+                   "WHERE fund_code IN :fund_codes ORDER BY analysis_date DESC")
+            df = db_manager.execute_query(sql, {'fund_codes': tuple(pending)})
+            for row in df.drop_duplicates('fund_code').itertuples(index=False):
+                if _notna(row.fund_name):
+                    types[str(row.fund_code)] = _classify_fund(row.fund_name, str(row.fund_code))
+        except Exception:
+            pass
+
+    for code in pending:
+        types.setdefault(code, 'unknown')
+    return types
+
+
 # ---------------------------------------------------------------------------
 # 内部工具函数
 # ---------------------------------------------------------------------------
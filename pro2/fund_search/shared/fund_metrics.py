@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+基金截面绩效指标
+
+以 (日期 × 基金) 净值矩阵为输入，一次 NumPy 计算得到全部基金的绩效指标，
+替代各模块按基金逐只用 pandas 计算的实现：
+  - 总收益率、年化收益率、年化波动率、最大回撤
+  - 夏普比率（成立以来 / 近一年 / 今年以来）、卡玛比率、索提诺比率
+  - VaR、胜率、盈亏比、综合评分
+
+缺失值约定：净值为 NaN 或 0 表示当天无净值；收益率为 NaN 表示当天无收益率。
+所有统计量只在各基金自身的有效数据上计算（样本标准差 ddof=1，与 pandas 一致）；
+波动率无法计算（有效收益率不足两个）时对应的比率记为 0。
+
+只依赖 numpy / pandas，供 services、data_retrieval 直接使用；
+回测模块通过 MetricEngine.compute_cross_section 调用同一实现。
+
+使用示例:
+    result = compute_cross_section_metrics(matrix, dates, codes=codes)
+    result.get('000001')['sharpe_ratio_1y']
+    result.values['sharpe_ratio']        # 每只基金一个值的数组
+"""
+
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# 综合评分默认权重（与 PERFORMANCE_CONFIG['weights'] 一致）
+DEFAULT_SCORE_WEIGHTS = {
+    'annualized_return': 0.3,
+    'sharpe_ratio': 0.25,
+    'max_drawdown': 0.2,
+    'volatility': 0.15,
+    'win_rate': 0.1
+}
+
+# 指标字段（输出顺序）
+FUND_METRIC_FIELDS = (
+    'total_return',
+    'annualized_return',
+    'volatility',
+    'sharpe_ratio',
+    'sharpe_ratio_ytd',
+    'sharpe_ratio_1y',
+    'sharpe_ratio_all',
+    'max_drawdown',
+    'calmar_ratio',
+    'sortino_ratio',
+    'var_95',
+    'win_rate',
+    'profit_loss_ratio',
+    'composite_score',
+    'data_days',
+)
+
+
+@dataclass
+class CrossSectionMetrics:
+    """截面指标结果：values 中每个指标是长度为基金数的数组"""
+    codes: List[str]
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _column(self, key: Union[int, str]) -> int:
+        return key if isinstance(key, (int, np.integer)) else self.codes.index(key)
+
+    def get(self, key: Union[int, str]) -> Dict[str, float]:
+        """单只基金的指标字典（按基金代码或列号）"""
+        j = self._column(key)
+        row = {name: float(values[j]) for name, values in self.values.items()}
+        row['data_days'] = int(self.values['data_days'][j])
+        return row
+
+    def to_records(self) -> List[Dict[str, float]]:
+        return [self.get(j) for j in range(len(self.codes))]
+
+
+def align_returns(daily_returns: pd.Series, target: Union[pd.Index, int]) -> np.ndarray:
+    """
+    把收益率序列对齐到净值表的行上
+
+    target 为净值表索引且收益率索引是其子集时按标签对齐；否则（或 target 为行数时）
+    按位置对齐到最后 len(daily_returns) 行，与原先按 daily_returns[-n:] 截取窗口的做法一致。
+    """
+    values = pd.to_numeric(daily_returns, errors='coerce')
+    if isinstance(target, pd.Index):
+        if target.is_unique and values.index.isin(target).all():
+            return values.reindex(target).to_numpy(dtype=np.float64)
+        length = len(target)
+    else:
+        length = int(target)
+
+    aligned = np.full(length, np.nan)
+    tail = values.to_numpy(dtype=np.float64)[max(len(values) - length, 0):]
+    aligned[length - len(tail):] = tail
+    return aligned
+
+
+def _masked_std(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """按列计算掩码内元素的样本标准差（ddof=1，不足两个元素为 NaN）"""
+    count = mask.sum(axis=0)
+    masked = np.where(mask, values, 0.0)
+    mean = masked.sum(axis=0) / count
+    squared = np.where(mask, (values - mean) ** 2, 0.0).sum(axis=0)
+    return np.sqrt(squared / (count - 1))
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    count = mask.sum(axis=0)
+    return np.where(mask, values, 0.0).sum(axis=0) / count
+
+
+def _unit_interval(values: np.ndarray) -> np.ndarray:
+    """截断到 [0, 1]；NaN 按 max(0, min(1, nan)) 的结果取 1"""
+    return np.where(np.isnan(values), 1.0, np.clip(values, 0.0, 1.0))
+
+
+def compute_cross_section_metrics(
+    navs: np.ndarray,
+    dates: Optional[Sequence] = None,
+    returns: Optional[np.ndarray] = None,
+    codes: Optional[List[str]] = None,
+    risk_free_rate: float = 0.02,
+    trading_days: int = 250,
+    var_confidence: float = 0.05,
+    as_of=None,
+    min_window_days: Optional[Dict[str, int]] = None,
+    short_window: str = 'zero',
+    drawdown_basis: str = 'returns',
+    score_weights: Optional[Dict[str, float]] = None
+) -> CrossSectionMetrics:
+    """
+    计算全部基金的绩效指标
+
+    Args:
+        navs: (日期 × 基金) 净值矩阵，一维数组视为单只基金
+        dates: 日期轴；为空时不计算近一年 / 今年以来夏普比率
+        returns: 与 navs 同形的日收益率（小数）；为空时由相邻有效净值计算
+        codes: 基金代码，默认使用列号
+        risk_free_rate: 年化无风险利率
+        trading_days: 年化交易日数
+        var_confidence: VaR 分位数（0.05 即 95% VaR）
+        as_of: 窗口锚定日期。为空时每只基金以自身最后净值日为锚（近一年回溯 365 天），
+            指定时所有基金使用同一锚点（近一年按自然年回溯）
+        min_window_days: 各窗口的最少有效净值数，如 {'1y': 30, 'ytd': 10}，默认均为 2
+        short_window: 窗口数据不足时的取值，'zero' 为 0，'all' 为成立以来夏普比率
+        drawdown_basis: 最大回撤的计算口径，'returns' 按收益率累计，'nav' 按净值
+        score_weights: 综合评分权重
+
+    Returns:
+        CrossSectionMetrics
+    """
+    navs = np.array(navs, dtype=np.float64)
+    if navs.ndim == 1:
+        navs = navs[:, None]
+    navs[navs == 0] = np.nan
+    n_rows, n_cols = navs.shape
+    codes = list(codes) if codes is not None else list(range(n_cols))
+    if n_rows == 0 or n_cols == 0:
+        empty = {name: np.zeros(n_cols) for name in FUND_METRIC_FIELDS}
+        empty['data_days'] = np.zeros(n_cols, dtype=np.int64)
+        return CrossSectionMetrics(codes=codes, values=empty)
+
+    windows = {'1y': 2, 'ytd': 2}
+    windows.update(min_window_days or {})
+    weights = score_weights or DEFAULT_SCORE_WEIGHTS
+
+    cols = np.arange(n_cols)
+    row_index = np.arange(n_rows)[:, None]
+    valid = ~np.isnan(navs)
+    counts = valid.sum(axis=0)
+    has_data = counts > 0
+    first_row = valid.argmax(axis=0)
+    last_row = n_rows - 1 - valid[::-1].argmax(axis=0)
+    first_nav = navs[first_row, cols]
+    last_nav = navs[last_row, cols]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if returns is None:
+            # 相对上一个有效净值的收益率，缺失日期不产生收益率
+            fill_index = np.maximum.accumulate(np.where(valid, row_index, 0), axis=0)
+            filled = navs[fill_index, cols]
+            previous = np.vstack([np.full((1, n_cols), np.nan), filled[:-1]])
+            returns = np.where(valid, navs / previous - 1, np.nan)
+        else:
+            returns = np.array(returns, dtype=np.float64).reshape(n_rows, n_cols)
+        ret_mask = np.isfinite(returns)
+        n_returns = ret_mask.sum(axis=0)
+
+        # 收益与波动
+        total_return = np.where(has_data & (first_nav != 0), (last_nav - first_nav) / first_nav, 0.0)
+        annualized_return = np.where(has_data, (1 + total_return) ** (trading_days / counts) - 1, 0.0)
+        volatility = _masked_std(returns, ret_mask) * np.sqrt(trading_days)
+        sharpe_all = np.where(volatility > 0, (annualized_return - risk_free_rate) / volatility, 0.0)
+
+        # 分期夏普比率
+        fallback = sharpe_all if short_window == 'all' else np.zeros(n_cols)
+        sharpe_1y = fallback.copy()
+        sharpe_ytd = fallback.copy()
+        if dates is not None:
+            date_axis = pd.to_datetime(np.asarray(dates)).values.astype('datetime64[ns]')
+            if as_of is None:
+                anchor = date_axis[last_row]
+                one_year_start = anchor - np.timedelta64(365, 'D')
+            else:
+                anchor = np.full(n_cols, pd.Timestamp(as_of).to_datetime64()).astype('datetime64[ns]')
+                one_year_start = np.full(n_cols, (pd.Timestamp(as_of) - pd.DateOffset(years=1)).to_datetime64())
+            ytd_start = anchor.astype('datetime64[Y]').astype('datetime64[ns]')
+
+            for name, start, target in (('1y', one_year_start, sharpe_1y), ('ytd', ytd_start, sharpe_ytd)):
+                in_window = date_axis[:, None] >= start[None, :]
+                window_valid = valid & in_window
+                window_count = window_valid.sum(axis=0)
+                start_nav = navs[window_valid.argmax(axis=0), cols]
+                window_total = np.where(start_nav != 0, (last_nav - start_nav) / start_nav, 0.0)
+                window_annual = (1 + window_total) ** (trading_days / window_count) - 1
+                window_vol = _masked_std(returns, ret_mask & in_window) * np.sqrt(trading_days)
+                window_sharpe = np.where(window_vol > 0, (window_annual - risk_free_rate) / window_vol, 0.0)
+                enough = has_data & (window_count >= windows[name])
+                target[enough] = window_sharpe[enough]
+
+        # 最大回撤
+        if drawdown_basis == 'nav':
+            level = np.where(valid, navs, np.nan)
+            level_mask = valid
+        else:
+            level = np.where(ret_mask, np.cumprod(np.where(ret_mask, 1 + returns, 1.0), axis=0), np.nan)
+            level_mask = ret_mask
+        running_max = np.fmax.accumulate(level, axis=0)
+        drawdown = np.where(level_mask, (level - running_max) / running_max, np.inf).min(axis=0)
+        if drawdown_basis == 'nav':
+            max_drawdown = np.where(level_mask.any(axis=0), drawdown, np.nan)
+        else:
+            max_drawdown = np.where(n_returns > 0, drawdown, 0.0)
+
+        calmar_ratio = np.where(max_drawdown != 0, annualized_return / np.abs(max_drawdown), 0.0)
+
+        # 下行风险与收益分布
+        negative = ret_mask & (returns < 0)
+        positive = ret_mask & (returns > 0)
+        n_negative = negative.sum(axis=0)
+        n_positive = positive.sum(axis=0)
+        downside = np.where(n_negative > 0, _masked_std(returns, negative) * np.sqrt(trading_days), volatility)
+        sortino_ratio = np.where(downside > 0, (annualized_return - risk_free_rate) / downside, 0.0)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            var_95 = np.nanquantile(np.where(ret_mask, returns, np.nan), var_confidence, axis=0)
+        var_95 = np.where(n_returns > 0, var_95, 0.0)
+
+        win_rate = np.where(n_returns > 0, n_positive / n_returns, 0.0)
+        avg_positive = np.where(n_positive > 0, _masked_mean(returns, positive), 0.0)
+        avg_negative = np.where(n_negative > 0, np.abs(_masked_mean(returns, negative)), 0.0)
+        profit_loss_ratio = np.where(avg_negative != 0, avg_positive / avg_negative, 0.0)
+
+        composite_score = (
+            weights['annualized_return'] * _unit_interval((annualized_return + 0.5) / 1.0) +
+            weights['sharpe_ratio'] * _unit_interval((sharpe_all + 2) / 4.0) +
+            weights['max_drawdown'] * _unit_interval(1 - np.abs(max_drawdown) / 0.5) +
+            weights['volatility'] * _unit_interval(1 - volatility / 0.5) +
+            weights['win_rate'] * win_rate
+        )
+
+    values = {
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_all,
+        'sharpe_ratio_ytd': sharpe_ytd,
+        'sharpe_ratio_1y': sharpe_1y,
+        'sharpe_ratio_all': sharpe_all,
+        'max_drawdown': max_drawdown,
+        'calmar_ratio': calmar_ratio,
+        'sortino_ratio': sortino_ratio,
+        'var_95': var_95,
+        'win_rate': win_rate,
+        'profit_loss_ratio': profit_loss_ratio,
+        'composite_score': composite_score,
+        'data_days': counts,
+    }
+    return CrossSectionMetrics(codes=codes, values=values)
@@ -7,6 +7,6 @@
 提供基于收益率的投资策略判断逻辑。
 """
 
-from .rules import InvestmentStrategyRules, StrategyResult, ActionType
+from .rules import InvestmentStrategyRules, StrategyResult, StrategyArrays, ActionType
 
-__all__ = ['InvestmentStrategyRules', 'StrategyResult', 'ActionType']
+__all__ = ['InvestmentStrategyRules', 'StrategyResult', 'StrategyArrays', 'ActionType']
@@ -11,6 +11,8 @@ from dataclasses import dataclass
 from typing import Optional, Tuple
 from enum import Enum
 
+import numpy as np
+
 
 class ActionType(Enum):
     """操作类型枚举"""
@@ -32,6 +34,27 @@ class StrategyResult:
     operation_suggestion: str
     execution_amount: str
     buy_multiplier: float
+    
+    def as_tuple(self) -> tuple:
+        """转换为原有接口的元组形式"""
+        return (self.status_label, self.is_buy, self.redeem_amount, self.comparison_value,
+                self.operation_suggestion, self.execution_amount, self.buy_multiplier)
+
+
+@dataclass
+class StrategyArrays:
+    """
+    批量策略结果（每个元素对应一组收益率）
+    
+    label_indices 为 InvestmentStrategyRules.STATUS_LABELS 的下标，
+    其余字段可通过 InvestmentStrategyRules.CASES[case_id] 查到。
+    """
+    case_ids: np.ndarray
+    buy_multipliers: np.ndarray
+    redeem_amounts: np.ndarray
+    label_indices: np.ndarray
+    is_buy: np.ndarray
+    comparison_values: np.ndarray
 
 
 class InvestmentStrategyRules:
@@ -40,6 +63,9 @@ class InvestmentStrategyRules:
     
     基于当日和昨日收益率生成投资建议。
     包含16种不同的市场状态判断逻辑。
+    
+    规则以条件表（_case_conditions）和结果表（CASES）的形式定义：
+    批量接口用 np.select 一次完成分类，单条接口在同一张条件表上取第一个满足的条件，两者结果一致。
     """
     
     # 买入倍数配置
@@ -59,6 +85,102 @@ class InvestmentStrategyRules:
         'none': 0
     }
     
+    # 情况编号 -> (状态标签, 操作类型, 是否买入, 赎回金额, 操作建议, 执行金额, 买入倍数)，0 为默认情况
+    CASES = {
+        0: ("🔴 下跌", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+            "定投买入，不赎回", f"买入{MULTIPLIERS['weak_buy']}×定额", MULTIPLIERS['weak_buy']),
+        1: ("🟢 大涨", ActionType.HOLD, False, REDEEM_AMOUNTS['none'],
+            "不买入，不赎回", "持有不动", MULTIPLIERS['hold']),
+        2: ("🟡 连涨", ActionType.SELL, False, REDEEM_AMOUNTS['small'],
+            "不买入，赎回15元", "赎回¥15", MULTIPLIERS['hold']),
+        3: ("🟠 连涨放缓", ActionType.HOLD, False, REDEEM_AMOUNTS['none'],
+            "不买入，不赎回", "持有不动", MULTIPLIERS['hold']),
+        4: ("🟠 连涨回落", ActionType.HOLD, False, REDEEM_AMOUNTS['none'],
+            "不买入，不赎回", "持有不动", MULTIPLIERS['hold']),
+        5: ("🔵 反转涨", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+            "定投买入，不赎回", f"买入{MULTIPLIERS['buy']}×定额", MULTIPLIERS['buy']),
+        6: ("🔴 转势休整", ActionType.SELL, False, REDEEM_AMOUNTS['medium'],
+            "不买入，赎回30元", "赎回¥30", MULTIPLIERS['hold']),
+        7: ("🔴 反转跌", ActionType.SELL, False, REDEEM_AMOUNTS['medium'],
+            "不买入，赎回30元", "赎回¥30", MULTIPLIERS['hold']),
+        8: ("⚪ 持平", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+            "定投买入，不赎回", f"买入{MULTIPLIERS['strong_buy']}×定额", MULTIPLIERS['strong_buy']),
+        9: ("🔴 首次大跌", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+            "定投买入，不赎回", f"买入{MULTIPLIERS['small_buy']}×定额", MULTIPLIERS['small_buy']),
+        10: ("🟠 首次下跌", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['buy']}×定额", MULTIPLIERS['buy']),
+        11: ("🔵 微跌试探", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['weak_buy']}×定额", MULTIPLIERS['weak_buy']),
+        12: ("🔴 暴跌加速", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['small_buy']}×定额", MULTIPLIERS['small_buy']),
+        13: ("🟣 跌速扩大", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['weak_buy']}×定额", MULTIPLIERS['weak_buy']),
+        14: ("🔵 暴跌回升", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['buy']}×定额", MULTIPLIERS['buy']),
+        15: ("🟦 跌速放缓", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['weak_buy']}×定额", MULTIPLIERS['weak_buy']),
+        16: ("🟣 阴跌筑底", ActionType.BUY, True, REDEEM_AMOUNTS['none'],
+             "定投买入，不赎回", f"买入{MULTIPLIERS['weak_buy']}×定额", MULTIPLIERS['weak_buy']),
+    }
+    
+    STATUS_LABELS = tuple(dict.fromkeys(case[0] for case in CASES.values()))
+    
+    # 按情况编号索引的查找表
+    _CASE_ROWS = [case for _, case in sorted(CASES.items())]
+    _CASE_LABEL_INDEX = np.array(list(map(STATUS_LABELS.index, [row[0] for row in _CASE_ROWS])))
+    _CASE_IS_BUY = np.array([row[2] for row in _CASE_ROWS], dtype=bool)
+    _CASE_REDEEM = np.array([row[3] for row in _CASE_ROWS], dtype=float)
+    _CASE_MULTIPLIER = np.array([row[6] for row in _CASE_ROWS], dtype=float)
+    
+    @staticmethod
+    def _case_conditions(today, prev, diff) -> list:
+        """
+        (情况编号, 条件) 列表，按顺序取第一个满足的条件
+        
+        条件只用比较和 & 运算，参数可以是浮点数也可以是数组；
+        各组的最后一个条件不再判断差值，对应原逻辑中的 else 分支。
+        """
+        both_pos = (today > 0) & (prev > 0)
+        prev_zero = (today < 0) & (prev == 0)
+        both_neg = (today < 0) & (prev < 0)
+        return [
+            # 情况1-4: 今日>0 昨日>0
+            (1, both_pos & (diff > 1)),
+            (2, both_pos & (diff > 0) & (diff <= 1)),
+            (3, both_pos & (diff >= -1) & (diff <= 0)),
+            (4, both_pos),
+            # 情况5: 今日>0 昨日≤0
+            (5, (today > 0) & (prev <= 0)),
+            # 情况6: 今日=0 昨日>0
+            (6, (today == 0) & (prev > 0)),
+            # 情况7: 今日<0 昨日>0
+            (7, (today < 0) & (prev > 0)),
+            # 情况8: 今日=0 昨日≤0
+            (8, (today == 0) & (prev <= 0)),
+            # 情况9-11: 今日<0 昨日=0
+            (9, prev_zero & (today <= -2)),
+            (10, prev_zero & (today > -2) & (today <= -0.5)),
+            (11, prev_zero),
+            # 情况12-16: 今日<0 昨日<0
+            (12, both_neg & (diff > 1) & (today <= -2)),
+            (13, both_neg & (diff > 1) & (today > -2)),
+            (14, both_neg & (prev - today > 0) & (prev <= -2)),
+            (15, both_neg & (prev - today > 0) & (prev > -2)),
+            (16, both_neg),
+        ]
+    
+    @classmethod
+    def classify(cls, today_return: float, prev_day_return: float) -> int:
+        """返回单组收益率对应的情况编号（0 为默认情况）"""
+        # 与批量接口相同：inf - inf 等无效运算得到 nan，不匹配任何情况，不输出警告
+        with np.errstate(invalid='ignore'):
+            return_diff = today_return - prev_day_return
+            cases = cls._case_conditions(today_return, prev_day_return, return_diff)
+        for case_id, matched in cases:
+            if matched:
+                return case_id
+        return 0
+    
     @classmethod
     def get_investment_strategy(cls, today_return: float, prev_day_return: float) -> StrategyResult:
         """
@@ -71,293 +193,45 @@ class InvestmentStrategyRules:
         返回：
             StrategyResult: 策略结果对象
         """
-        return_diff = today_return - prev_day_return
-        
-        # 情况1-4: 今日>0 昨日>0
-        if today_return > 0 and prev_day_return > 0:
-            return cls._handle_both_positive(today_return, prev_day_return, return_diff)
-        
-        # 情况5: 今日>0 昨日≤0
-        elif today_return > 0 and prev_day_return <= 0:
-            return cls._handle_today_positive(today_return, prev_day_return, return_diff)
-        
-        # 情况6: 今日=0 昨日>0
-        elif today_return == 0 and prev_day_return > 0:
-            return cls._handle_today_zero_positive_prev(today_return, prev_day_return, return_diff)
-        
-        # 情况7: 今日<0 昨日>0
-        elif today_return < 0 and prev_day_return > 0:
-            return cls._handle_today_negative_positive_prev(today_return, prev_day_return, return_diff)
-        
-        # 情况8: 今日=0 昨日≤0
-        elif today_return == 0 and prev_day_return <= 0:
-            return cls._handle_today_zero_negative_prev(today_return, prev_day_return, return_diff)
-        
-        # 情况9-11: 今日<0 昨日=0
-        elif today_return < 0 and prev_day_return == 0:
-            return cls._handle_prev_zero(today_return, prev_day_return, return_diff)
-        
-        # 情况12-16: 今日<0 昨日<0
-        elif today_return < 0 and prev_day_return < 0:
-            return cls._handle_both_negative(today_return, prev_day_return, return_diff)
-        
-        # 默认情况
-        return cls._create_result(
-            status_label="🔴 下跌",
-            action=ActionType.BUY,
-            is_buy=True,
-            redeem_amount=0,
-            comparison_value=return_diff,
-            operation_suggestion="定投买入，不赎回",
-            execution_amount=f"买入{cls.MULTIPLIERS['weak_buy']}×定额",
-            buy_multiplier=cls.MULTIPLIERS['weak_buy']
-        )
-    
-    @classmethod
-    def _handle_both_positive(cls, today_return: float, prev_day_return: float, 
-                              return_diff: float) -> StrategyResult:
-        """处理今日>0 昨日>0的情况"""
-        
-        # 情况1: today-prev > 1%
-        if return_diff > 1:
-            return cls._create_result(
-                status_label="🟢 大涨",
-                action=ActionType.HOLD,
-                is_buy=False,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="不买入，不赎回",
-                execution_amount="持有不动",
-                buy_multiplier=cls.MULTIPLIERS['hold']
-            )
-        
-        # 情况2: 0 < today-prev ≤ 1%
-        elif 0 < return_diff <= 1:
-            return cls._create_result(
-                status_label="🟡 连涨",
-                action=ActionType.SELL,
-                is_buy=False,
-                redeem_amount=cls.REDEEM_AMOUNTS['small'],
-                comparison_value=return_diff,
-                operation_suggestion="不买入，赎回15元",
-                execution_amount="赎回¥15",
-                buy_multiplier=cls.MULTIPLIERS['hold']
-            )
-        
-        # 情况3: -1% ≤ today-prev ≤ 0
-        elif -1 <= return_diff <= 0:
-            return cls._create_result(
-                status_label="🟠 连涨放缓",
-                action=ActionType.HOLD,
-                is_buy=False,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="不买入，不赎回",
-                execution_amount="持有不动",
-                buy_multiplier=cls.MULTIPLIERS['hold']
-            )
-        
-        # 情况4: today-prev < -1%
-        else:  # return_diff < -1
-            return cls._create_result(
-                status_label="🟠 连涨回落",
-                action=ActionType.HOLD,
-                is_buy=False,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="不买入，不赎回",
-                execution_amount="持有不动",
-                buy_multiplier=cls.MULTIPLIERS['hold']
-            )
-    
-    @classmethod
-    def _handle_today_positive(cls, today_return: float, prev_day_return: float,
-                               return_diff: float) -> StrategyResult:
-        """处理今日>0 昨日≤0的情况"""
-        return cls._create_result(
-            status_label="🔵 反转涨",
-            action=ActionType.BUY,
-            is_buy=True,
-            redeem_amount=cls.REDEEM_AMOUNTS['none'],
-            comparison_value=return_diff,
-            operation_suggestion="定投买入，不赎回",
-            execution_amount=f"买入{cls.MULTIPLIERS['buy']}×定额",
-            buy_multiplier=cls.MULTIPLIERS['buy']
-        )
-    
-    @classmethod
-    def _handle_today_zero_positive_prev(cls, today_return: float, prev_day_return: float,
-                                          return_diff: float) -> StrategyResult:
-        """处理今日=0 昨日>0的情况"""
-        return cls._create_result(
-            status_label="🔴 转势休整",
-            action=ActionType.SELL,
-            is_buy=False,
-            redeem_amount=cls.REDEEM_AMOUNTS['medium'],
-            comparison_value=return_diff,
-            operation_suggestion="不买入，赎回30元",
-            execution_amount="赎回¥30",
-            buy_multiplier=cls.MULTIPLIERS['hold']
-        )
-    
-    @classmethod
-    def _handle_today_negative_positive_prev(cls, today_return: float, prev_day_return: float,
-                                              return_diff: float) -> StrategyResult:
-        """处理今日<0 昨日>0的情况"""
-        return cls._create_result(
-            status_label="🔴 反转跌",
-            action=ActionType.SELL,
-            is_buy=False,
-            redeem_amount=cls.REDEEM_AMOUNTS['medium'],
-            comparison_value=return_diff,
-            operation_suggestion="不买入，赎回30元",
-            execution_amount="赎回¥30",
-            buy_multiplier=cls.MULTIPLIERS['hold']
-        )
-    
-    @classmethod
-    def _handle_today_zero_negative_prev(cls, today_return: float, prev_day_return: float,
-                                          return_diff: float) -> StrategyResult:
-        """处理今日=0 昨日≤0的情况"""
-        return cls._create_result(
-            status_label="⚪ 持平",
-            action=ActionType.BUY,
-            is_buy=True,
-            redeem_amount=cls.REDEEM_AMOUNTS['none'],
-            comparison_value=return_diff,
-            operation_suggestion="定投买入，不赎回",
-            execution_amount=f"买入{cls.MULTIPLIERS['strong_buy']}×定额",
-            buy_multiplier=cls.MULTIPLIERS['strong_buy']
-        )
-    
-    @classmethod
-    def _handle_prev_zero(cls, today_return: float, prev_day_return: float,
-                          return_diff: float) -> StrategyResult:
-        """处理今日<0 昨日=0的情况"""
-        
-        # 情况9: today ≤ -2%
-        if today_return <= -2:
-            return cls._create_result(
-                status_label="🔴 首次大跌",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['small_buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['small_buy']
-            )
-        
-        # 情况10: -2% < today ≤ -0.5%
-        elif -2 < today_return <= -0.5:
-            return cls._create_result(
-                status_label="🟠 首次下跌",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['buy']
-            )
-        
-        # 情况11: today > -0.5%
-        else:  # today_return > -0.5
-            return cls._create_result(
-                status_label="🔵 微跌试探",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['weak_buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['weak_buy']
-            )
-    
-    @classmethod
-    def _handle_both_negative(cls, today_return: float, prev_day_return: float,
-                              return_diff: float) -> StrategyResult:
-        """处理今日<0 昨日<0的情况"""
-        prev_minus_today = prev_day_return - today_return
-        
-        # 情况12: (today-prev) > 1% & today ≤ -2%
-        if return_diff > 1 and today_return <= -2:
-            return cls._create_result(
-                status_label="🔴 暴跌加速",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['small_buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['small_buy']
-            )
-        
-        # 情况13: (today-prev) > 1% & today > -2%
-        elif return_diff > 1 and today_return > -2:
-            return cls._create_result(
-                status_label="🟣 跌速扩大",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['weak_buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['weak_buy']
-            )
-        
-        # 情况14: (prev-today) > 0 & prev ≤ -2%
-        elif prev_minus_today > 0 and prev_day_return <= -2:
-            return cls._create_result(
-                status_label="🔵 暴跌回升",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['buy']
-            )
-        
-        # 情况15: (prev-today) > 0 & prev > -2%
-        elif prev_minus_today > 0 and prev_day_return > -2:
-            return cls._create_result(
-                status_label="🟦 跌速放缓",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['weak_buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['weak_buy']
-            )
-        
-        # 情况16: abs(差值) ≤ 1%
-        else:  # abs(return_diff) <= 1
-            return cls._create_result(
-                status_label="🟣 阴跌筑底",
-                action=ActionType.BUY,
-                is_buy=True,
-                redeem_amount=cls.REDEEM_AMOUNTS['none'],
-                comparison_value=return_diff,
-                operation_suggestion="定投买入，不赎回",
-                execution_amount=f"买入{cls.MULTIPLIERS['weak_buy']}×定额",
-                buy_multiplier=cls.MULTIPLIERS['weak_buy']
-            )
-    
-    @classmethod
-    def _create_result(cls, status_label: str, action: ActionType, is_buy: bool,
-                       redeem_amount: float, comparison_value: float,
-                       operation_suggestion: str, execution_amount: str,
-                       buy_multiplier: float) -> StrategyResult:
-        """创建策略结果对象"""
+        case_id = cls.classify(today_return, prev_day_return)
+        with np.errstate(invalid='ignore'):
+            comparison_value = today_return - prev_day_return
+        status_label, action, is_buy, redeem_amount, suggestion, execution_amount, multiplier = cls.CASES[case_id]
         return StrategyResult(
             status_label=status_label,
             action=action,
             is_buy=is_buy,
             redeem_amount=redeem_amount,
             comparison_value=comparison_value,
-            operation_suggestion=operation_suggestion,
+            operation_suggestion=suggestion,
             execution_amount=execution_amount,
-            buy_multiplier=buy_multiplier
+            buy_multiplier=multiplier
+        )
+    
+    @classmethod
+    def get_investment_strategy_arrays(cls, today_returns, prev_day_returns) -> StrategyArrays:
+        """
+        批量计算投资策略（get_investment_strategy 的向量化版本）
+        
+        参数：
+            today_returns: 当日收益率数组（%）
+            prev_day_returns: 昨日收益率数组（%），形状与 today_returns 相同
+            
+        返回：
+            StrategyArrays: 各组收益率的情况编号、买入倍数、赎回金额、状态标签下标等
+        """
+        today = np.asarray(today_returns, dtype=float)
+        prev = np.asarray(prev_day_returns, dtype=float)
+        # inf - inf 等无效运算得到 nan，不匹配任何情况（与逐条计算一致），不输出警告
+        with np.errstate(invalid='ignore'):
+            diff = today - prev
+            cases = cls._case_conditions(today, prev, diff)
+        case_ids = np.select([matched for _, matched in cases], [case_id for case_id, _ in cases], default=0)
+        return StrategyArrays(
+            case_ids=case_ids,
+            buy_multipliers=cls._CASE_MULTIPLIER[case_ids],
+            redeem_amounts=cls._CASE_REDEEM[case_ids],
+            label_indices=cls._CASE_LABEL_INDEX[case_ids],
+            is_buy=cls._CASE_IS_BUY[case_ids],
+            comparison_values=diff
         )
@@ -296,7 +296,11 @@ def init_components():
     # 8. 初始化GraphQL
     if GRAPHQL_AVAILABLE:
         try:
-            init_graphql(app)
+            init_graphql(
+                app,
+                db_manager=components.get('db_manager'),
+                holding_service=components.get('holding_service')
+            )
             logger.info("GraphQL已初始化")
         except Exception as e:
             logger.error(f"GraphQL初始化失败: {e}")
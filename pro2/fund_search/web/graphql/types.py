@@ -187,20 +187,24 @@ class UserHoldingType(graphene.ObjectType):
     
     def resolve_fund(self, info):
         """获取关联的基金信息"""
-        # 这里可以从上下文获取fund_data_service来查询
+        # GraphQL请求上下文中按基金代码批量加载，否则从上下文的fund_data_service逐个查询
+        from graphql_api.context import GraphQLContext
         context = info.context
-        if hasattr(context, 'fund_data_service'):
+        fund_info = None
+        if isinstance(context, GraphQLContext):
+            fund_info = context.fund_basic.load(self.fund_code)
+        elif hasattr(context, 'fund_data_service'):
             fund_info = context.fund_data_service.get_fund_basic_info(self.fund_code)
-            if fund_info:
-                return FundType(
-                    fund_code=self.fund_code,
-                    fund_name=fund_info.get('fund_name', self.fund_name),
-                    fund_type=fund_info.get('fund_type', self.fund_type),
-                    current_nav=self.current_nav,
-                    yesterday_nav=None,
-                    daily_return=self.today_return,
-                    update_time=datetime.now()
-                )
+        if fund_info:
+            return FundType(
+                fund_code=self.fund_code,
+                fund_name=fund_info.get('fund_name', self.fund_name),
+                fund_type=fund_info.get('fund_type', self.fund_type),
+                current_nav=self.current_nav,
+                yesterday_nav=None,
+                daily_return=self.today_return,
+                update_time=datetime.now()
+            )
         return None
 
 
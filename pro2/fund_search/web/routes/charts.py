@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+图表图片 API 路由
+返回图表渲染服务生成的 PNG/SVG 图片，渲染未完成时返回 202
+"""
+
+import os
+import sys
+import logging
+
+from flask import jsonify, request, send_file
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.chart_render_service import SUPPORTED_FORMATS, get_chart_render_service
+
+logger = logging.getLogger(__name__)
+
+MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+def _is_chart_key(key):
+    return len(key) == 64 and all(c in '0123456789abcdef' for c in key)
+
+
+def get_chart_image(key, fmt):
+    """
+    获取图表图片
+
+    查询参数 wait=秒数 时最多等待渲染完成的时间，默认不等待
+    """
+    if fmt not in SUPPORTED_FORMATS or not _is_chart_key(key):
+        return jsonify({'success': False, 'error': '图表不存在'}), 404
+
+    service = get_chart_render_service()
+    try:
+        timeout = min(float(request.args.get('wait', 0)), 30)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'wait 必须是数字'}), 400
+    status = service.wait(key, fmt, timeout) if timeout > 0 else service.status(key, fmt)
+
+    if status == 'ready':
+        response = send_file(service.path(key, fmt), mimetype=MIMETYPES[fmt], conditional=True)
+        # 键是图表内容的哈希，同一URL的内容不会变化
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+    if status == 'pending':
+        response = jsonify({'success': True, 'status': 'pending'})
+        response.headers['Retry-After'] = '1'
+        return response, 202
+    if status == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'error': service.error(key, fmt)}), 500
+    return jsonify({'success': False, 'status': 'missing', 'error': '图表不存在或已过期'}), 404
+
+
+def get_chart_status(key, fmt):
+    """查询图表渲染状态"""
+    if fmt not in SUPPORTED_FORMATS or not _is_chart_key(key):
+        return jsonify({'success': False, 'error': '图表不存在'}), 404
+    service = get_chart_render_service()
+    status = service.status(key, fmt)
+    return jsonify({
+        'success': True,
+        'status': status,
+        'url': service.url(key, fmt),
+        'error': service.error(key, fmt)
+    })
+
+
+def register_routes(app, **kwargs):
+    """注册图表图片路由"""
+    app.route('/api/charts/<key>.<fmt>', methods=['GET'])(get_chart_image)
+    app.route('/api/charts/<key>.<fmt>/status', methods=['GET'])(get_chart_status)
@@ -37,6 +37,10 @@ from services.fund_type_service import (
     get_fund_type_css_class, FUND_TYPE_CN, FUND_TYPE_CSS_CLASS
 )
 from shared.json_utils import safe_jsonify, create_safe_response
+from shared.chart_downsampling import downsample_chart_data, encode_chart_data, parse_chart_options
+from services.portfolio_aggregation_service import (
+    get_portfolio_aggregation_service, invalidate_portfolio_snapshots, stock_exposure, weighted_sum
+)
 from shared.fund_helpers import (
     get_fund_name_from_db as _get_fund_name_from_db_helper,
     get_fund_type_for_allocation as _get_fund_type_for_allocation_helper,
@@ -867,6 +871,32 @@ def get_best_ocr_engine():
         })
 
 
+def _query_nav_groups(fund_codes, start_date, end_date):
+    """
+    一次查询 fund_nav_cache 中多只基金在区间内的净值
+    
+    Returns:
+        dict: 基金代码 -> DataFrame（nav, nav_date，按日期升序），缓存中没有数据的基金不在结果中
+    """
+    nav_sql = """
+        SELECT fund_code, nav_value as nav, nav_date FROM fund_nav_cache
+        WHERE fund_code IN :fund_codes
+        AND nav_date >= :start_date
+        AND nav_date <= :end_date
+        ORDER BY fund_code, nav_date
+    """
+    all_nav_df = db_manager.execute_query(nav_sql, {
+        'fund_codes': tuple(fund_codes),
+        'start_date': start_date,
+        'end_date': end_date
+    })
+    if all_nav_df is None or all_nav_df.empty:
+        return {}
+    all_nav_df['fund_code'] = all_nav_df['fund_code'].astype(str)
+    return {code: group.drop(columns='fund_code').reset_index(drop=True)
+            for code, group in all_nav_df.groupby('fund_code', sort=False)}
+
+
 def get_portfolio_metrics():
     """获取基金组合在指定时间段的绩效指标"""
     try:
@@ -881,28 +911,10 @@ def get_portfolio_metrics():
         if not start_date or not end_date:
             return jsonify({'success': False, 'error': '请提供开始和结束日期'}), 400
 
-        # 获取基金持仓信息（用于计算权重）
+        # 按持仓金额计算权重（没有持仓数据时平均分配），持仓快照与其他看板接口共用
         user_id = data.get('user_id', 'default_user')
-        holdings_sql = """
-            SELECT fund_code, holding_amount
-            FROM user_holdings
-            WHERE user_id = :user_id AND fund_code IN :fund_codes
-        """
-        holdings_df = db_manager.execute_query(holdings_sql, {
-            'user_id': user_id,
-            'fund_codes': tuple(fund_codes)
-        })
-
-        # 计算权重
-        total_amount = holdings_df['holding_amount'].sum() if not holdings_df.empty else 0
-        weights = {}
-        if total_amount > 0:
-            for _, row in holdings_df.iterrows():
-                weights[row['fund_code']] = row['holding_amount'] / total_amount
-        else:
-            # 如果没有持仓数据，平均分配权重
-            for code in fund_codes:
-                weights[code] = 1.0 / len(fund_codes)
+        snapshot = get_portfolio_aggregation_service(db_manager).load_snapshot(user_id)
+        weights = snapshot.weights(fund_codes)
 
         # 获取各基金的绩效数据
         import numpy as np
@@ -944,24 +956,14 @@ def get_portfolio_metrics():
         end_dt = datetime.strptime(end_date, '%Y-%m-%d')
         trading_days = (end_dt - start_dt).days * 0.6  # 估算交易日
 
-        # 获取基金收益率数据
+        # 获取基金收益率数据（所有基金的历史净值一次查询）
         portfolio_returns = []
         fund_metrics = []
 
+        nav_groups = _query_nav_groups(fund_codes, start_date, end_date)
+
         for fund_code in fund_codes:
-            # 获取基金历史净值数据
-            nav_sql = """
-                SELECT nav_value as nav, nav_date FROM fund_nav_cache
-                WHERE fund_code = :fund_code
-                AND nav_date >= :start_date
-                AND nav_date <= :end_date
-                ORDER BY nav_date
-            """
-            nav_df = db_manager.execute_query(nav_sql, {
-                'fund_code': fund_code,
-                'start_date': start_date,
-                'end_date': end_date
-            })
+            nav_df = nav_groups.get(str(fund_code), pd.DataFrame(columns=['nav', 'nav_date']))
 
             # 如果 fund_nav_cache 为空，尝试实时从 tushare 获取
             if nav_df.empty:
@@ -1011,7 +1013,7 @@ def get_portfolio_metrics():
 
                     fund_metrics.append({
                         'fund_code': fund_code,
-                        'weight': weights.get(fund_code, 0),
+                        'weight': float(weights.get(fund_code, 0.0)),
                         'annualized_return': safe_round(annualized_return),
                         'sharpe_ratio': safe_round(sharpe_ratio),
                         'max_drawdown': safe_round(max_drawdown),
@@ -1026,15 +1028,11 @@ def get_portfolio_metrics():
                     else:
                         portfolio_returns = np.concatenate([portfolio_returns, returns])
 
-        # 计算组合加权指标
-        # 安全处理组合指标
-        def safe_sum(values):
-            return sum(v for v in values if v is not None and not np.isnan(v) and not np.isinf(v))
-        
-        portfolio_annualized_return = safe_sum(m['annualized_return'] * m['weight'] for m in fund_metrics)
-        portfolio_sharpe = safe_sum(m['sharpe_ratio'] * m['weight'] for m in fund_metrics)
-        portfolio_max_drawdown = safe_sum(m['max_drawdown'] * m['weight'] for m in fund_metrics)
-        portfolio_volatility = safe_sum(m['volatility'] * m['weight'] for m in fund_metrics)
+        # 计算组合加权指标（无效值不计入）
+        metrics_frame = pd.DataFrame(fund_metrics).set_index('fund_code') if fund_metrics else pd.DataFrame()
+        portfolio_totals = weighted_sum(metrics_frame, weights, [
+            'annualized_return', 'sharpe_ratio', 'max_drawdown', 'volatility', 'win_rate'
+        ])
 
         # 归因分析 - 各基金对组合收益的贡献
         attribution = []
@@ -1054,11 +1052,11 @@ def get_portfolio_metrics():
                     'trading_days': int(trading_days)
                 },
                 'portfolio': {
-                    'annualized_return': safe_round(portfolio_annualized_return),
-                    'sharpe_ratio': safe_round(portfolio_sharpe),
-                    'max_drawdown': safe_round(portfolio_max_drawdown),
-                    'volatility': safe_round(portfolio_volatility),
-                    'win_rate': safe_round(safe_sum(m['win_rate'] * m['weight'] for m in fund_metrics))
+                    'annualized_return': safe_round(portfolio_totals['annualized_return']),
+                    'sharpe_ratio': safe_round(portfolio_totals['sharpe_ratio']),
+                    'max_drawdown': safe_round(portfolio_totals['max_drawdown']),
+                    'volatility': safe_round(portfolio_totals['volatility']),
+                    'win_rate': safe_round(portfolio_totals['win_rate'])
                 },
                 'funds': fund_metrics,
                 'attribution': attribution
@@ -1087,51 +1085,26 @@ def get_portfolio_optimization():
         if not start_date or not end_date:
             return jsonify({'success': False, 'error': '请提供开始和结束日期'}), 400
 
-        # 获取用户持仓权重（用于基准对比）
+        # 获取用户持仓权重（用于基准对比，没有持仓数据时平均分配）
         user_id = data.get('user_id', 'default_user')
-        holdings_sql = """
-            SELECT fund_code, holding_amount
-            FROM user_holdings
-            WHERE user_id = :user_id AND fund_code IN :fund_codes
-        """
-        holdings_df = db_manager.execute_query(holdings_sql, {
-            'user_id': user_id,
-            'fund_codes': tuple(fund_codes)
-        })
-
-        # 计算用户持仓权重
-        total_amount = holdings_df['holding_amount'].sum() if not holdings_df.empty else 0
-        user_weights = {}
-        if total_amount > 0:
-            for _, row in holdings_df.iterrows():
-                user_weights[row['fund_code']] = row['holding_amount'] / total_amount
-        else:
-            # 如果没有持仓数据，平均分配权重
-            for code in fund_codes:
-                user_weights[code] = 1.0 / len(fund_codes)
-
-        # 获取基金收益率数据
+        snapshot = get_portfolio_aggregation_service(db_manager).load_snapshot(user_id)
+        weights = snapshot.weights(fund_codes)
+        held = weights.index.isin(snapshot.fund_codes)
+        if held.any() and weights[held].sum() > 0:
+            # 有持仓时只列出实际持有的基金
+            weights = weights[held]
+        user_weights = {code: float(w) for code, w in weights.items()}
+
+        # 获取基金收益率数据（所有基金的历史净值一次查询，缓存中没有的基金再从 tushare 实时获取）
         returns_dict = {}
         fund_navs = {}
+        nav_groups = _query_nav_groups(fund_codes, start_date, end_date)
 
         for fund_code in fund_codes:
-            # 先尝试从 tushare 实时获取
-            nav_df = fetch_nav_from_tushare_realtime(fund_code, start_date, end_date)
-            
-            # 如果 tushare 无数据，再从 fund_nav_cache 获取
+            nav_df = nav_groups.get(str(fund_code), pd.DataFrame(columns=['nav', 'nav_date']))
             if nav_df.empty:
-                nav_sql = """
-                    SELECT nav_value as nav, nav_date FROM fund_nav_cache
-                    WHERE fund_code = :fund_code
-                    AND nav_date >= :start_date
-                    AND nav_date <= :end_date
-                    ORDER BY nav_date
-                """
-                nav_df = db_manager.execute_query(nav_sql, {
-                    'fund_code': fund_code,
-                    'start_date': start_date,
-                    'end_date': end_date
-                })
+                logger.info(f"[Portfolio Optimization] fund_nav_cache 无数据，尝试从 tushare 实时获取 {fund_code}")
+                nav_df = fetch_nav_from_tushare_realtime(fund_code, start_date, end_date)
 
             if not nav_df.empty:
                 nav_df = nav_df.sort_values('nav_date')
@@ -1381,6 +1354,7 @@ def import_holding_confirm():
                 errors.append(error_msg)
 
         if imported_count > 0:
+            invalidate_portfolio_snapshots(user_id)
             message = f"成功导入 {imported_count} 只基金"
             if errors:
                 message += f"，{len(errors)} 只基金导入失败"
@@ -1453,6 +1427,7 @@ def add_holding():
                 update_fund_analysis_results(fund_code, fund_name)
             except Exception as e:
                 logger.warning(f"基金 {fund_code} 绩效指标计算失败: {e}")
+            invalidate_portfolio_snapshots(user_id)
             
             return jsonify({'success': True, 'message': '持仓添加成功'})
         else:
@@ -1718,6 +1693,7 @@ def update_holding(fund_code):
             logger.warning(f"更新实时数据失败: {str(e)}")
             # 即使更新实时数据失败，也返回成功（因为持仓已更新）
         
+        invalidate_portfolio_snapshots(user_id)
         return jsonify({'success': True, 'message': '持仓更新成功，实时数据已刷新'})
             
     except Exception as e:
@@ -1736,6 +1712,7 @@ def clear_holdings():
         success = db_manager.execute_sql(sql, {'user_id': user_id})
         
         if success:
+            invalidate_portfolio_snapshots(user_id)
             # 清理持仓相关的缓存数据
             try:
                 if holding_service and hasattr(holding_service, 'cache'):
@@ -1782,6 +1759,11 @@ def analyze_fund_correlation_interactive():
         if len(fund_codes) < 2:
             return jsonify({'success': False, 'error': '至少需要2只基金进行相关性分析'})
         
+        try:
+            max_points, _, encoding = parse_chart_options(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         # 步骤1: 批量获取基金名称
         step_start = time.perf_counter()
         fund_names = _batch_get_fund_names(fund_codes)
@@ -1816,7 +1798,8 @@ def analyze_fund_correlation_interactive():
             fund2_code = detail_pair['fund2']
             
             pair_detail = analyzer.generate_pair_detail_data(
-                fund_data_dict, fund_names, fund1_code, fund2_code
+                fund_data_dict, fund_names, fund1_code, fund2_code,
+                max_points=max_points, encoding=encoding
             )
             
             if not pair_detail:
@@ -1837,7 +1820,7 @@ def analyze_fund_correlation_interactive():
         
         # 否则返回懒加载格式的数据（主组合+精简列表）
         interactive_data = analyzer.generate_interactive_correlation_data(
-            fund_data_dict, fund_names, lazy_load=True
+            fund_data_dict, fund_names, lazy_load=True, max_points=max_points, encoding=encoding
         )
         
         step_elapsed = (time.perf_counter() - step_start) * 1000
@@ -2104,54 +2087,21 @@ def get_real_holding_distribution(user_id: str = 'default_user') -> list:
     根据用户的实际持仓按基金类型统计
     """
     try:
-        # 第一步：获取用户持仓
-        sql_holdings = """
-        SELECT h.fund_code, h.holding_shares, h.cost_price
-        FROM user_holdings h
-        WHERE h.user_id = :user_id
-        """
-        
-        df_holdings = db_manager.execute_query(sql_holdings, {'user_id': user_id})
-        
-        if df_holdings.empty:
+        # 持仓、基金类型（批量查询）和按类型的金额/数量统计由持仓快照一次完成
+        snapshot = get_portfolio_aggregation_service(db_manager).load_snapshot(user_id)
+
+        if snapshot.holdings.empty:
             logger.info(f"用户 {user_id} 没有持仓数据")
             return []
-        
-        logger.info(f"获取到 {len(df_holdings)} 条持仓记录")
-        
-        # 第二步：为每个基金获取类型（使用新的基金类型服务）
-        fund_codes = df_holdings['fund_code'].tolist()
-        fund_type_map = {}
-        
-        for fund_code in fund_codes:
-            # 使用统一的基金类型获取方法
-            fund_type_code = get_fund_type_for_allocation(fund_code)
-            fund_type_map[fund_code] = fund_type_code
-        
-        # 第三步：按基金类型统计持仓金额
-        type_amounts = {}
-        total_amount = 0
-        
-        for _, row in df_holdings.iterrows():
-            fund_code = row['fund_code']
-            fund_type = fund_type_map.get(fund_code, 'unknown')
-            
-            holding_amount = float(row['holding_shares']) * float(row['cost_price'])
-            
-            if fund_type in type_amounts:
-                type_amounts[fund_type] += holding_amount
-            else:
-                type_amounts[fund_type] = holding_amount
-            
-            total_amount += holding_amount
-            
-            logger.debug(f"基金 {fund_code}: 类型={fund_type}, 金额={holding_amount}")
-        
-        if total_amount == 0:
+
+        logger.info(f"获取到 {len(snapshot.holdings)} 条持仓记录")
+
+        type_distribution = snapshot.type_distribution()
+        if type_distribution['amount'].sum() == 0:
             logger.warning("总持仓金额为0")
             return []
-        
-        logger.info(f"持仓分布统计完成: {type_amounts}")
+
+        logger.info(f"持仓分布统计完成: {dict(zip(type_distribution['fund_type'], type_distribution['amount']))}")
         
         # 类型代码到中文名称的映射
         cn_name_map = {
@@ -2192,30 +2142,18 @@ def get_real_holding_distribution(user_id: str = 'default_user') -> list:
             'unknown': '#adb5bd'
         }
         
-        # 统计每个类型的基金数量
-        type_count = {}
-        for _, row in df_holdings.iterrows():
-            fund_code = row['fund_code']
-            fund_type = fund_type_map.get(fund_code, 'unknown')
-            
-            if fund_type in type_count:
-                type_count[fund_type] += 1
-            else:
-                type_count[fund_type] = 1
-        
         # 构建分布数据
         distribution = []
-        for fund_type, amount in sorted(type_amounts.items(), key=lambda x: x[1], reverse=True):
-            percentage = round((amount / total_amount) * 100, 1)
-            count = type_count.get(fund_type, 0)
+        for row in type_distribution.to_dict('records'):
+            fund_type = row['fund_type']
             distribution.append({
                 'name': f'{cn_name_map.get(fund_type, fund_type)}基金',
                 'type_code': fund_type,
-                'percentage': percentage,
-                'count': count,
+                'percentage': round(float(row['percentage']), 1),
+                'count': int(row['count']),
                 'color': color_map.get(fund_type, 'primary'),
                 'colorHex': color_hex_map.get(fund_type, '#007bff'),
-                'amount': round(amount, 2)
+                'amount': round(float(row['amount']), 2)
             })
         
         logger.info(f"持仓分布: {distribution}")
@@ -2312,6 +2250,12 @@ def analyze_fund_correlation():
         
         # 获取增强分析选项
         enhanced_analysis = data.get('enhanced_analysis', True)
+        try:
+            top_k = int(data.get('top_k', 10))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': f"top_k 必须是整数: {data.get('top_k')}"}), 400
+        if top_k < 0:
+            return jsonify({'success': False, 'error': f"top_k 不能为负数: {top_k}"}), 400
         
         logger.info(f"[Correlation] 开始分析 {len(fund_codes)} 只基金的相关性")
         
@@ -2365,16 +2309,20 @@ def analyze_fund_correlation():
                 
                 if len(fund_data_dict) >= 2:
                     enhanced_analyzer = EnhancedCorrelationAnalyzer()
+                    # 所有基金对的相关矩阵、各周期相关矩阵和高相关性基金对的滚动序列
+                    # 与增强分析共用一次数据对齐和相关矩阵计算
                     enhanced_result = enhanced_analyzer.analyze_enhanced_correlation(
-                        fund_data_dict, fund_names
+                        fund_data_dict, fund_names, batch_top_k=top_k
                     )
+                    batch_result = enhanced_result.pop('batch_analysis')
                     
-                    # 生成相关性图表
+                    # 生成相关性图表：默认提交到图表渲染服务并返回图片URL，inline_charts=true 时内嵌base64图片
                     chart_data = enhanced_analyzer.generate_correlation_charts(
-                        fund_data_dict, fund_names
+                        fund_data_dict, fund_names, wait=bool(data.get('inline_charts', False))
                     )
                     
                     result['data']['enhanced_analysis'] = enhanced_result
+                    result['data']['batch_analysis'] = batch_result
                     if chart_data:
                         result['data']['charts'] = chart_data
                 else:
@@ -2483,11 +2431,22 @@ def analyze_comprehensive():
         if not fund_codes:
             return jsonify({'success': False, 'error': '请选择至少一只基金'})
         
+        # 持仓基金的最新重仓股来自持仓快照（一次批量查询），快照中没有的基金再逐只从数据源获取
+        user_id = data.get('user_id', 'default_user')
+        snapshot = get_portfolio_aggregation_service(db_manager).load_snapshot(user_id)
+        snapshot_stocks = snapshot.fund_stocks(fund_codes)
+        covered = set(snapshot_stocks['fund_code'])
+        
         # Collect position data for each fund
         all_holdings = []
         total_asset = 0
+        if not snapshot_stocks.empty:
+            all_holdings.append(_snapshot_stocks_to_holdings(snapshot_stocks))
+            total_asset += 100000 * len(covered)
         
         for fund_code in fund_codes:
+            if str(fund_code) in covered:
+                continue
             # Get fund position data
             holdings_df = get_fund_holdings_data(fund_code)
             if holdings_df is not None and not holdings_df.empty:
@@ -2511,7 +2470,11 @@ def analyze_comprehensive():
         industry_distribution = calculate_industry_distribution(combined_holdings, total_asset, fund_codes_count)
         
         # Calculate top stocks (with weighted average for multiple funds)
-        top_stocks = calculate_top_stocks(combined_holdings, total_asset, fund_codes_count)
+        if covered.issuperset(str(code) for code in fund_codes):
+            # 全部基金都在快照中：按持仓权重计算组合的重仓股暴露
+            top_stocks = format_top_stocks(snapshot.stock_exposure(fund_codes), total_asset)
+        else:
+            top_stocks = calculate_top_stocks(combined_holdings, total_asset, fund_codes_count)
         
         # Generate analysis summary
         summary = generate_analysis_summary(asset_allocation, industry_distribution, top_stocks, fund_codes_count)
@@ -2561,6 +2524,7 @@ def delete_holding(fund_code):
         success = db_manager.execute_sql(sql, {'user_id': user_id, 'fund_code': fund_code})
         
         if success:
+            invalidate_portfolio_snapshots(user_id)
             return jsonify({'success': True, 'message': '持仓删除成功'})
         else:
             return jsonify({'success': False, 'error': '持仓删除失败'}), 500
@@ -2783,6 +2747,19 @@ def _get_holdings_from_sina(fund_code):
         raise
 
 
+def _snapshot_stocks_to_holdings(stocks):
+    """持仓快照中的重仓股转换为 get_fund_holdings_data 返回的持仓数据格式"""
+    holdings_df = pd.DataFrame({
+        'stock_name': stocks['stock_name'].astype(str),
+        'stock_code': stocks['stock_code'].astype(str),
+        'proportion': pd.to_numeric(stocks['holding_ratio'], errors='coerce').fillna(0.0),
+        'change_percent': '--',
+        'fund_code': stocks['fund_code'],
+    })
+    holdings_df['industry'] = holdings_df['stock_name'].map(_get_industry_by_stock_name)
+    return holdings_df
+
+
 def _get_industry_by_stock_name(stock_name):
     """根据股票名称推断所属行业（简化版）"""
     industry_mapping = {
@@ -2886,74 +2863,54 @@ def calculate_top_stocks(holdings_df, total_asset, fund_codes_count=1):
         fund_codes_count: 基金数量（用于加权平均）
     """
     try:
-        # 首先收集每只股票关联的基金信息
-        stock_fund_map = {}
-        # 缓存基金名称避免重复查询
-        fund_name_cache = {}
-        
+        # 基金名称：每只基金只取一次，缺失时查库
+        fund_names = {}
+        stocks = holdings_df
         if 'fund_code' in holdings_df.columns:
-            for _, row in holdings_df.iterrows():
-                stock_key = (str(row.get('stock_code', '')), str(row.get('stock_name', '')))
-                fund_code = str(row.get('fund_code', ''))
-                proportion = float(row.get('proportion', 0))
-                
-                # 获取基金名称（优先从缓存）
-                if fund_code not in fund_name_cache:
-                    fund_name = row.get('fund_name', '') or get_fund_name_from_db(fund_code) or fund_code
-                    fund_name_cache[fund_code] = fund_name
-                else:
-                    fund_name = fund_name_cache[fund_code]
-                
-                if stock_key not in stock_fund_map:
-                    stock_fund_map[stock_key] = []
-                
-                # 避免重复添加同一基金
-                existing_codes = [f['fund_code'] for f in stock_fund_map[stock_key]]
-                if fund_code and fund_code not in existing_codes:
-                    stock_fund_map[stock_key].append({
-                        'fund_code': fund_code,
-                        'fund_name': fund_name,
-                        'proportion': round(proportion, 2)
-                    })
-        
-        # Group by stock code and name, sum the proportions
-        grouped = holdings_df.groupby(['stock_code', 'stock_name'], as_index=False)['proportion'].sum()
-        
-        # Sort by proportion
-        sorted_holdings = grouped.sort_values('proportion', ascending=False).head(10)
-        
-        # Convert to list of dictionaries
+            firsts = holdings_df.drop_duplicates('fund_code')
+            names = firsts['fund_name'] if 'fund_name' in firsts.columns else [''] * len(firsts)
+            for fund_code, fund_name in zip(firsts['fund_code'].astype(str), names):
+                fund_names[fund_code] = (fund_name if isinstance(fund_name, str) and fund_name else
+                                         get_fund_name_from_db(fund_code) or fund_code)
+        else:
+            stocks = holdings_df.assign(fund_code='')
+
+        # 按股票汇总持仓比例并取前10，同时整理每只股票的关联基金
+        exposure = stock_exposure(stocks, top_n=10, ratio_column='proportion', fund_names=fund_names)
+
         # 对多基金情况进行加权平均
-        top_stocks = []
-        for _, row in sorted_holdings.iterrows():
-            raw_proportion = float(row.get('proportion', 0))
-            adjusted_proportion = raw_proportion / max(fund_codes_count, 1)
-            stock_code = str(row.get('stock_code', row.get('code', '')))
-            stock_name = str(row.get('stock_name', row.get('name', '')))
-            stock_key = (stock_code, stock_name)
-            
-            # 获取关联基金列表
-            related_funds = stock_fund_map.get(stock_key, [])
-            fund_count = len(related_funds) if related_funds else 1
-            
-            stock_info = {
-                'stock_name': stock_name,
-                'stock_code': stock_code,
-                'proportion': round(adjusted_proportion, 2),
-                'market_value': round(adjusted_proportion * total_asset / 100, 2),
-                'change_percent': row.get('change_percent', row.get('涨跌幅', '--')),
-                'fund_count': fund_count,
-                'related_funds': related_funds
-            }
-            top_stocks.append(stock_info)
-        
-        return top_stocks
+        exposure['proportion'] = exposure['proportion'].astype(float) / max(fund_codes_count, 1)
+        return format_top_stocks(exposure, total_asset)
     except Exception as e:
         logger.error(f"计算重仓股失败: {e}")
         traceback.print_exc()
         return []
 
 
+def format_top_stocks(exposure, total_asset):
+    """
+    重仓股暴露（stock_exposure 的结果）转换为接口返回的重仓股列表
+    
+    Args:
+        exposure: stock_code, stock_name, proportion, related_funds，proportion 为组合层面的持仓比例
+        total_asset: 总资产（用于市值计算）
+    """
+    top_stocks = []
+    for row in exposure.to_dict('records'):
+        proportion = float(row['proportion'])
+        related_funds = row['related_funds']
+        top_stocks.append({
+            'stock_name': row['stock_name'],
+            'stock_code': row['stock_code'],
+            'proportion': round(proportion, 2),
+            'market_value': round(proportion * total_asset / 100, 2),
+            'change_percent': '--',
+            'fund_count': len(related_funds) or 1,
+            'related_funds': related_funds
+        })
+    return top_stocks
+
+
 def generate_analysis_summary(asset_allocation, industry_distribution, top_stocks, fund_codes_count=1):
     """
     Generate analysis summary based on calculated data
@@ -3204,6 +3161,10 @@ def get_dip_returns():
         fund_codes = data.get('fund_codes', [])
         start_date = data.get('start_date')
         end_date = data.get('end_date')
+        try:
+            max_points, method, encoding = parse_chart_options(data)
+        except ValueError as e:
+            return safe_jsonify({'success': False, 'error': str(e)}), 400
         
         if not fund_codes:
             holdings = _get_holdings_from_db()
@@ -3228,6 +3189,7 @@ def get_dip_returns():
             'total_return': portfolio_returns['total_return'].tolist(),
             'return_rate': (portfolio_returns['return_rate'] * 100).tolist()
         }
+        chart_data = encode_chart_data(downsample_chart_data(chart_data, max_points, method=method), encoding)
         
         latest = portfolio_returns.iloc[-1]
         
@@ -3256,6 +3218,10 @@ def get_fund_dip_returns(fund_code):
         
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        try:
+            max_points, method, encoding = parse_chart_options(request.args)
+        except ValueError as e:
+            return safe_jsonify({'success': False, 'error': str(e)}), 400
         
         df = calculator.calculate_daily_returns(fund_code, start_date, end_date)
         
@@ -3271,8 +3237,9 @@ def get_fund_dip_returns(fund_code):
             'total_return': df['total_return'].tolist(),
             'return_rate': (df['return_rate'] * 100).tolist()
         }
+        chart_data = encode_chart_data(downsample_chart_data(chart_data, max_points, method=method), encoding)
         
-        summary = calculator.get_return_summary(fund_code, start_date)
+        summary = calculator.summarize_returns(fund_code, df)
         
         return safe_jsonify({
             'success': True,
@@ -3298,6 +3265,10 @@ def get_portfolio_dip_returns():
         weights = data.get('weights')
         start_date = data.get('start_date')
         end_date = data.get('end_date')
+        try:
+            max_points, method, encoding = parse_chart_options(data)
+        except ValueError as e:
+            return safe_jsonify({'success': False, 'error': str(e)}), 400
         
         if not fund_codes:
             return safe_jsonify({'success': False, 'error': '请提供基金代码列表'}), 400
@@ -3314,6 +3285,7 @@ def get_portfolio_dip_returns():
             'total_return': df['total_return'].tolist(),
             'return_rate': (df['return_rate'] * 100).tolist()
         }
+        chart_data = encode_chart_data(downsample_chart_data(chart_data, max_points, method=method), encoding)
         
         latest = df.iloc[-1]
         
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回测执行内核性能基准
+
+对比原逐日回测（iloc 逐行）与数组化内核在6年日频数据上的耗时。
+pytest.ini 默认忽略 tests/performance，需显式运行：
+
+    pytest tests/performance/test_backtest_kernel_benchmark.py -s -m performance
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'unit'))
+from test_backtest_kernel import make_fund_history, reference_backtest  # noqa: E402
+
+
+@pytest.mark.performance
+def test_backtest_kernel_speedup():
+    """数组化内核相对逐日回测的加速比"""
+    from backtesting.core.backtest_engine import FundBacktest
+
+    backtester = FundBacktest(base_amount=100, initial_cash=10000, use_unified_strategy=False)
+    fund_hist = make_fund_history(n_days=252 * 6)
+
+    start = time.perf_counter()
+    reference_backtest(backtester, fund_hist)
+    loop_seconds = time.perf_counter() - start
+
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        backtester.backtest_from_history(fund_hist)
+    kernel_seconds = (time.perf_counter() - start) / runs
+
+    print(f"\n逐日回测: {loop_seconds * 1000:.1f} ms, 数组化内核: {kernel_seconds * 1000:.2f} ms, "
+          f"加速比: {loop_seconds / kernel_seconds:.0f}x")
+    assert kernel_seconds < loop_seconds
+
+
+@pytest.mark.performance
+def test_portfolio_matrix_scales_with_width():
+    """40只基金组合：矩阵回测 vs 逐基金回测"""
+    from backtesting.core.backtest_engine import FundBacktest
+
+    backtester = FundBacktest(base_amount=100, initial_cash=10000, use_unified_strategy=False)
+    fund_histories = {f'{i:06d}': make_fund_history(n_days=252 * 3, seed=i) for i in range(40)}
+
+    start = time.perf_counter()
+    for hist in fund_histories.values():
+        reference_backtest(backtester, hist)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backtester.backtest_fund_matrix(fund_histories)
+    matrix_seconds = time.perf_counter() - start
+
+    print(f"\n逐基金逐日回测: {loop_seconds:.2f} s, 矩阵回测: {matrix_seconds * 1000:.1f} ms, "
+          f"加速比: {loop_seconds / matrix_seconds:.0f}x")
+    assert matrix_seconds < loop_seconds
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+MemoryCache 微基准
+
+对比原实现（满容量时 min() 全表扫描淘汰 + 定期全表扫描过期）与
+OrderedDict LRU + 过期堆实现在满容量写入下的吞吐（ops/sec）。
+
+    pytest tests/performance/test_memory_cache_benchmark.py -s -m performance
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+
+class LegacyMemoryCache:
+    """原 MemoryCache 的核心逻辑（作为对照）"""
+
+    def __init__(self, max_size=1000, cleanup_interval=100):
+        self._cache = {}
+        self._lock = threading.RLock()
+        self._max_size = max_size
+        self._cleanup_interval = cleanup_interval
+        self._operation_count = 0
+
+    def get(self, key):
+        with self._lock:
+            self._operation_count += 1
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            value, created_at, expires_at = entry
+            if expires_at is not None and datetime.now() > expires_at:
+                del self._cache[key]
+                return None
+            self._maybe_cleanup()
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._operation_count += 1
+            expires_at = datetime.now() + timedelta(seconds=ttl) if ttl is not None else None
+            if len(self._cache) >= self._max_size and key not in self._cache:
+                oldest_key = min(self._cache.keys(), key=lambda k: self._cache[k][1])
+                del self._cache[oldest_key]
+            self._cache[key] = (value, datetime.now(), expires_at)
+            self._maybe_cleanup()
+            return True
+
+    def _maybe_cleanup(self):
+        if self._operation_count % self._cleanup_interval == 0:
+            now = datetime.now()
+            for key in [k for k, e in self._cache.items() if e[2] is not None and now > e[2]]:
+                del self._cache[key]
+
+
+def run_workload(cache, n_ops, key_space):
+    """满容量下 1:1 读写混合"""
+    start = time.perf_counter()
+    for i in range(n_ops):
+        key = f'fund:{(i * 7919) % key_space}'
+        if cache.get(key) is None:
+            cache.set(key, i, ttl=3600)
+    return n_ops / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+def test_memory_cache_ops_per_second():
+    """max_size=2000、键空间4000时的吞吐对比"""
+    from services.cache.memory_cache import MemoryCache
+
+    n_ops, key_space = 20000, 4000
+    legacy_ops = run_workload(LegacyMemoryCache(max_size=2000), n_ops, key_space)
+    new_ops = run_workload(MemoryCache(max_size=2000), n_ops, key_space)
+    sharded_ops = run_workload(MemoryCache(max_size=2000, num_shards=8), n_ops, key_space)
+
+    print(f"\n原实现: {legacy_ops:,.0f} ops/s, LRU+过期堆: {new_ops:,.0f} ops/s, "
+          f"8分段: {sharded_ops:,.0f} ops/s, 加速比: {new_ops / legacy_ops:.0f}x")
+    assert new_ops > legacy_ops
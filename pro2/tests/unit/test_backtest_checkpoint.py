@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+增量回测断点测试：逐日从断点继续的结果与从头回测逐位一致
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting.core.backtest_checkpoint import BacktestCheckpointStore
+from backtesting.core.backtest_engine import FundBacktest
+
+
+def make_nav_df(n_days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = np.round(rng.normal(0.0003, 0.012, n_days), 4)
+    returns[rng.random(n_days) < 0.1] = 0.0
+    return pd.DataFrame({
+        'date': pd.bdate_range('2022-01-03', periods=n_days),
+        'nav': np.round(np.cumprod(1 + returns), 4),
+        'daily_return': returns,
+    })
+
+
+class FakeNavStore:
+    """只暴露截止日之前数据的净值存储，模拟每天新增一个交易日"""
+
+    def __init__(self, nav_df):
+        self.nav_df = nav_df
+        self.visible_rows = len(nav_df)
+        self.requested_rows = []
+
+    def get(self, namespace, code, start_date=None, end_date=None):
+        df = self.nav_df.iloc[:self.visible_rows]
+        df = df[df['date'] >= pd.Timestamp(start_date)]
+        self.requested_rows.append(len(df))
+        return df.reset_index(drop=True)
+
+
+def make_backtester(nav_store, initial_cash=500):
+    return FundBacktest(base_amount=100, start_date='2022-01-01', end_date='2030-12-31',
+                        initial_cash=initial_cash, use_unified_strategy=False, nav_store=nav_store)
+
+
+def full_backtest(nav_df, initial_cash):
+    backtester = make_backtester(FakeNavStore(nav_df), initial_cash)
+    return backtester.backtest_single_fund('000001')
+
+
+class TestIncrementalBacktest:
+
+    @pytest.mark.parametrize('initial_cash', [500, 100000])
+    def test_daily_extension_matches_full_recompute(self, tmp_path, initial_cash):
+        nav_df = make_nav_df()
+        nav_store = FakeNavStore(nav_df)
+        store = BacktestCheckpointStore(str(tmp_path))
+        backtester = make_backtester(nav_store, initial_cash)
+
+        nav_store.visible_rows = 200
+        assert len(backtester.extend_backtest('000001', store)) == 199
+        for rows in range(201, len(nav_df) + 1):
+            nav_store.visible_rows = rows
+            new_rows = backtester.extend_backtest('000001', store)
+            assert len(new_rows) == 1
+        # 每天只读取断点日和新增的交易日
+        assert nav_store.requested_rows[-1] == 2
+
+        expected = full_backtest(nav_df, initial_cash)
+        curve = store.read_curve('000001', backtester.checkpoint_key())
+        pd.testing.assert_frame_equal(curve, expected, check_dtype=False, rtol=0, atol=0)
+
+        # 没有新数据时不追加
+        assert backtester.extend_backtest('000001', store).empty
+        assert len(store.read_curve('000001', backtester.checkpoint_key())) == len(expected)
+
+    def test_restated_history_triggers_rebuild(self, tmp_path):
+        nav_df = make_nav_df()
+        nav_store = FakeNavStore(nav_df)
+        store = BacktestCheckpointStore(str(tmp_path))
+        backtester = make_backtester(nav_store)
+
+        nav_store.visible_rows = 250
+        backtester.extend_backtest('000001', store)
+
+        # 断点日的净值被修正
+        nav_df.loc[249, 'nav'] += 0.01
+        nav_store.visible_rows = 260
+        result = backtester.extend_backtest('000001', store)
+        assert len(result) == 259
+        pd.testing.assert_frame_equal(store.read_curve('000001', backtester.checkpoint_key()),
+                                      full_backtest(nav_df.iloc[:260], 500), check_dtype=False)
+
+    def test_uncommitted_tail_is_discarded(self, tmp_path):
+        nav_df = make_nav_df(n_days=60)
+        nav_store = FakeNavStore(nav_df)
+        store = BacktestCheckpointStore(str(tmp_path))
+        backtester = make_backtester(nav_store)
+        key = backtester.checkpoint_key()
+
+        nav_store.visible_rows = 50
+        backtester.extend_backtest('000001', store)
+        # 模拟追加曲线后、写入断点前进程中断
+        with open(tmp_path / key / '000001' / 'curve.csv', 'a', encoding='utf-8') as f:
+            f.write('2099-01-01,1,2,3\n')
+        assert len(store.read_curve('000001', key)) == 49
+
+        nav_store.visible_rows = 60
+        backtester.extend_backtest('000001', store)
+        pd.testing.assert_frame_equal(store.read_curve('000001', key), full_backtest(nav_df, 500),
+                                      check_dtype=False)
+
+    def test_checkpoint_key_depends_on_parameters(self):
+        nav_store = FakeNavStore(make_nav_df(n_days=10))
+        assert make_backtester(nav_store, 500).checkpoint_key() == make_backtester(nav_store, 500).checkpoint_key()
+        assert make_backtester(nav_store, 500).checkpoint_key() != make_backtester(nav_store, 1000).checkpoint_key()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回测数组化执行内核单元测试
+
+验证 FundBacktest.backtest_from_history 与原逐日回测（iloc 逐行 + 字典追加）结果一致。
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+
+
+def make_fund_history(n_days=400, seed=0, zero_ratio=0.1):
+    """构造与 get_fund_history 输出格式一致的历史数据（含持平日）"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=n_days)
+    returns = np.round(rng.normal(0.0003, 0.012, n_days), 4)
+    returns[rng.random(n_days) < zero_ratio] = 0.0
+    navs = np.round(1.0 * np.cumprod(1 + returns), 4)
+    return pd.DataFrame({
+        '净值日期': dates,
+        '单位净值': navs,
+        '日增长率': returns
+    })
+
+
+def reference_backtest(backtester, fund_hist):
+    """原逐日回测实现（作为等价性基准）"""
+    cash = backtester.initial_cash
+    shares = 0
+    total_asset = []
+    benchmark_asset = []
+    benchmark_cash = backtester.initial_cash
+    benchmark_shares = 0
+
+    for i in range(1, len(fund_hist)):
+        today = fund_hist.iloc[i]
+        yesterday = fund_hist.iloc[i - 1]
+        today_nav = today['单位净值']
+        today_return = today['日增长率']
+        prev_day_return = yesterday['日增长率']
+
+        status_label, is_buy, redeem_amount, _, _, _, buy_multiplier = \
+            backtester.get_investment_strategy(today_return, prev_day_return)
+
+        if is_buy:
+            buy_amount = backtester.base_amount * buy_multiplier
+            if cash >= buy_amount or i == 1:
+                shares += buy_amount / today_nav
+                cash -= buy_amount
+
+        if redeem_amount > 0 and shares > 0:
+            shares = max(0, shares - redeem_amount / today_nav)
+            cash += redeem_amount
+
+        total_asset.append({
+            'date': today['净值日期'],
+            'total_value': cash + shares * today_nav,
+            'cash': cash,
+            'shares': shares,
+            'nav': today_nav,
+            'strategy': status_label
+        })
+
+        if benchmark_cash >= backtester.base_amount or i == 1:
+            benchmark_shares += backtester.base_amount / today_nav
+            benchmark_cash -= backtester.base_amount
+        benchmark_asset.append({
+            'date': today['净值日期'],
+            'total_value': benchmark_cash + benchmark_shares * today_nav
+        })
+
+    result_df = pd.DataFrame(total_asset).merge(
+        pd.DataFrame(benchmark_asset), on='date', suffixes=('_strategy', '_benchmark'))
+    result_df['daily_return_strategy'] = result_df['total_value_strategy'].pct_change().fillna(0)
+    result_df['daily_return_benchmark'] = result_df['total_value_benchmark'].pct_change().fillna(0)
+    return result_df
+
+
+class TestBacktestKernel:
+    """数组化回测内核测试"""
+
+    @pytest.fixture
+    def engine_module(self):
+        from backtesting.core import backtest_engine
+        return backtest_engine
+
+    @pytest.mark.parametrize('initial_cash', [None, 0, 1000, 25000])
+    @pytest.mark.parametrize('seed', [0, 1, 2])
+    def test_matches_reference_loop(self, engine_module, initial_cash, seed):
+        """不同初始现金（现金约束是否生效）下，结果与逐日回测完全一致"""
+        backtester = engine_module.FundBacktest(base_amount=100, initial_cash=initial_cash,
+                                                use_unified_strategy=False)
+        fund_hist = make_fund_history(seed=seed)
+
+        expected = reference_backtest(backtester, fund_hist)
+        result = backtester.backtest_from_history(fund_hist)
+
+        assert list(result.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-12, atol=1e-9)
+
+    def test_legacy_strategy_arrays_match_scalar(self, engine_module):
+        """向量化信号与 _get_legacy_strategy 逐条一致（含0和NaN）"""
+        backtester = engine_module.FundBacktest(use_unified_strategy=False)
+        values = np.array([-0.02, -0.01, 0.0, 0.01, 0.02, np.nan])
+        today, prev = [a.ravel() for a in np.meshgrid(values, values)]
+
+        labels, is_buy, redeem, multipliers = engine_module.legacy_strategy_arrays(today, prev)
+
+        for i in range(len(today)):
+            label, buy, redeem_amount, _, _, _, multiplier = backtester._get_legacy_strategy(today[i], prev[i])
+            assert labels[i] == label
+            assert is_buy[i] == buy
+            assert redeem[i] == redeem_amount
+            assert multipliers[i] == multiplier
+
+    def test_insufficient_history_returns_none(self, engine_module):
+        """少于2天数据时返回None"""
+        backtester = engine_module.FundBacktest(use_unified_strategy=False)
+        assert backtester.backtest_from_history(make_fund_history(n_days=1)) is None
+
+    def test_benchmark_stops_buying_when_cash_runs_out(self, engine_module):
+        """基准定投在现金耗尽后停止买入"""
+        navs = np.ones(10)
+        values = engine_module.fixed_amount_benchmark_values(navs, base_amount=100, initial_cash=300)
+        # 净值恒为1时总资产恒等于初始现金
+        np.testing.assert_allclose(values, 300)
+
+
+def reference_portfolio(backtester, fund_results, weights, hs300_hist):
+    """原组合回测的对齐与基准计算逻辑（逐基金 reindex + 逐日累乘）"""
+    all_fund_dates = set()
+    for result_df in fund_results.values():
+        all_fund_dates.update(result_df['date'].tolist())
+
+    first_result = next(iter(fund_results.values()))
+    if hs300_hist is not None:
+        common_dates = sorted(all_fund_dates.intersection(set(hs300_hist['date'].tolist())))
+        dates = pd.to_datetime(common_dates) if common_dates else first_result['date']
+    else:
+        dates = first_result['date']
+
+    portfolio_asset = None
+    for i, result_df in enumerate(fund_results.values()):
+        aligned_df = result_df.set_index('date').reindex(dates).reset_index()
+        values = aligned_df['total_value_strategy'].fillna(0).values * weights[i]
+        portfolio_asset = values if i == 0 else portfolio_asset + values
+
+    if hs300_hist is None:
+        benchmark_asset = None
+        for i, result_df in enumerate(fund_results.values()):
+            if i == 0:
+                benchmark_asset = result_df['total_value_benchmark'].values * weights[i]
+            else:
+                aligned_df = result_df.set_index('date').reindex(dates).reset_index()
+                benchmark_asset = benchmark_asset + aligned_df['total_value_benchmark'].fillna(0).values * weights[i]
+    else:
+        hs300_returns = hs300_hist.set_index('date').reindex(dates).reset_index()['pct_change'].fillna(0)
+        benchmark_asset = [portfolio_asset[0]]
+        for i in range(1, len(hs300_returns)):
+            benchmark_asset.append(benchmark_asset[i - 1] * (1 + hs300_returns.iloc[i]))
+
+    return np.asarray(portfolio_asset), np.asarray(benchmark_asset)
+
+
+class TestPortfolioMatrixBacktest:
+    """多基金矩阵回测测试"""
+
+    @pytest.fixture
+    def fund_histories(self):
+        """三只基金，起止日期与停牌日各不相同"""
+        histories = {
+            '000001': make_fund_history(n_days=300, seed=10),
+            '000002': make_fund_history(n_days=260, seed=11).iloc[20:].reset_index(drop=True),
+            '000003': make_fund_history(n_days=300, seed=12).drop(index=[50, 51, 120]).reset_index(drop=True),
+        }
+        return histories
+
+    @pytest.fixture
+    def hs300_hist(self):
+        rng = np.random.default_rng(99)
+        dates = pd.bdate_range('2019-12-25', periods=320)
+        close = 4000 * np.cumprod(1 + rng.normal(0, 0.01, len(dates)))
+        hist = pd.DataFrame({'date': dates, 'close': close}).drop(index=[30, 31]).reset_index(drop=True)
+        hist['pct_change'] = hist['close'].pct_change().fillna(0)
+        return hist
+
+    @pytest.fixture
+    def backtester(self):
+        from backtesting.core.backtest_engine import FundBacktest
+        return FundBacktest(base_amount=100, initial_cash=2000, use_unified_strategy=False)
+
+    def test_matrix_columns_match_single_fund(self, backtester, fund_histories):
+        """矩阵回测的每一列与单基金回测一致"""
+        strategy_values, benchmark_values = backtester.backtest_fund_matrix(fund_histories)
+
+        for code, hist in fund_histories.items():
+            single = backtester.backtest_from_history(hist).set_index('date')
+            np.testing.assert_allclose(strategy_values[code].dropna().to_numpy(),
+                                       single['total_value_strategy'].to_numpy(), rtol=1e-12)
+            np.testing.assert_allclose(benchmark_values[code].dropna().to_numpy(),
+                                       single['total_value_benchmark'].to_numpy(), rtol=1e-12)
+            assert list(strategy_values[code].dropna().index) == list(single.index)
+
+    @pytest.mark.parametrize('use_hs300', [True, False])
+    def test_portfolio_matches_reference(self, backtester, fund_histories, hs300_hist, use_hs300):
+        """组合回测与原逐基金对齐逻辑一致"""
+        backtester.get_fund_history = lambda code: fund_histories[code].copy()
+        backtester.get_hs300_history = lambda: hs300_hist.copy() if use_hs300 else None
+        weights = [0.5, 0.3, 0.2]
+
+        result = backtester.backtest_portfolio(list(fund_histories), weights)
+
+        fund_results = {code: backtester.backtest_from_history(hist) for code, hist in fund_histories.items()}
+        expected_strategy, expected_benchmark = reference_portfolio(
+            backtester, fund_results, weights, hs300_hist if use_hs300 else None)
+
+        np.testing.assert_allclose(result['total_value_strategy'].to_numpy(), expected_strategy, rtol=1e-10)
+        np.testing.assert_allclose(result['total_value_benchmark'].to_numpy(), expected_benchmark, rtol=1e-10)
+        assert list(result.columns) == ['date', 'total_value_strategy', 'total_value_benchmark',
+                                        'daily_return_strategy', 'daily_return_benchmark']
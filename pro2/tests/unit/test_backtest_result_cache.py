@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回测结果缓存测试：缓存键、两级存储、BacktestAPIHandler 复用结果
+"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from backtesting.core import backtest_api
+from backtesting.core.result_cache import BacktestResultCache, data_fingerprint, make_cache_key
+from backtesting.strategies.custom_strategy_backtest import BacktestResult
+
+
+def make_funds_data(nav=1.0):
+    return pd.DataFrame({
+        'fund_code': ['000001', '000002', '000001', '000002'],
+        'date': ['2024-01-02', '2024-01-02', '2024-01-03', '2024-01-03'],
+        'nav': [1.0, 2.0, nav, 2.1],
+        'composite_score': [0.5, 0.6, 0.5, 0.6],
+    })
+
+
+class FakeDB:
+    def __init__(self):
+        self.funds_data = make_funds_data()
+        self.config = {'name': '动量', 'select_count': 2}
+
+    def execute_query(self, sql, params):
+        if 'user_strategies' in sql:
+            return pd.DataFrame([{'id': 1, 'name': 's', 'description': '', 'config': json.dumps(self.config)}])
+        if 'fund_analysis_results' in sql:
+            return self.funds_data.copy()
+        return pd.DataFrame()
+
+    def execute_sql(self, sql, params):
+        return True
+
+
+class TestCacheKey:
+
+    def test_key_is_order_insensitive_and_content_sensitive(self):
+        base = dict(strategy_config={'a': 1}, fund_codes=['A', 'B'], weights=[0.3, 0.7],
+                    start_date='2024-01-01', end_date='2024-06-30', data_version='v1')
+        key = make_cache_key(**base, initial_capital=1e5)
+        assert key == make_cache_key(**{**base, 'fund_codes': ['B', 'A'], 'weights': [0.7, 0.3]},
+                                     initial_capital=1e5)
+        assert key != make_cache_key(**{**base, 'weights': [0.4, 0.6]}, initial_capital=1e5)
+        assert key != make_cache_key(**{**base, 'data_version': 'v2'}, initial_capital=1e5)
+        assert key != make_cache_key(**{**base, 'strategy_config': {'a': 2}}, initial_capital=1e5)
+        assert key != make_cache_key(**base, initial_capital=2e5)
+
+    def test_fingerprint_changes_with_data(self):
+        assert data_fingerprint(make_funds_data()) == data_fingerprint(make_funds_data())
+        assert data_fingerprint(make_funds_data()) != data_fingerprint(make_funds_data(nav=1.01))
+        assert data_fingerprint(pd.DataFrame()) == 'empty'
+
+
+class TestBacktestResultCache:
+
+    def test_memory_lru_and_disk_fallback(self, tmp_path):
+        cache = BacktestResultCache(str(tmp_path), max_memory_entries=2)
+        for i in range(3):
+            cache.set(f'{i:064x}', {'value': i})
+        assert cache.get_stats()['memory_entries'] == 2
+
+        # 最早的条目已被淘汰出内存，从磁盘读取并回填
+        assert cache.get(f'{0:064x}') == {'value': 0}
+        assert cache.get_stats()['disk_hits'] == 1
+
+        # 其他进程（新实例）可以读取磁盘缓存
+        assert BacktestResultCache(str(tmp_path)).get(f'{2:064x}') == {'value': 2}
+        assert cache.get('f' * 64) is None
+
+    def test_corrupt_file_is_a_miss(self, tmp_path):
+        cache = BacktestResultCache(str(tmp_path))
+        key = 'ab' + '0' * 62
+        cache.set(key, {'value': 1})
+        with open(tmp_path / 'ab' / f'{key}.pkl', 'wb') as f:
+            f.write(b'not a pickle')
+        assert BacktestResultCache(str(tmp_path)).get(key) is None
+
+    def test_disk_entries_are_pruned(self, tmp_path):
+        cache = BacktestResultCache(str(tmp_path), max_memory_entries=1, max_disk_entries=5)
+        for i in range(12):
+            cache.set(f'{i:064x}', i)
+        assert len(list(tmp_path.glob('*/*.pkl'))) <= 6
+
+
+class TestHandlerCaching:
+
+    @pytest.fixture
+    def handler(self, tmp_path, monkeypatch):
+        calls = []
+
+        def fake_backtest(**kwargs):
+            calls.append(kwargs)
+            return BacktestResult(total_return=len(calls) * 0.1)
+
+        monkeypatch.setattr(backtest_api, 'run_custom_backtest', fake_backtest)
+        handler = backtest_api.BacktestAPIHandler(db_manager=FakeDB(),
+                                                  result_cache=BacktestResultCache(str(tmp_path)))
+        handler.calls = calls
+        return handler
+
+    def run(self, handler, **overrides):
+        params = dict(strategy_id=1, start_date='2024-01-01', end_date='2024-01-31', initial_capital=100000)
+        params.update(overrides)
+        success, result = handler.run_backtest(**params)
+        assert success
+        return result
+
+    def test_repeat_backtest_served_from_cache(self, handler):
+        first = self.run(handler)
+        second = self.run(handler)
+        assert len(handler.calls) == 1
+        assert not first['cached'] and second['cached']
+        assert second['result'] == first['result']
+        # 缓存命中的任务同样可以查询结果
+        ok, result = handler.get_backtest_result(second['task_id'])
+        assert ok and result['total_return'] == pytest.approx(0.1)
+
+    def test_invalidated_by_new_data_and_params(self, handler):
+        self.run(handler)
+        self.run(handler, initial_capital=200000)
+        assert len(handler.calls) == 2
+
+        handler.db_manager.config = {'name': '动量', 'select_count': 3}
+        self.run(handler)
+        assert len(handler.calls) == 3
+
+        # 新净值数据写入后自动失效
+        handler.db_manager.funds_data = make_funds_data(nav=1.05)
+        assert not self.run(handler)['cached']
+        assert self.run(handler)['cached']
+        assert len(handler.calls) == 4
+
+    def test_cache_can_be_disabled(self, tmp_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(backtest_api, 'run_custom_backtest', lambda **kw: calls.append(kw) or BacktestResult())
+        handler = backtest_api.BacktestAPIHandler(db_manager=FakeDB(), use_result_cache=False)
+        for _ in range(2):
+            assert handler.run_backtest(strategy_id=1, start_date='2024-01-01', end_date='2024-01-31')[0]
+        assert len(calls) == 2
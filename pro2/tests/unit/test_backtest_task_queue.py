@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+回测服务持久化队列与工作池测试：去重、进度、重启恢复、进程崩溃后重建
+"""
+
+import os
+import time
+
+import pytest
+
+from microservices.backtest_service.service import BacktestService, TaskStatus
+from microservices.backtest_service.task_queue import (
+    BacktestWorkerPool, SQLiteTaskQueue, params_hash
+)
+
+
+def fake_execute(params, progress):
+    progress(40.0)
+    time.sleep(0.05)
+    if params['strategy_id'] == 'bad':
+        return {'success': False, 'error': '策略不存在'}
+    return {'success': True, 'data': {'summary': {'total_return': 0.1}, 'pid': os.getpid()}}
+
+
+def crashing_execute(params, progress):
+    if params['strategy_id'] == 'crash':
+        os._exit(1)
+    return fake_execute(params, progress)
+
+
+def wait_for(service, task_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        task = service.get_task(task_id)
+        if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+            return task
+        time.sleep(0.02)
+    raise AssertionError(f'任务未完成: {service.get_task(task_id)}')
+
+
+@pytest.fixture
+def service(tmp_path):
+    BacktestService._instance = None
+    service = BacktestService()
+    service.configure_queue(SQLiteTaskQueue(str(tmp_path / 'tasks.db')), max_workers=2,
+                            execute=fake_execute, use_processes=False)
+    yield service
+    service.stop_workers()
+    BacktestService._instance = None
+
+
+def create(service, strategy_id='s1', **kwargs):
+    return service.create_task(strategy_id=strategy_id, user_id='u1', start_date='2023-01-01',
+                               end_date=kwargs.get('end_date', '2023-12-31'))
+
+
+class TestBacktestService:
+
+    def test_run_task_is_async_and_completes(self, service):
+        task = create(service)
+        assert task.status == TaskStatus.PENDING
+        assert service.run_task(task.task_id)
+
+        done = wait_for(service, task.task_id)
+        assert done.status == TaskStatus.COMPLETED
+        assert done.progress == 100.0
+        assert service.get_task_result(task.task_id)['summary'] == {'total_return': 0.1}
+        assert service.get_stats()['completed'] == 1
+
+    def test_failed_task(self, service):
+        task = create(service, strategy_id='bad')
+        service.run_task(task.task_id)
+        done = wait_for(service, task.task_id)
+        assert done.status == TaskStatus.FAILED
+        assert done.error == '策略不存在'
+
+    def test_identical_requests_are_deduplicated(self, service):
+        first = create(service)
+        second = create(service)
+        assert second.task_id == first.task_id
+        assert create(service, end_date='2023-06-30').task_id != first.task_id
+
+        service.run_task(first.task_id)
+        assert service.run_task(second.task_id)
+        wait_for(service, first.task_id)
+
+        # 已完成的任务不按参数复用结果（策略内容可能已修改），重新排队执行
+        again = create(service)
+        assert again.task_id != first.task_id
+        assert again.status == TaskStatus.PENDING
+        assert again.result is None
+
+    def test_cancel_queued_task(self, service):
+        task = create(service)
+        service.queue.enqueue(task.task_id)
+        assert service.cancel_task(task.task_id)
+        assert not service.cancel_task(task.task_id)
+        assert service.queue.claim('w') is None
+        assert service.list_tasks(status='cancelled')[0]['task_id'] == task.task_id
+
+    def test_tasks_survive_restart(self, service, tmp_path):
+        """未执行的任务保存在队列文件中，新的服务实例启动后继续执行"""
+        task = create(service)
+        service.queue.enqueue(task.task_id)
+
+        BacktestService._instance = None
+        restarted = BacktestService()
+        restarted.configure_queue(SQLiteTaskQueue(str(tmp_path / 'tasks.db')), max_workers=1,
+                                  execute=fake_execute, use_processes=False)
+        try:
+            restarted.start_workers()
+            assert wait_for(restarted, task.task_id).status == TaskStatus.COMPLETED
+        finally:
+            restarted.stop_workers()
+
+
+class TestWorkerPool:
+
+    def test_process_pool_reports_progress(self, tmp_path):
+        queue = SQLiteTaskQueue(str(tmp_path / 'tasks.db'))
+        finished = []
+        for i in range(4):
+            task = {'task_id': f't{i}', 'strategy_id': f's{i}', 'user_id': 'u', 'start_date': None,
+                    'end_date': '2024-01-01', 'initial_capital': 1.0, 'rebalance_freq': 'monthly',
+                    'status': 'pending', 'created_at': f'2024-01-0{i + 1}'}
+            task['params_hash'] = params_hash(task)
+            queue.add(task)
+            queue.enqueue(task['task_id'])
+
+        pool = BacktestWorkerPool(queue, fake_execute, max_workers=2, on_finished=finished.append).start()
+        try:
+            deadline = time.time() + 20
+            while len(finished) < 4 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            pool.stop()
+
+        assert sorted(t['task_id'] for t in finished) == ['t0', 't1', 't2', 't3']
+        assert all(t['status'] == 'completed' for t in finished)
+        assert {t['result']['pid'] for t in finished} != {os.getpid()}
+
+    def test_pool_rebuilt_after_worker_crash(self, tmp_path):
+        queue = SQLiteTaskQueue(str(tmp_path / 'tasks.db'))
+        finished = []
+        for i, strategy_id in enumerate(['crash', 's1', 's2']):
+            task = {'task_id': f't{i}', 'strategy_id': strategy_id, 'user_id': 'u', 'start_date': None,
+                    'end_date': '2024-01-01', 'initial_capital': 1.0, 'rebalance_freq': 'monthly',
+                    'status': 'pending', 'created_at': f'2024-01-0{i + 1}'}
+            task['params_hash'] = params_hash(task)
+            queue.add(task)
+            queue.enqueue(task['task_id'])
+            time.sleep(0.01)
+
+        pool = BacktestWorkerPool(queue, crashing_execute, max_workers=1, on_finished=finished.append).start()
+        try:
+            deadline = time.time() + 20
+            while len(finished) < 3 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            pool.stop()
+
+        statuses = {t['task_id']: t['status'] for t in finished}
+        assert statuses == {'t0': 'failed', 't1': 'completed', 't2': 'completed'}
+        assert '异常退出' in queue.get('t0')['error']
+
+    def test_stale_running_tasks_are_requeued(self, tmp_path):
+        queue = SQLiteTaskQueue(str(tmp_path / 'tasks.db'))
+        task = {'task_id': 't', 'strategy_id': 's', 'user_id': 'u', 'start_date': None, 'end_date': None,
+                'initial_capital': 1.0, 'rebalance_freq': 'monthly', 'status': 'pending',
+                'created_at': '2024-01-01', 'params_hash': 'h'}
+        queue.add(task)
+        queue.enqueue('t')
+        assert queue.claim('dead-worker')['status'] == 'running'
+        assert queue.requeue_stale(60) == 0
+        assert queue.requeue_stale(-1) == 1
+        assert queue.claim('w')['task_id'] == 't'
+        # 重新入队后旧工作进程的结果不会覆盖
+        assert queue.finish('t', 'completed', result={'ok': 1})
+        assert not queue.finish('t', 'failed', error='late')
+
+
+def test_params_hash_normalizes_capital_and_open_end_date():
+    base = {'strategy_id': 's', 'user_id': 'u', 'start_date': '2024-01-01', 'end_date': None,
+            'initial_capital': 100000, 'rebalance_freq': 'monthly'}
+    today = time.strftime('%Y-%m-%d')
+    assert params_hash(base) == params_hash({**base, 'initial_capital': 100000.0, 'end_date': today})
+    assert params_hash(base) != params_hash({**base, 'rebalance_freq': 'weekly'})
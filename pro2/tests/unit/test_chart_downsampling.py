@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+图表数据降采样测试：LTTB / min-max 分桶、多序列对齐、紧凑编码、请求参数解析
+"""
+
+import numpy as np
+import pytest
+
+from shared.chart_downsampling import (
+    decode_array, downsample_chart_data, encode_chart_data, lttb_indices,
+    minmax_indices, parse_chart_options, select_indices
+)
+
+
+def make_curve(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0003, 0.01, n))
+
+
+class TestDownsampling:
+
+    def test_lttb_keeps_endpoints_and_extremes(self):
+        y = make_curve()
+        y[2345] = y.max() * 1.5  # 尖峰
+        indices = lttb_indices(y, 200)
+        assert len(indices) == 200
+        assert indices[0] == 0 and indices[-1] == len(y) - 1
+        assert np.all(np.diff(indices) > 0)
+        assert 2345 in indices
+
+    def test_minmax_keeps_every_series_extremes(self):
+        columns = np.column_stack([make_curve(seed=1), make_curve(seed=2)])
+        indices = minmax_indices(columns, 300)
+        assert len(indices) <= 300
+        for j in range(2):
+            assert np.argmax(columns[:, j]) in indices
+            assert np.argmin(columns[:, j]) in indices
+
+    def test_short_or_disabled_series_untouched(self):
+        y = make_curve(n=50)
+        assert len(select_indices([y], 100)) == 50
+        assert len(select_indices([y], None)) == 50
+        assert len(select_indices([y], 0)) == 50
+
+    def test_nan_values_do_not_break_selection(self):
+        y = make_curve(n=1000)
+        y[100:400] = np.nan
+        indices = select_indices([y, y * 2], 100)
+        assert len(indices) <= 100 and indices[-1] == 999
+
+    def test_chart_data_series_stay_aligned(self):
+        n = 3000
+        y = make_curve(n=n)
+        chart = {'dates': [f'd{i}' for i in range(n)], 'market_value': y.tolist(),
+                 'return_rate': (y / 100 - 1).tolist(), 'name': '组合'}
+        result = downsample_chart_data(chart, 500)
+
+        assert len(result['dates']) <= 500
+        assert result['name'] == '组合'
+        positions = [int(d[1:]) for d in result['dates']]
+        assert result['market_value'] == [chart['market_value'][i] for i in positions]
+        assert result['return_rate'] == [chart['return_rate'][i] for i in positions]
+        assert downsample_chart_data(chart, None) is chart
+
+    def test_base64_encoding_round_trip(self):
+        chart = {'dates': ['2024-01-01', '2024-01-02'], 'values': [1.5, -2.25], 'labels': ['a', 'b']}
+        encoded = encode_chart_data(chart, 'base64')
+        assert encoded['dates'] == chart['dates'] and encoded['labels'] == chart['labels']
+        assert encoded['values']['dtype'] == 'float32'
+        np.testing.assert_array_equal(decode_array(encoded['values']), [1.5, -2.25])
+        assert encode_chart_data(chart, 'json') is chart
+
+
+class TestChartOptions:
+
+    def test_defaults_and_explicit_values(self):
+        max_points, method, encoding = parse_chart_options({})
+        assert max_points and method == 'lttb' and encoding == 'json'
+        assert parse_chart_options({'max_points': '0'})[0] is None
+        assert parse_chart_options({'max_points': 1})[0] == 3
+        assert parse_chart_options({'max_points': 800, 'downsample': 'minmax', 'encoding': 'base64'}) == \
+            (800, 'minmax', 'base64')
+
+    @pytest.mark.parametrize('params', [{'max_points': 'abc'}, {'max_points': -1},
+                                        {'downsample': 'avg'}, {'encoding': 'msgpack'}])
+    def test_invalid_options_rejected(self, params):
+        with pytest.raises(ValueError):
+            parse_chart_options(params)
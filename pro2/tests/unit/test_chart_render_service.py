@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+图表渲染服务测试：内容哈希缓存、异步提交、并发合并、失败状态和图片路由
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+from matplotlib.figure import Figure
+
+from services.chart_render_service import CHART_RENDERERS, ChartRenderService, make_chart_key
+
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+release = threading.Event()
+calls = []
+
+
+def draw_line(payload):
+    calls.append(payload)
+    fig = Figure(figsize=(4, 3))
+    fig.subplots().plot(payload['values'])
+    return fig
+
+
+def draw_blocked(payload):
+    release.wait(10)
+    return draw_line(payload)
+
+
+def draw_broken(payload):
+    raise RuntimeError('bad payload')
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    for name in ('line', 'blocked', 'broken'):
+        monkeypatch.setitem(CHART_RENDERERS, name, (f'{__name__}:draw_{name}', None))
+    calls.clear()
+    release.clear()
+    service = ChartRenderService(str(tmp_path), max_workers=2, use_processes=False)
+    yield service
+    release.set()
+    service.shutdown()
+
+
+class TestChartRenderService:
+
+    def test_render_is_cached_by_content(self, service):
+        first = service.render('line', {'values': [1, 3, 2]})
+        assert first.startswith(PNG_MAGIC)
+        assert service.render('line', {'values': [1, 3, 2]}) == first
+        assert len(calls) == 1
+        service.render('line', {'values': [1, 3, 4]})
+        assert len(calls) == 2
+        assert service.get_stats()['hits'] == 1
+
+        svg = service.render('line', {'values': [1, 3, 2]}, fmt='svg')
+        assert b'<svg' in svg
+
+    def test_submit_returns_before_render_and_joins_duplicates(self, service):
+        payload = {'values': [5, 1, 4]}
+        ticket = service.submit('blocked', payload)
+        assert ticket['status'] == 'pending'
+        assert ticket['key'] == make_chart_key('blocked', payload)
+        assert ticket['url'] == f"/api/charts/{ticket['key']}.png"
+        assert service.submit('blocked', payload)['status'] == 'pending'
+
+        release.set()
+        assert service.wait(ticket['key']) == 'ready'
+        assert len(calls) == 1
+        assert service.get_stats()['joined'] == 1
+
+    def test_failed_render_reported(self, service):
+        ticket = service.submit('broken', {'values': [1]})
+        assert service.wait(ticket['key']) == 'failed'
+        assert 'bad payload' in service.error(ticket['key'])
+        with pytest.raises(ValueError):
+            service.submit('unknown', {})
+        with pytest.raises(ValueError):
+            service.submit('line', {}, fmt='gif')
+
+    def test_numpy_payload_key_matches_list_payload(self):
+        assert make_chart_key('line', {'values': np.array([1.0, 2.0])}) == \
+            make_chart_key('line', {'values': [1.0, 2.0]})
+        assert make_chart_key('line', {'values': [1.0]}, dpi=100) != make_chart_key('line', {'values': [1.0]}, dpi=200)
+
+
+class TestRenderers:
+
+    def test_correlation_and_backtest_charts_render(self, tmp_path):
+        service = ChartRenderService(str(tmp_path), use_processes=False)
+        rng = np.random.default_rng(0)
+        n = 150
+        dates = pd.bdate_range('2024-01-02', periods=n).strftime('%Y-%m-%d').tolist()
+        returns = rng.normal(0, 1, (n, 2)).round(3)
+        correlation = service.render('correlation', {
+            'fund1_name': '基金甲', 'fund2_name': '名称很长的基金乙联接A类份额',
+            'dates': dates, 'returns1': returns[:, 0].tolist(), 'returns2': returns[:, 1].tolist(),
+            'pearson_corr': 0.12, 'rolling_window': 60
+        }, dpi=40)
+        assert correlation.startswith(PNG_MAGIC)
+
+        metric_names = ['总收益率', '年化收益率', '最大回撤', '夏普比率', '胜率', '年化波动率', 'Alpha', 'Beta',
+                        '索提诺比率', '卡玛比率']
+        metrics = {f'{name}_{side}': 0.1 for name in metric_names for side in ('strategy', 'benchmark')}
+        backtest = service.render('backtest', {
+            'title': '基金定投策略回测结果 - 000001', 'dates': dates,
+            'total_value_strategy': np.linspace(100, 120, n).tolist(),
+            'total_value_benchmark': np.linspace(100, 110, n).tolist(),
+            'daily_return_strategy': returns[:, 0].tolist(), 'daily_return_benchmark': returns[:, 1].tolist(),
+            'metrics': metrics
+        }, dpi=40)
+        assert backtest.startswith(PNG_MAGIC)
+        service.shutdown()
+
+
+class TestChartRoutes:
+
+    def test_image_route_states(self, service, monkeypatch):
+        from web.routes import charts
+        monkeypatch.setattr(charts, 'get_chart_render_service', lambda: service)
+        app = Flask(__name__)
+        charts.register_routes(app)
+        client = app.test_client()
+
+        ticket = service.submit('blocked', {'values': [2, 2, 3]})
+        assert client.get(ticket['url']).status_code == 202
+        assert client.get(ticket['url'] + '/status').get_json()['status'] == 'pending'
+
+        release.set()
+        response = client.get(ticket['url'] + '?wait=5')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        assert response.data.startswith(PNG_MAGIC)
+        assert 'immutable' in response.headers['Cache-Control']
+
+        assert client.get(f"/api/charts/{'0' * 64}.png").status_code == 404
+        assert client.get('/api/charts/not-a-key.png').status_code == 404
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量相关性计算测试：与逐对的 pandas / scipy 计算结果一致
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from backtesting.analysis.correlation_batch import (
+    correlation_matrix, correlation_p_values, period_correlation_matrix,
+    rolling_correlation, spearman_matrix, top_correlated_pairs
+)
+from backtesting.analysis.enhanced_correlation import EnhancedCorrelationAnalyzer
+
+
+def make_returns(n_dates=300, n_funds=6, seed=0):
+    """带共同因子的收益率（百分比），最后一列在前半段为常数"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 1.0, n_dates)
+    loadings = np.linspace(-0.8, 1.2, n_funds)
+    returns = np.round(market[:, None] * loadings + rng.normal(0, 0.8, (n_dates, n_funds)), 4)
+    returns[:n_dates // 2, -1] = 0.0
+    return returns
+
+
+def make_fund_data(returns):
+    dates = pd.bdate_range('2023-01-02', periods=len(returns))
+    return {f'{j:06d}': pd.DataFrame({'date': dates, 'daily_return': returns[:, j]})
+            for j in range(returns.shape[1])}
+
+
+class TestCorrelationKernels:
+
+    def test_matrix_matches_pandas(self):
+        returns = make_returns()
+        expected = pd.DataFrame(returns).corr().to_numpy()
+        np.testing.assert_allclose(correlation_matrix(returns), expected, atol=1e-12)
+
+        constant = np.column_stack([returns[:, 0], np.full(len(returns), 0.5)])
+        corr = correlation_matrix(constant)
+        assert corr[0, 0] == 1.0 and np.isnan(corr[0, 1]) and np.isnan(corr[1, 1])
+
+    def test_rolling_tensor_matches_pandas(self):
+        returns = make_returns()
+        frame = pd.DataFrame(returns)
+        tensor = rolling_correlation(returns, 60)
+        assert tensor.shape == (len(returns), returns.shape[1], returns.shape[1])
+        for i in range(returns.shape[1]):
+            for j in range(returns.shape[1]):
+                expected = frame[i].rolling(60).corr(frame[j]).to_numpy().copy()
+                # 常数窗口的结果在 pandas 中可能是 ±inf 或 NaN，这里统一为 NaN
+                expected[~np.isfinite(expected)] = np.nan
+                np.testing.assert_allclose(tensor[:, i, j], expected, atol=1e-9, equal_nan=True)
+
+        pairs = rolling_correlation(returns, 20, pairs=[(0, 3), (2, 1)])
+        np.testing.assert_allclose(pairs[:, 1], frame[2].rolling(20).corr(frame[1]).to_numpy(),
+                                   atol=1e-9, equal_nan=True)
+
+    def test_period_correlation_matches_nav_pct_change(self):
+        returns = make_returns(n_funds=3)
+        analyzer = EnhancedCorrelationAnalyzer()
+        navs = [analyzer._returns_to_nav(pd.Series(returns[:, j])) for j in range(3)]
+        for period in (5, 20, 60):
+            expected = navs[0].pct_change(period).corr(navs[1].pct_change(period))
+            assert period_correlation_matrix(returns, period)[0, 1] == pytest.approx(expected, abs=1e-12)
+
+    def test_spearman_and_p_values_match_scipy(self):
+        returns = make_returns(n_funds=3)
+        pearson = correlation_matrix(returns)
+        spearman = spearman_matrix(returns)
+        for matrix, func in ((pearson, stats.pearsonr), (spearman, stats.spearmanr)):
+            expected_corr, expected_p = func(returns[:, 0], returns[:, 1])
+            assert matrix[0, 1] == pytest.approx(expected_corr, abs=1e-12)
+            assert correlation_p_values(matrix, len(returns))[0, 1] == pytest.approx(expected_p, rel=1e-6)
+
+    def test_top_pairs_ordered_by_absolute_value(self):
+        corr = np.array([[1.0, 0.75, -0.9, 0.1],
+                         [0.75, 1.0, 0.75, np.nan],
+                         [-0.9, 0.75, 1.0, 0.2],
+                         [0.1, np.nan, 0.2, 1.0]])
+        assert top_correlated_pairs(corr, threshold=0.7) == [(0, 2, -0.9), (0, 1, 0.75), (1, 2, 0.75)]
+        assert top_correlated_pairs(corr, k=1) == [(0, 2, -0.9)]
+
+
+class TestAnalyzerBatch:
+
+    def test_batch_result_consistent_with_pairwise(self):
+        returns = make_returns(n_funds=5)
+        fund_data = make_fund_data(returns)
+        names = {code: f'基金{code}' for code in fund_data}
+        analyzer = EnhancedCorrelationAnalyzer()
+
+        batch = analyzer.analyze_correlation_batch(fund_data, names, top_k=3, threshold=0.0)
+        aligned = analyzer._align_fund_data(fund_data)
+        codes = batch['fund_codes']
+        np.testing.assert_allclose(np.array(batch['correlation_matrix'], dtype=float),
+                                   aligned[codes].corr().to_numpy(), atol=1e-6)
+
+        assert len(batch['high_correlation_pairs']) == 3
+        top = batch['high_correlation_pairs'][0]
+        expected_rolling = aligned[top['fund1_code']].rolling(60).corr(aligned[top['fund2_code']]).dropna()
+        assert len(top['rolling_correlation']) == len(batch['rolling_dates']) == len(expected_rolling)
+        np.testing.assert_allclose(top['rolling_correlation'], expected_rolling.to_numpy(), atol=1e-9)
+        assert set(batch['period_correlation']) == {'weekly', 'biweekly', 'monthly', 'quarterly'}
+
+    def test_enhanced_analysis_embeds_batch_with_one_alignment(self, monkeypatch):
+        returns = make_returns(n_funds=5)
+        fund_data = make_fund_data(returns)
+        names = {code: f'基金{code}' for code in fund_data}
+        analyzer = EnhancedCorrelationAnalyzer()
+        standalone = analyzer.analyze_correlation_batch(fund_data, names, top_k=3)
+
+        calls = []
+        align = analyzer._align_fund_data
+        monkeypatch.setattr(analyzer, '_align_fund_data', lambda data: calls.append(1) or align(data))
+        result = analyzer.analyze_enhanced_correlation(fund_data, names, batch_top_k=3)
+        assert len(calls) == 1
+        assert result['batch_analysis'] == standalone
+        assert 'batch_analysis' not in analyzer.analyze_enhanced_correlation(fund_data, names)
+
+    def test_enhanced_analysis_uses_pairwise_equivalent_results(self):
+        returns = make_returns(n_funds=4)
+        fund_data = make_fund_data(returns)
+        analyzer = EnhancedCorrelationAnalyzer()
+        result = analyzer.analyze_enhanced_correlation(fund_data, {})
+
+        methods = result['enhanced_analysis']['correlation_methods']
+        expected = stats.spearmanr(returns[:, 0], returns[:, 2])
+        assert methods['000000_000002']['spearman']['corr'] == pytest.approx(expected[0], abs=1e-12)
+        high_pairs = result['high_correlation_pairs']
+        assert [abs(p['correlation']) for p in high_pairs] == sorted((abs(p['correlation']) for p in high_pairs),
+                                                                     reverse=True)
+
+        interactive = analyzer.generate_interactive_correlation_data(fund_data, {})
+        summary = interactive['all_combinations_summary']
+        assert len(summary) == 6
+        primary = interactive['primary_combination']
+        assert {primary['fund1_code'], primary['fund2_code']} == {summary[0]['fund1_code'], summary[0]['fund2_code']}
+
+    def test_interactive_line_charts_downsampled(self):
+        returns = make_returns(n_dates=480, n_funds=3)
+        fund_data = make_fund_data(returns)
+        analyzer = EnhancedCorrelationAnalyzer()
+
+        full = analyzer.generate_interactive_correlation_data(fund_data, {})
+        sampled = analyzer.generate_interactive_correlation_data(fund_data, {}, max_points=100)
+        nav = sampled['all_funds_nav_comparison']
+        assert len(full['all_funds_nav_comparison']['dates']) == 480
+        assert len(nav['dates']) <= 100
+        assert nav['dates'][0] == full['all_funds_nav_comparison']['dates'][0]
+        assert nav['dates'][-1] == full['all_funds_nav_comparison']['dates'][-1]
+        assert all(len(f['values']) == len(nav['dates']) for f in nav['funds'])
+
+        pair = sampled['primary_combination']
+        assert len(pair['nav_comparison_data']['dates']) <= 100
+        rolling = pair['rolling_correlation_data']
+        assert len(rolling['dates']) <= 100
+        # 滚动相关性的日期与数值一一对应
+        aligned = analyzer._align_fund_data(fund_data)
+        expected = aligned[pair['fund1_code']].rolling(60).corr(aligned[pair['fund2_code']])
+        lookup = dict(zip(aligned['date'].dt.strftime('%Y-%m-%d'), expected))
+        assert all(lookup[d] == pytest.approx(c, abs=1e-9) for d, c in zip(rolling['dates'], rolling['correlations']))
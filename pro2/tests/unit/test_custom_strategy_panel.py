@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+自定义策略回测的交易日面板与向量化筛选、排序测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting.core.strategy_models import CustomStrategyConfig, FilterCondition
+from backtesting.strategies.custom_strategy_backtest import (
+    CustomStrategyBacktest, FilterEngine, FundDataPanel, SortingEngine
+)
+
+
+@pytest.fixture
+def factor_frame():
+    rng = np.random.default_rng(7)
+    n = 200
+    frame = pd.DataFrame({
+        'fund_code': [f'{i:06d}' for i in range(n)],
+        'sharpe_ratio': rng.normal(0.5, 0.5, n).round(1),
+        'max_drawdown': -rng.uniform(0, 0.4, n),
+        'status_label': rng.choice(['持有', '买入', None], n),
+        'is_active': rng.choice([True, False], n),
+    })
+    frame.loc[rng.random(n) < 0.1, 'sharpe_ratio'] = np.nan
+    return frame
+
+
+class TestVectorizedEngines:
+
+    @pytest.mark.parametrize('condition', [
+        FilterCondition('sharpe_ratio', '>', '0.5'),
+        FilterCondition('sharpe_ratio', '<=', 0.2),
+        FilterCondition('sharpe_ratio', '==', 0.5),
+        FilterCondition('sharpe_ratio', '!=', 0.5),
+        FilterCondition('max_drawdown', '>=', -0.2),
+        FilterCondition('status_label', '==', '持有'),
+        FilterCondition('status_label', '!=', '买入'),
+        FilterCondition('status_label', '>', 1),
+        FilterCondition('is_active', '==', 'true'),
+        FilterCondition('is_active', '!=', 'True'),
+        FilterCondition('sharpe_ratio', '>', 'abc'),
+        FilterCondition('missing_field', '>', 0),
+        FilterCondition('sharpe_ratio', '~', 0),
+    ])
+    def test_condition_mask_matches_row_evaluation(self, factor_frame, condition):
+        expected = [FilterEngine.evaluate_condition(row, condition) for row in factor_frame.to_dict('records')]
+        assert FilterEngine.condition_mask(factor_frame, condition).tolist() == expected
+
+    @pytest.mark.parametrize('logic', ['AND', 'OR'])
+    def test_filter_frame_matches_filter_funds(self, factor_frame, logic):
+        conditions = [FilterCondition('sharpe_ratio', '>', 0.3), FilterCondition('status_label', '!=', '买入')]
+        expected = FilterEngine.filter_funds(factor_frame.to_dict('records'), conditions, logic)
+        result = FilterEngine.filter_frame(factor_frame, conditions, logic)
+        assert result['fund_code'].tolist() == [f['fund_code'] for f in expected]
+
+    @pytest.mark.parametrize('order', ['DESC', 'ASC'])
+    def test_sort_and_select_frame_keeps_ties_in_order(self, factor_frame, order):
+        frame = factor_frame.dropna(subset=['sharpe_ratio'])
+        expected = SortingEngine.sort_and_select(frame.to_dict('records'), 'sharpe_ratio', order, 15)
+        result = SortingEngine.sort_and_select_frame(frame, 'sharpe_ratio', order, 15)
+        assert result['fund_code'].tolist() == [f['fund_code'] for f in expected]
+
+        with_missing = SortingEngine.sort_and_select_frame(factor_frame, 'sharpe_ratio', order, 1000)
+        assert len(with_missing) == len(frame)
+        assert SortingEngine.sort_and_select_frame(factor_frame, 'unknown', order, 5).empty
+
+
+class TestCompiledFilter:
+
+    def test_compiled_filters_cached_by_definition(self):
+        conditions = [FilterCondition('sharpe_ratio', '>', 0.3), FilterCondition('max_drawdown', '>=', -0.2)]
+        compiled = FilterEngine.compile(conditions, 'AND')
+        same = FilterEngine.compile([FilterCondition('sharpe_ratio', '>', 0.3),
+                                     FilterCondition('max_drawdown', '>=', -0.2)], 'AND')
+        assert same is compiled
+        assert FilterEngine.compile(conditions, 'OR') is not compiled
+        assert FilterEngine.compile(conditions[:1], 'AND').key != compiled.key
+
+    def test_compiled_filter_matches_rows_and_frame(self, factor_frame):
+        compiled = FilterEngine.compile([
+            FilterCondition('sharpe_ratio', '>=', '0.2'),
+            FilterCondition('sharpe_ratio', '<', 1.0),
+            FilterCondition('status_label', '!=', '买入'),
+        ], 'AND')
+        expected = [compiled.match(row) for row in factor_frame.to_dict('records')]
+        assert compiled.mask(factor_frame).tolist() == expected
+        assert compiled.apply(factor_frame)['fund_code'].tolist() == \
+            factor_frame['fund_code'][np.array(expected)].tolist()
+
+        # 比较值只在编译时转换一次
+        assert compiled.conditions[0].threshold == 0.2
+        assert FilterEngine.compile([], 'AND').mask(factor_frame).all()
+
+
+class TestFundDataPanel:
+
+    def test_panel_indexes_trading_days(self):
+        data = pd.DataFrame({
+            'date': pd.to_datetime(['2024-01-03', '2024-01-02', '2024-01-03', '2024-01-03', '2024-01-08',
+                                    '2023-12-29']),
+            'fund_code': ['A', 'A', 'B', 'B', 'A', 'A'],
+            'nav': [1.1, 1.0, 2.0, np.nan, 1.2, 0.9],
+            'score': [1, 2, 3, 4, 5, 6],
+        })
+        panel = FundDataPanel(data, '2024-01-01', '2024-01-31')
+
+        assert panel.dates.strftime('%Y-%m-%d').tolist() == ['2024-01-02', '2024-01-03', '2024-01-08']
+        assert dict(panel.prices_at(0)) == {'A': 1.0}
+        # 缺失价格不覆盖同日已有的有效报价
+        assert dict(panel.prices_at(1)) == {'A': 1.1, 'B': 2.0}
+        assert 'B' not in panel.prices_at(2)
+        assert panel.prices_at(2).get('B', -1) == -1
+        assert panel.factors_at(1)['score'].tolist() == [1, 3, 4]
+
+    def test_panel_without_date_column_is_empty(self):
+        panel = FundDataPanel(pd.DataFrame({'fund_code': ['A'], 'nav': [1.0]}), '2024-01-01', '2024-12-31')
+        assert len(panel) == 0
+
+
+class TestPanelBacktest:
+
+    def test_backtest_iterates_trading_days_only(self):
+        dates = pd.bdate_range('2024-01-01', '2024-03-29')
+        codes = ['000001', '000002', '000003']
+        rng = np.random.default_rng(3)
+        nav = np.cumprod(1 + rng.normal(0.001, 0.005, (len(dates), len(codes))), axis=0)
+        data = pd.DataFrame({
+            'date': np.repeat(dates.strftime('%Y-%m-%d'), len(codes)),
+            'fund_code': np.tile(codes, len(dates)),
+            'fund_name': np.tile(['甲', '乙', '丙'], len(dates)),
+            'nav': nav.ravel(),
+            'sharpe_ratio': np.tile([1.5, 0.2, 0.9], len(dates)),
+        })
+        config = CustomStrategyConfig.from_dict({
+            'name': '测试策略',
+            'filter_conditions': [{'field': 'sharpe_ratio', 'operator': '>', 'value': 0.5}],
+            'sort_field': 'sharpe_ratio',
+            'select_count': 2,
+            'daily_stop_loss': -0.5,
+            'daily_take_profit': 0.5,
+            'total_stop_loss': -0.9,
+        })
+
+        result = CustomStrategyBacktest(config).run_backtest(data, '2024-01-01', '2024-03-31', 'monthly')
+
+        assert [e['date'] for e in result.equity_curve] == dates.strftime('%Y-%m-%d').tolist()
+        bought = {t.fund_code for t in result.trades if t.action == 'buy'}
+        assert bought == {'000001', '000003'}
+        # 每月第一个交易日调仓
+        month_starts = set(dates.to_series().groupby(dates.month).min().dt.strftime('%Y-%m-%d'))
+        assert {t.date for t in result.trades} <= month_starts
+        assert result.equity_curve[0]['value'] == pytest.approx(100000.0)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+令牌桶速率限制器测试
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from data_retrieval.utils.rate_limiter import (
+    FileBucketBackend, LocalBucketBackend, MultiRateLimiter, RateLimiter,
+    RateLimitExceeded, RedisBucketBackend, rate_limited
+)
+
+
+def _acquire_many(state_dir, n):
+    """子进程：从共享文件后端获取 n 个令牌（不等待）"""
+    limiter = RateLimiter(max_calls=10, period=3600, burst_size=10, name='shared',
+                          backend=FileBucketBackend(state_dir))
+    return sum(limiter.try_acquire(timeout=0) for _ in range(n))
+
+
+class TestTokenBucket:
+
+    def test_burst_then_throttle(self):
+        """桶满时立即放行 burst_size 次，之后按速率补充"""
+        limiter = RateLimiter(max_calls=20, period=1, burst_size=5, name='t')
+        start = time.monotonic()
+        for _ in range(10):
+            assert limiter.try_acquire()
+        elapsed = time.monotonic() - start
+
+        # 补充速率 (20 - 5 + 1) / 1 = 16次/秒，后5次需要等待 5 / 16 ≈ 0.31s
+        assert 0.2 <= elapsed < 0.6
+        assert limiter.get_stats()['throttled_calls'] == 5
+
+    @pytest.mark.parametrize('burst_size', [None, 3, 5])
+    def test_window_never_exceeds_max_calls(self, burst_size):
+        """桶满后第一个周期内（含突发）合计不超过 max_calls"""
+        limiter = RateLimiter(max_calls=5, period=0.3, burst_size=burst_size, name='t')
+        start = time.monotonic()
+        grants = []
+        for _ in range(8):
+            limiter.try_acquire()
+            grants.append(time.monotonic() - start)
+        assert sum(t < 0.3 for t in grants) == 5
+
+    def test_timeout_does_not_consume(self):
+        """超时返回False且不消耗令牌"""
+        limiter = RateLimiter(max_calls=1, period=60, name='t')
+        assert limiter.try_acquire(timeout=0)
+        assert not limiter.try_acquire(timeout=0.1)
+        assert limiter.get_stats()['total_calls'] == 1
+
+    def test_wait_if_needed_and_record_call_consume_once(self):
+        """兼容接口：wait_if_needed 预留，record_call 不重复扣减"""
+        limiter = RateLimiter(max_calls=2, period=60, burst_size=2, name='t')
+        assert limiter.wait_if_needed(timeout=0)
+        limiter.record_call()
+        assert limiter.wait_if_needed(timeout=0)
+        limiter.record_call()
+        assert not limiter.wait_if_needed(timeout=0)
+
+    def test_threads_wake_in_order_without_overshoot(self):
+        """并发线程按预留顺序依次放行，不会同时醒来超发"""
+        limiter = RateLimiter(max_calls=50, period=1, burst_size=1, name='t')
+        limiter.try_acquire()
+        grants = []
+        lock = threading.Lock()
+
+        def worker():
+            limiter.try_acquire()
+            with lock:
+                grants.append(time.monotonic())
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        grants.sort()
+        gaps = [b - a for a, b in zip(grants, grants[1:])]
+        # 每个令牌间隔 20ms，放行时间应分散开而不是集中在一个时刻
+        assert grants[-1] - grants[0] >= 0.15
+        assert min(gaps) > 0.005
+
+    def test_async_acquire(self):
+        """async 获取不阻塞事件循环"""
+        limiter = RateLimiter(max_calls=20, period=1, burst_size=1, name='t')
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            for _ in range(4):
+                async with limiter.acquire():
+                    pass
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(main()) >= 5
+
+    def test_rate_limited_decorator(self):
+        """装饰器支持同步和协程函数，超时抛出异常"""
+        limiter = RateLimiter(max_calls=1, period=60, name='t')
+
+        @rate_limited(limiter, timeout=0)
+        def call():
+            return 'ok'
+
+        @rate_limited(limiter, timeout=0)
+        async def call_async():
+            return 'ok'
+
+        assert call() == 'ok'
+        with pytest.raises(RateLimitExceeded):
+            call()
+        with pytest.raises(RateLimitExceeded):
+            asyncio.run(call_async())
+
+
+class TestSharedBackends:
+
+    def test_multi_limiter_shares_backend(self):
+        """MultiRateLimiter 的各接口使用同一后端，按名称隔离"""
+        backend = LocalBucketBackend()
+        multi = MultiRateLimiter({'a': {'max_calls': 1, 'period': 60}}, backend=backend)
+        assert multi.get_limiter('a').backend is backend
+        assert multi.get_limiter('b').backend is backend
+
+        assert multi.get_limiter('a').try_acquire(timeout=0)
+        assert not multi.get_limiter('a').try_acquire(timeout=0)
+        assert multi.get_limiter('b').try_acquire(timeout=0)
+
+    def test_file_backend_across_processes(self, tmp_path):
+        """文件后端：多个进程合计不超过配额"""
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(4) as pool:
+            granted = pool.starmap(_acquire_many, [(str(tmp_path), 5)] * 4)
+        assert sum(granted) == 10
+
+    def test_redis_backend_shared_between_limiters(self):
+        """Redis 后端：不同进程（此处用两个实例模拟）共享同一配额"""
+        fakeredis = pytest.importorskip('fakeredis')
+        pytest.importorskip('lupa')
+
+        server = fakeredis.FakeServer()
+        first = RateLimiter(max_calls=3, period=60, burst_size=3, name='fund_nav',
+                            backend=RedisBucketBackend(fakeredis.FakeRedis(server=server)))
+        second = RateLimiter(max_calls=3, period=60, burst_size=3, name='fund_nav',
+                             backend=RedisBucketBackend(fakeredis.FakeRedis(server=server)))
+
+        assert first.try_acquire(timeout=0)
+        assert second.try_acquire(timeout=0)
+        assert first.try_acquire(timeout=0)
+        assert not second.try_acquire(timeout=0)
+        assert first.get_current_usage() == 3
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+定投收益计算测试：交易对齐净值日历、累计份额成本、多基金组合
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.dip_return_calculator import DipReturnCalculator, accumulate_dip_positions, simulated_dip_trades
+
+
+def nav_frame(start, periods, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.bdate_range(start, periods=periods),
+        'nav': np.cumprod(1 + rng.normal(0, 0.01, periods)),
+        'daily_return': 0.0,
+    })
+
+
+class FakeDB:
+
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.queries = []
+
+    def execute_query(self, sql, params=None):
+        self.queries.append((sql, params))
+        codes = params['fund_codes']
+        return self.transactions[self.transactions['fund_code'].isin(codes)].copy()
+
+
+class TestAccumulateDipPositions:
+
+    def test_trades_aligned_to_nav_calendar(self):
+        navs = pd.DataFrame({
+            'fund_code': 'A',
+            'date': pd.to_datetime(['2024-01-05', '2024-01-08', '2024-01-09']),
+            'nav': [1.0, 2.0, 4.0],
+        })
+        transactions = pd.DataFrame({
+            'fund_code': ['A', 'A', 'A', 'A', 'A'],
+            # 区间前、周末、交易日当天（带时间）、卖出、区间后
+            'trade_date': pd.to_datetime(['2024-01-01 00:00', '2024-01-06 00:00', '2024-01-09 14:30',
+                                          '2024-01-09 00:00', '2024-01-10 00:00']),
+            'trade_type': ['buy', 'buy', 'buy', 'sell', 'buy'],
+            'amount': [100.0, 200.0, 400.0, 999.0, 800.0],
+            'shares': [100.0, 100.0, 100.0, 999.0, 200.0],
+        })
+
+        result = accumulate_dip_positions(navs, transactions)
+
+        assert result['shares'].tolist() == [100.0, 200.0, 300.0]
+        assert result['total_cost'].tolist() == [100.0, 300.0, 700.0]
+        assert result['market_value'].tolist() == [100.0, 400.0, 1200.0]
+        assert result['return_rate'].tolist() == pytest.approx([0.0, 1 / 3, 500 / 700])
+        assert str(result['date'].iloc[0]) == '2024-01-05'
+
+    def test_date_trade_dates_with_mixed_resolution(self):
+        # DATE 列读出的 datetime.date（秒精度）与微秒精度的净值日期
+        navs = pd.DataFrame({
+            'fund_code': ['A', 'A', 'A'],
+            'date': pd.to_datetime(['2024-01-05', '2024-01-08', '2024-01-09']).astype('datetime64[us]'),
+            'nav': [1.0, 2.0, 4.0],
+        })
+        transactions = pd.DataFrame({
+            'fund_code': ['A', 'A'],
+            'trade_date': [datetime.date(2024, 1, 5), datetime.date(2024, 1, 7)],
+            'trade_type': ['buy', 'buy'],
+            'amount': [100.0, 200.0],
+            'shares': [100.0, 100.0],
+        })
+        transactions['trade_date'] = pd.to_datetime(transactions['trade_date'])
+        result = accumulate_dip_positions(navs, transactions)
+        assert result['shares'].tolist() == [100.0, 200.0, 200.0]
+
+        transactions['trade_date'] = [datetime.date(2024, 1, 5), datetime.date(2024, 1, 7)]
+        assert accumulate_dip_positions(navs, transactions)['total_cost'].tolist() == [100.0, 300.0, 300.0]
+
+    def test_sell_only_transactions(self):
+        navs = nav_frame('2024-01-01', 5).assign(fund_code='A')
+        transactions = pd.DataFrame({
+            'fund_code': ['A'], 'trade_date': [datetime.date(2024, 1, 2)], 'trade_type': ['sell'],
+            'amount': [50.0], 'shares': [50.0],
+        })
+        result = accumulate_dip_positions(navs, transactions)
+        assert (result['shares'] == 0).all() and (result['total_cost'] == 0).all()
+
+    def test_no_trades_gives_zero_positions(self):
+        navs = nav_frame('2024-01-01', 5).assign(fund_code='A')
+        result = accumulate_dip_positions(navs, pd.DataFrame())
+        assert (result['shares'] == 0).all()
+        assert (result['return_rate'] == 0).all()
+
+    def test_simulated_dip_buys_every_nav_day(self):
+        navs = nav_frame('2024-01-01', 30, seed=1).assign(fund_code='A')
+        result = accumulate_dip_positions(navs, simulated_dip_trades(navs))
+        assert result['total_cost'].tolist() == [100.0 * (i + 1) for i in range(30)]
+        assert result['shares'].to_numpy() == pytest.approx(np.cumsum(100 / navs['nav'].to_numpy()))
+
+
+class TestDipReturnCalculator:
+
+    @pytest.fixture
+    def calculator(self, monkeypatch):
+        navs = {'A': nav_frame('2024-01-01', 60, 1), 'B': nav_frame('2024-02-01', 40, 2)}
+        transactions = pd.DataFrame({
+            'fund_code': ['A', 'A'],
+            'trade_date': ['2024-01-03', '2024-02-10'],
+            'trade_type': ['buy', 'buy'],
+            'amount': [1000.0, 500.0],
+            'nav': [1.0, 1.0],
+            'shares': [1000.0, 480.0],
+        })
+        calculator = DipReturnCalculator(FakeDB(transactions))
+        monkeypatch.setattr(calculator, 'get_fund_nav_from_tushare', lambda code, days=365: navs.get(code, pd.DataFrame()))
+        return calculator
+
+    def test_portfolio_matches_weighted_fund_curves(self, calculator):
+        panel = calculator.get_fund_returns_panel(['A', 'B', 'X'], '2024-01-01', '2024-06-30')
+        assert set(panel['fund_code']) == {'A', 'B'}
+        assert len(calculator.db_manager.queries) == 1
+        sql, params = calculator.db_manager.queries[0]
+        assert 'IN :fund_codes' in sql and set(params['fund_codes']) == {'A', 'B'}
+
+        # A 使用真实交易，B 没有交易记录按每日定投模拟
+        fund_a = panel[panel['fund_code'] == 'A']
+        assert fund_a['total_cost'].max() == 1500.0
+        assert panel[panel['fund_code'] == 'B']['total_cost'].iloc[-1] == 100.0 * 40
+
+        portfolio = calculator.get_portfolio_returns(['A', 'B'], [0.7, 0.3], '2024-01-01', '2024-06-30')
+        expected = (panel.assign(w=panel['fund_code'].map({'A': 0.7, 'B': 0.3}))
+                    .assign(mv=lambda df: df['market_value'] * df['w'], cost=lambda df: df['total_cost'] * df['w'])
+                    .groupby('date')[['mv', 'cost']].sum())
+        assert portfolio['date'].tolist() == expected.index.tolist()
+        assert portfolio['market_value'].to_numpy() == pytest.approx(expected['mv'].to_numpy())
+        assert portfolio['total_cost'].to_numpy() == pytest.approx(expected['cost'].to_numpy())
+
+    def test_single_fund_returns_and_summary(self, calculator):
+        df = calculator.calculate_daily_returns('A', '2024-01-01', '2024-06-30')
+        assert df['shares'].iloc[-1] == 1480.0
+        summary = calculator.summarize_returns('A', df)
+        assert summary['success'] and summary['start_date'] == '2024-01-01'
+        assert summary['total_cost'] == 1500.0
+
+        assert calculator.get_portfolio_returns(['A'], [0.5, 0.5]).empty
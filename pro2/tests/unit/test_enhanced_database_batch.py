@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+EnhancedDatabaseManager 集合式批量写入测试
+"""
+
+import numpy as np
+import pytest
+
+
+class RecordingConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        if self.log.get('fail_on') and self.log['fail_on'] in str(statement):
+            raise RuntimeError('db error')
+        self.log['executes'].append((str(statement), params))
+
+    def commit(self):
+        self.log['commits'] += 1
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.log = {'executes': [], 'commits': 0}
+
+    def connect(self):
+        self.log['connects'] = self.log.get('connects', 0) + 1
+        return RecordingConnection(self.log)
+
+
+@pytest.fixture
+def db_manager():
+    from data_access.enhanced_database import EnhancedDatabaseManager
+
+    # 跳过 __init__ 中的建库建表
+    manager = EnhancedDatabaseManager.__new__(EnhancedDatabaseManager)
+    manager.engine = RecordingEngine()
+    manager.last_batch_summary = {}
+    return manager
+
+
+def make_results(n):
+    return [{
+        'fund_code': f'{i:06d}',
+        'fund_name': f'基金{i}',
+        'today_return': np.float64(0.5),
+        'prev_day_return': 0.1,
+        'is_buy': True,
+        'data_days': np.int64(250),
+    } for i in range(n)]
+
+
+def executes_for(engine, table):
+    return [params for sql, params in engine.log['executes'] if f'INTO {table}' in sql]
+
+
+class TestBatchInsertData:
+
+    def test_one_transaction_chunked_per_table(self, db_manager):
+        """每张表分批多行写入，所有表在同一连接中一次提交"""
+        assert db_manager.batch_insert_data(make_results(12), {'total_funds': 12}, chunk_size=5)
+
+        engine = db_manager.engine
+        assert engine.log['connects'] == 1
+        assert engine.log['commits'] == 1
+        for table in ('fund_basic_info', 'fund_performance', 'fund_analysis_results'):
+            assert [len(batch) for batch in executes_for(engine, table)] == [5, 5, 2]
+        assert len(executes_for(engine, 'analysis_summary')) == 1
+
+    def test_summary_reports_rows_and_latency(self, db_manager):
+        """返回各表行数、批次数和耗时"""
+        summary = db_manager.batch_upsert_fund_data(make_results(3), {'total_funds': 3}, chunk_size=2)
+
+        assert summary['fund_performance']['rows'] == 3
+        assert summary['fund_performance']['batches'] == 2
+        assert summary['analysis_summary']['rows'] == 1
+        assert summary['total_seconds'] >= 0
+
+    def test_rows_match_single_insert_mapping(self, db_manager):
+        """批量写入的字段与逐条写入一致，numpy 类型转换为原生类型"""
+        db_manager.batch_insert_data(make_results(1), {})
+        row = executes_for(db_manager.engine, 'fund_analysis_results')[0][0]
+
+        assert row['is_buy'] == 1
+        assert row['today_return'] == 0.5 and type(row['today_return']) is float
+        perf = executes_for(db_manager.engine, 'fund_performance')[0][0]
+        assert type(perf['data_days']) is int
+
+    def test_bad_row_is_skipped(self, db_manager):
+        """单条记录字段无法转换时跳过该记录"""
+        results = make_results(3)
+        results[1]['today_return'] = None
+
+        summary = db_manager.batch_upsert_fund_data(results, None)
+        assert summary['fund_analysis_results']['rows'] == 2
+        assert summary['fund_analysis_results']['skipped'] == 1
+        assert summary['fund_basic_info']['rows'] == 3
+
+    def test_failure_rolls_back(self, db_manager):
+        """任一表写入失败时不提交并返回False"""
+        db_manager.engine.log['fail_on'] = 'fund_analysis_results'
+        assert db_manager.batch_insert_data(make_results(3), {}) is False
+        assert db_manager.engine.log['commits'] == 0
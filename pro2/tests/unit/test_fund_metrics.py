@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+截面绩效指标测试：矩阵一次计算与逐只基金计算一致
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.fund_metrics import align_returns, compute_cross_section_metrics
+
+
+def make_panel(n_rows=600, n_cols=6, seed=0):
+    """不同起止日期、含缺失日期的净值矩阵"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2022-01-03', periods=n_rows)
+    navs = 1 + np.cumsum(rng.normal(0.0004, 0.01, (n_rows, n_cols)), axis=0)
+    for j in range(n_cols):
+        navs[: j * 40, j] = np.nan
+        navs[n_rows - j * 15:, j] = np.nan
+    navs[rng.random((n_rows, n_cols)) < 0.05] = np.nan
+    return dates, navs
+
+
+def window_sharpe(nav, start, trading_days=250, risk_free_rate=0.02):
+    """pandas 逐只基金计算窗口夏普比率的参考实现"""
+    window = nav[nav.index >= start]
+    returns = nav.pct_change().dropna()
+    returns = returns[returns.index >= start]
+    total = window.iloc[-1] / window.iloc[0] - 1
+    annual = (1 + total) ** (trading_days / len(window)) - 1
+    return (annual - risk_free_rate) / (returns.std() * np.sqrt(trading_days))
+
+
+class TestCrossSectionMetrics:
+
+    def test_matrix_matches_single_fund(self):
+        """整体矩阵计算与每只基金单独计算结果一致"""
+        dates, navs = make_panel()
+        codes = [f'{j:06d}' for j in range(navs.shape[1])]
+        result = compute_cross_section_metrics(navs, dates, codes=codes)
+
+        for j, code in enumerate(codes):
+            valid = ~np.isnan(navs[:, j])
+            single = compute_cross_section_metrics(navs[valid, j], dates[valid]).get(0)
+            assert result.get(code) == pytest.approx(single, rel=1e-9)
+
+    def test_windows_match_pandas(self):
+        """近一年 / 今年以来 / 成立以来夏普比率与 pandas 逐只计算一致"""
+        dates, navs = make_panel()
+        result = compute_cross_section_metrics(navs, dates)
+
+        for j in range(navs.shape[1]):
+            nav = pd.Series(navs[:, j], index=dates).dropna()
+            last = nav.index[-1]
+            expected_1y = window_sharpe(nav, last - pd.Timedelta(days=365))
+            expected_ytd = window_sharpe(nav, pd.Timestamp(year=last.year, month=1, day=1))
+            expected_all = window_sharpe(nav, nav.index[0])
+
+            assert result.values['sharpe_ratio_1y'][j] == pytest.approx(expected_1y, rel=1e-9)
+            assert result.values['sharpe_ratio_ytd'][j] == pytest.approx(expected_ytd, rel=1e-9)
+            assert result.values['sharpe_ratio_all'][j] == pytest.approx(expected_all, rel=1e-9)
+            assert result.values['data_days'][j] == len(nav)
+
+    def test_drawdown_and_distribution(self):
+        navs = np.array([1.0, 1.2, 0.9, 1.0, 1.5, 1.2])
+        metrics = compute_cross_section_metrics(navs, drawdown_basis='nav').get(0)
+        returns = pd.Series(navs).pct_change().dropna()
+
+        assert metrics['max_drawdown'] == pytest.approx(-0.25)
+        assert metrics['win_rate'] == pytest.approx((returns > 0).mean())
+        assert metrics['var_95'] == pytest.approx(returns.quantile(0.05))
+        assert metrics['profit_loss_ratio'] == pytest.approx(
+            returns[returns > 0].mean() / abs(returns[returns < 0].mean()))
+
+    def test_anchored_windows_fall_back_to_all(self):
+        """指定锚点且窗口数据不足时沿用成立以来的夏普比率"""
+        dates, navs = make_panel(n_rows=200, n_cols=2)
+        result = compute_cross_section_metrics(
+            navs, dates, as_of=dates[-1] + pd.Timedelta(days=400),
+            min_window_days={'1y': 30, 'ytd': 10}, short_window='all'
+        )
+        np.testing.assert_allclose(result.values['sharpe_ratio_1y'], result.values['sharpe_ratio_all'])
+        np.testing.assert_allclose(result.values['sharpe_ratio_ytd'], result.values['sharpe_ratio_all'])
+
+    def test_funds_without_data(self):
+        navs = np.full((10, 2), np.nan)
+        navs[:, 0] = np.linspace(1, 2, 10)
+        navs[3, 1] = 1.0
+        result = compute_cross_section_metrics(navs, pd.bdate_range('2024-01-01', periods=10))
+
+        empty = result.get(1)
+        assert empty['data_days'] == 1
+        assert empty['sharpe_ratio'] == 0.0 and empty['max_drawdown'] == 0.0
+        assert result.get(0)['total_return'] == pytest.approx(1.0)
+
+    def test_align_returns(self):
+        returns = pd.Series([0.1, 0.2], index=[2, 3])
+        np.testing.assert_array_equal(align_returns(returns, pd.Index([1, 2, 3, 4])), [np.nan, 0.1, 0.2, np.nan])
+        np.testing.assert_array_equal(align_returns(returns, 3), [np.nan, 0.1, 0.2])
+        np.testing.assert_array_equal(align_returns(returns, 1), [0.2])
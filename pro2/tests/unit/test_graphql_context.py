@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GraphQL执行上下文测试：请求内批量加载、基金列表索引、组合查询的查询次数
+"""
+
+import pandas as pd
+import pytest
+
+from graphql_api import schema
+from graphql_api.context import BatchLoader, FundListIndex, GraphQLContext, load_fund_basic_info
+
+
+class FakeCache:
+
+    def __init__(self, data):
+        self.data = data
+        self.mget_calls = []
+
+    def mget(self, keys):
+        self.mget_calls.append(list(keys))
+        return {key: self.data[key] for key in keys if key in self.data}
+
+
+class FakePreloader:
+    KEY_PREFIX = {'basic_info': 'fund:basic', 'performance': 'fund:perf'}
+
+    def __init__(self, codes):
+        data = {}
+        for i, code in enumerate(codes):
+            # 一半基金的基本信息不在缓存中
+            if i % 2 == 0:
+                data[f'fund:basic:{code}'] = {'fund_code': code, 'fund_name': f'缓存{code}', 'fund_type': '混合型'}
+            data[f'fund:perf:{code}'] = {'sharpe_ratio': i / 10, 'sharpe_ratio_1y': 1.0, 'data_days': 250}
+        self.cache = FakeCache(data)
+
+
+class FakeDB:
+
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, sql, params=None):
+        self.queries.append((sql, params))
+        codes = list(params['fund_codes'])
+        return pd.DataFrame({
+            'fund_code': codes,
+            'fund_name': [f'库{code}' for code in codes],
+            'fund_type': '债券型',
+            'fund_company': None,
+            'fund_manager': '张三',
+            'establish_date': None,
+        })
+
+
+class FakeFetcher:
+
+    def __init__(self):
+        self.calls = []
+
+    def get_batch_realtime(self, fund_codes):
+        self.calls.append(list(fund_codes))
+        return {code: {'current_nav': 1.5, 'estimate_nav': 1.51, 'today_return': 0.4} for code in fund_codes}
+
+
+class FakeHoldingService:
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.calls = 0
+        self.realtime_fetcher = FakeFetcher()
+
+    def get_holdings_data(self, user_id):
+        self.calls += 1
+        return [{
+            'fund_code': code, 'fund_name': f'持仓{code}', 'holding_shares': 100.0, 'cost_price': 1.0,
+            'holding_amount': 100.0, 'current_nav': 1.2, 'current_market_value': 120.0,
+            'holding_profit': 20.0, 'holding_profit_rate': 20.0, 'today_return': 1.0, 'today_profit': 1.2,
+        } for code in self.codes]
+
+
+@pytest.fixture
+def codes():
+    return [f'{i:06d}' for i in range(50)]
+
+
+@pytest.fixture
+def context(codes):
+    return GraphQLContext(db_manager=FakeDB(), holding_service=FakeHoldingService(codes),
+                          preloader=FakePreloader(codes))
+
+
+class TestBatchLoader:
+
+    def test_wanted_keys_loaded_in_one_batch(self):
+        batches = []
+        loader = BatchLoader(lambda keys: batches.append(keys) or {k: k.upper() for k in keys if k != 'x'})
+        loader.want(['a', 'b', 'a'])
+        assert loader.load('c') == 'C'
+        assert batches == [['a', 'b', 'c']]
+        assert loader.load_many(['a', 'b', 'x']) == ['A', 'B', None]
+        assert loader.load('x') is None
+        assert batches == [['a', 'b', 'c'], ['x']]
+
+        loader.prime('d', 'primed')
+        loader.want(['d'])
+        assert loader.load('d') == 'primed'
+        assert loader.batch_count == 2
+
+    def test_failed_batch_resolves_to_none(self):
+        def fail(keys):
+            raise RuntimeError('boom')
+        loader = BatchLoader(fail, 'fail')
+        assert loader.load_many(['a', 'b']) == [None, None]
+        assert loader.batch_count == 1
+
+    def test_basic_info_prefers_preloaded_cache(self, codes):
+        db = FakeDB()
+        info = load_fund_basic_info(codes[:4], FakePreloader(codes), db)
+        assert [info[code]['fund_name'] for code in codes[:4]] == \
+            ['缓存000000', '库000001', '缓存000002', '库000003']
+        assert len(db.queries) == 1
+        assert db.queries[0][1] == {'fund_codes': ('000001', '000003')}
+
+
+class TestFundListIndex:
+
+    @pytest.fixture
+    def raw_list(self):
+        return pd.DataFrame({
+            '基金代码': ['000003', '000001', '000002', '110011'],
+            '基金简称': ['沪深300ETF联接', '华夏成长混合', '易方达纯债债券A', '易方达中小盘'],
+            '类型': ['指数型', '混合型', '债券型', '混合型'],
+        })
+
+    def test_search_filter_sort(self, raw_list):
+        index = FundListIndex(lambda: raw_list)
+        assert index.search()['code'].tolist() == ['000001', '000002', '000003', '110011']
+        assert index.search('易方达', sort_by='code', sort_order='desc')['code'].tolist() == ['110011', '000002']
+        assert index.search('etf')['name'].tolist() == ['沪深300ETF联接']
+        assert index.search('0011')['code'].tolist() == ['110011']
+        assert index.search(fund_type='混合型', sort_by='name', limit=1)['code'].tolist() == ['000001']
+
+    def test_list_cached_until_expired(self, raw_list):
+        calls = []
+        index = FundListIndex(lambda: calls.append(1) or raw_list, ttl=60)
+        index.search('华夏')
+        index.search('易方达')
+        assert len(calls) == 1
+        index.invalidate()
+        index.search()
+        assert len(calls) == 2
+
+    def test_failed_reload_keeps_previous_list(self, raw_list):
+        responses = [raw_list, None]
+        index = FundListIndex(lambda: responses.pop(0), ttl=60)
+        assert len(index.search()) == 4
+        index.invalidate()
+        assert len(index.search()) == 4
+        assert FundListIndex(lambda: None).search().empty
+
+
+class TestSchemaBatching:
+
+    PORTFOLIO_QUERY = '''
+        query($userId: String!) {
+            portfolio(userId: $userId) {
+                totalValue
+                totalReturn
+                holdings {
+                    fundCode
+                    currentValue
+                    fund { name type manager performance { sharpeRatio } currentNav }
+                }
+            }
+            holding(userId: $userId, fundCode: "000007") { fundName }
+        }
+    '''
+
+    def test_portfolio_query_batches_fund_lookups(self, context, codes):
+        result = schema.execute(self.PORTFOLIO_QUERY, variables={'userId': 'u1'}, context=context)
+        assert not result.errors, result.errors
+
+        portfolio = result.data['portfolio']
+        assert portfolio['totalValue'] == pytest.approx(120.0 * 50)
+        assert portfolio['totalReturn'] == pytest.approx(20.0)
+        funds = [h['fund'] for h in portfolio['holdings']]
+        assert [f['name'] for f in funds[:2]] == ['缓存000000', '库000001']
+        assert funds[1]['manager'] == '张三'
+        assert funds[3]['performance']['sharpeRatio'] == pytest.approx(0.3)
+        # 持仓服务已取到的实时数据直接复用
+        assert funds[0]['currentNav'] == 1.2
+        assert result.data['holding']['fundName'] == '持仓000007'
+
+        # 50 只持仓：一次持仓查询、一次基本信息缓存读取 + 一次数据库查询、一次绩效缓存读取
+        assert context.holding_service.calls == 1
+        assert len(context.db_manager.queries) == 1
+        assert len(context.db_manager.queries[0][1]['fund_codes']) == 25
+        assert [len(keys) for keys in context.preloader.cache.mget_calls] == [50, 50]
+        assert context.holding_service.realtime_fetcher.calls == []
+        assert {name: loader.batch_count for name, loader in context.loaders.items()} == \
+            {'fund_basic': 1, 'fund_performance': 1, 'fund_realtime': 0}
+
+    def test_fund_list_uses_index_and_batches_page(self, context, monkeypatch):
+        raw = pd.DataFrame({
+            '基金代码': [f'{i:06d}' for i in range(30)],
+            '基金简称': [f'测试基金{i}' for i in range(30)],
+            '类型': ['混合型', '债券型'] * 15,
+        })
+        index = FundListIndex(lambda: raw)
+        monkeypatch.setattr(GraphQLContext, 'fund_list', property(lambda self: index))
+
+        query = '''{ funds(fundType: "债券型", sortOrder: "desc", first: 3) {
+            edges { node { code name todayReturn performance { sharpeRatio } } } } }'''
+        result = schema.execute(query, context=context)
+        assert not result.errors, result.errors
+
+        nodes = [edge['node'] for edge in result.data['funds']['edges']]
+        assert [n['code'] for n in nodes] == ['000029', '000027', '000025']
+        assert nodes[0]['todayReturn'] == 0.4
+        # 只为当前页的基金批量获取一次实时数据
+        assert context.holding_service.realtime_fetcher.calls == [['000029', '000027', '000025']]
+        assert context.fund_performance.batch_count == 1
+
+    def test_dict_context_shares_one_request_context(self, monkeypatch):
+        created = []
+        original = GraphQLContext.__init__
+
+        def init(self, *args, **kwargs):
+            created.append(self)
+            original(self, *args, **kwargs)
+        monkeypatch.setattr(GraphQLContext, '__init__', init)
+        monkeypatch.setattr(GraphQLContext, 'preloader', property(lambda self: FakePreloader(['000001'])))
+        monkeypatch.setattr(GraphQLContext, 'db_manager', property(lambda self: FakeDB()))
+
+        result = schema.execute('{ a: fund(code: "000001") { name } b: fund(code: "000002") { name } }',
+                                context={'request': None})
+        assert not result.errors, result.errors
+        assert result.data == {'a': {'name': '缓存000001'}, 'b': {'name': '库000002'}}
+        assert len(created) == 1
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+本地列式净值存储单元测试
+"""
+
+import os
+
+import pytest
+import pandas as pd
+import numpy as np
+
+
+def make_nav_frame(start='2024-01-01', periods=10, seed=0):
+    """构造 date / nav / daily_return 格式的净值数据"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=periods)
+    returns = np.round(rng.normal(0, 0.01, periods), 4)
+    return pd.DataFrame({
+        'date': dates,
+        'nav': np.round(np.cumprod(1 + returns), 4),
+        'daily_return': returns
+    })
+
+
+class TestNavStore:
+    """NavStore 测试"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        from backtesting.core.nav_store import NavStore
+        return NavStore(str(tmp_path))
+
+    def test_append_and_read_roundtrip(self, store):
+        """写入后读取数据一致"""
+        df = make_nav_frame(periods=30)
+        assert store.append('fund', '000001', df) == 30
+
+        result = store.read('fund', '000001')
+        pd.testing.assert_frame_equal(result, df, check_dtype=False, check_freq=False)
+
+    def test_read_date_range(self, store):
+        """按日期区间读取，两端包含"""
+        df = make_nav_frame(periods=30)
+        store.append('fund', '000001', df)
+
+        result = store.read('fund', '000001', start_date=df['date'].iloc[5], end_date=df['date'].iloc[9])
+        assert list(result['date']) == list(df['date'].iloc[5:10])
+
+    def test_incremental_append_only_new_days(self, store):
+        """只追加比本地最后日期更新的交易日"""
+        df = make_nav_frame(periods=20)
+        store.append('fund', '000001', df.iloc[:15])
+
+        # 再次写入包含重叠部分的完整数据
+        assert store.append('fund', '000001', df) == 5
+        assert store.append('fund', '000001', df) == 0
+        assert len(store.read('fund', '000001')) == 20
+        assert store.get_version('fund', '000001') == 2
+
+    def test_missing_series_returns_none(self, store):
+        """本地无数据且无数据源时返回None"""
+        assert store.read('fund', '999999') is None
+        assert store.get('fund', '999999') is None
+        assert store.get_version('fund', '999999') == 0
+
+    def test_interrupted_write_is_ignored(self, store, tmp_path):
+        """写入中断遗留的尾部数据被忽略，并在下次追加时覆盖"""
+        df = make_nav_frame(periods=20)
+        store.append('fund', '000001', df.iloc[:10])
+
+        # 模拟列文件已写入但元数据未提交
+        with open(os.path.join(str(tmp_path), 'fund', '000001', 'nav.bin'), 'ab') as f:
+            f.write(np.array([123.0, 456.0]).tobytes())
+        assert len(store.read('fund', '000001')) == 10
+
+        store.append('fund', '000001', df)
+        result = store.read('fund', '000001')
+        np.testing.assert_allclose(result['nav'].to_numpy(), df['nav'].to_numpy())
+
+    def test_get_fetches_only_when_needed(self, tmp_path):
+        """本地已覆盖请求区间时不访问数据源"""
+        from backtesting.core.nav_store import NavStore
+
+        df = make_nav_frame(periods=20)
+        calls = []
+
+        def fetcher(code):
+            calls.append(code)
+            return df
+
+        store = NavStore(str(tmp_path), fetchers={'fund': fetcher}, max_age_seconds=0)
+        assert len(store.get('fund', '000001', end_date=df['date'].iloc[-1])) == 20
+        assert calls == ['000001']
+
+        store.get('fund', '000001', end_date=df['date'].iloc[10])
+        assert calls == ['000001']
+
+        # 请求区间超出本地最后日期且数据已过期时重新获取
+        store.get('fund', '000001', end_date=df['date'].iloc[-1] + pd.Timedelta(days=7))
+        assert calls == ['000001', '000001']
+
+    def test_fetcher_failure_falls_back_to_local(self, tmp_path):
+        """数据源失败时返回本地已有数据"""
+        from backtesting.core.nav_store import NavStore
+
+        def failing_fetcher(code):
+            raise ConnectionError('network down')
+
+        store = NavStore(str(tmp_path), fetchers={'fund': failing_fetcher}, max_age_seconds=0)
+        store.append('fund', '000001', make_nav_frame(periods=5))
+        assert len(store.get('fund', '000001', end_date='2030-01-01')) == 5
+
+    def test_backtest_engine_reads_from_store(self, store):
+        """回测引擎离线读取本地存储"""
+        from backtesting.core.backtest_engine import FundBacktest
+
+        df = make_nav_frame(start='2023-01-02', periods=60)
+        store.append('fund', '000001', df)
+
+        backtester = FundBacktest(start_date='2023-01-01', end_date='2023-02-28',
+                                  use_unified_strategy=False, nav_store=store)
+        fund_hist = backtester.get_fund_history('000001')
+
+        assert list(fund_hist.columns) == ['净值日期', '单位净值', '日增长率']
+        assert fund_hist['净值日期'].max() <= pd.Timestamp('2023-02-28')
+        assert backtester.backtest_single_fund('000001') is not None
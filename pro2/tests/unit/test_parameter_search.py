@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+参数搜索执行器测试：评分缓存、逐次减半、进程池、高斯过程贝叶斯优化
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtesting.utils.parameter_search import (
+    GaussianProcessOptimizer, ParameterSearchExecutor
+)
+from backtesting.utils.strategy_parameter_tuner import (
+    OptimizationMethod, StrategyParameterTuner
+)
+
+
+def quadratic_score(params, data, target_metric):
+    """最优点 x=0.7, y=0.2；窗口越短噪声越大"""
+    noise = 0.5 / len(data)
+    return -((params['x'] - 0.7) ** 2 + (params['y'] - 0.2) ** 2) + noise * params['x']
+
+
+def pid_score(params, data, target_metric):
+    return float(os.getpid())
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2020-01-01', periods=600)
+    return pd.DataFrame({'close': np.exp(np.cumsum(rng.normal(0.0005, 0.02, len(dates))))}, index=dates)
+
+
+def grid(n=9):
+    return [{'x': x, 'y': y} for x in np.linspace(0, 1, n) for y in np.linspace(0, 1, n)]
+
+
+class TestParameterSearchExecutor:
+
+    def test_scores_are_memoized(self, prices):
+        """相同参数（含 numpy 标量）只评估一次"""
+        calls = []
+
+        def counting(params, data, target_metric):
+            calls.append(params)
+            return quadratic_score(params, data, target_metric)
+
+        executor = ParameterSearchExecutor(prices, 'sharpe', counting)
+        params = [{'x': np.float64(0.5), 'y': np.int64(0)}, {'x': 0.5, 'y': 0}, {'x': 0.1, 'y': 0}]
+        first = executor.evaluate_many(params)
+        second = executor.evaluate_many(params)
+
+        assert first == second
+        assert len(calls) == 2
+        assert executor.evaluations == 2 and executor.cache_hits == 4
+        assert isinstance(calls[0]['y'], int)
+
+    def test_cache_is_scoped_by_data_and_window(self, prices):
+        """不同数据/窗口不共享评分"""
+        cache = {}
+        params = [{'x': 0.3, 'y': 0.3}]
+        a = ParameterSearchExecutor(prices, 'sharpe', quadratic_score, score_cache=cache)
+        b = ParameterSearchExecutor(prices.iloc[:300], 'sharpe', quadratic_score, score_cache=cache)
+
+        a.evaluate_many(params)
+        a.evaluate_many(params, window=100)
+        b.evaluate_many(params)
+        assert len(cache) == 3
+
+    def test_successive_halving_prunes_on_short_windows(self, prices):
+        """短窗口淘汰大部分组合，最优组合在完整数据上胜出"""
+        executor = ParameterSearchExecutor(prices, 'sharpe', quadratic_score)
+        ranked = executor.successive_halving(grid(), eta=3, min_window=60)
+
+        best_params, _ = ranked[0]
+        assert best_params == {'x': 0.75, 'y': 0.25}
+        windows = [entry['window'] for entry in executor.history]
+        assert windows.count(len(prices)) == len(ranked) < 81 / 3
+        assert min(windows) == len(prices) // 9
+
+    def test_process_pool_matches_serial(self, prices):
+        """进程池评估与串行结果一致"""
+        params = grid(4)
+        serial = ParameterSearchExecutor(prices, 'sharpe', quadratic_score).evaluate_many(params)
+        with ParameterSearchExecutor(prices, 'sharpe', quadratic_score, n_jobs=2) as executor:
+            parallel = executor.evaluate_many(params)
+            pids = set(ParameterSearchExecutor(prices, 'sharpe', pid_score, n_jobs=2)
+                       ._run(params, len(prices)))
+
+        assert parallel == serial
+        assert os.getpid() not in pids
+
+    def test_local_evaluator_in_pool(self, prices):
+        """局部函数作为评估函数：fork 下直接继承，spawn 下无法序列化时退回串行"""
+        with ParameterSearchExecutor(prices, 'sharpe', lambda p, d, t: p['x'], n_jobs=2) as executor:
+            scores = executor.evaluate_many([{'x': 1.0}, {'x': 2.0}])
+
+        assert scores == [1.0, 2.0]
+
+    def test_failed_evaluations_score_negative_infinity(self, prices):
+        def broken(params, data, target_metric):
+            if params['x'] > 0.5:
+                raise RuntimeError('backtest failed')
+            return float('nan')
+
+        executor = ParameterSearchExecutor(prices, 'sharpe', broken)
+        assert executor.evaluate_many([{'x': 0.1}, {'x': 0.9}]) == [-np.inf, -np.inf]
+
+
+class TestGaussianProcessOptimizer:
+
+    def test_converges_near_optimum(self, prices):
+        """代理模型在有限评估次数内接近最优点"""
+        executor = ParameterSearchExecutor(prices, 'sharpe', quadratic_score)
+        results = executor.bayesian_optimize({'x': (0.0, 1.0), 'y': (0.0, 1.0)}, n_iterations=25, seed=1)
+
+        best_params, best_score = max(results, key=lambda item: item[1])
+        assert len(results) == 25
+        assert best_score > -0.01
+        assert abs(best_params['x'] - 0.7) < 0.1 and abs(best_params['y'] - 0.2) < 0.1
+
+    def test_batch_suggestions_are_distinct_and_integer_aware(self):
+        optimizer = GaussianProcessOptimizer({'x': (0.0, 1.0), 'ma_short_period': (3, 10)}, seed=0)
+        initial = optimizer.initial_design(6)
+        optimizer.observe(initial, [-(p['x'] - 0.5) ** 2 for p in initial])
+
+        batch = optimizer.suggest(4)
+        assert len({(p['x'], p['ma_short_period']) for p in batch}) == 4
+        assert all(isinstance(p['ma_short_period'], int) and 3 <= p['ma_short_period'] <= 10 for p in batch)
+
+
+class TestTunerIntegration:
+
+    def test_bayesian_method_uses_surrogate(self, prices):
+        tuner = StrategyParameterTuner()
+        result = tuner.optimize_parameters(
+            prices, optimization_method=OptimizationMethod.BAYESIAN, max_iterations=12
+        )
+
+        assert result.iterations == 12
+        assert result.convergence_info['evaluations'] == 12
+        assert np.isfinite(result.best_score)
+
+    def test_repeated_grid_search_hits_cache(self, prices):
+        """同一调优器重复搜索相同数据时全部命中缓存"""
+        tuner = StrategyParameterTuner()
+        bounds = {'stop_loss_threshold': (-0.2, -0.08), 'ma_short_period': (3, 6)}
+
+        first = tuner.optimize_parameters(prices, param_bounds=bounds)
+        second = tuner.optimize_parameters(prices, param_bounds=bounds)
+
+        assert first.convergence_info['evaluations'] == 40
+        assert second.convergence_info['evaluations'] == 0
+        assert second.convergence_info['cache_hits'] == 40
+        assert second.best_score == first.best_score
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+持仓组合聚合服务测试：权重、加权指标、类型分布、重仓股暴露和快照缓存
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.portfolio_aggregation_service import (
+    PortfolioAggregationService, get_portfolio_aggregation_service, holding_weights,
+    invalidate_portfolio_snapshots, stock_exposure, weighted_sum
+)
+from shared.fund_helpers import get_fund_type_for_allocation, get_fund_types_for_allocation
+
+
+class FakeDB:
+    """按 SQL 中的表名返回固定数据，记录查询次数"""
+
+    def __init__(self):
+        self.queries = []
+        self.holdings = pd.DataFrame({
+            'fund_code': ['000001', '000002', '000003'],
+            'fund_name': ['华夏成长混合', '易方达纯债债券A', '沪深300指数A'],
+            'holding_shares': [1000.0, 2000.0, 500.0],
+            'cost_price': [1.5, 1.0, 2.0],
+            'holding_amount': [1500.0, 2000.0, 1000.0],
+        })
+        self.basic_info = pd.DataFrame({
+            'fund_code': ['000001', '000002'],
+            'fund_name': ['华夏成长混合', '易方达纯债债券A'],
+            'fund_type': ['混合型', '债券型'],
+        })
+        self.analysis = pd.DataFrame({
+            'fund_code': ['000003', '000001', '000003'],
+            'fund_name': ['沪深300指数A', '华夏成长混合', '沪深300指数A'],
+            'analysis_date': ['2024-06-30', '2024-06-30', '2024-03-31'],
+            'annualized_return': [0.08, 0.12, 0.01],
+            'sharpe_ratio': [0.6, 1.1, 0.1],
+            'max_drawdown': [-0.2, -0.15, -0.3],
+            'volatility': [0.18, 0.2, 0.25],
+            'win_rate': [0.55, 0.6, 0.4],
+            'composite_score': [60.0, 75.0, 40.0],
+        })
+        self.stocks = pd.DataFrame({
+            'fund_code': ['000001', '000001', '000001', '000003', '000003'],
+            'stock_code': ['600519', '000858', '600519', '600519', '601318'],
+            'stock_name': ['贵州茅台', '五粮液', '贵州茅台', '贵州茅台', '中国平安'],
+            'holding_ratio': [9.0, 5.0, 8.0, 4.0, 3.0],
+            'report_period': ['2024Q2', '2024Q2', '2024Q1', '2024Q2', '2024Q2'],
+            'ranking': [1, 2, 1, 1, 2],
+        })
+
+    def execute_query(self, sql, params=None):
+        self.queries.append(sql)
+        params = params or {}
+        codes = params.get('fund_codes') or (params.get('fund_code'),)
+        if 'FROM user_holdings' in sql:
+            return self.holdings.copy()
+        if 'FROM fund_basic_info' in sql:
+            return self.basic_info[self.basic_info['fund_code'].isin(codes)].reset_index(drop=True)
+        if 'FROM fund_analysis_results' in sql:
+            df = self.analysis[self.analysis['fund_code'].isin(codes)]
+            return df.sort_values('analysis_date', ascending=False, kind='stable').reset_index(drop=True)
+        if 'FROM fund_heavyweight_stocks' in sql:
+            return self.stocks[self.stocks['fund_code'].isin(codes)].reset_index(drop=True)
+        return pd.DataFrame()
+
+
+class TestAggregationFunctions:
+
+    def test_holding_weights(self):
+        holdings = pd.DataFrame({'fund_code': ['a', 'b', 'c'], 'holding_amount': [100.0, 300.0, 600.0]})
+        weights = holding_weights(holdings, ['a', 'b', 'x'])
+        assert weights.to_dict() == pytest.approx({'a': 0.25, 'b': 0.75, 'x': 0.0})
+        assert holding_weights(holdings).sum() == pytest.approx(1.0)
+
+        # 没有持仓金额时等权
+        empty = holding_weights(holdings.iloc[0:0], ['a', 'b'])
+        assert empty.to_dict() == pytest.approx({'a': 0.5, 'b': 0.5})
+
+    def test_weighted_sum_skips_invalid_values(self):
+        values = pd.DataFrame({'ret': [0.1, np.nan, 0.3], 'vol': [0.2, 0.1, np.inf]}, index=['a', 'b', 'c'])
+        weights = pd.Series({'a': 0.5, 'b': 0.25, 'c': 0.25})
+        totals = weighted_sum(values, weights, ['ret', 'vol'])
+        assert totals['ret'] == pytest.approx(0.1 * 0.5 + 0.3 * 0.25)
+        assert totals['vol'] == pytest.approx(0.2 * 0.5 + 0.1 * 0.25)
+
+    def test_stock_exposure_matches_row_by_row(self):
+        stocks = pd.DataFrame({
+            'fund_code': ['f1', 'f1', 'f2', 'f2', 'f3'],
+            'stock_code': ['s1', 's2', 's1', 's3', 's1'],
+            'stock_name': ['甲', '乙', '甲', '丙', '甲'],
+            'proportion': [6.0, 4.0, 3.0, 5.0, 1.0],
+        })
+        exposure = stock_exposure(stocks, top_n=2, ratio_column='proportion', fund_names={'f1': '基金一'})
+        assert exposure['stock_code'].tolist() == ['s1', 's3']
+        assert exposure['proportion'].tolist() == [10.0, 5.0]
+        first = exposure.iloc[0]
+        assert first['fund_count'] == 3
+        assert first['related_funds'][0] == {'fund_code': 'f1', 'fund_name': '基金一', 'proportion': 6.0}
+        assert [f['fund_name'] for f in first['related_funds']][1:] == ['f2', 'f3']
+
+        weighted = stock_exposure(stocks, pd.Series({'f1': 0.5, 'f2': 0.5}), top_n=None, ratio_column='proportion')
+        assert dict(zip(weighted['stock_code'], weighted['proportion'])) == \
+            pytest.approx({'s1': 4.5, 's2': 2.0, 's3': 2.5})
+
+
+class TestPortfolioAggregationService:
+
+    def test_snapshot_aggregates(self):
+        db = FakeDB()
+        snapshot = PortfolioAggregationService(db).load_snapshot('u1')
+
+        # 持仓、基金类型（每个数据源一次）、最新绩效指标和重仓股各一次批量查询
+        assert len(db.queries) == 5
+        assert sum('fund_heavyweight_stocks' in sql for sql in db.queries) == 1
+
+        assert snapshot.holdings['amount'].tolist() == [1500.0, 2000.0, 1000.0]
+        assert snapshot.metrics.loc['000003', 'annualized_return'] == pytest.approx(0.08)
+        assert snapshot.weights().sum() == pytest.approx(1.0)
+
+        expected_types = {code: get_fund_type_for_allocation(code, db) for code in snapshot.fund_codes}
+        assert dict(zip(snapshot.fund_codes, snapshot.holdings['fund_type'])) == expected_types
+
+        distribution = snapshot.type_distribution()
+        assert distribution['amount'].sum() == pytest.approx(4500.0)
+        assert distribution['percentage'].sum() == pytest.approx(100.0)
+        assert distribution['amount'].is_monotonic_decreasing
+
+        # 只使用每只基金最新报告期的重仓股
+        exposure = snapshot.stock_exposure()
+        weights = snapshot.weights()
+        moutai = exposure.set_index('stock_code').loc['600519']
+        assert moutai['proportion'] == pytest.approx(9.0 * weights['000001'] + 4.0 * weights['000003'])
+        assert moutai['fund_count'] == 2
+        assert moutai['related_funds'][0]['fund_name'] == '华夏成长混合'
+
+        # 只看部分基金时在这些基金内归一化
+        subset = snapshot.stock_exposure(['000003'], top_n=None)
+        assert dict(zip(subset['stock_code'], subset['proportion'])) == pytest.approx({'600519': 4.0, '601318': 3.0})
+
+    def test_snapshot_cached_until_invalidated(self):
+        db = FakeDB()
+        service = get_portfolio_aggregation_service(db)
+        assert get_portfolio_aggregation_service(db) is service
+
+        service.load_snapshot('u1')
+        queries = len(db.queries)
+        service.load_snapshot('u1')
+        assert len(db.queries) == queries
+
+        invalidate_portfolio_snapshots('u1')
+        service.load_snapshot('u1')
+        assert len(db.queries) > queries
+
+    def test_batch_fund_types_use_one_query_per_source(self):
+        db = FakeDB()
+        types = get_fund_types_for_allocation(['000001', '000002', '000003', '999999'], db)
+        assert types['999999'] == 'unknown'
+        assert types == {code: get_fund_type_for_allocation(code, FakeDB()) for code in types}
+        assert sum('fund_basic_info' in sql for sql in db.queries) == 1
+        assert sum('fund_analysis_results' in sql for sql in db.queries) == 1
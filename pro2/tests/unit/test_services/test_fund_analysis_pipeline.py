@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+基金批量分析流水线测试
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.fund_analysis_pipeline import FundAnalysisPipeline, resolve_returns
+
+
+class FakeAdapter:
+    def __init__(self, fail_codes=()):
+        self.fail_codes = set(fail_codes)
+        self.history_calls = []
+        self._lock = threading.Lock()
+
+    def get_fund_basic_info(self, code):
+        return {'fund_type': '混合型'}
+
+    def get_realtime_data(self, code, name):
+        if code in self.fail_codes:
+            raise ConnectionError('timeout')
+        return {'today_return': 0.5, 'prev_day_return': -0.3, 'current_nav': 1.2}
+
+    def get_historical_data(self, code, days=365):
+        with self._lock:
+            self.history_calls.append((code, days))
+        rng = np.random.default_rng(int(code))
+        # 少于 60 行时不评估高级策略，使用基础策略引擎
+        nav = 1 + np.cumsum(rng.normal(0.0005, 0.01, 50))
+        return pd.DataFrame({'date': pd.bdate_range('2024-01-02', periods=50), 'nav': nav,
+                             'daily_return': np.r_[np.nan, np.diff(nav) / nav[:-1] * 100]})
+
+
+class SlowLastAdapter(FakeAdapter):
+    """最后一只基金的历史净值在 release 之前一直阻塞"""
+
+    def __init__(self, slow_code):
+        super().__init__()
+        self.slow_code = slow_code
+        self.release = threading.Event()
+
+    def get_historical_data(self, code, days=365):
+        if code == self.slow_code:
+            self.release.wait(timeout=30)
+        return super().get_historical_data(code, days)
+
+
+class FakeStrategyEngine:
+    def analyze_strategy(self, today_return, prev_day_return, performance_metrics):
+        return {'strategy_name': 'fake', 'action': 'buy', 'buy_multiplier': 1.0,
+                'status_label': 'ok', 'composite_score': performance_metrics.get('composite_score')}
+
+
+class FakeDB:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def batch_upsert_fund_data(self, fund_data_list, summary_data=None, chunk_size=None):
+        if self.fail:
+            raise RuntimeError('db down')
+        self.batches.append([item['fund_code'] for item in fund_data_list])
+        return {}
+
+
+FUNDS = [(f'{i:06d}', f'基金{i}') for i in range(1, 8)]
+
+
+def make_pipeline(adapter, db, tmp_path=None, **kwargs):
+    checkpoint = str(tmp_path / 'checkpoint.jsonl') if tmp_path is not None else None
+    return FundAnalysisPipeline(adapter, db, fetch_workers=4, eval_workers=1, write_chunk=3,
+                                checkpoint_path=checkpoint, strategy_engine=FakeStrategyEngine(), **kwargs)
+
+
+class TestFundAnalysisPipeline:
+
+    def test_results_ordered_and_streamed_in_chunks(self):
+        adapter, db = FakeAdapter(), FakeDB()
+        pipeline = make_pipeline(adapter, db)
+        results = pipeline.run(FUNDS, '2024-06-01')
+
+        assert [r['fund_code'] for r in results] == [code for code, _ in FUNDS]
+        assert all(r['strategy_name'] == 'fake' and r['today_return'] == 0.5 for r in results)
+        assert 'sharpe_ratio' in results[0]
+        # 历史净值每只基金只请求一次
+        assert len(adapter.history_calls) == len(FUNDS)
+        assert sorted(code for batch in db.batches for code in batch) == [code for code, _ in FUNDS]
+        assert max(len(batch) for batch in db.batches) <= 3
+        assert pipeline.unpersisted_results == []
+        assert pipeline.stage_timings['write_batches'] == len(db.batches)
+
+    def test_process_pool_evaluation(self):
+        pipeline = FundAnalysisPipeline(FakeAdapter(), FakeDB(), fetch_workers=4, eval_workers=2)
+        results = pipeline.run(FUNDS, '2024-06-01')
+        assert [r['fund_code'] for r in results] == [code for code, _ in FUNDS]
+        assert pipeline.stage_timings['failed'] == 0
+
+    def test_process_pool_results_streamed_before_prefetch_finishes(self, tmp_path):
+        """进程池评估的结果在预取阶段结束前就写入数据库和断点文件"""
+        adapter, db = SlowLastAdapter(FUNDS[-1][0]), FakeDB()
+        checkpoint = tmp_path / 'checkpoint.jsonl'
+        pipeline = FundAnalysisPipeline(adapter, db, fetch_workers=4, eval_workers=2, write_chunk=1,
+                                        checkpoint_path=str(checkpoint))
+        runner = threading.Thread(target=pipeline.run, args=(FUNDS, '2024-06-01'))
+        runner.start()
+        try:
+            def checkpointed():
+                return len(checkpoint.read_text(encoding='utf-8').splitlines()) if checkpoint.exists() else 0
+
+            deadline = time.monotonic() + 30
+            while checkpointed() < len(FUNDS) - 1 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert checkpointed() == len(FUNDS) - 1
+            assert len(db.batches) == len(FUNDS) - 1
+            assert runner.is_alive()
+        finally:
+            adapter.release.set()
+            runner.join()
+        assert sorted(code for batch in db.batches for code in batch) == [code for code, _ in FUNDS]
+        assert pipeline.stage_timings['failed'] == 0
+
+    def test_resume_skips_completed_funds(self, tmp_path):
+        """失败的基金不进入断点，重新运行时只分析这些基金"""
+        db = FakeDB()
+        first = make_pipeline(FakeAdapter(fail_codes={'000003'}), db, tmp_path)
+        results = first.run(FUNDS, '2024-06-01')
+        assert results[2]['status_label'] == "🔴 分析失败"
+        assert [r['fund_code'] for r in first.unpersisted_results] == ['000003']
+        assert (tmp_path / 'checkpoint.jsonl').exists()
+
+        adapter = FakeAdapter()
+        second = make_pipeline(adapter, db, tmp_path)
+        results = second.run(FUNDS, '2024-06-01')
+        assert adapter.history_calls == [('000003', 3650)]
+        assert second.stage_timings['resumed'] == len(FUNDS) - 1
+        assert results[2]['strategy_name'] == 'fake'
+        assert results[0]['fund_code'] == '000001'
+        assert not (tmp_path / 'checkpoint.jsonl').exists()
+
+        # 其他分析日期不使用断点
+        adapter = FakeAdapter(fail_codes={'000001'})
+        make_pipeline(adapter, db, tmp_path).run(FUNDS, '2024-06-01')
+        adapter = FakeAdapter()
+        make_pipeline(adapter, db, tmp_path).run(FUNDS, '2024-06-02')
+        assert len(adapter.history_calls) == len(FUNDS)
+
+    def test_unpersisted_results_when_db_fails(self, tmp_path):
+        """数据库写入失败的结果交给最终汇总写入，恢复运行时同样保留"""
+        pipeline = make_pipeline(FakeAdapter(fail_codes={'000007'}), FakeDB(fail=True), tmp_path)
+        pipeline.run(FUNDS, '2024-06-01')
+        assert len(pipeline.unpersisted_results) == len(FUNDS)
+
+        resumed = make_pipeline(FakeAdapter(), FakeDB(), tmp_path)
+        resumed.run(FUNDS, '2024-06-01')
+        assert sorted(r['fund_code'] for r in resumed.unpersisted_results) == [code for code, _ in FUNDS[:-1]]
+
+        # 最终汇总写入之前断点一直保留：汇总写入失败后重新运行仍能取回这些结果
+        assert (tmp_path / 'checkpoint.jsonl').exists()
+        adapter = FakeAdapter()
+        retried = make_pipeline(adapter, FakeDB(), tmp_path)
+        retried.run(FUNDS, '2024-06-01')
+        assert adapter.history_calls == []
+        assert len(retried.unpersisted_results) == len(FUNDS) - 1
+
+        retried.complete()
+        assert retried.unpersisted_results == []
+        assert not (tmp_path / 'checkpoint.jsonl').exists()
+
+
+def test_resolve_returns_qdii_backtrace():
+    history = pd.DataFrame({'daily_return': [0.8, 0.0, 0.0]})
+    assert resolve_returns('000001', '标普500QDII', {'today_return': 150}, history) == (0.0, 0.8)
+    assert resolve_returns('000001', '普通混合', {'today_return': '0.123'}, history) == (0.12, 0.0)
+    assert resolve_returns('000001', '普通混合', {'prev_day_return': 1.234}, history) == (0.0, 1.23)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+MemoryCache LRU / 过期堆 / 字节预算 / 分段锁 测试
+"""
+
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def MemoryCache():
+    from services.cache.memory_cache import MemoryCache
+    return MemoryCache
+
+
+class TestMemoryCacheLRU:
+    """LRU 淘汰与过期清理"""
+
+    def test_access_promotes_entry(self, MemoryCache):
+        """访问过的条目不会被优先淘汰（真正的 LRU 而非 FIFO）"""
+        cache = MemoryCache(max_size=3)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+
+        cache.get('a')
+        cache.set('d', 'd')
+
+        assert cache.exists('a')
+        assert not cache.exists('b')
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_overwrite_does_not_evict(self, MemoryCache):
+        """覆盖已有键不触发淘汰"""
+        cache = MemoryCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('a', 3)
+
+        assert cache.get('a') == 3
+        assert cache.get('b') == 2
+
+    def test_expired_entries_purged_on_write(self, MemoryCache):
+        """写入时清理已到期条目，不影响未到期条目"""
+        cache = MemoryCache(max_size=100)
+        cache.set('short', 1, ttl=0.05)
+        cache.set('long', 2, ttl=3600)
+        time.sleep(0.1)
+
+        cache.set('other', 3)
+
+        stats = cache.get_stats()
+        assert stats['size'] == 2
+        assert stats['expirations'] == 1
+        assert cache.get('long') == 2
+
+    def test_reset_ttl_keeps_entry(self, MemoryCache):
+        """重新设置更长的TTL后，旧的到期记录不会删除新条目"""
+        cache = MemoryCache(max_size=100)
+        cache.set('key', 1, ttl=0.05)
+        cache.set('key', 2, ttl=3600)
+        time.sleep(0.1)
+        cache.set('other', 3)
+
+        assert cache.get('key') == 2
+
+    def test_expiry_heap_compaction(self, MemoryCache):
+        """同一键反复设置时过期堆不会无限增长"""
+        cache = MemoryCache(max_size=10)
+        for i in range(1000):
+            cache.set('key', i, ttl=3600)
+
+        assert len(cache._shards[0].expiry_heap) < 100
+
+
+class TestMemoryCacheBudget:
+    """字节预算与分段"""
+
+    def test_max_bytes_evicts_lru(self, MemoryCache):
+        """超过字节预算时按LRU淘汰"""
+        cache = MemoryCache(max_size=100, max_bytes=3000)
+        for i in range(10):
+            cache.set(f'key{i}', b'x' * 1000)
+
+        stats = cache.get_stats()
+        assert stats['bytes'] <= 3000
+        assert cache.exists('key9')
+        assert not cache.exists('key0')
+
+    def test_sharded_capacity(self, MemoryCache):
+        """分段后总容量不超过max_size"""
+        cache = MemoryCache(max_size=100, num_shards=8)
+        for i in range(500):
+            cache.set(f'key{i}', i)
+
+        stats = cache.get_stats()
+        assert stats['size'] <= 100
+        assert stats['shards'] == 8
+        assert stats['sets'] == 500
+
+    def test_concurrent_access(self, MemoryCache):
+        """多线程并发读写保持统计一致"""
+        cache = MemoryCache(max_size=1000, num_shards=8)
+
+        def worker(worker_id):
+            for i in range(2000):
+                key = f'key{(worker_id * 7 + i) % 1500}'
+                if cache.get(key) is None:
+                    cache.set(key, i, ttl=60)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.get_stats()
+        assert stats['hits'] + stats['misses'] == 8 * 2000
+        assert stats['size'] <= 1000
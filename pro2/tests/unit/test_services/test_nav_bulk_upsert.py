@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+FundNavCacheManager 净值批量写入测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class RecordingConnection:
+    """记录 execute 调用的连接替身"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.db.executes.append((str(statement), params))
+
+    def commit(self):
+        self.db.commits += 1
+
+
+class RecordingEngine:
+    def __init__(self, db):
+        self.db = db
+
+    def connect(self):
+        return RecordingConnection(self.db)
+
+
+class FakeDB:
+    def __init__(self, latest_dates=None):
+        self.latest_dates = latest_dates or {}
+        self.executes = []
+        self.commits = 0
+        self.engine = RecordingEngine(self)
+
+    def execute_sql(self, sql, params=None):
+        return True
+
+    def execute_query(self, sql, params=None):
+        codes = list((params or {}).values())
+        rows = [(code, self.latest_dates[code]) for code in codes if code in self.latest_dates]
+        return pd.DataFrame(rows, columns=['fund_code', 'latest_date'])
+
+    def nav_batches(self):
+        return [params for sql, params in self.executes if 'fund_nav_cache' in sql]
+
+
+def make_nav(periods=10, start='2024-01-01'):
+    dates = pd.bdate_range(start, periods=periods)
+    nav = np.round(1 + np.arange(periods) * 0.01, 4)
+    df = pd.DataFrame({'date': dates, 'nav': nav, 'daily_return': np.r_[np.nan, np.diff(nav)]})
+    return df
+
+
+@pytest.fixture
+def make_manager():
+    from services.fund_nav_cache_manager import FundNavCacheManager
+
+    def factory(db):
+        # 单例：每个用例重新创建实例
+        FundNavCacheManager._instance = None
+        return FundNavCacheManager(db)
+
+    yield factory
+    FundNavCacheManager._instance = None
+
+
+class TestNavBulkUpsert:
+
+    def test_records_built_from_columns(self, make_manager):
+        """记录按列构造，缺失值为None，日期格式化为字符串"""
+        from services.fund_nav_cache_manager import FundNavCacheManager
+
+        records = FundNavCacheManager._build_nav_records('000001', make_nav(3), 'akshare')
+        rows = records.to_dict('records')
+        assert rows[0] == {'fund_code': '000001', 'nav_date': '2024-01-01', 'nav_value': 1.0,
+                           'accum_nav': None, 'daily_return': None, 'source': 'akshare'}
+        assert rows[2]['nav_value'] == pytest.approx(1.02)
+
+    def test_chunked_executemany(self, make_manager):
+        """按批次 executemany，所有批次一次提交"""
+        db = FakeDB()
+        manager = make_manager(db)
+
+        summary = manager.save_fund_nav_to_db('000001', make_nav(25), 'akshare', chunk_size=10)
+
+        batches = db.nav_batches()
+        assert [len(b) for b in batches] == [10, 10, 5]
+        assert summary['rows'] == 25 and summary['batches'] == 3 and summary['skipped'] == 0
+        assert summary['rows_per_second'] > 0
+
+    def test_delta_mode_skips_synced_dates(self, make_manager):
+        """增量模式只写入最后同步日期之后的净值"""
+        df = make_nav(10)
+        db = FakeDB(latest_dates={'000001': df['date'].iloc[6]})
+        manager = make_manager(db)
+
+        summary = manager.save_fund_nav_to_db('000001', df, 'akshare', delta=True)
+
+        written = [row['nav_date'] for batch in db.nav_batches() for row in batch]
+        assert written == list(df['date'].iloc[7:].dt.strftime('%Y-%m-%d'))
+        assert summary['rows'] == 3 and summary['skipped'] == 7
+
+    def test_delta_mode_nothing_new(self, make_manager):
+        """没有新日期时不执行写入"""
+        df = make_nav(5)
+        db = FakeDB(latest_dates={'000001': df['date'].iloc[-1]})
+        manager = make_manager(db)
+
+        summary = manager.save_fund_nav_to_db('000001', df, 'akshare', delta=True)
+        assert summary['rows'] == 0
+        assert db.executes == []
+
+    def test_multi_fund_batch(self, make_manager):
+        """多只基金合并写入，元数据按基金更新"""
+        db = FakeDB()
+        manager = make_manager(db)
+
+        summary = manager.save_fund_nav_batch(
+            {'000001': make_nav(8), '000002': make_nav(8), '000003': pd.DataFrame()},
+            'akshare', chunk_size=5
+        )
+
+        assert summary['funds'] == 2 and summary['rows'] == 16
+        assert [len(b) for b in db.nav_batches()] == [5, 5, 5, 1]
+        metadata = [params for sql, params in db.executes if 'fund_cache_metadata' in sql]
+        assert sorted(p['fund_code'] for p in metadata) == ['000001', '000002']
+        assert all(p['count'] == 8 for p in metadata)
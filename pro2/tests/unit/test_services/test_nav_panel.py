@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+列式净值面板与预加载器绩效计算测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.nav_panel import NavPanel
+
+
+def make_nav(start, periods, seed=0, code_offset=0.0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=periods)
+    nav = np.round(1 + code_offset + np.cumsum(rng.normal(0.0005, 0.01, periods)), 4)
+    return pd.DataFrame({'date': dates, 'nav': nav, 'daily_return': np.r_[np.nan, np.diff(nav)],
+                         'fund_name': 'x'})
+
+
+def reference_metrics(records):
+    """改造前按 records 计算的实现，用于校验向量化结果"""
+    navs = [r.get('nav', r.get('单位净值', 0)) for r in records if r.get('nav') or r.get('单位净值')]
+    if len(navs) < 2:
+        return {}
+    navs = pd.Series(navs)
+    returns = navs.pct_change().dropna()
+    total_return = (navs.iloc[-1] - navs.iloc[0]) / navs.iloc[0] if navs.iloc[0] > 0 else 0
+    years = len(navs) / 250
+    annualized_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else 0
+    volatility = returns.std() * np.sqrt(250)
+    sharpe_ratio = (annualized_return - 0.02) / volatility if volatility > 0 else 0
+    cumulative = (1 + returns).cumprod()
+    running_max = cumulative.expanding().max()
+    max_drawdown = ((cumulative - running_max) / running_max).min()
+    return {
+        'total_return': round(total_return * 100, 2),
+        'annualized_return': round(annualized_return * 100, 2),
+        'volatility': round(volatility * 100, 2),
+        'sharpe_ratio': round(sharpe_ratio, 2),
+        'max_drawdown': round(max_drawdown * 100, 2),
+        'data_days': len(navs)
+    }
+
+
+class TestNavPanel:
+
+    def test_views_share_panel_memory(self):
+        """单只基金的数组和 DataFrame 列都是面板内存的视图"""
+        panel = NavPanel()
+        panel.upsert({'000001': make_nav('2024-01-01', 20), '000002': make_nav('2024-01-01', 20, seed=1)})
+
+        values = panel.get_fund_values('000001')
+        _, matrix, codes = panel.get_matrix('nav')
+        assert np.shares_memory(values, matrix)
+        assert not values.flags.writeable
+
+        df = panel.get_fund_nav_history('000001')
+        assert np.shares_memory(df['nav'].to_numpy(), matrix)
+        assert list(df.columns) == ['date', 'nav', 'accum_nav', 'daily_return']
+        np.testing.assert_allclose(df['nav'], make_nav('2024-01-01', 20)['nav'])
+
+    def test_different_ranges_and_missing_fields(self):
+        """基金起止日期不同时各自只返回自身区间，缺失字段为 NaN"""
+        panel = NavPanel()
+        panel.upsert({'A': make_nav('2024-01-01', 30), 'B': make_nav('2024-01-15', 5)})
+
+        assert len(panel.get_fund_nav_history('A')) == 30
+        b = panel.get_fund_nav_history('B')
+        assert len(b) == 5 and b['date'].iloc[0] == pd.Timestamp('2024-01-15')
+        assert b['accum_nav'].isna().all()
+
+    def test_incremental_append_and_middle_insert(self):
+        """追加新交易日只合并新数据；插入更早日期时已有数据位置正确迁移"""
+        panel = NavPanel()
+        full = make_nav('2024-01-01', 40)
+        panel.upsert({'A': full.iloc[:30], 'B': make_nav('2024-01-01', 30, seed=2)})
+
+        # 最近几天的增量更新（与已有日期重叠）
+        panel.upsert({'A': full.iloc[25:]})
+        np.testing.assert_allclose(panel.get_fund_values('A'), full['nav'])
+        assert len(panel.get_fund_values('B')) == 30
+
+        # 插入比现有轴更早的日期
+        earlier = make_nav('2023-12-01', 5, seed=3)
+        panel.upsert({'C': earlier})
+        np.testing.assert_allclose(panel.get_fund_values('A'), full['nav'])
+        assert panel.get_fund_nav_history('C')['date'].iloc[-1] == earlier['date'].iloc[-1]
+
+    def test_gaps_are_dropped_from_frame(self):
+        """区间内本基金缺失的日期不出现在返回的 DataFrame 中"""
+        panel = NavPanel()
+        a = make_nav('2024-01-01', 10)
+        panel.upsert({'A': a.drop(index=[3, 4]), 'B': a})
+        hist = panel.get_fund_nav_history('A')
+        assert len(hist) == 8
+        assert not hist['nav'].isna().any()
+
+    def test_float32_halves_memory(self):
+        frames = {f'{i:06d}': make_nav('2023-01-01', 250, seed=i) for i in range(50)}
+        wide = NavPanel(dtype=np.float64)
+        narrow = NavPanel(dtype=np.float32)
+        wide.upsert(frames)
+        narrow.upsert(frames)
+        assert narrow.memory_bytes() < wide.memory_bytes() * 0.6
+        np.testing.assert_allclose(narrow.get_fund_values('000007'), wide.get_fund_values('000007'), rtol=1e-6)
+
+    def test_payload_round_trip(self):
+        panel = NavPanel()
+        panel.upsert({'A': make_nav('2024-01-01', 10)})
+        frame = NavPanel.payload_to_frame(panel.to_payload('A'))
+        pd.testing.assert_frame_equal(frame, panel.get_fund_nav_history('A'), check_dtype=False)
+
+
+class TestPreloaderPanel:
+
+    @pytest.fixture
+    def preloader(self):
+        from services.fund_data_preloader import FundDataPreloader
+        FundDataPreloader._instance = None
+        preloader = FundDataPreloader()
+        yield preloader
+        preloader.cache.clear()
+        FundDataPreloader._instance = None
+
+    def test_vectorized_metrics_match_reference(self, preloader):
+        """面板向量化计算与逐只基金计算结果一致（含缺失日期和不同起始日）"""
+        frames = {
+            'A': make_nav('2023-01-01', 300, seed=1),
+            'B': make_nav('2023-06-01', 120, seed=2).drop(index=[10, 11, 50]),
+            'C': make_nav('2023-03-01', 1, seed=3),
+        }
+        preloader.store_nav_history(frames)
+        assert preloader.recalculate_performance(chunk_size=2) == 3
+
+        for code, df in frames.items():
+            expected = reference_metrics(df.to_dict('records'))
+            actual = preloader.get_fund_performance(code)
+            assert expected.keys() <= actual.keys()
+            for key in expected:
+                assert actual[key] == pytest.approx(expected[key], abs=0.011)
+
+    def test_single_fund_metrics_compatibility(self, preloader):
+        records = make_nav('2023-01-01', 100, seed=5).to_dict('records')
+        expected = reference_metrics(records)
+        actual = preloader._calculate_metrics(records)
+        assert {key: actual[key] for key in expected} == pytest.approx(expected, abs=0.011)
+        assert {'sharpe_ratio_ytd', 'sharpe_ratio_1y', 'sharpe_ratio_all'} <= actual.keys()
+        assert preloader._calculate_metrics(records[:1]) == {}
+
+    def test_published_history_is_loaded_into_panel(self, preloader):
+        """其他进程发布的列式数据在面板缺失时被加载"""
+        df = make_nav('2024-01-01', 15)
+        preloader.store_nav_history({'000001': df}, publish=True)
+        preloader.nav_panel.clear()
+
+        hist = preloader.get_fund_nav_history('000001')
+        np.testing.assert_allclose(hist['nav'], df['nav'])
+        assert '000001' in preloader.nav_panel
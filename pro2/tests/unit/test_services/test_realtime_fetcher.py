@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+RealtimeDataFetcher 异步批量获取测试（本地 aiohttp 服务模拟天天基金/新浪接口）
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+
+class FakeQuoteServer:
+    """模拟行情接口：天天基金按代码配置延迟/失败，新浪记录每次请求的代码列表"""
+
+    def __init__(self, tiantian_delay=None, tiantian_fail=()):
+        self.tiantian_delay = tiantian_delay or {}
+        self.tiantian_fail = set(tiantian_fail)
+        self.tiantian_calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sina_requests = []
+        self.base_url = None
+
+    async def tiantian(self, request):
+        code = request.match_info['code']
+        self.tiantian_calls.append(code)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.tiantian_delay.get(code, 0))
+        finally:
+            self.in_flight -= 1
+        if code in self.tiantian_fail:
+            return web.Response(status=500)
+        today = datetime.now().strftime('%Y-%m-%d')
+        payload = {'fundcode': code, 'dwjz': '1.0000', 'gsz': '1.0100', 'gszzl': '1.00',
+                   'jzrq': today, 'gztime': f'{today} 14:30'}
+        return web.Response(text=f'jsonpgz({json.dumps(payload)});')
+
+    async def sina(self, request):
+        codes = [item[2:] for item in request.match_info['codes'].split(',')]
+        self.sina_requests.append(codes)
+        lines = [f'var hq_str_f_{code}="基金{code},1.0200,1.5,1.0000,2024-01-01,10";' for code in codes]
+        return web.Response(text='\n'.join(lines))
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/js/{code}.js', self.tiantian)
+        app.router.add_get('/list={codes}', self.sina)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://127.0.0.1:{port}'
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def make_fetcher(server, **kwargs):
+    from services.holding_realtime_service import RealtimeDataFetcher
+
+    fetcher = RealtimeDataFetcher(**kwargs)
+    fetcher.TIANTIAN_URL = server.base_url + '/js/{code}.js'
+    fetcher.SINA_URL = server.base_url + '/list={codes}'
+    # 只测试 HTTP 数据源，避免调用 SDK
+    fetcher.source_order = ('tiantian', 'sina')
+    return fetcher
+
+
+def run_with_server(coro_factory, **server_kwargs):
+    async def main():
+        async with FakeQuoteServer(**server_kwargs) as server:
+            return server, await coro_factory(server)
+    return asyncio.run(main())
+
+
+class TestAsyncRealtimeFetcher:
+
+    def test_primary_source_answers(self):
+        """天天基金正常返回时不触发备用数据源"""
+        codes = [f'{i:06d}' for i in range(20)]
+        server, results = run_with_server(
+            lambda s: make_fetcher(s).get_batch_realtime_async(codes)
+        )
+
+        assert set(results) == set(codes)
+        assert all(r['source'] == 'tiantian' and r['today_return'] == 1.0 for r in results.values())
+        assert server.sina_requests == []
+
+    def test_slow_primary_is_hedged(self):
+        """天天基金超过对冲延迟未返回时，新浪的结果先胜出"""
+        server, (results, elapsed) = run_with_server(
+            lambda s: self._timed(make_fetcher(s, hedge_delay_ms=50).get_batch_realtime_async(['000001'])),
+            tiantian_delay={'000001': 1.0}
+        )
+
+        assert results['000001']['source'] == 'sina'
+        assert results['000001']['today_return'] == 2.0
+        assert elapsed < 0.8
+
+    def test_failures_fall_through_in_one_sina_batch(self):
+        """天天基金失败的多只基金合并为一次新浪请求"""
+        codes = [f'{i:06d}' for i in range(30)]
+        failing = codes[::2]
+        server, results = run_with_server(
+            lambda s: make_fetcher(s).get_batch_realtime_async(codes),
+            tiantian_fail=failing
+        )
+
+        assert all(results[code]['source'] == 'sina' for code in failing)
+        assert len(server.sina_requests) == 1
+        assert sorted(server.sina_requests[0]) == sorted(failing)
+
+    def test_sina_batch_size_is_respected(self):
+        """新浪合并请求按 SINA_BATCH_SIZE 分批"""
+        codes = [f'{i:06d}' for i in range(12)]
+
+        async def fetch(server):
+            fetcher = make_fetcher(server)
+            fetcher.SINA_BATCH_SIZE = 5
+            return await fetcher.get_batch_realtime_async(codes)
+
+        server, results = run_with_server(fetch, tiantian_fail=codes)
+        assert sorted(len(batch) for batch in server.sina_requests) == [2, 5, 5]
+        assert all(r['source'] == 'sina' for r in results.values())
+
+    def test_all_sources_failed(self):
+        """所有数据源失败时返回 failed 占位结果"""
+        async def fetch(server):
+            fetcher = make_fetcher(server)
+            fetcher.SINA_URL = server.base_url + '/missing/{codes}'
+            return await fetcher.get_batch_realtime_async(['000001'])
+
+        _, results = run_with_server(fetch, tiantian_fail=['000001'])
+        assert results['000001'] == {'current_nav': None, 'estimate_nav': None,
+                                     'today_return': 0.0, 'source': 'failed'}
+
+    def test_per_source_concurrency_limit(self):
+        """天天基金并发请求数不超过配置的上限"""
+        codes = [f'{i:06d}' for i in range(12)]
+        server, results = run_with_server(
+            lambda s: make_fetcher(s, source_concurrency={'tiantian': 3}, hedge_delay_ms=5000)
+            .get_batch_realtime_async(codes),
+            tiantian_delay={code: 0.05 for code in codes}
+        )
+
+        assert len(results) == 12
+        assert server.max_in_flight == 3
+
+    def test_queued_requests_are_not_hedged(self):
+        """对冲计时从拿到并发许可开始，仅在排队的请求不会对冲到新浪"""
+        codes = [f'{i:06d}' for i in range(6)]
+        server, results = run_with_server(
+            lambda s: make_fetcher(s, source_concurrency={'tiantian': 1}, hedge_delay_ms=150)
+            .get_batch_realtime_async(codes),
+            tiantian_delay={code: 0.05 for code in codes}
+        )
+
+        assert all(r['source'] == 'tiantian' for r in results.values())
+        assert server.sina_requests == []
+
+    def test_quota_sources_only_used_after_failures(self):
+        """Tushare 不参与对冲：天天基金慢但成功时不请求，失败后才请求"""
+        tushare_calls = []
+
+        async def fetch(server):
+            fetcher = make_fetcher(server, hedge_delay_ms=20)
+            fetcher.source_order = ('tiantian', 'tushare')
+            fetcher._from_tushare = lambda code: tushare_calls.append(code) or {
+                'current_nav': 1.0, 'estimate_nav': 1.0, 'today_return': 0.5, 'source': 'tushare'}
+            return await fetcher.get_batch_realtime_async(['000001', '000002'])
+
+        _, results = run_with_server(fetch, tiantian_delay={'000001': 0.2}, tiantian_fail=['000002'])
+        assert results['000001']['source'] == 'tiantian'
+        assert results['000002']['source'] == 'tushare'
+        assert tushare_calls == ['000002']
+
+    def test_hung_sdk_source_does_not_block_batch(self):
+        """SDK 调用卡住时按超时放弃，同步入口不会等待卡住的线程"""
+        async def fetch(server):
+            fetcher = make_fetcher(server, request_timeout=0.3)
+            fetcher.source_order = ('tiantian', 'eastmoney')
+            fetcher._from_eastmoney = lambda code: time.sleep(2)
+            loop = asyncio.get_running_loop()
+            start = time.monotonic()
+            results = await loop.run_in_executor(None, fetcher.get_batch_realtime, ['000001'])
+            return results, time.monotonic() - start
+
+        _, (results, elapsed) = run_with_server(fetch, tiantian_fail=['000001'])
+        assert results['000001']['source'] == 'failed'
+        assert elapsed < 1.5
+
+    def test_sync_entry_uses_async_mode_and_cache(self):
+        """同步入口在无事件循环时走异步模式，结果写入短期缓存"""
+        async def fetch(server):
+            fetcher = make_fetcher(server)
+            loop = asyncio.get_running_loop()
+            # 同步入口内部调用 asyncio.run，需要在独立线程中执行
+            results = await loop.run_in_executor(None, fetcher.get_batch_realtime, ['000001', '000002'])
+            cached = fetcher._get_from_cache('000001')
+            return results, cached
+
+        server, (results, cached) = run_with_server(fetch)
+        assert results['000002']['source'] == 'tiantian'
+        assert cached == results['000001']
+        assert len(server.tiantian_calls) == 2
+
+    @staticmethod
+    async def _timed(coro):
+        start = time.monotonic()
+        result = await coro
+        return result, time.monotonic() - start
+
+
+class TestQuoteParsing:
+
+    def test_parse_sina_multiple_codes(self):
+        from services.holding_realtime_service import RealtimeDataFetcher
+
+        text = ('var hq_str_f_000001="华夏成长,1.1000,3.2,1.0000,2024-01-01,10";\n'
+                'var hq_str_f_000002="短字段,1.0";\n'
+                'var hq_str_f_000003="测试,2.0000,2.0,2.0000,2024-01-01,10";')
+        parsed = RealtimeDataFetcher._parse_sina(text)
+
+        assert set(parsed) == {'000001', '000003'}
+        assert parsed['000001']['today_return'] == 10.0
+        assert parsed['000003']['today_return'] == 0.0
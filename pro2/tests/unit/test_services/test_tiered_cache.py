@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多级缓存（内存 → Redis → MySQL）测试
+"""
+
+import fnmatch
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+class FakeCacheDB:
+    """只实现 cache_entries 表读写的数据库管理器替身"""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = 0
+
+    def execute_sql(self, sql, params=None):
+        params = params or {}
+        statement = sql.strip().split()[0].upper()
+        if statement == 'INSERT':
+            self.rows[params['cache_key']] = (params['cache_value'], params['expires_at'])
+        elif statement == 'DELETE':
+            if 'cache_key' in params:
+                self.rows.pop(params['cache_key'], None)
+            elif 'pattern' in params:
+                glob = params['pattern'].replace('\\_', '_').replace('%', '*')
+                for key in [k for k in self.rows if fnmatch.fnmatchcase(k, glob)]:
+                    del self.rows[key]
+            elif 'now' in params:
+                for key in [k for k, (_, exp) in self.rows.items() if exp is not None and exp <= params['now']]:
+                    del self.rows[key]
+            else:
+                self.rows.clear()
+        return True
+
+    def execute_query(self, sql, params=None):
+        self.queries += 1
+        if 'COUNT(*)' in sql:
+            return pd.DataFrame({'size': [len(self.rows)]})
+        row = self.rows.get(params['cache_key'])
+        if row is None or (row[1] is not None and row[1] <= params['now']):
+            return pd.DataFrame(columns=['cache_value', 'expires_at'])
+        return pd.DataFrame({'cache_value': [row[0]], 'expires_at': [row[1]]})
+
+
+@pytest.fixture
+def tiers():
+    from services.cache.tiered_cache import (
+        CacheNamespace, MEMORY_TIER, MYSQL_TIER, MySQLCache, REDIS_TIER, RedisCache, TieredCache
+    )
+
+    redis_backend = RedisCache(fakeredis.FakeRedis())
+    db = FakeCacheDB()
+    cache = TieredCache(
+        namespaces=[
+            CacheNamespace('default', ttl=60),
+            CacheNamespace('nav', ttl=600, max_entries=100, tiers=(MEMORY_TIER, REDIS_TIER, MYSQL_TIER)),
+            CacheNamespace('local', ttl=60, max_entries=10, tiers=(MEMORY_TIER,)),
+        ],
+        redis_backend=redis_backend,
+        mysql_backend=MySQLCache(db)
+    )
+    return cache, redis_backend, db
+
+
+class TestTieredCache:
+    """读穿透 / 写穿透 / 命名空间"""
+
+    def test_write_through_all_tiers(self, tiers):
+        """写入同时落到内存、Redis 和 MySQL"""
+        cache, redis_backend, db = tiers
+        df = pd.DataFrame({'nav': [1.0, 1.01]})
+        cache.set('000001', df, namespace='nav')
+
+        pd.testing.assert_frame_equal(redis_backend.get('nav:000001'), df)
+        assert 'nav:000001' in db.rows
+        assert cache.get('000001', namespace='nav') is df
+
+    def test_read_through_backfills_upper_tiers(self, tiers):
+        """只存在于 MySQL 的数据被读取后回填 Redis 和内存"""
+        cache, redis_backend, db = tiers
+        cache.set('000001', {'nav': 1.0}, namespace='nav')
+        cache._state('nav').memory.clear()
+        redis_backend.clear()
+
+        assert cache.get('000001', namespace='nav') == {'nav': 1.0}
+        assert redis_backend.get('nav:000001') == {'nav': 1.0}
+        queries = db.queries
+        assert cache.get('000001', namespace='nav') == {'nav': 1.0}
+        assert db.queries == queries
+
+        layers = cache.get_namespace_stats('nav')['layers']
+        assert layers['memory'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+        assert layers['redis']['misses'] == 1
+        assert layers['mysql']['hits'] == 1
+
+    def test_backfill_keeps_remaining_ttl(self, tiers):
+        """回填 Redis 时沿用 MySQL 中的剩余过期时间"""
+        cache, redis_backend, _ = tiers
+        cache.set('000001', 1.0, ttl=120, namespace='nav')
+        cache._state('nav').memory.clear()
+        redis_backend.clear()
+
+        cache.get('000001', namespace='nav')
+        assert 0 < redis_backend._client.ttl('fund_search:cache:nav:000001') <= 120
+
+    def test_namespace_tiers_are_respected(self, tiers):
+        """只配置内存层的命名空间不写入 Redis/MySQL"""
+        cache, redis_backend, db = tiers
+        cache.set('k', 'v', namespace='local')
+        assert redis_backend.get('local:k') is None
+        assert not db.rows
+
+    def test_namespace_budgets_are_isolated(self, tiers):
+        """一个命名空间写满不会淘汰其他命名空间的数据"""
+        cache, _, _ = tiers
+        cache.set('keep', 'v', namespace='nav')
+        for i in range(50):
+            cache.set(f'k{i}', i, namespace='local')
+
+        assert len(cache.keys('local')) == 10
+        assert cache.get('keep', namespace='nav') == 'v'
+
+    def test_invalidate_pattern_across_tiers(self, tiers):
+        """按模式失效同时清理所有层"""
+        cache, redis_backend, db = tiers
+        view = cache.namespace('nav')
+        view.set('nav:000001:20240101', 1)
+        view.set('perf:000001:20240101', 2)
+        view.set('nav:000002:20240101', 3)
+
+        assert view.invalidate('*000001*') == 2
+        assert view.get('nav:000001:20240101') is None
+        assert view.get('nav:000002:20240101') == 3
+        assert redis_backend.get('nav:perf:000001:20240101') is None
+        assert set(db.rows) == {'nav:nav:000002:20240101'}
+
+    def test_get_or_load(self, tiers):
+        """未命中时加载并缓存，命中后不再调用加载函数"""
+        cache, _, _ = tiers
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return {'value': 42}
+
+        view = cache.namespace('nav')
+        assert view.get_or_load('x', loader) == {'value': 42}
+        assert view.get_or_load('x', loader) == {'value': 42}
+        assert len(calls) == 1
+
+    def test_remote_failure_degrades_to_memory(self):
+        """Redis 不可用时按未命中处理，内存层照常工作"""
+        from services.cache.tiered_cache import RedisCache, TieredCache
+
+        class BrokenRedis:
+            def __getattr__(self, name):
+                raise ConnectionError('redis down')
+
+        cache = TieredCache(redis_backend=RedisCache(BrokenRedis()))
+        assert cache.set('k', 'v', namespace='nav')
+        assert cache.get('k', namespace='nav') == 'v'
+        assert cache.get('missing', namespace='nav') is None
+
+    def test_mysql_expired_entries_are_ignored(self):
+        """MySQL 中过期的条目视为未命中"""
+        from services.cache.tiered_cache import MySQLCache
+
+        db = FakeCacheDB()
+        backend = MySQLCache(db)
+        backend.set('k', 'v', ttl=60)
+        db.rows['k'] = (db.rows['k'][0], datetime(2000, 1, 1))
+        assert backend.get('k') is None
+
+    def test_stats_are_comparable_across_layers(self, tiers):
+        """全局统计按层汇总各命名空间的命中情况"""
+        cache, _, _ = tiers
+        cache.set('a', 1, namespace='nav')
+        cache.get('a', namespace='nav')
+        cache.get('b', namespace='local')
+
+        stats = cache.get_stats()
+        assert stats['layers']['memory'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+        assert stats['backends'] == ['mysql', 'redis']
+        assert set(stats['namespaces']) == {'default', 'nav', 'local'}
+
+
+class TestCacheConsolidation:
+    """现有缓存共享同一多级缓存"""
+
+    def test_existing_caches_share_tiered_memory(self):
+        from services.cache.tiered_cache import get_tiered_cache
+        from services.cache.persistent_cache import FundDataCache as PersistentFundDataCache
+        from services.fund_nav_cache_manager import FundNavCacheManager
+
+        tiered = get_tiered_cache()
+        PersistentFundDataCache().save_cached_data('000001', 'current_nav', 1.23)
+        assert any(key.startswith('000001:current_nav:') for key in tiered.keys('fund_data'))
+
+        manager = FundNavCacheManager()
+        manager.set_to_memory('yesterday:000001:20240101', {'yesterday_nav': 1.0})
+        assert manager.get_from_memory('yesterday:000001:20240101') == {'yesterday_nav': 1.0}
+        assert 'yesterday:000001:20240101' in tiered.keys('nav')
+
+        manager.invalidate_memory_cache('000001')
+        assert manager.get_from_memory('yesterday:000001:20240101') is None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+投资策略规则测试：批量接口与单条接口、原分支逻辑的一致性
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from fund_search.strategies.rules import InvestmentStrategyRules, StrategyArrays
+
+
+def reference_case(today, prev):
+    """原 16 分支判断逻辑，返回情况编号"""
+    with np.errstate(invalid='ignore'):
+        return _reference_case(today, prev)
+
+
+def _reference_case(today, prev):
+    diff = today - prev
+    if today > 0 and prev > 0:
+        if diff > 1:
+            return 1
+        elif 0 < diff <= 1:
+            return 2
+        elif -1 <= diff <= 0:
+            return 3
+        return 4
+    elif today > 0 and prev <= 0:
+        return 5
+    elif today == 0 and prev > 0:
+        return 6
+    elif today < 0 and prev > 0:
+        return 7
+    elif today == 0 and prev <= 0:
+        return 8
+    elif today < 0 and prev == 0:
+        if today <= -2:
+            return 9
+        elif -2 < today <= -0.5:
+            return 10
+        return 11
+    elif today < 0 and prev < 0:
+        if diff > 1 and today <= -2:
+            return 12
+        elif diff > 1 and today > -2:
+            return 13
+        elif prev - today > 0 and prev <= -2:
+            return 14
+        elif prev - today > 0 and prev > -2:
+            return 15
+        return 16
+    return 0
+
+
+# 各分支的边界值
+BOUNDARIES = [-3.0, -2.5, -2.0, -1.99, -1.0, -0.5, -0.49, -0.1, 0.0, 0.1, 0.5, 1.0, 1.01, 2.0, 3.5,
+              np.nan, np.inf, -np.inf]
+
+
+@pytest.fixture(scope='module')
+def return_pairs():
+    rng = np.random.default_rng(2024)
+    grid = np.array(list(itertools.product(BOUNDARIES, repeat=2)))
+    continuous = rng.normal(0, 1.5, (20000, 2))
+    rounded = rng.integers(-8, 9, (5000, 2)) / 4.0
+    pairs = np.vstack([grid, continuous, rounded])
+    return pairs[:, 0], pairs[:, 1]
+
+
+class TestInvestmentStrategyRules:
+
+    def test_scalar_matches_reference(self, return_pairs):
+        for today, prev in zip(*return_pairs):
+            assert InvestmentStrategyRules.classify(today, prev) == reference_case(today, prev), (today, prev)
+
+    def test_arrays_match_scalar(self, return_pairs):
+        today, prev = return_pairs
+        arrays = InvestmentStrategyRules.get_investment_strategy_arrays(today, prev)
+        assert isinstance(arrays, StrategyArrays)
+
+        for i in range(0, len(today), 7):
+            result = InvestmentStrategyRules.get_investment_strategy(today[i], prev[i])
+            assert arrays.case_ids[i] == reference_case(today[i], prev[i])
+            assert InvestmentStrategyRules.STATUS_LABELS[arrays.label_indices[i]] == result.status_label
+            assert arrays.buy_multipliers[i] == result.buy_multiplier
+            assert arrays.redeem_amounts[i] == result.redeem_amount
+            assert arrays.is_buy[i] == result.is_buy
+            np.testing.assert_equal(arrays.comparison_values[i], result.comparison_value)
+
+    def test_infinite_inputs_do_not_warn(self):
+        today = np.array([np.inf, -np.inf, np.inf, 1.0])
+        prev = np.array([np.inf, -np.inf, -np.inf, np.nan])
+        with np.errstate(all='raise'):
+            arrays = InvestmentStrategyRules.get_investment_strategy_arrays(today, prev)
+        assert np.isnan(arrays.comparison_values[:2]).all()
+        assert arrays.comparison_values[2] == np.inf
+
+        with np.errstate(all='raise'):
+            results = [InvestmentStrategyRules.get_investment_strategy(t, p) for t, p in zip(today, prev)]
+        assert [r.status_label for r in results] == [
+            InvestmentStrategyRules.STATUS_LABELS[i] for i in arrays.label_indices]
+        assert np.isnan(results[0].comparison_value)
+
+    def test_every_case_reachable(self, return_pairs):
+        arrays = InvestmentStrategyRules.get_investment_strategy_arrays(*return_pairs)
+        assert set(arrays.case_ids.tolist()) == set(InvestmentStrategyRules.CASES)
+
+    def test_scalar_result_fields(self):
+        result = InvestmentStrategyRules.get_investment_strategy(-2.5, 0)
+        assert result.as_tuple() == ("🔴 首次大跌", True, 0, -2.5, "定投买入，不赎回", "买入0.5×定额", 0.5)
+        assert InvestmentStrategyRules.get_investment_strategy(0.5, 0.3).redeem_amount == 15
+        assert InvestmentStrategyRules.get_investment_strategy(np.nan, 1.0).status_label == "🔴 下跌"